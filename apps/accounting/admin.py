@@ -2,8 +2,10 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.utils import timezone
 from apps.accounting.models.accounting_period import AccountingPeriod, TaxDeclaration
-from apps.accounting.models.expenses import Expense
+from apps.accounting.models.expenses import Expense, ExpenseBudget
+from apps.accounting.models.ledger import LedgerDailyRollup, AccountingPeriodSnapshot
 from apps.accounting.models.landor_statement import LandlordStatement, LandlordStatementDetail
+from apps.accounting.models.statement_run import StatementRun, StatementRunItem
 
 
 
@@ -36,7 +38,7 @@ class ExpenseAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Bien concerné', {
-            'fields': ('bien',),
+            'fields': ('bien', 'residence'),
             'classes': ('collapse',)
         }),
         ('Fichiers', {
@@ -70,11 +72,23 @@ class ExpenseAdmin(admin.ModelAdmin):
     
     def mark_as_paid(self, request, queryset):
         """Action pour marquer comme payé"""
-        updated = queryset.update(statut='paye')
+        # Seules les dépenses validées sont payées: 'valide' et 'paye' sont
+        # comptabilisés de la même façon, le grand livre et les rapports
+        # ne changent pas (update() contourne leurs signaux)
+        updated = queryset.filter(statut='valide').update(statut='paye')
         self.message_user(request, f"{updated} dépense(s) marquée(s) comme payée(s).")
     mark_as_paid.short_description = "Marquer comme payé"
 
 
+@admin.register(ExpenseBudget)
+class ExpenseBudgetAdmin(admin.ModelAdmin):
+    list_display = ('periode', 'categorie', 'residence', 'montant_prevu')
+    list_filter = ('periode', 'categorie')
+    search_fields = ('periode__nom', 'residence__nom')
+    list_select_related = ('periode', 'residence')
+    autocomplete_fields = ('residence',)
+
+
 class LandlordStatementDetailInline(admin.TabularInline):
     model = LandlordStatementDetail
     extra = 0
@@ -124,14 +138,17 @@ class LandlordStatementAdmin(admin.ModelAdmin):
     actions = ['calculate_totals', 'generate_pdf', 'mark_as_sent']
     
     def calculate_totals(self, request, queryset):
-        """Action pour recalculer les totaux"""
+        """Action pour recalculer les totaux (relevés en brouillon seulement)"""
         updated = 0
-        for statement in queryset:
+        for statement in queryset.filter(statut='brouillon'):
             statement.calculate_totals()
-            statement.generate_details()
             updated += 1
+        ignores = queryset.exclude(statut='brouillon').count()
         
-        self.message_user(request, f"Totaux recalculés pour {updated} relevé(s).")
+        message = f"Totaux recalculés pour {updated} relevé(s)."
+        if ignores:
+            message += f" {ignores} relevé(s) envoyé(s) ou payé(s) conservé(s)."
+        self.message_user(request, message)
     calculate_totals.short_description = "Recalculer les totaux"
     
     def mark_as_sent(self, request, queryset):
@@ -193,7 +210,7 @@ class AccountingPeriodAdmin(admin.ModelAdmin):
     def calculate_period_totals(self, request, queryset):
         """Action pour recalculer les totaux des périodes"""
         updated = 0
-        for period in queryset:
+        for period in queryset.filter(is_closed=False):
             period.calculate_totals()
             updated += 1
         
@@ -211,6 +228,33 @@ class AccountingPeriodAdmin(admin.ModelAdmin):
     close_periods.short_description = "Clôturer les périodes"
 
 
+@admin.register(LedgerDailyRollup)
+class LedgerDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'type_flux', 'categorie', 'residence', 'montant', 'nb_operations')
+    list_filter = ('type_flux', 'categorie', 'date')
+    date_hierarchy = 'date'
+    list_select_related = ('residence',)
+
+    # Alimentés par les signaux et rebuild_ledger_rollups uniquement
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AccountingPeriodSnapshot)
+class AccountingPeriodSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('periode', 'total_revenus', 'total_depenses', 'resultat_net', 'nb_paiements', 'nb_depenses', 'created_at')
+    list_select_related = ('periode',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(TaxDeclaration)
 class TaxDeclarationAdmin(admin.ModelAdmin):
     list_display = (
@@ -266,4 +310,23 @@ class TaxDeclarationAdmin(admin.ModelAdmin):
         """Action pour marquer comme déclaré"""
         updated = queryset.update(statut='declare')
         self.message_user(request, f"{updated} déclaration(s) marquée(s) comme déclarée(s).")
-    mark_as_declared.short_description = "Marquer comme déclaré"
\ No newline at end of file
+    mark_as_declared.short_description = "Marquer comme déclaré"
+
+
+class StatementRunItemInline(admin.TabularInline):
+    model = StatementRunItem
+    extra = 0
+    fields = ('proprietaire', 'statut', 'releve', 'tentatives', 'duree_calcul', 'duree_pdf')
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(StatementRun)
+class StatementRunAdmin(admin.ModelAdmin):
+    list_display = (
+        'periode_debut', 'periode_fin', 'statut', 'lance_par',
+        'date_debut_traitement', 'date_fin_traitement'
+    )
+    list_filter = ('statut',)
+    readonly_fields = ('created_at', 'updated_at', 'date_debut_traitement', 'date_fin_traitement')
+    inlines = [StatementRunItemInline]
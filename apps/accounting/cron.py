@@ -0,0 +1,18 @@
+# apps/accounting/cron.py
+from django_cron import CronJobBase, Schedule
+
+
+class GenerateLandlordStatementsCronJob(CronJobBase):
+    RUN_AT_TIMES = ['03:00']
+
+    schedule = Schedule(run_at_times=RUN_AT_TIMES)
+    code = 'accounting.generate_landlord_statements'
+
+    def do(self):
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        # Relevés du mois précédent, générés le 1er du mois (reprise les jours
+        # suivants si le lot n'a pas abouti)
+        if timezone.now().day <= 3:
+            call_command('generate_landlord_statements')
@@ -1 +1,48 @@
- 
+# apps/accounting/filters.py
+"""
+Filtres des écrans comptables (django-filter)
+"""
+
+import django_filters
+
+from apps.accounting.models import AccountingPeriod, Expense
+from apps.properties.models.residence import Residence
+
+
+class ExpenseFilter(django_filters.FilterSet):
+    """
+    Filtre des dépenses pour l'analyse et l'export
+
+    Une période comptable fixe la plage de dates; à défaut, date_debut et
+    date_fin s'appliquent.
+    """
+
+    periode = django_filters.ModelChoiceFilter(
+        queryset=AccountingPeriod.objects.all(),
+        method='filtrer_periode',
+        label="Période comptable"
+    )
+    date_debut = django_filters.DateFilter(field_name='date_expense', lookup_expr='gte', label="Du")
+    date_fin = django_filters.DateFilter(field_name='date_expense', lookup_expr='lte', label="Au")
+    categorie = django_filters.ChoiceFilter(choices=Expense.CATEGORIE_CHOICES, label="Catégorie")
+    residence = django_filters.ModelChoiceFilter(
+        queryset=Residence.objects.only('id', 'nom').order_by('nom'),
+        label="Résidence"
+    )
+    fournisseur = django_filters.CharFilter(lookup_expr='icontains', label="Fournisseur")
+    is_deductible = django_filters.BooleanFilter(label="Déductible")
+
+    class Meta:
+        model = Expense
+        fields = ['periode', 'date_debut', 'date_fin', 'categorie', 'residence', 'fournisseur', 'is_deductible']
+
+    def filtrer_periode(self, queryset, name, value):
+        return queryset.filter(date_expense__range=[value.date_debut, value.date_fin])
+
+    def plage(self):
+        """Plage de dates retenue (date_debut, date_fin), None si ouverte"""
+        donnees = self.form.cleaned_data if self.form.is_valid() else {}
+        periode = donnees.get('periode')
+        if periode:
+            return periode.date_debut, periode.date_fin
+        return donnees.get('date_debut'), donnees.get('date_fin')
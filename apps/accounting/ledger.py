@@ -0,0 +1,251 @@
+# apps/accounting/ledger.py
+"""
+Grand livre incrémental: cumuls journaliers des revenus et dépenses
+
+Chaque paiement validé (Payment) et chaque dépense validée ou payée
+(Expense) contribue à un cumul (date, type de flux, catégorie, résidence). La
+contribution est ajoutée ou retirée par un UPDATE ... SET montant = montant
++ x dans la transaction qui modifie le paiement ou la dépense (signaux de
+apps.accounting.signals). Les totaux d'une période sont ensuite une somme
+sur quelques centaines de cumuls au lieu d'un parcours de tous les paiements.
+
+Les écritures en masse (bulk_create, QuerySet.update) ne passent pas par les
+signaux: reconstruire_cumuls() recalcule une plage de dates depuis la source.
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+# Statuts comptabilisés: une dépense payée reste une dépense validée
+STATUTS_PAIEMENT_COMPTABILISES = ['valide']
+STATUTS_DEPENSE_COMPTABILISES = ['valide', 'paye']
+
+Mouvement = namedtuple('Mouvement', 'date type_flux categorie residence_id montant')
+
+
+# ============================================================================
+# CONTRIBUTIONS
+# ============================================================================
+
+def mouvement_paiement(statut, montant, date_paiement, type_facture, residence_id):
+    """Contribution d'un paiement au grand livre (None s'il n'est pas comptabilisé)"""
+    if statut not in STATUTS_PAIEMENT_COMPTABILISES:
+        return None
+    return Mouvement(date_paiement, 'revenu', type_facture, residence_id, montant)
+
+
+def mouvement_depense(statut, montant, date_expense, categorie, residence_id):
+    """Contribution d'une dépense au grand livre (None si elle n'est pas comptabilisée)"""
+    if statut not in STATUTS_DEPENSE_COMPTABILISES:
+        return None
+    return Mouvement(date_expense, 'depense', categorie, residence_id, montant)
+
+
+def mouvement_paiement_en_base(pk):
+    """Contribution actuelle d'un paiement, lue en une requête"""
+    from apps.payments.models.payment import Payment
+
+    ligne = Payment.objects.filter(pk=pk).values(
+        'statut', 'montant', 'date_paiement',
+        'facture__type_facture', 'facture__contrat__appartement__residence_id',
+    ).first()
+    if ligne is None:
+        return None
+    return mouvement_paiement(
+        ligne['statut'], ligne['montant'], ligne['date_paiement'],
+        ligne['facture__type_facture'], ligne['facture__contrat__appartement__residence_id'],
+    )
+
+
+def mouvement_depense_en_base(pk):
+    """Contribution actuelle d'une dépense, lue en une requête"""
+    from apps.accounting.models import Expense
+
+    ligne = Expense.objects.filter(pk=pk).values(
+        'statut', 'montant', 'date_expense', 'categorie', 'residence_id'
+    ).first()
+    if ligne is None:
+        return None
+    return mouvement_depense(
+        ligne['statut'], ligne['montant'], ligne['date_expense'],
+        ligne['categorie'], ligne['residence_id'],
+    )
+
+
+# ============================================================================
+# ÉCRITURE INCRÉMENTALE
+# ============================================================================
+
+def appliquer_mouvement(mouvement, sens=1):
+    """
+    Ajoute (sens=1) ou retire (sens=-1) un mouvement de son cumul journalier
+
+    Un UPDATE atomique; le cumul est créé s'il n'existe pas encore.
+    """
+    from apps.accounting.models import LedgerDailyRollup
+
+    if mouvement is None:
+        return
+    cle = {
+        'date': mouvement.date,
+        'type_flux': mouvement.type_flux,
+        'categorie': mouvement.categorie,
+        'residence_id': mouvement.residence_id,
+    }
+    montant = mouvement.montant * sens
+    cumuls = LedgerDailyRollup.objects.filter(**cle)
+    increments = {'montant': F('montant') + montant, 'nb_operations': F('nb_operations') + sens}
+
+    if cumuls.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            LedgerDailyRollup.objects.create(montant=montant, nb_operations=sens, **cle)
+    except IntegrityError:
+        # Créé entre-temps par une transaction concurrente
+        cumuls.update(**increments)
+
+
+def remplacer_mouvement(ancien, nouveau):
+    """Remplace la contribution d'une opération (sans effet si elle n'a pas changé)"""
+    if ancien == nouveau:
+        return
+    appliquer_mouvement(ancien, -1)
+    appliquer_mouvement(nouveau, 1)
+
+
+# ============================================================================
+# RECONSTRUCTION ET LECTURE
+# ============================================================================
+
+def _cumuls_source(date_debut=None, date_fin=None):
+    """Cumuls recalculés depuis Payment et Expense (deux requêtes groupées)"""
+    from apps.accounting.models import Expense
+    from apps.payments.models.payment import Payment
+
+    paiements = Payment.objects.filter(statut__in=STATUTS_PAIEMENT_COMPTABILISES)
+    depenses = Expense.objects.filter(statut__in=STATUTS_DEPENSE_COMPTABILISES)
+    if date_debut:
+        paiements = paiements.filter(date_paiement__gte=date_debut)
+        depenses = depenses.filter(date_expense__gte=date_debut)
+    if date_fin:
+        paiements = paiements.filter(date_paiement__lte=date_fin)
+        depenses = depenses.filter(date_expense__lte=date_fin)
+
+    for ligne in paiements.order_by().values(
+        'date_paiement', 'facture__type_facture', 'facture__contrat__appartement__residence_id'
+    ).annotate(total=Sum('montant'), nb=Count('id')):
+        yield {
+            'date': ligne['date_paiement'],
+            'type_flux': 'revenu',
+            'categorie': ligne['facture__type_facture'],
+            'residence_id': ligne['facture__contrat__appartement__residence_id'],
+            'montant': ligne['total'],
+            'nb_operations': ligne['nb'],
+        }
+
+    for ligne in depenses.order_by().values(
+        'date_expense', 'categorie', 'residence_id'
+    ).annotate(total=Sum('montant'), nb=Count('id')):
+        yield {
+            'date': ligne['date_expense'],
+            'type_flux': 'depense',
+            'categorie': ligne['categorie'],
+            'residence_id': ligne['residence_id'],
+            'montant': ligne['total'],
+            'nb_operations': ligne['nb'],
+        }
+
+
+def reconstruire_cumuls(date_debut=None, date_fin=None):
+    """
+    Recalcule les cumuls d'une plage de dates depuis les paiements et dépenses
+
+    Returns:
+        int: nombre de cumuls créés
+    """
+    from apps.accounting.models import LedgerDailyRollup
+
+    cumuls = [LedgerDailyRollup(**ligne) for ligne in _cumuls_source(date_debut, date_fin)]
+    existants = LedgerDailyRollup.objects.all()
+    if date_debut:
+        existants = existants.filter(date__gte=date_debut)
+    if date_fin:
+        existants = existants.filter(date__lte=date_fin)
+
+    with transaction.atomic():
+        existants.delete()
+        LedgerDailyRollup.objects.bulk_create(cumuls, batch_size=1000)
+    return len(cumuls)
+
+
+def cumuls_desynchronises(date_debut=None, date_fin=None):
+    """
+    Compare les cumuls enregistrés à la source
+
+    Returns:
+        list: clés (date, type_flux, categorie, residence_id) en écart
+    """
+    from apps.accounting.models import LedgerDailyRollup
+
+    attendus = {
+        (l['date'], l['type_flux'], l['categorie'], l['residence_id']): (l['montant'], l['nb_operations'])
+        for l in _cumuls_source(date_debut, date_fin)
+    }
+    enregistres = LedgerDailyRollup.objects.exclude(montant=0, nb_operations=0)
+    if date_debut:
+        enregistres = enregistres.filter(date__gte=date_debut)
+    if date_fin:
+        enregistres = enregistres.filter(date__lte=date_fin)
+    trouves = {
+        (l['date'], l['type_flux'], l['categorie'], l['residence_id']): (l['montant'], l['nb_operations'])
+        for l in enregistres.values('date', 'type_flux', 'categorie', 'residence_id', 'montant', 'nb_operations')
+    }
+    return sorted(
+        (cle for cle in set(attendus) | set(trouves) if attendus.get(cle) != trouves.get(cle)),
+        key=lambda cle: (cle[0], cle[1], cle[2], cle[3] or 0),
+    )
+
+
+def totaux_periode(date_debut, date_fin):
+    """
+    Totaux d'une plage de dates depuis les cumuls (une requête)
+
+    Returns:
+        dict: total_revenus, total_depenses, resultat_net, nb_paiements, nb_depenses
+    """
+    from apps.accounting.models import LedgerDailyRollup
+
+    zero = Decimal('0.00')
+    revenu, depense = Q(type_flux='revenu'), Q(type_flux='depense')
+    totaux = LedgerDailyRollup.objects.filter(date__range=[date_debut, date_fin]).aggregate(
+        total_revenus=Coalesce(Sum('montant', filter=revenu), zero),
+        total_depenses=Coalesce(Sum('montant', filter=depense), zero),
+        nb_paiements=Coalesce(Sum('nb_operations', filter=revenu), 0),
+        nb_depenses=Coalesce(Sum('nb_operations', filter=depense), 0),
+    )
+    totaux['resultat_net'] = totaux['total_revenus'] - totaux['total_depenses']
+    return totaux
+
+
+def repartition_periode(date_debut, date_fin, par='categorie'):
+    """
+    Montants d'une plage de dates par type de flux et catégorie (ou résidence)
+
+    Returns:
+        list: dicts type_flux, categorie|residence_id, montant, nb_operations
+    """
+    from apps.accounting.models import LedgerDailyRollup
+
+    champ = 'residence_id' if par == 'residence' else 'categorie'
+    return list(
+        LedgerDailyRollup.objects.filter(date__range=[date_debut, date_fin])
+        .order_by().values('type_flux', champ)
+        .annotate(montant=Sum('montant'), nb_operations=Sum('nb_operations'))
+        .exclude(montant=0, nb_operations=0)
+        .order_by('type_flux', '-montant')
+    )
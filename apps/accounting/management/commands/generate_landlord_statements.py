@@ -0,0 +1,119 @@
+# apps/accounting/management/commands/generate_landlord_statements.py
+"""
+Commande Django pour générer les relevés de tous les propriétaires
+Usage: python manage.py generate_landlord_statements [--month 1 --year 2025] [--workers 4]
+
+Relancer la commande sur la même période reprend le lot là où il s'est arrêté.
+"""
+
+import calendar
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.accounting.services import StatementBatchRunner
+
+
+class Command(BaseCommand):
+    help = 'Génère les relevés (et PDF) de tous les propriétaires pour un mois'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month',
+            type=int,
+            help='Mois du relevé (1-12). Par défaut: mois précédent'
+        )
+        parser.add_argument(
+            '--year',
+            type=int,
+            help='Année du relevé. Par défaut: année du mois précédent'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Nombre de propriétaires traités en parallèle (défaut: 4)'
+        )
+        parser.add_argument(
+            '--no-pdf',
+            action='store_true',
+            help='Calculer les relevés sans générer les PDF'
+        )
+        parser.add_argument(
+            '--skip-failed',
+            action='store_true',
+            help='Ne pas retenter les propriétaires en échec lors d\'une reprise'
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Afficher la progression du lot sans rien traiter'
+        )
+
+    def handle(self, *args, **options):
+        if options['month'] or options['year']:
+            if not (options['month'] and options['year']):
+                raise CommandError('--month et --year doivent être fournis ensemble')
+            if not 1 <= options['month'] <= 12:
+                raise CommandError('--month doit être compris entre 1 et 12')
+            month, year = options['month'], options['year']
+        else:
+            previous = timezone.now().date().replace(day=1) - timedelta(days=1)
+            month, year = previous.month, previous.year
+
+        periode_debut = date(year, month, 1)
+        periode_fin = date(year, month, calendar.monthrange(year, month)[1])
+
+        run = StatementBatchRunner.pour_periode(periode_debut, periode_fin)
+
+        if options['status']:
+            self.afficher_progression(run)
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\n🔄 Relevés propriétaires du {periode_debut} au {periode_fin}\n')
+        )
+
+        runner = StatementBatchRunner(
+            run,
+            max_workers=options['workers'],
+            generer_pdf=not options['no_pdf'],
+            reprendre_echecs=not options['skip_failed'],
+            log=self.stdout.write,
+        )
+        runner.executer()
+
+        run.refresh_from_db()
+        self.afficher_progression(run)
+
+    def afficher_progression(self, run):
+        progression = run.progression()
+        durees = run.items.filter(statut='succes').values_list('duree_calcul', 'duree_pdf')
+
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(self.style.SUCCESS(f'📊 {run}'))
+        self.stdout.write('=' * 60)
+        self.stdout.write(f"✅ Succès: {progression['succes']}")
+        self.stdout.write(f"❌ Échecs: {progression['echec']}")
+        if progression['ignore']:
+            self.stdout.write(f"⏭️  Déjà envoyés ou payés (conservés): {progression['ignore']}")
+        self.stdout.write(f"⏳ En attente: {progression['en_attente'] + progression['en_cours']}")
+        self.stdout.write(f"📈 Progression: {progression['pourcentage']}% ({progression['traites']}/{progression['total']})")
+
+        if durees:
+            calcul = [d[0] for d in durees if d[0] is not None]
+            pdf = [d[1] for d in durees if d[1] is not None]
+            if calcul:
+                self.stdout.write(f'⏱️  Calcul: {sum(calcul) / len(calcul):.2f}s en moyenne, max {max(calcul):.2f}s')
+            if pdf:
+                self.stdout.write(f'⏱️  PDF: {sum(pdf) / len(pdf):.2f}s en moyenne, max {max(pdf):.2f}s')
+
+        if run.date_debut_traitement and run.date_fin_traitement:
+            duree = (run.date_fin_traitement - run.date_debut_traitement).total_seconds()
+            self.stdout.write(f'🕒 Durée totale: {duree:.1f}s')
+
+        for item in run.items.filter(statut='echec').select_related('proprietaire')[:10]:
+            derniere_ligne = item.erreur.strip().splitlines()[-1] if item.erreur else ''
+            self.stdout.write(self.style.ERROR(f'  ❌ {item.proprietaire.nom_complet}: {derniere_ligne}'))
+        self.stdout.write('')
@@ -0,0 +1,55 @@
+# apps/accounting/management/commands/rebuild_ledger_rollups.py
+"""
+Commande Django pour recalculer les cumuls comptables journaliers
+Usage: python manage.py rebuild_ledger_rollups [--from 2025-01-01] [--to 2025-12-31] [--check]
+
+À lancer après un import en masse (bulk_create / update) qui contourne les signaux.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounting.ledger import cumuls_desynchronises, reconstruire_cumuls
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les cumuls comptables journaliers depuis les paiements et dépenses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='date_debut',
+            help='Première date à recalculer (AAAA-MM-JJ). Par défaut: début de l\'historique'
+        )
+        parser.add_argument(
+            '--to',
+            dest='date_fin',
+            help='Dernière date à recalculer (AAAA-MM-JJ). Par défaut: fin de l\'historique'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Lister les cumuls en écart sans rien modifier'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            date_debut = date.fromisoformat(options['date_debut']) if options['date_debut'] else None
+            date_fin = date.fromisoformat(options['date_fin']) if options['date_fin'] else None
+        except ValueError:
+            raise CommandError('Les dates doivent être au format AAAA-MM-JJ')
+
+        if options['check']:
+            ecarts = cumuls_desynchronises(date_debut, date_fin)
+            if not ecarts:
+                self.stdout.write(self.style.SUCCESS('✅ Cumuls à jour'))
+                return
+            for jour, type_flux, categorie, residence_id in ecarts:
+                self.stdout.write(f'  ⚠️ {jour} {type_flux} {categorie} résidence={residence_id or "-"}')
+            self.stdout.write(self.style.WARNING(f'⚠️ {len(ecarts)} cumul(s) en écart'))
+            return
+
+        self.stdout.write('🔄 Recalcul des cumuls comptables...')
+        nb_cumuls = reconstruire_cumuls(date_debut, date_fin)
+        self.stdout.write(self.style.SUCCESS(f'✅ {nb_cumuls} cumul(s) recalculé(s)'))
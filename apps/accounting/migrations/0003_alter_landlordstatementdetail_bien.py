@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0004_alter_residence_proprietaire"),
+        ("accounting", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="landlordstatementdetail",
+            name="bien",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="lignes_releves",
+                to="properties.appartement",
+                verbose_name="Bien",
+            ),
+        ),
+    ]
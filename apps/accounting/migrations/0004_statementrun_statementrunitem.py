@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiers', '0004_alter_tiers_type_tiers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounting', '0003_alter_landlordstatementdetail_bien'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatementRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('periode_debut', models.DateField(verbose_name='Début de période')),
+                ('periode_fin', models.DateField(verbose_name='Fin de période')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('termine_erreurs', 'Terminé avec erreurs')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('date_debut_traitement', models.DateTimeField(blank=True, null=True, verbose_name='Début du traitement')),
+                ('date_fin_traitement', models.DateTimeField(blank=True, null=True, verbose_name='Fin du traitement')),
+                ('lance_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lots_releves', to=settings.AUTH_USER_MODEL, verbose_name='Lancé par')),
+            ],
+            options={
+                'verbose_name': 'Lot de relevés propriétaires',
+                'verbose_name_plural': 'Lots de relevés propriétaires',
+                'ordering': ['-periode_fin', '-created_at'],
+                'unique_together': {('periode_debut', 'periode_fin')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StatementRunItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('succes', 'Succès'), ('echec', 'Échec')], default='en_attente', max_length=15, verbose_name='Statut')),
+                ('tentatives', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('date_debut_traitement', models.DateTimeField(blank=True, null=True, verbose_name='Début du traitement')),
+                ('duree_calcul', models.FloatField(blank=True, null=True, verbose_name='Durée du calcul (s)')),
+                ('duree_pdf', models.FloatField(blank=True, null=True, verbose_name='Durée du PDF (s)')),
+                ('erreur', models.TextField(blank=True, verbose_name='Erreur')),
+                ('proprietaire', models.ForeignKey(limit_choices_to={'type_tiers': 'proprietaire'}, on_delete=django.db.models.deletion.CASCADE, related_name='lots_releves', to='tiers.tiers', verbose_name='Propriétaire')),
+                ('releve', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lots', to='accounting.landlordstatement', verbose_name='Relevé')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='accounting.statementrun', verbose_name='Lot')),
+            ],
+            options={
+                'verbose_name': 'Relevé du lot',
+                'verbose_name_plural': 'Relevés du lot',
+                'ordering': ['run', 'proprietaire__nom'],
+                'indexes': [models.Index(fields=['run', 'statut'], name='accounting__run_id_77eeae_idx')],
+                'unique_together': {('run', 'proprietaire')},
+            },
+        ),
+    ]
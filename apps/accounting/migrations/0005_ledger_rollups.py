@@ -0,0 +1,102 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:57
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def initialiser_cumuls(apps, schema_editor):
+    """Construit les cumuls journaliers depuis les paiements et dépenses validés"""
+    Payment = apps.get_model('payments', 'Payment')
+    Expense = apps.get_model('accounting', 'Expense')
+    LedgerDailyRollup = apps.get_model('accounting', 'LedgerDailyRollup')
+
+    cumuls = [
+        LedgerDailyRollup(
+            date=ligne['date_paiement'], type_flux='revenu',
+            categorie=ligne['facture__type_facture'],
+            residence_id=ligne['facture__contrat__appartement__residence_id'],
+            montant=ligne['total'], nb_operations=ligne['nb'],
+        )
+        for ligne in Payment.objects.filter(statut='valide').order_by().values(
+            'date_paiement', 'facture__type_facture', 'facture__contrat__appartement__residence_id'
+        ).annotate(total=Sum('montant'), nb=Count('id'))
+    ]
+    cumuls += [
+        LedgerDailyRollup(
+            date=ligne['date_expense'], type_flux='depense', categorie=ligne['categorie'],
+            residence_id=None, montant=ligne['total'], nb_operations=ligne['nb'],
+        )
+        for ligne in Expense.objects.filter(statut__in=['valide', 'paye']).order_by().values(
+            'date_expense', 'categorie'
+        ).annotate(total=Sum('montant'), nb=Count('id'))
+    ]
+    LedgerDailyRollup.objects.bulk_create(cumuls, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_occupationperiode'),
+        ('accounting', '0004_statementrun_statementrunitem'),
+        ('payments', '0005_alter_invoice_date_reception'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='residence',
+            field=models.ForeignKey(blank=True, help_text='Utilisée pour la répartition des dépenses par résidence', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='depenses', to='properties.residence', verbose_name='Résidence concernée'),
+        ),
+        migrations.CreateModel(
+            name='AccountingPeriodSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('total_revenus', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Total revenus')),
+                ('total_depenses', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Total dépenses')),
+                ('resultat_net', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Résultat net')),
+                ('nb_paiements', models.IntegerField(default=0, verbose_name='Nombre de paiements')),
+                ('nb_depenses', models.IntegerField(default=0, verbose_name='Nombre de dépenses')),
+                ('par_categorie', models.JSONField(default=list, verbose_name='Répartition par catégorie')),
+                ('par_residence', models.JSONField(default=list, verbose_name='Répartition par résidence')),
+                ('periode', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='accounting.accountingperiod', verbose_name='Période comptable')),
+            ],
+            options={
+                'verbose_name': 'Clôture de période comptable',
+                'verbose_name_plural': 'Clôtures de périodes comptables',
+                'ordering': ['-periode__date_debut'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('type_flux', models.CharField(choices=[('revenu', 'Revenu'), ('depense', 'Dépense')], max_length=10, verbose_name='Type de flux')),
+                ('categorie', models.CharField(max_length=30, verbose_name='Catégorie')),
+                ('montant', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Montant')),
+                ('nb_operations', models.IntegerField(default=0, verbose_name="Nombre d'opérations")),
+                ('residence', models.ForeignKey(blank=True, help_text='Vide pour les flux non rattachés à une résidence', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cumuls_comptables', to='properties.residence', verbose_name='Résidence')),
+            ],
+            options={
+                'verbose_name': 'Cumul comptable journalier',
+                'verbose_name_plural': 'Cumuls comptables journaliers',
+                'ordering': ['-date', 'type_flux', 'categorie'],
+                'indexes': [models.Index(fields=['type_flux', 'date'], name='accounting__type_fl_cd4bf9_idx'), models.Index(fields=['residence', 'date'], name='accounting__residen_23f963_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerdailyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('residence__isnull', False)), fields=('date', 'type_flux', 'categorie', 'residence'), name='cumul_journalier_unique_residence'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerdailyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('residence__isnull', True)), fields=('date', 'type_flux', 'categorie'), name='cumul_journalier_unique_general'),
+        ),
+        migrations.RunPython(initialiser_cumuls, migrations.RunPython.noop),
+    ]
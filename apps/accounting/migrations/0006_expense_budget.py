@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:01
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_occupationperiode'),
+        ('accounting', '0005_ledger_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseBudget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('categorie', models.CharField(choices=[('maintenance', 'Maintenance'), ('reparation', 'Réparation'), ('amenagement', 'Aménagement'), ('marketing', 'Marketing'), ('assurance', 'Assurance'), ('taxes', 'Taxes et impôts'), ('fournitures', 'Fournitures'), ('transport', 'Transport'), ('communication', 'Communication'), ('salaires', 'Salaires'), ('autres', 'Autres')], max_length=30, verbose_name='Catégorie')),
+                ('montant_prevu', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Montant prévu')),
+                ('notes', models.TextField(blank=True, verbose_name='Notes')),
+            ],
+            options={
+                'verbose_name': 'Budget de dépenses',
+                'verbose_name_plural': 'Budgets de dépenses',
+                'ordering': ['periode', 'categorie'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['statut', 'date_expense'], name='accounting__statut_643bba_idx'),
+        ),
+        migrations.AddField(
+            model_name='expensebudget',
+            name='periode',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets_depenses', to='accounting.accountingperiod', verbose_name='Période comptable'),
+        ),
+        migrations.AddField(
+            model_name='expensebudget',
+            name='residence',
+            field=models.ForeignKey(blank=True, help_text='Laisser vide pour un budget global de la catégorie', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='budgets_depenses', to='properties.residence', verbose_name='Résidence'),
+        ),
+        migrations.AddConstraint(
+            model_name='expensebudget',
+            constraint=models.UniqueConstraint(condition=models.Q(('residence__isnull', False)), fields=('periode', 'categorie', 'residence'), name='budget_depense_unique_residence'),
+        ),
+        migrations.AddConstraint(
+            model_name='expensebudget',
+            constraint=models.UniqueConstraint(condition=models.Q(('residence__isnull', True)), fields=('periode', 'categorie'), name='budget_depense_unique_global'),
+        ),
+    ]
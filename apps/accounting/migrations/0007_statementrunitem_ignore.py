@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0006_expense_budget'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='statementrunitem',
+            name='statut',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('succes', 'Succès'), ('echec', 'Échec'), ('ignore', 'Ignoré (déjà envoyé)')], default='en_attente', max_length=15, verbose_name='Statut'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_occupationperiode'),
+        ('accounting', '0007_statementrunitem_ignore'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerdailyrollup',
+            name='residence',
+            field=models.ForeignKey(blank=True, help_text='Vide pour les flux non rattachés à une résidence', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='cumuls_comptables', to='properties.residence', verbose_name='Résidence'),
+        ),
+    ]
@@ -8,13 +8,20 @@ Les imports depuis l'ancien emplacement continuent de fonctionner:
 """
 
 from .accounting_period import AccountingPeriod, TaxDeclaration
-from .expenses import Expense
+from .expenses import Expense, ExpenseBudget
+from .ledger import LedgerDailyRollup, AccountingPeriodSnapshot
 from .landor_statement import LandlordStatement, LandlordStatementDetail
+from .statement_run import StatementRun, StatementRunItem
 
 __all__ = [
     'AccountingPeriod',
     'TaxDeclaration',
     'Expense',
+    'ExpenseBudget',
+    'LedgerDailyRollup',
+    'AccountingPeriodSnapshot',
     'LandlordStatement',
     'LandlordStatementDetail',
+    'StatementRun',
+    'StatementRunItem',
 ]
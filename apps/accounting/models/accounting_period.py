@@ -2,7 +2,6 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from decimal import Decimal
-from apps.accounting.models.expenses import Expense
 from apps.core.models import BaseModel
 
 User = get_user_model()
@@ -79,45 +78,101 @@ class AccountingPeriod(BaseModel):
         return f"{self.nom} ({self.date_debut} au {self.date_fin})"
     
     def calculate_totals(self):
-        """Calcule les totaux de la période"""
-        from django.db.models import Sum
-        from apps.payments.models.payment import Payment
-        
-        # Calculer les revenus (paiements validés)
-        self.total_revenus = Payment.objects.filter(
-            date_paiement__range=[self.date_debut, self.date_fin],
-            statut='valide'
-        ).aggregate(Sum('montant'))['montant__sum'] or Decimal('0.00')
-        
-        # Calculer les dépenses
-        self.total_depenses = Expense.objects.filter(
-            date_expense__range=[self.date_debut, self.date_fin],
-            statut='valide'
-        ).aggregate(Sum('montant'))['montant__sum'] or Decimal('0.00')
-        
-        # Calculer le résultat net
-        self.resultat_net = self.total_revenus - self.total_depenses
-        
-        self.save()
-    
+        """
+        Calcule les totaux de la période depuis les cumuls journaliers
+
+        Une période clôturée garde les totaux figés à sa clôture.
+        """
+        from apps.accounting.ledger import totaux_periode
+
+        if self.is_closed:
+            return
+
+        totaux = totaux_periode(self.date_debut, self.date_fin)
+        self.total_revenus = totaux['total_revenus']
+        self.total_depenses = totaux['total_depenses']
+        self.resultat_net = totaux['resultat_net']
+
+        self.save(update_fields=['total_revenus', 'total_depenses', 'resultat_net', 'updated_at'])
+
     def close_period(self, closed_by):
-        """Clôture la période comptable"""
+        """Clôture la période comptable et fige ses totaux dans une photographie"""
+        from django.db import transaction
         from django.utils import timezone
-        
+        from apps.accounting.ledger import repartition_periode, totaux_periode
+        from apps.accounting.models.ledger import AccountingPeriodSnapshot
+
         if self.is_closed:
             return False
-        
-        # Calculer les totaux finaux
-        self.calculate_totals()
-        
-        # Marquer comme clôturée
-        self.is_closed = True
-        self.date_cloture = timezone.now()
-        self.cloture_par = closed_by
-        self.save()
-        
+
+        def serialiser(lignes):
+            return [
+                {**ligne, 'montant': str(ligne['montant'])}
+                for ligne in lignes
+            ]
+
+        with transaction.atomic():
+            totaux = totaux_periode(self.date_debut, self.date_fin)
+            AccountingPeriodSnapshot.objects.create(
+                periode=self,
+                par_categorie=serialiser(repartition_periode(self.date_debut, self.date_fin)),
+                par_residence=serialiser(
+                    repartition_periode(self.date_debut, self.date_fin, par='residence')
+                ),
+                **totaux
+            )
+
+            self.total_revenus = totaux['total_revenus']
+            self.total_depenses = totaux['total_depenses']
+            self.resultat_net = totaux['resultat_net']
+            self.is_closed = True
+            self.date_cloture = timezone.now()
+            self.cloture_par = closed_by
+            self.save()
+
         return True
 
+    def totaux(self):
+        """
+        Totaux de la période: photographie si clôturée, cumuls sinon
+
+        Returns:
+            dict: total_revenus, total_depenses, resultat_net, nb_paiements, nb_depenses
+        """
+        from apps.accounting.ledger import totaux_periode
+
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return totaux_periode(self.date_debut, self.date_fin)
+        return {
+            'total_revenus': snapshot.total_revenus,
+            'total_depenses': snapshot.total_depenses,
+            'resultat_net': snapshot.resultat_net,
+            'nb_paiements': snapshot.nb_paiements,
+            'nb_depenses': snapshot.nb_depenses,
+        }
+
+    def repartition(self, par='categorie'):
+        """Montants par type de flux et catégorie (ou résidence) de la période"""
+        from apps.accounting.ledger import repartition_periode
+
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return repartition_periode(self.date_debut, self.date_fin, par=par)
+        lignes = snapshot.par_residence if par == 'residence' else snapshot.par_categorie
+        return [{**ligne, 'montant': Decimal(ligne['montant'])} for ligne in lignes]
+
+    def get_snapshot(self):
+        """Photographie de clôture (None pour une période ouverte)"""
+        from apps.accounting.models.ledger import AccountingPeriodSnapshot
+
+        if not self.is_closed:
+            return None
+        try:
+            return self.snapshot
+        except AccountingPeriodSnapshot.DoesNotExist:
+            return None
+
 
 class TaxDeclaration(BaseModel):
     """Modèle pour les déclarations fiscales"""
@@ -9,6 +9,20 @@ User = get_user_model()
 
 class Expense(BaseModel):
     """Modèle pour les dépenses"""
+
+    CATEGORIE_CHOICES = [
+        ('maintenance', 'Maintenance'),
+        ('reparation', 'Réparation'),
+        ('amenagement', 'Aménagement'),
+        ('marketing', 'Marketing'),
+        ('assurance', 'Assurance'),
+        ('taxes', 'Taxes et impôts'),
+        ('fournitures', 'Fournitures'),
+        ('transport', 'Transport'),
+        ('communication', 'Communication'),
+        ('salaires', 'Salaires'),
+        ('autres', 'Autres'),
+    ]
     
     numero_expense = models.CharField(
         max_length=50,
@@ -26,22 +40,20 @@ class Expense(BaseModel):
         verbose_name="Bien concerné",
         help_text="Laisser vide pour les dépenses générales"
     )
+
+    residence = models.ForeignKey(
+        'properties.Residence',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='depenses',
+        verbose_name="Résidence concernée",
+        help_text="Utilisée pour la répartition des dépenses par résidence"
+    )
     
     categorie = models.CharField(
         max_length=30,
-        choices=[
-            ('maintenance', 'Maintenance'),
-            ('reparation', 'Réparation'),
-            ('amenagement', 'Aménagement'),
-            ('marketing', 'Marketing'),
-            ('assurance', 'Assurance'),
-            ('taxes', 'Taxes et impôts'),
-            ('fournitures', 'Fournitures'),
-            ('transport', 'Transport'),
-            ('communication', 'Communication'),
-            ('salaires', 'Salaires'),
-            ('autres', 'Autres'),
-        ],
+        choices=CATEGORIE_CHOICES,
         verbose_name="Catégorie"
     )
     
@@ -162,6 +174,7 @@ class Expense(BaseModel):
             models.Index(fields=['categorie']),
             models.Index(fields=['date_expense']),
             models.Index(fields=['statut']),
+            models.Index(fields=['statut', 'date_expense']),
         ]
     
     def save(self, *args, **kwargs):
@@ -180,3 +193,62 @@ class Expense(BaseModel):
         self.valide_par = validated_by
         self.date_validation = timezone.now()
         self.save()
+
+
+class ExpenseBudget(BaseModel):
+    """Budget de dépenses d'une période comptable, par catégorie et résidence"""
+
+    periode = models.ForeignKey(
+        'accounting.AccountingPeriod',
+        on_delete=models.CASCADE,
+        related_name='budgets_depenses',
+        verbose_name="Période comptable"
+    )
+
+    categorie = models.CharField(
+        max_length=30,
+        choices=Expense.CATEGORIE_CHOICES,
+        verbose_name="Catégorie"
+    )
+
+    residence = models.ForeignKey(
+        'properties.Residence',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='budgets_depenses',
+        verbose_name="Résidence",
+        help_text="Laisser vide pour un budget global de la catégorie"
+    )
+
+    montant_prevu = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.00'))],
+        verbose_name="Montant prévu"
+    )
+
+    notes = models.TextField(
+        verbose_name="Notes",
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = "Budget de dépenses"
+        verbose_name_plural = "Budgets de dépenses"
+        ordering = ['periode', 'categorie']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['periode', 'categorie', 'residence'],
+                condition=models.Q(residence__isnull=False),
+                name='budget_depense_unique_residence',
+            ),
+            models.UniqueConstraint(
+                fields=['periode', 'categorie'],
+                condition=models.Q(residence__isnull=True),
+                name='budget_depense_unique_global',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.periode.nom} - {self.get_categorie_display()} - {self.montant_prevu} FCFA"
@@ -2,7 +2,6 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from decimal import Decimal
-from apps.accounting.models.expenses import Expense
 from apps.core.models import BaseModel
 from apps.core.utils import generate_unique_reference
 
@@ -139,96 +138,26 @@ class LandlordStatement(BaseModel):
     def __str__(self):
         return f"{self.numero_releve} - {self.proprietaire.nom_complet} ({self.periode_debut} au {self.periode_fin})"
     
+    @property
+    def est_recalculable(self):
+        """Un relevé envoyé ou payé reste tel que le propriétaire l'a reçu"""
+        return self.statut == 'brouillon'
+
     def calculate_totals(self):
-        """Calcule les totaux du relevé"""
-        from django.db.models import Sum
-        from apps.payments.models.payment import Payment
-        from apps.contracts.models import RentalContract
-        
-        # Récupérer tous les biens du bailleur
-        biens = self.bailleur.biens.all()
-        self.nb_biens_concernes = biens.count()
-        
-        # Calculer le total encaissé
-        total_encaisse = Payment.objects.filter(
-            facture__contrat__bien__in=biens,
-            facture__contrat__bien__bailleur=self.bailleur,
-            date_paiement__range=[self.periode_debut, self.periode_fin],
-            statut='valide'
-        ).aggregate(Sum('montant'))['montant__sum'] or Decimal('0.00')
-        
-        self.total_encaisse = total_encaisse
-        
-        # Calculer les dépenses liées aux biens du bailleur
-        total_depenses = Expense.objects.filter(
-            bien__in=biens,
-            date_expense__range=[self.periode_debut, self.periode_fin],
-            statut='valide'
-        ).aggregate(Sum('montant'))['montant__sum'] or Decimal('0.00')
-        
-        self.total_depenses = total_depenses
-        
-        # Calculer la commission (exemple: 10%)
-        taux_commission = self.bailleur.taux_commission or Decimal('10.00')
-        self.commission_agence = (self.total_encaisse * taux_commission) / 100
-        
-        # Calculer le montant à verser
-        self.montant_a_verser = self.total_encaisse - self.commission_agence - self.total_depenses
-        
-        self.save()
-    
+        """
+        Calcule les totaux et les détails du relevé
+
+        Délègue au moteur groupé (apps.accounting.services): une requête
+        groupée pour toutes les lignes, puis bulk_create des détails.
+        """
+        from apps.accounting.services import LandlordStatementEngine
+
+        engine = LandlordStatementEngine(self.periode_debut, self.periode_fin)
+        return engine.generer(self.proprietaire, releve=self)
+
     def generate_details(self):
-        """Génère les détails du relevé"""
-        from apps.payments.models.payment import Payment
-        from apps.contracts.models import RentalContract
-        
-        # Supprimer les anciens détails
-        self.details.all().delete()
-        
-        # Créer les détails pour chaque bien
-        for bien in self.bailleur.biens.all():
-            contrats = RentalContract.objects.filter(
-                bien=bien,
-                date_debut__lte=self.periode_fin,
-                date_fin__gte=self.periode_debut
-            )
-            
-            for contrat in contrats:
-                # Calculer les paiements pour ce contrat
-                paiements = Payment.objects.filter(
-                    facture__contrat=contrat,
-                    date_paiement__range=[self.periode_debut, self.periode_fin],
-                    statut='valide'
-                )
-                
-                if paiements.exists():
-                    montant_loyer = sum(p.montant for p in paiements if p.facture.type_facture == 'loyer')
-                    montant_charges = sum(p.montant for p in paiements if p.facture.type_facture == 'charges')
-                    
-                    # Calculer les dépenses pour ce bien
-                    depenses_bien = Expense.objects.filter(
-                        bien=bien,
-                        date_expense__range=[self.periode_debut, self.periode_fin],
-                        statut='valide'
-                    ).aggregate(sum('montant'))['montant__sum'] or Decimal('0.00')
-                    
-                    # Calculer la commission
-                    total_bien = montant_loyer + montant_charges
-                    taux_commission = self.bailleur.taux_commission or Decimal('10.00')
-                    commission_bien = (total_bien * taux_commission) / 100
-                    
-                    # Créer le détail
-                    LandlordStatementDetail.objects.create(
-                        releve=self,
-                        bien=bien,
-                        contrat=contrat,
-                        montant_loyer=montant_loyer,
-                        montant_charges=montant_charges,
-                        total_depenses=depenses_bien,
-                        commission_pourcentage=taux_commission,
-                        commission_montant=commission_bien,
-                        net_bailleur=total_bien - commission_bien - depenses_bien
-                    )
+        """Génère les détails du relevé (recalcule aussi les totaux)"""
+        return self.calculate_totals()
 
 
 class LandlordStatementDetail(BaseModel):
@@ -242,8 +171,9 @@ class LandlordStatementDetail(BaseModel):
     )
     
     bien = models.ForeignKey(
-        'properties.Property',
+        'properties.Appartement',
         on_delete=models.CASCADE,
+        related_name='lignes_releves',
         verbose_name="Bien"
     )
     
@@ -0,0 +1,151 @@
+from django.db import models
+from decimal import Decimal
+from apps.core.models import BaseModel
+
+
+class LedgerDailyRollup(BaseModel):
+    """
+    Cumul journalier des revenus et dépenses par catégorie et par résidence
+
+    Alimenté de façon incrémentale à la validation (ou l'annulation) d'un
+    paiement ou d'une dépense, voir apps.accounting.ledger. Les totaux d'une
+    période comptable sont la somme de ces cumuls.
+    """
+
+    TYPE_FLUX_CHOICES = [
+        ('revenu', 'Revenu'),
+        ('depense', 'Dépense'),
+    ]
+
+    date = models.DateField(
+        verbose_name="Date"
+    )
+
+    type_flux = models.CharField(
+        max_length=10,
+        choices=TYPE_FLUX_CHOICES,
+        verbose_name="Type de flux"
+    )
+
+    # Type de facture pour les revenus, catégorie de dépense pour les dépenses
+    categorie = models.CharField(
+        max_length=30,
+        verbose_name="Catégorie"
+    )
+
+    residence = models.ForeignKey(
+        'properties.Residence',
+        # Pas de cascade: les dates sont recalculées à la suppression
+        # (apps.accounting.signals.reconstruire_cumuls_residence)
+        on_delete=models.DO_NOTHING,
+        null=True,
+        blank=True,
+        related_name='cumuls_comptables',
+        verbose_name="Résidence",
+        help_text="Vide pour les flux non rattachés à une résidence"
+    )
+
+    montant = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Montant"
+    )
+
+    nb_operations = models.IntegerField(
+        default=0,
+        verbose_name="Nombre d'opérations"
+    )
+
+    class Meta:
+        verbose_name = "Cumul comptable journalier"
+        verbose_name_plural = "Cumuls comptables journaliers"
+        ordering = ['-date', 'type_flux', 'categorie']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'type_flux', 'categorie', 'residence'],
+                condition=models.Q(residence__isnull=False),
+                name='cumul_journalier_unique_residence',
+            ),
+            models.UniqueConstraint(
+                fields=['date', 'type_flux', 'categorie'],
+                condition=models.Q(residence__isnull=True),
+                name='cumul_journalier_unique_general',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['type_flux', 'date']),
+            models.Index(fields=['residence', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.get_type_flux_display()} {self.categorie} - {self.montant} FCFA"
+
+
+class AccountingPeriodSnapshot(BaseModel):
+    """
+    Photographie figée d'une période comptable à sa clôture
+
+    Les rapports d'une période clôturée lisent cette photographie; elle
+    n'est jamais modifiée après création.
+    """
+
+    periode = models.OneToOneField(
+        'accounting.AccountingPeriod',
+        on_delete=models.CASCADE,
+        related_name='snapshot',
+        verbose_name="Période comptable"
+    )
+
+    total_revenus = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        verbose_name="Total revenus"
+    )
+
+    total_depenses = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        verbose_name="Total dépenses"
+    )
+
+    resultat_net = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        verbose_name="Résultat net"
+    )
+
+    nb_paiements = models.IntegerField(
+        default=0,
+        verbose_name="Nombre de paiements"
+    )
+
+    nb_depenses = models.IntegerField(
+        default=0,
+        verbose_name="Nombre de dépenses"
+    )
+
+    # Listes de {type_flux, categorie|residence_id, montant, nb_operations},
+    # montants sérialisés en chaînes pour conserver les décimales
+    par_categorie = models.JSONField(
+        default=list,
+        verbose_name="Répartition par catégorie"
+    )
+
+    par_residence = models.JSONField(
+        default=list,
+        verbose_name="Répartition par résidence"
+    )
+
+    class Meta:
+        verbose_name = "Clôture de période comptable"
+        verbose_name_plural = "Clôtures de périodes comptables"
+        ordering = ['-periode__date_debut']
+
+    def __str__(self):
+        return f"Clôture {self.periode.nom}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("La photographie d'une période clôturée ne peut pas être modifiée")
+        super().save(*args, **kwargs)
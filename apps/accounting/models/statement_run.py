@@ -0,0 +1,195 @@
+from datetime import timedelta
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from apps.core.models import BaseModel
+
+User = get_user_model()
+
+
+class StatementRun(BaseModel):
+    """
+    Lot de génération des relevés de tous les propriétaires pour une période
+
+    Un lot par période: relancer la génération reprend le lot existant et
+    ne traite que les propriétaires qui n'ont pas abouti.
+    """
+
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('termine_erreurs', 'Terminé avec erreurs'),
+    ]
+
+    periode_debut = models.DateField(
+        verbose_name="Début de période"
+    )
+
+    periode_fin = models.DateField(
+        verbose_name="Fin de période"
+    )
+
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        verbose_name="Statut"
+    )
+
+    date_debut_traitement = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Début du traitement"
+    )
+
+    date_fin_traitement = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Fin du traitement"
+    )
+
+    lance_par = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='lots_releves',
+        verbose_name="Lancé par"
+    )
+
+    class Meta:
+        verbose_name = "Lot de relevés propriétaires"
+        verbose_name_plural = "Lots de relevés propriétaires"
+        ordering = ['-periode_fin', '-created_at']
+        unique_together = [['periode_debut', 'periode_fin']]
+
+    def __str__(self):
+        return f"Relevés du {self.periode_debut} au {self.periode_fin} ({self.get_statut_display()})"
+
+    def est_actif(self, delai_minutes=10):
+        """
+        Indique si le lot est réellement en cours de traitement
+
+        Un lot resté « en cours » sans activité récente (processus arrêté)
+        n'est plus considéré comme actif et peut être relancé.
+        """
+        if self.statut != 'en_cours':
+            return False
+        limite = timezone.now() - timedelta(minutes=delai_minutes)
+        return self.updated_at >= limite or self.items.filter(
+            statut__in=['en_cours', 'succes', 'echec', 'ignore'],
+            date_debut_traitement__gte=limite,
+        ).exists()
+
+    def progression(self):
+        """Nombre d'éléments par statut (une seule requête)"""
+        return StatementRun.progressions([self])[self.pk]
+
+    @staticmethod
+    def progressions(runs):
+        """
+        Progression de plusieurs lots en une seule requête groupée
+
+        Returns:
+            dict: {run_id: compteurs par statut, total, traites, pourcentage}
+        """
+        resultats = {
+            run.pk: {statut: 0 for statut, _ in StatementRunItem.STATUT_CHOICES}
+            for run in runs
+        }
+        lignes = StatementRunItem.objects.filter(run__in=list(resultats)).order_by().values(
+            'run', 'statut'
+        ).annotate(nb=models.Count('id'))
+        for ligne in lignes:
+            resultats[ligne['run']][ligne['statut']] = ligne['nb']
+        for compteurs in resultats.values():
+            compteurs['total'] = sum(compteurs.values())
+            compteurs['traites'] = compteurs['succes'] + compteurs['echec'] + compteurs['ignore']
+            compteurs['pourcentage'] = (
+                round(compteurs['traites'] * 100 / compteurs['total']) if compteurs['total'] else 0
+            )
+        return resultats
+
+
+class StatementRunItem(BaseModel):
+    """Traitement d'un propriétaire dans un lot de relevés"""
+
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('succes', 'Succès'),
+        ('echec', 'Échec'),
+        ('ignore', 'Ignoré (déjà envoyé)'),
+    ]
+
+    run = models.ForeignKey(
+        StatementRun,
+        on_delete=models.CASCADE,
+        related_name='items',
+        verbose_name="Lot"
+    )
+
+    proprietaire = models.ForeignKey(
+        'tiers.Tiers',
+        on_delete=models.CASCADE,
+        related_name='lots_releves',
+        verbose_name="Propriétaire",
+        limit_choices_to={'type_tiers': 'proprietaire'}
+    )
+
+    releve = models.ForeignKey(
+        'accounting.LandlordStatement',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='lots',
+        verbose_name="Relevé"
+    )
+
+    statut = models.CharField(
+        max_length=15,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        verbose_name="Statut"
+    )
+
+    tentatives = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Tentatives"
+    )
+
+    date_debut_traitement = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Début du traitement"
+    )
+
+    duree_calcul = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Durée du calcul (s)"
+    )
+
+    duree_pdf = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Durée du PDF (s)"
+    )
+
+    erreur = models.TextField(
+        blank=True,
+        verbose_name="Erreur"
+    )
+
+    class Meta:
+        verbose_name = "Relevé du lot"
+        verbose_name_plural = "Relevés du lot"
+        ordering = ['run', 'proprietaire__nom']
+        unique_together = [['run', 'proprietaire']]
+        indexes = [
+            models.Index(fields=['run', 'statut']),
+        ]
+
+    def __str__(self):
+        return f"{self.run} - {self.proprietaire_id} ({self.get_statut_display()})"
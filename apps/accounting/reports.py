@@ -1 +1,312 @@
- 
+# apps/accounting/reports.py
+"""
+Analyse des dépenses et préparation des déclarations fiscales
+
+- ExpenseReport: répartitions par catégorie, résidence, fournisseur et mois,
+  budget prévu / réalisé, chacune en une requête groupée
+- rapport_periode(): synthèse d'une période, mise en cache une fois la
+  période clôturée (invalidée par apps.accounting.signals)
+- preparer_declarations(): bases et montants des déclarations TVA / IS
+- flux_csv(): export CSV ligne à ligne (StreamingHttpResponse)
+"""
+
+import csv
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from apps.accounting.ledger import STATUTS_DEPENSE_COMPTABILISES, STATUTS_PAIEMENT_COMPTABILISES
+from apps.accounting.models import Expense
+
+ZERO = Decimal('0.00')
+CENTIMES = Decimal('0.01')
+
+CACHE_RAPPORT = 'accounting:depenses:{pk}'
+
+LIBELLES_CATEGORIES = dict(Expense.CATEGORIE_CHOICES)
+
+
+def _montant(valeur):
+    return (valeur or ZERO).quantize(CENTIMES)
+
+
+def _taux(reel, prevu):
+    return round(reel * 100 / prevu, 1) if prevu else None
+
+
+class ExpenseReport:
+    """
+    Répartitions des dépenses comptabilisées d'une plage de dates
+
+    Usage:
+        rapport = ExpenseReport(date_debut=date(2025, 1, 1), date_fin=date(2025, 3, 31))
+        rapport.par_categorie()
+    """
+
+    def __init__(self, depenses=None, date_debut=None, date_fin=None):
+        depenses = Expense.objects.all() if depenses is None else depenses
+        depenses = depenses.filter(statut__in=STATUTS_DEPENSE_COMPTABILISES)
+        if date_debut:
+            depenses = depenses.filter(date_expense__gte=date_debut)
+        if date_fin:
+            depenses = depenses.filter(date_expense__lte=date_fin)
+        self.depenses = depenses.order_by()
+        self.date_debut = date_debut
+        self.date_fin = date_fin
+
+    def _grouper(self, *champs):
+        lignes = list(
+            self.depenses.values(*champs)
+            .annotate(montant=Sum('montant'), nb_depenses=Count('id'))
+            .order_by('-montant')
+        )
+        for ligne in lignes:
+            ligne['montant'] = _montant(ligne['montant'])
+        return lignes
+
+    def totaux(self):
+        """Montant total, montant déductible et nombre de dépenses"""
+        totaux = self.depenses.aggregate(
+            total=Coalesce(Sum('montant'), ZERO),
+            total_deductible=Coalesce(Sum('montant', filter=Q(is_deductible=True)), ZERO),
+            nb_depenses=Count('id'),
+        )
+        return {
+            'montant': _montant(totaux['total']),
+            'montant_deductible': _montant(totaux['total_deductible']),
+            'nb_depenses': totaux['nb_depenses'],
+        }
+
+    def par_categorie(self):
+        lignes = self._grouper('categorie')
+        for ligne in lignes:
+            ligne['libelle'] = LIBELLES_CATEGORIES.get(ligne['categorie'], ligne['categorie'])
+        return lignes
+
+    def par_residence(self):
+        lignes = self._grouper('residence_id', 'residence__nom')
+        for ligne in lignes:
+            ligne['libelle'] = ligne.pop('residence__nom') or 'Dépenses générales'
+        return lignes
+
+    def par_fournisseur(self, limite=None):
+        lignes = self._grouper('fournisseur')
+        for ligne in lignes:
+            ligne['libelle'] = ligne['fournisseur'] or 'Non renseigné'
+        return lignes[:limite] if limite else lignes
+
+    def par_mois(self):
+        lignes = list(
+            self.depenses.annotate(mois=TruncMonth('date_expense'))
+            .values('mois')
+            .annotate(montant=Sum('montant'), nb_depenses=Count('id'))
+            .order_by('mois')
+        )
+        for ligne in lignes:
+            ligne['montant'] = _montant(ligne['montant'])
+        return lignes
+
+    def budget_vs_reel(self, periode):
+        """
+        Budget prévu / réalisé d'une période, par catégorie et résidence
+
+        Un budget sans résidence couvre toute la catégorie. Les dépenses sans
+        budget apparaissent avec un prévu nul.
+
+        Returns:
+            list: dicts categorie, libelle, residence_id, residence, prevu, reel, ecart, taux
+        """
+        budgets = list(periode.budgets_depenses.values(
+            'categorie', 'residence_id', 'residence__nom', 'montant_prevu'
+        ))
+        reel = {
+            (ligne['categorie'], ligne['residence_id']): ligne
+            for ligne in self._grouper('categorie', 'residence_id', 'residence__nom')
+        }
+        reel_categorie = {}
+        for (categorie, _), ligne in reel.items():
+            reel_categorie[categorie] = reel_categorie.get(categorie, ZERO) + ligne['montant']
+
+        lignes = []
+        couverts = set()
+        for budget in budgets:
+            categorie, residence_id = budget['categorie'], budget['residence_id']
+            if residence_id is None:
+                montant = reel_categorie.get(categorie, ZERO)
+                couverts.update(cle for cle in reel if cle[0] == categorie)
+            else:
+                montant = reel.get((categorie, residence_id), {}).get('montant', ZERO)
+                couverts.add((categorie, residence_id))
+            lignes.append({
+                'categorie': categorie,
+                'residence_id': residence_id,
+                'residence': budget['residence__nom'],
+                'prevu': budget['montant_prevu'],
+                'reel': _montant(montant),
+            })
+
+        for cle, ligne in reel.items():
+            if cle not in couverts:
+                lignes.append({
+                    'categorie': cle[0],
+                    'residence_id': cle[1],
+                    'residence': ligne['residence__nom'],
+                    'prevu': ZERO,
+                    'reel': _montant(ligne['montant']),
+                })
+
+        for ligne in lignes:
+            ligne['libelle'] = LIBELLES_CATEGORIES.get(ligne['categorie'], ligne['categorie'])
+            ligne['ecart'] = ligne['reel'] - ligne['prevu']
+            ligne['taux'] = _taux(ligne['reel'], ligne['prevu'])
+        return sorted(lignes, key=lambda l: (l['categorie'], l['residence'] or ''))
+
+    def synthese(self, limite_fournisseurs=20):
+        """Toutes les répartitions (cinq requêtes)"""
+        return {
+            'date_debut': self.date_debut,
+            'date_fin': self.date_fin,
+            'totaux': self.totaux(),
+            'par_categorie': self.par_categorie(),
+            'par_residence': self.par_residence(),
+            'par_fournisseur': self.par_fournisseur(limite_fournisseurs),
+            'par_mois': self.par_mois(),
+        }
+
+
+def rapport_periode(periode):
+    """
+    Synthèse des dépenses d'une période comptable avec son budget
+
+    Une période clôturée ne change plus: sa synthèse est mise en cache
+    (ACCOUNTING_RAPPORT_CACHE_TTL, 24 h par défaut).
+    """
+    def calculer():
+        rapport = ExpenseReport(date_debut=periode.date_debut, date_fin=periode.date_fin)
+        return {**rapport.synthese(), 'budget': rapport.budget_vs_reel(periode)}
+
+    if not periode.is_closed:
+        return calculer()
+    return cache.get_or_set(
+        CACHE_RAPPORT.format(pk=periode.pk),
+        calculer,
+        getattr(settings, 'ACCOUNTING_RAPPORT_CACHE_TTL', 60 * 60 * 24),
+    )
+
+
+def invalider_rapport_periode(*periode_ids):
+    cache.delete_many([CACHE_RAPPORT.format(pk=pk) for pk in periode_ids])
+
+
+# ============================================================================
+# DÉCLARATIONS FISCALES
+# ============================================================================
+
+def base_fiscale(periode):
+    """
+    Bases des déclarations d'une période (deux requêtes, plus les totaux de la période)
+
+    Returns:
+        dict: revenus, depenses_deductibles, resultat_fiscal, tva_collectee
+    """
+    from apps.payments.models.payment import Payment
+
+    revenus = periode.totaux()['total_revenus']
+    depenses_deductibles = ExpenseReport(
+        Expense.objects.filter(is_deductible=True), periode.date_debut, periode.date_fin
+    ).depenses.aggregate(total=Coalesce(Sum('montant'), ZERO))['total']
+
+    # Part de TVA incluse dans les encaissements, par taux: montant × taux / (100 + taux)
+    encaissements_par_taux = Payment.objects.filter(
+        statut__in=STATUTS_PAIEMENT_COMPTABILISES,
+        date_paiement__range=[periode.date_debut, periode.date_fin],
+    ).order_by().values('facture__taux_tva').annotate(total=Sum('montant'))
+    tva_collectee = sum(
+        (
+            ligne['total'] * ligne['facture__taux_tva'] / (100 + ligne['facture__taux_tva'])
+            for ligne in encaissements_par_taux if ligne['facture__taux_tva']
+        ),
+        ZERO,
+    )
+
+    return {
+        'revenus': _montant(revenus),
+        'depenses_deductibles': _montant(depenses_deductibles),
+        'resultat_fiscal': max(_montant(revenus - depenses_deductibles), ZERO),
+        'tva_collectee': _montant(tva_collectee),
+    }
+
+
+def preparer_declarations(periode):
+    """
+    Calcule (ou recalcule) les déclarations TVA et IS d'une période
+
+    Les déclarations déjà déclarées ou payées ne sont pas modifiées. Taux
+    d'IS: ACCOUNTING_TAUX_IS (30 % par défaut); échéance: fin de période +
+    ACCOUNTING_DELAI_DECLARATION_JOURS (15 jours par défaut).
+
+    Returns:
+        tuple: (base fiscale, liste des TaxDeclaration)
+    """
+    from datetime import timedelta
+    from apps.accounting.models import TaxDeclaration
+
+    base = base_fiscale(periode)
+    taux_is = Decimal(str(getattr(settings, 'ACCOUNTING_TAUX_IS', 30)))
+    echeance = periode.date_fin + timedelta(days=getattr(settings, 'ACCOUNTING_DELAI_DECLARATION_JOURS', 15))
+    montants = {
+        'tva': base['tva_collectee'],
+        'impot_societe': _montant(base['resultat_fiscal'] * taux_is / 100),
+    }
+
+    existantes = {d.type_declaration: d for d in periode.declarations_fiscales.all()}
+    declarations = []
+    for type_declaration, montant in montants.items():
+        declaration = existantes.get(type_declaration)
+        if declaration is None:
+            declaration = TaxDeclaration.objects.create(
+                periode=periode, type_declaration=type_declaration,
+                montant_du=montant, date_echeance=echeance,
+            )
+        elif declaration.statut == 'calcule':
+            declaration.montant_du = montant
+            declaration.date_echeance = echeance
+            declaration.save(update_fields=['montant_du', 'date_echeance', 'updated_at'])
+        declarations.append(declaration)
+    return base, declarations
+
+
+# ============================================================================
+# EXPORT CSV
+# ============================================================================
+
+class _Tampon:
+    """Pseudo-fichier: csv.writer renvoie la ligne écrite au lieu de la stocker"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def flux_csv(entetes, lignes):
+    """Générateur de lignes CSV (séparateur « ; », BOM pour Excel)"""
+    writer = csv.writer(_Tampon(), delimiter=';')
+    yield '\ufeff' + writer.writerow(entetes)
+    for ligne in lignes:
+        yield writer.writerow(ligne)
+
+
+def lignes_depenses(depenses):
+    """Dépenses détaillées, lues par paquets sans instancier les modèles"""
+    return depenses.order_by('date_expense', 'pk').values_list(
+        'numero_expense', 'date_expense', 'categorie', 'residence__nom', 'fournisseur',
+        'numero_facture_fournisseur', 'titre', 'montant', 'statut', 'is_deductible',
+    ).iterator(chunk_size=2000)
+
+
+ENTETES_DEPENSES = [
+    'Numéro', 'Date', 'Catégorie', 'Résidence', 'Fournisseur',
+    'Facture fournisseur', 'Titre', 'Montant', 'Statut', 'Déductible',
+]
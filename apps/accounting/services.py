@@ -0,0 +1,414 @@
+# apps/accounting/services.py
+"""
+Moteur de calcul des relevés propriétaires
+
+Les lignes de détail d'un relevé (une par contrat) sont calculées en une
+seule requête groupée sur Payment → Invoice → RentalContract → Appartement,
+restreinte aux biens confiés par le propriétaire via TiersBien (lien direct
+à l'appartement ou lien à sa résidence), puis insérées par bulk_create.
+
+StatementBatchRunner enchaîne ce calcul et le PDF pour tous les
+propriétaires d'une période, avec un suivi par propriétaire permettant la
+reprise après interruption. Un relevé déjà envoyé ou payé n'est jamais
+recalculé: le lot le signale comme ignoré.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+logger = logging.getLogger(__name__)
+
+# Taux de commission agence appliqué quand le mandat n'en précise pas (%)
+TAUX_COMMISSION_DEFAUT = Decimal('10.00')
+
+# Types de liaison TiersBien qui confient un bien à l'agence
+TYPES_CONTRAT_PROPRIETAIRE = ['gestion']
+
+ZERO = Decimal('0.00')
+
+
+class LandlordStatementEngine:
+    """
+    Calcule et enregistre les relevés propriétaires d'une période
+
+    Usage:
+        engine = LandlordStatementEngine(date(2025, 1, 1), date(2025, 1, 31))
+        releve = engine.generer(proprietaire)
+        resultats = engine.generer_tous(max_workers=4)
+    """
+
+    def __init__(self, periode_debut, periode_fin, taux_defaut=TAUX_COMMISSION_DEFAUT):
+        self.periode_debut = periode_debut
+        self.periode_fin = periode_fin
+        self.taux_defaut = taux_defaut
+
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+
+    def mandats(self, proprietaire):
+        """Liaisons TiersBien du propriétaire actives sur la période"""
+        from apps.tiers.models import TiersBien
+
+        return TiersBien.objects.filter(
+            tiers=proprietaire,
+            type_contrat__in=TYPES_CONTRAT_PROPRIETAIRE,
+            date_debut__lte=self.periode_fin,
+        ).filter(
+            Q(date_fin__isnull=True) | Q(date_fin__gte=self.periode_debut)
+        ).exclude(statut='annule')
+
+    def appartements(self, proprietaire):
+        """Appartements confiés par le propriétaire (directement ou via la résidence)"""
+        from apps.properties.models.appartement import Appartement
+
+        mandats = self.mandats(proprietaire)
+        return Appartement.objects.filter(
+            Q(pk__in=mandats.filter(appartement__isnull=False).values('appartement_id'))
+            | Q(residence_id__in=mandats.filter(residence__isnull=False).values('residence_id'))
+        )
+
+    def lignes(self, proprietaire):
+        """
+        Lignes de détail du relevé, en une seule requête groupée
+
+        Le taux de commission vient du mandat de l'appartement, à défaut de
+        celui de la résidence, à défaut du taux par défaut.
+
+        Returns:
+            list[dict]: contrat_id, appartement_id, taux, montant_loyer, montant_charges
+        """
+        from apps.payments.models.payment import Payment
+
+        mandats = self.mandats(proprietaire).filter(pourcentage_commission__isnull=False)
+        taux_appartement = mandats.filter(
+            appartement_id=OuterRef('facture__contrat__appartement_id')
+        ).values('pourcentage_commission')[:1]
+        taux_residence = mandats.filter(
+            residence_id=OuterRef('facture__contrat__appartement__residence_id')
+        ).values('pourcentage_commission')[:1]
+
+        montant = DecimalField(max_digits=12, decimal_places=2)
+
+        return list(
+            Payment.objects.filter(
+                statut='valide',
+                date_paiement__range=[self.periode_debut, self.periode_fin],
+                facture__contrat__appartement__in=self.appartements(proprietaire).values('pk'),
+            ).annotate(
+                taux=Coalesce(
+                    Subquery(taux_appartement, output_field=montant),
+                    Subquery(taux_residence, output_field=montant),
+                    Value(self.taux_defaut, output_field=montant),
+                ),
+            ).values(
+                'taux',
+                contrat_id=F('facture__contrat_id'),
+                appartement_id=F('facture__contrat__appartement_id'),
+            ).annotate(
+                montant_loyer=Coalesce(
+                    Sum('montant', filter=Q(facture__type_facture='loyer')),
+                    Value(ZERO, output_field=montant),
+                ),
+                montant_charges=Coalesce(
+                    Sum('montant', filter=Q(facture__type_facture='charges')),
+                    Value(ZERO, output_field=montant),
+                ),
+            ).filter(
+                Q(montant_loyer__gt=0) | Q(montant_charges__gt=0)
+            ).order_by('appartement_id', 'contrat_id')
+        )
+
+    def total_depenses(self, proprietaire):
+        """
+        Dépenses validées de la période imputables au propriétaire
+
+        Expense n'est rattaché qu'à l'ancien modèle Property: les dépenses
+        sont donc prises au niveau du relevé (Property.landlord), pas ventilées
+        par appartement.
+        """
+        from apps.accounting.models.expenses import Expense
+
+        return Expense.objects.filter(
+            bien__landlord=proprietaire,
+            date_expense__range=[self.periode_debut, self.periode_fin],
+            statut='valide',
+        ).aggregate(total=Sum('montant'))['total'] or ZERO
+
+    # ------------------------------------------------------------------
+    # Génération
+    # ------------------------------------------------------------------
+
+    def generer(self, proprietaire, releve=None, genere_par=None):
+        """
+        Calcule (ou recalcule) le relevé d'un propriétaire pour la période
+
+        Nombre de requêtes constant, quel que soit le nombre de biens et de
+        paiements: lignes groupées, dépenses, nombre de biens, puis
+        écriture du relevé et bulk_create des détails dans une transaction.
+
+        Un relevé déjà envoyé ou payé n'est pas recalculé: il est retourné
+        tel quel (releve.est_recalculable est faux).
+
+        Returns:
+            LandlordStatement: relevé enregistré avec ses totaux
+        """
+        from apps.accounting.models.landor_statement import (
+            LandlordStatement, LandlordStatementDetail,
+        )
+
+        if releve is None:
+            releve = LandlordStatement.objects.filter(
+                proprietaire=proprietaire,
+                periode_debut=self.periode_debut,
+                periode_fin=self.periode_fin,
+            ).first()
+        if releve is not None and not releve.est_recalculable:
+            return releve
+
+        lignes = self.lignes(proprietaire)
+        total_depenses = self.total_depenses(proprietaire)
+        nb_biens = self.appartements(proprietaire).count()
+
+        details = []
+        total_encaisse = ZERO
+        commission_agence = ZERO
+        for ligne in lignes:
+            encaisse = ligne['montant_loyer'] + ligne['montant_charges']
+            commission = (encaisse * ligne['taux'] / 100).quantize(Decimal('0.01'))
+            total_encaisse += encaisse
+            commission_agence += commission
+            details.append(LandlordStatementDetail(
+                bien_id=ligne['appartement_id'],
+                contrat_id=ligne['contrat_id'],
+                montant_loyer=ligne['montant_loyer'],
+                montant_charges=ligne['montant_charges'],
+                commission_pourcentage=ligne['taux'],
+                commission_montant=commission,
+                net_bailleur=encaisse - commission,
+            ))
+
+        with transaction.atomic():
+            if releve is None:
+                releve, _ = LandlordStatement.objects.get_or_create(
+                    proprietaire=proprietaire,
+                    periode_debut=self.periode_debut,
+                    periode_fin=self.periode_fin,
+                    defaults={'genere_par': genere_par},
+                )
+            releve.total_encaisse = total_encaisse
+            releve.commission_agence = commission_agence
+            releve.total_depenses = total_depenses
+            releve.montant_a_verser = total_encaisse - commission_agence - total_depenses
+            releve.nb_biens_concernes = nb_biens
+            releve.save()
+
+            releve.details.all().delete()
+            for detail in details:
+                detail.releve = releve
+            LandlordStatementDetail.objects.bulk_create(details, batch_size=500)
+
+        return releve
+
+    def generer_tous(self, proprietaires=None, max_workers=4, genere_par=None):
+        """
+        Génère les relevés de plusieurs propriétaires en parallèle
+
+        Chaque propriétaire est traité dans sa propre transaction par un
+        thread du pool; une erreur sur un propriétaire n'interrompt pas les
+        autres. Les relevés déjà envoyés ou payés sont retournés inchangés.
+
+        Args:
+            proprietaires: itérable de Tiers (défaut: tous les propriétaires)
+            max_workers (int): taille du pool (1 = séquentiel)
+
+        Returns:
+            dict: {proprietaire_id: LandlordStatement ou Exception}
+        """
+        from apps.tiers.models import Tiers
+
+        if proprietaires is None:
+            proprietaires = Tiers.objects.filter(type_tiers='proprietaire')
+        proprietaires = list(proprietaires)
+
+        if max_workers <= 1:
+            return {p.pk: self._generer_protege(p, genere_par) for p in proprietaires}
+
+        resultats = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._generer_thread, p, genere_par): p.pk
+                for p in proprietaires
+            }
+            for future in as_completed(futures):
+                resultats[futures[future]] = future.result()
+        return resultats
+
+    def _generer_protege(self, proprietaire, genere_par=None):
+        try:
+            return self.generer(proprietaire, genere_par=genere_par)
+        except Exception as e:
+            logger.exception(f"Relevé {proprietaire.pk} ({self.periode_debut} - {self.periode_fin}): {e}")
+            return e
+
+    def _generer_thread(self, proprietaire, genere_par=None):
+        try:
+            return self._generer_protege(proprietaire, genere_par)
+        finally:
+            # Chaque thread ouvre sa propre connexion: la fermer en sortant
+            connection.close()
+
+
+class StatementBatchRunner:
+    """
+    Génère les relevés de tous les propriétaires d'une période, avec suivi
+
+    L'état de chaque propriétaire est enregistré dans StatementRunItem
+    (statut, durées, erreur). Après un arrêt brutal, relancer le même lot
+    remet les éléments restés « en cours » en attente et ne traite que ce
+    qui n'a pas abouti.
+
+    Usage:
+        run = StatementBatchRunner.pour_periode(date(2025, 1, 1), date(2025, 1, 31))
+        StatementBatchRunner(run, max_workers=4).executer()
+    """
+
+    def __init__(self, run, max_workers=4, generer_pdf=True, reprendre_echecs=True, log=None):
+        self.run = run
+        self.max_workers = max_workers
+        self.generer_pdf = generer_pdf
+        self.reprendre_echecs = reprendre_echecs
+        self.log = log or (lambda message: None)
+        self.engine = LandlordStatementEngine(run.periode_debut, run.periode_fin)
+
+    @classmethod
+    def pour_periode(cls, periode_debut, periode_fin, lance_par=None):
+        """Retourne le lot de la période (créé si nécessaire)"""
+        from apps.accounting.models.statement_run import StatementRun
+
+        run, _ = StatementRun.objects.get_or_create(
+            periode_debut=periode_debut,
+            periode_fin=periode_fin,
+            defaults={'lance_par': lance_par},
+        )
+        return run
+
+    def preparer(self):
+        """
+        Ajoute au lot les propriétaires manquants et récupère les éléments
+        interrompus
+
+        Returns:
+            list: identifiants des éléments à traiter
+        """
+        from apps.accounting.models.statement_run import StatementRunItem
+        from apps.tiers.models import Tiers
+
+        proprietaires = Tiers.objects.filter(type_tiers='proprietaire').values_list('pk', flat=True)
+        StatementRunItem.objects.bulk_create(
+            [StatementRunItem(run=self.run, proprietaire_id=pk) for pk in proprietaires],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+        # Éléments « en cours » d'une exécution interrompue
+        self.run.items.filter(statut='en_cours').update(statut='en_attente')
+
+        statuts = ['en_attente', 'echec'] if self.reprendre_echecs else ['en_attente']
+        return list(self.run.items.filter(statut__in=statuts).values_list('pk', flat=True))
+
+    def executer(self):
+        """
+        Traite tous les éléments en attente dans un pool de threads
+
+        Returns:
+            dict: progression finale du lot (voir StatementRun.progression)
+        """
+        from django.utils import timezone
+
+        item_ids = self.preparer()
+
+        self.run.statut = 'en_cours'
+        if not self.run.date_debut_traitement:
+            self.run.date_debut_traitement = timezone.now()
+        self.run.date_fin_traitement = None
+        self.run.save(update_fields=['statut', 'date_debut_traitement', 'date_fin_traitement', 'updated_at'])
+        self.log(f"{len(item_ids)} propriétaire(s) à traiter avec {self.max_workers} worker(s)")
+
+        if self.max_workers <= 1:
+            for item_id in item_ids:
+                self.traiter(item_id)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for _ in executor.map(self._traiter_thread, item_ids):
+                    pass
+
+        progression = self.run.progression()
+        self.run.statut = 'termine_erreurs' if progression['echec'] else 'termine'
+        self.run.date_fin_traitement = timezone.now()
+        self.run.save(update_fields=['statut', 'date_fin_traitement', 'updated_at'])
+        return progression
+
+    def traiter(self, item_id):
+        """Calcule le relevé et le PDF d'un propriétaire, en enregistrant le résultat"""
+        import time
+        import traceback
+
+        from django.core.files.base import ContentFile
+        from django.db.models import F
+        from django.utils import timezone
+
+        from apps.accounting.models.statement_run import StatementRunItem
+        from apps.accounting.utils import generate_landlord_statement_pdf
+
+        StatementRunItem.objects.filter(pk=item_id).update(
+            statut='en_cours', tentatives=F('tentatives') + 1,
+            date_debut_traitement=timezone.now(), erreur='',
+        )
+        item = StatementRunItem.objects.select_related('proprietaire').get(pk=item_id)
+
+        try:
+            start = time.perf_counter()
+            releve = self.engine.generer(item.proprietaire, genere_par=self.run.lance_par)
+            duree_calcul = time.perf_counter() - start
+
+            if not releve.est_recalculable:
+                StatementRunItem.objects.filter(pk=item_id).update(statut='ignore', releve=releve)
+                self.log(f"⏭️  {item.proprietaire.nom_complet}: relevé {releve.get_statut_display().lower()}, conservé")
+                return True
+
+            duree_pdf = None
+            if self.generer_pdf:
+                start = time.perf_counter()
+                buffer = generate_landlord_statement_pdf(releve)
+                if releve.fichier_pdf:
+                    releve.fichier_pdf.delete(save=False)
+                releve.fichier_pdf.save(
+                    f'releve_{releve.numero_releve}.pdf', ContentFile(buffer.getvalue()), save=False
+                )
+                releve.save(update_fields=['fichier_pdf', 'updated_at'])
+                duree_pdf = time.perf_counter() - start
+        except Exception as e:
+            logger.exception(f"Lot {self.run.pk}, propriétaire {item.proprietaire_id}: {e}")
+            StatementRunItem.objects.filter(pk=item_id).update(
+                statut='echec', erreur=traceback.format_exc()[-4000:],
+            )
+            self.log(f"❌ {item.proprietaire.nom_complet}: {e}")
+            return False
+
+        StatementRunItem.objects.filter(pk=item_id).update(
+            statut='succes', releve=releve, duree_calcul=duree_calcul, duree_pdf=duree_pdf,
+        )
+        self.log(f"✓ {item.proprietaire.nom_complet}: {releve.montant_a_verser} FCFA ({duree_calcul:.2f}s)")
+        return True
+
+    def _traiter_thread(self, item_id):
+        try:
+            return self.traiter(item_id)
+        finally:
+            connection.close()
@@ -1 +1,108 @@
- 
+# apps/accounting/signals.py
+"""
+Signals pour le module comptabilité
+Mise à jour incrémentale des cumuls journaliers (apps.accounting.ledger)
+quand un paiement ou une dépense est validé, modifié ou supprimé, et
+invalidation des synthèses de dépenses des périodes clôturées
+
+Une résidence supprimée ne supprime pas ses cumuls: les dépenses survivent
+sans résidence, les dates concernées sont recalculées depuis la source.
+"""
+
+from django.db.models import Max, Min, Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.accounting import ledger
+from apps.accounting.models import AccountingPeriod, Expense, ExpenseBudget, LedgerDailyRollup
+from apps.accounting.reports import invalider_rapport_periode
+from apps.payments.models.payment import Payment
+from apps.properties.models.residence import Residence
+
+# Lecteurs de la contribution actuelle en base, par modèle suivi
+LECTEURS = {
+    Payment: ledger.mouvement_paiement_en_base,
+    Expense: ledger.mouvement_depense_en_base,
+}
+STATUTS_COMPTABILISES = {
+    Payment: ledger.STATUTS_PAIEMENT_COMPTABILISES,
+    Expense: ledger.STATUTS_DEPENSE_COMPTABILISES,
+}
+
+
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=Expense)
+@receiver(pre_delete, sender=Payment)
+@receiver(pre_delete, sender=Expense)
+def memoriser_mouvement(sender, instance, raw=False, **kwargs):
+    """Mémorise la contribution avant modification (une requête, seulement en mise à jour)"""
+    if raw or instance.pk is None:
+        instance._mouvement_avant = None
+        return
+    instance._mouvement_avant = LECTEURS[sender](instance.pk)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=Expense)
+def appliquer_mouvement(sender, instance, raw=False, **kwargs):
+    """Remplace l'ancienne contribution par la nouvelle dans les cumuls"""
+    if raw:
+        return
+    avant = getattr(instance, '_mouvement_avant', None)
+    if avant is None and instance.statut not in STATUTS_COMPTABILISES[sender]:
+        # Ni avant ni après dans le grand livre: rien à relire
+        return
+    ledger.remplacer_mouvement(avant, LECTEURS[sender](instance.pk))
+
+
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=Expense)
+def retirer_mouvement(sender, instance, **kwargs):
+    """Retire la contribution d'une opération supprimée"""
+    ledger.appliquer_mouvement(getattr(instance, '_mouvement_avant', None), -1)
+
+
+@receiver([post_save, post_delete], sender=Expense)
+def invalider_rapport_depense(sender, instance, raw=False, **kwargs):
+    """Une dépense modifiée dans une période clôturée périme sa synthèse en cache"""
+    if raw:
+        return
+    dates = {instance.date_expense}
+    avant = getattr(instance, '_mouvement_avant', None)
+    if avant is not None:
+        dates.add(avant.date)
+    filtre = Q()
+    for jour in dates:
+        filtre |= Q(date_debut__lte=jour, date_fin__gte=jour)
+    invalider_rapport_periode(
+        *AccountingPeriod.objects.filter(filtre, is_closed=True).values_list('pk', flat=True)
+    )
+
+
+@receiver([post_save, post_delete], sender=ExpenseBudget)
+def invalider_rapport_budget(sender, instance, raw=False, **kwargs):
+    """Un budget modifié change la comparaison prévu / réalisé de sa période"""
+    if not raw:
+        invalider_rapport_periode(instance.periode_id)
+
+
+@receiver(pre_delete, sender=Residence)
+def memoriser_dates_cumuls(sender, instance, **kwargs):
+    """Mémorise la plage de dates des cumuls de la résidence supprimée"""
+    instance._dates_cumuls = LedgerDailyRollup.objects.filter(residence=instance).aggregate(
+        debut=Min('date'), fin=Max('date')
+    )
+
+
+@receiver(post_delete, sender=Residence)
+def reconstruire_cumuls_residence(sender, instance, **kwargs):
+    """
+    Recalcule les cumuls des dates de la résidence supprimée
+
+    Les dépenses rattachées passent à residence=NULL (SET_NULL) et restent
+    comptabilisées; les paiements de ses appartements sont supprimés avec eux.
+    """
+    dates = getattr(instance, '_dates_cumuls', None) or {}
+    if dates.get('debut'):
+        ledger.reconstruire_cumuls(dates['debut'], dates['fin'])
+
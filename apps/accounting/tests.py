@@ -1,3 +1,462 @@
-from django.test import TestCase
+"""
+Tests pour le module de comptabilité
+"""
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounting.ledger import cumuls_desynchronises, reconstruire_cumuls, totaux_periode
+from apps.accounting.models import (
+    AccountingPeriod, AccountingPeriodSnapshot, Expense, ExpenseBudget, LandlordStatement,
+    LedgerDailyRollup, StatementRunItem, TaxDeclaration,
+)
+from apps.accounting.reports import ExpenseReport, preparer_declarations, rapport_periode
+from apps.accounting.views import expense_analytics_export_view
+from apps.accounting.services import LandlordStatementEngine, StatementBatchRunner
+from apps.payments.models.invoice import Invoice
+from apps.payments.models.payment import Payment
+from apps.tiers.models import TiersBien
+
+from tests.factories import (
+    make_appartement, make_contract, make_residence, make_tiers, make_user,
+)
+
+
+class LandlordStatementTestMixin:
+    """Portefeuille minimal: deux propriétaires, un contrat chacun"""
+
+    def setUp(self):
+        self.proprietaire = make_tiers('Ndiaye', type_tiers='proprietaire')
+        self.autre_proprietaire = make_tiers('Sow', type_tiers='proprietaire')
+        self.locataire = make_tiers('Fall')
+
+        # Le signal de Residence crée le mandat de gestion
+        self.residence = make_residence(proprietaire=self.proprietaire)
+        autre_residence = make_residence('Autre', proprietaire=self.autre_proprietaire)
+        TiersBien.objects.update(date_debut=date(2024, 1, 1))
+        TiersBien.objects.filter(residence=self.residence).update(
+            pourcentage_commission=Decimal('8.00')
+        )
+
+        self.appartement = make_appartement(self.residence, 'A1')
+        self.contrat = make_contract(
+            self.appartement, self.locataire, date_debut=date(2025, 1, 1)
+        )
+        autre_contrat = make_contract(
+            make_appartement(autre_residence, 'B1'), self.locataire,
+            date_debut=date(2025, 1, 1)
+        )
+
+        self.payer(self.contrat, 'loyer', Decimal('250000.00'), date(2025, 3, 5))
+        self.payer(self.contrat, 'charges', Decimal('20000.00'), date(2025, 3, 6))
+        # Hors période et autre propriétaire: exclus
+        self.payer(self.contrat, 'loyer', Decimal('250000.00'), date(2025, 4, 5))
+        self.payer(autre_contrat, 'loyer', Decimal('300000.00'), date(2025, 3, 5))
+
+        self.engine = LandlordStatementEngine(date(2025, 3, 1), date(2025, 3, 31))
+
+    def payer(self, contrat, type_facture, montant, date_paiement):
+        facture = Invoice.objects.create(
+            contrat=contrat, type_facture=type_facture,
+            periode_debut=date_paiement.replace(day=1), periode_fin=date_paiement,
+            date_emission=date_paiement, date_echeance=date_paiement,
+            montant_ht=montant, montant_ttc=montant, statut='payee',
+        )
+        return Payment.objects.create(
+            facture=facture, montant=montant, date_paiement=date_paiement,
+            moyen_paiement='virement', statut='valide',
+        )
+
+
+class LandlordStatementEngineTest(LandlordStatementTestMixin, TestCase):
+    """Tests pour le moteur de relevés propriétaires"""
+
+    def test_totaux_et_details(self):
+        """Test des totaux et des lignes d'un relevé"""
+        releve = self.engine.generer(self.proprietaire)
+
+        self.assertEqual(releve.total_encaisse, Decimal('270000.00'))
+        self.assertEqual(releve.commission_agence, Decimal('21600.00'))
+        self.assertEqual(releve.montant_a_verser, Decimal('248400.00'))
+        self.assertEqual(releve.nb_biens_concernes, 1)
+
+        detail = releve.details.get()
+        self.assertEqual(detail.bien, self.appartement)
+        self.assertEqual(detail.contrat, self.contrat)
+        self.assertEqual(detail.montant_loyer, Decimal('250000.00'))
+        self.assertEqual(detail.montant_charges, Decimal('20000.00'))
+        self.assertEqual(detail.commission_pourcentage, Decimal('8.00'))
+
+    def test_regeneration_idempotente(self):
+        """Test qu'une seconde génération remplace les détails"""
+        self.engine.generer(self.proprietaire)
+        releve = self.engine.generer(self.proprietaire)
+
+        self.assertEqual(LandlordStatement.objects.filter(proprietaire=self.proprietaire).count(), 1)
+        self.assertEqual(releve.details.count(), 1)
+
+    def test_releve_envoye_conserve(self):
+        """Test qu'un relevé envoyé n'est pas recalculé"""
+        releve = self.engine.generer(self.proprietaire)
+        LandlordStatement.objects.filter(pk=releve.pk).update(statut='envoye')
+        self.payer(self.contrat, 'loyer', Decimal('50000.00'), date(2025, 3, 15))
+
+        releve = self.engine.generer(self.proprietaire)
+
+        self.assertFalse(releve.est_recalculable)
+        self.assertEqual(releve.total_encaisse, Decimal('270000.00'))
+        releve.refresh_from_db()
+        self.assertEqual(releve.total_encaisse, Decimal('270000.00'))
+        self.assertEqual(releve.details.get().montant_loyer, Decimal('250000.00'))
+
+    def test_nombre_de_requetes_constant(self):
+        """Test que le nombre de requêtes ne dépend pas du nombre de contrats"""
+        self.engine.generer(self.proprietaire)
+        with CaptureQueriesContext(connection) as avant:
+            self.engine.generer(self.proprietaire)
+
+        for i in range(5):
+            contrat = make_contract(
+                make_appartement(self.residence, f'A{i + 2}'), self.locataire,
+                date_debut=date(2025, 1, 1)
+            )
+            self.payer(contrat, 'loyer', Decimal('100000.00'), date(2025, 3, 10))
+
+        with CaptureQueriesContext(connection) as apres:
+            releve = self.engine.generer(self.proprietaire)
+
+        self.assertEqual(releve.details.count(), 6)
+        self.assertEqual(len(apres.captured_queries), len(avant.captured_queries))
+
+    def test_generer_tous(self):
+        """Test de la génération pour tous les propriétaires"""
+        resultats = self.engine.generer_tous(max_workers=1)
+
+        self.assertEqual(set(resultats), {self.proprietaire.pk, self.autre_proprietaire.pk})
+        self.assertEqual(
+            resultats[self.autre_proprietaire.pk].total_encaisse, Decimal('300000.00')
+        )
+        # Taux par défaut sans pourcentage sur le mandat
+        self.assertEqual(
+            resultats[self.autre_proprietaire.pk].commission_agence, Decimal('30000.00')
+        )
+
+
+class StatementBatchRunnerTest(LandlordStatementTestMixin, TestCase):
+    """Tests pour les lots de relevés (suivi et reprise)"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.run = StatementBatchRunner.pour_periode(date(2025, 3, 1), date(2025, 3, 31))
+
+    def test_lot_complet(self):
+        """Test d'un lot: un élément par propriétaire, relevés et PDF"""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            progression = StatementBatchRunner(self.run, max_workers=1).executer()
+
+        self.assertEqual(progression['succes'], 2)
+        self.assertEqual(progression['pourcentage'], 100)
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.statut, 'termine')
+
+        item = self.run.items.get(proprietaire=self.proprietaire)
+        self.assertEqual(item.releve.total_encaisse, Decimal('270000.00'))
+        self.assertIsNotNone(item.duree_calcul)
+        self.assertTrue(item.releve.fichier_pdf.name.endswith('.pdf'))
+
+    def test_reprise_apres_interruption(self):
+        """Test que la reprise ne retraite que les éléments non aboutis"""
+        runner = StatementBatchRunner(self.run, max_workers=1, generer_pdf=False)
+        runner.preparer()
+        termine = self.run.items.get(proprietaire=self.proprietaire)
+        runner.traiter(termine.pk)
+        # Élément resté « en cours » après un arrêt brutal
+        self.run.items.filter(proprietaire=self.autre_proprietaire).update(statut='en_cours')
+
+        progression = runner.executer()
+
+        self.assertEqual(progression['succes'], 2)
+        self.assertEqual(StatementRunItem.objects.get(pk=termine.pk).tentatives, 1)
+
+    def test_releve_paye_ignore(self):
+        """Test qu'un relevé payé est signalé ignoré sans PDF régénéré"""
+        releve = LandlordStatementEngine(date(2025, 3, 1), date(2025, 3, 31)).generer(self.proprietaire)
+        LandlordStatement.objects.filter(pk=releve.pk).update(statut='paye')
+
+        progression = StatementBatchRunner(self.run, max_workers=1, generer_pdf=False).executer()
+
+        self.assertEqual(progression['succes'], 1)
+        self.assertEqual(progression['ignore'], 1)
+        self.assertEqual(progression['pourcentage'], 100)
+        item = self.run.items.get(proprietaire=self.proprietaire)
+        self.assertEqual(item.statut, 'ignore')
+        self.assertEqual(item.releve, releve)
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.statut, 'termine')
+
+    def test_echec_enregistre(self):
+        """Test qu'une erreur est enregistrée sans interrompre le lot"""
+        runner = StatementBatchRunner(self.run, max_workers=1, generer_pdf=False)
+
+        def generer(proprietaire, **kwargs):
+            if proprietaire.pk == self.autre_proprietaire.pk:
+                raise ValueError('Données incohérentes')
+            return LandlordStatementEngine.generer(runner.engine, proprietaire, **kwargs)
+
+        runner.engine.generer = generer
+        progression = runner.executer()
+
+        self.assertEqual(progression['succes'], 1)
+        self.assertEqual(progression['echec'], 1)
+        item = self.run.items.get(proprietaire=self.autre_proprietaire)
+        self.assertIn('Données incohérentes', item.erreur)
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.statut, 'termine_erreurs')
+
+
+class GrandLivreTest(LandlordStatementTestMixin, TestCase):
+    """Tests pour les cumuls journaliers et la clôture des périodes"""
+
+    def setUp(self):
+        super().setUp()
+        self.periode = AccountingPeriod.objects.create(
+            nom='Mars 2025', date_debut=date(2025, 3, 1), date_fin=date(2025, 3, 31)
+        )
+        self.depense = Expense.objects.create(
+            categorie='maintenance', titre='Pompe', montant=Decimal('40000.00'),
+            date_expense=date(2025, 3, 10), fournisseur='Sénélec', moyen_paiement='especes',
+            residence=self.residence,
+        )
+
+    def test_cumuls_incrementaux(self):
+        """Test que les signaux tiennent les cumuls à jour"""
+        self.assertEqual(totaux_periode(date(2025, 3, 1), date(2025, 3, 31))['total_depenses'], 0)
+
+        self.depense.statut = 'valide'
+        self.depense.save()
+        totaux = totaux_periode(date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(totaux['total_revenus'], Decimal('570000.00'))
+        self.assertEqual(totaux['total_depenses'], Decimal('40000.00'))
+        self.assertEqual(totaux['nb_paiements'], 3)
+
+        # Changement de montant et de date, puis suppression d'un paiement
+        self.depense.montant = Decimal('45000.00')
+        self.depense.date_expense = date(2025, 4, 2)
+        self.depense.save()
+        Payment.objects.filter(date_paiement=date(2025, 3, 6)).get().delete()
+
+        totaux = totaux_periode(date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(totaux['total_revenus'], Decimal('550000.00'))
+        self.assertEqual(totaux['total_depenses'], Decimal('0.00'))
+        self.assertEqual(cumuls_desynchronises(), [])
+
+    def test_depense_payee_reste_comptabilisee(self):
+        """Test qu'une dépense payée reste dans les cumuls"""
+        self.depense.validate_expense(None)
+        self.depense.statut = 'paye'
+        self.depense.save()
+
+        totaux = totaux_periode(date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(totaux['total_depenses'], Decimal('40000.00'))
+        self.assertEqual(cumuls_desynchronises(), [])
+
+    def test_suppression_residence(self):
+        """Test qu'une résidence supprimée ne retire pas ses dépenses du grand livre"""
+        residence = make_residence('Annexe', proprietaire=self.proprietaire)
+        Expense.objects.filter(pk=self.depense.pk).update(residence=residence)
+        self.depense.refresh_from_db()
+        self.depense.validate_expense(None)
+        self.assertEqual(LedgerDailyRollup.objects.get(type_flux='depense').residence, residence)
+
+        residence.delete()
+
+        self.assertTrue(Expense.objects.filter(pk=self.depense.pk, residence__isnull=True).exists())
+        totaux = totaux_periode(date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(totaux['total_depenses'], Decimal('40000.00'))
+        self.assertEqual(totaux['total_revenus'], Decimal('570000.00'))
+        self.assertEqual(cumuls_desynchronises(), [])
+
+    def test_reconstruction(self):
+        """Test que la reconstruction rattrape une écriture en masse"""
+        Expense.objects.filter(pk=self.depense.pk).update(statut='valide')
+        self.assertEqual(len(cumuls_desynchronises()), 1)
+
+        reconstruire_cumuls(date(2025, 3, 1), date(2025, 3, 31))
+
+        self.assertEqual(cumuls_desynchronises(), [])
+        cumul = LedgerDailyRollup.objects.get(type_flux='depense')
+        self.assertEqual(cumul.residence, self.residence)
+        self.assertEqual(cumul.montant, Decimal('40000.00'))
+
+    def test_totaux_en_une_requete(self):
+        """Test que les totaux d'une période ne parcourent pas les paiements"""
+        with self.assertNumQueries(2):
+            self.periode.calculate_totals()
+        self.assertEqual(self.periode.total_revenus, Decimal('570000.00'))
+        self.assertEqual(self.periode.resultat_net, Decimal('570000.00'))
+
+    def test_cloture_figee(self):
+        """Test qu'une période clôturée lit sa photographie"""
+        self.assertTrue(self.periode.close_period(None))
+        snapshot = AccountingPeriodSnapshot.objects.get(periode=self.periode)
+        self.assertEqual(snapshot.total_revenus, Decimal('570000.00'))
+        self.assertEqual(snapshot.nb_paiements, 3)
+
+        # Une validation tardive ne change plus la période clôturée
+        self.depense.validate_expense(None)
+        periode = AccountingPeriod.objects.get(pk=self.periode.pk)
+        periode.calculate_totals()
+
+        self.assertEqual(periode.total_depenses, Decimal('0.00'))
+        self.assertEqual(periode.totaux()['total_revenus'], Decimal('570000.00'))
+        loyers = [l for l in periode.repartition() if l['categorie'] == 'loyer']
+        self.assertEqual(loyers[0]['montant'], Decimal('550000.00'))
+        self.assertFalse(periode.close_period(None))
+        with self.assertRaises(ValueError):
+            snapshot.save()
+
+
+class ExpenseReportTest(LandlordStatementTestMixin, TestCase):
+    """Tests pour l'analyse des dépenses et la préparation fiscale"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.periode = AccountingPeriod.objects.create(
+            nom='Mars 2025', date_debut=date(2025, 3, 1), date_fin=date(2025, 3, 31)
+        )
+        self.depenser('maintenance', '40000.00', date(2025, 3, 10), 'Plomberie Diallo', self.residence)
+        self.depenser('maintenance', '10000.00', date(2025, 3, 20), 'Plomberie Diallo')
+        self.depenser('assurance', '30000.00', date(2025, 2, 20), 'AXA', self.residence, is_deductible=False)
+        self.depenser('marketing', '5000.00', date(2025, 3, 5), 'Expat-Dakar')
+        # Brouillon: exclu des analyses
+        self.depenser('marketing', '99000.00', date(2025, 3, 5), 'Expat-Dakar', statut='brouillon')
+
+    def depenser(self, categorie, montant, date_expense, fournisseur, residence=None, statut='valide', **kwargs):
+        return Expense.objects.create(
+            categorie=categorie, titre=f'{categorie} {fournisseur}', montant=Decimal(montant),
+            date_expense=date_expense, fournisseur=fournisseur, moyen_paiement='virement',
+            residence=residence, statut=statut, **kwargs
+        )
+
+    def test_repartitions(self):
+        """Test des répartitions groupées"""
+        rapport = ExpenseReport(date_debut=date(2025, 2, 1), date_fin=date(2025, 3, 31))
+
+        with self.assertNumQueries(5):
+            synthese = rapport.synthese()
+
+        self.assertEqual(synthese['totaux']['montant'], Decimal('85000.00'))
+        self.assertEqual(synthese['totaux']['montant_deductible'], Decimal('55000.00'))
+        self.assertEqual(synthese['par_categorie'][0]['categorie'], 'maintenance')
+        self.assertEqual(synthese['par_categorie'][0]['montant'], Decimal('50000.00'))
+        residences = {l['libelle']: l['montant'] for l in synthese['par_residence']}
+        self.assertEqual(residences['Résidence Test'], Decimal('70000.00'))
+        self.assertEqual(residences['Dépenses générales'], Decimal('15000.00'))
+        self.assertEqual(synthese['par_fournisseur'][0]['libelle'], 'Plomberie Diallo')
+        self.assertEqual([l['mois'].month for l in synthese['par_mois']], [2, 3])
+
+    def test_budget_vs_reel(self):
+        """Test du budget global, par résidence et des dépenses hors budget"""
+        ExpenseBudget.objects.create(periode=self.periode, categorie='maintenance', montant_prevu=Decimal('40000.00'))
+        ExpenseBudget.objects.create(
+            periode=self.periode, categorie='assurance', residence=self.residence, montant_prevu=Decimal('20000.00')
+        )
+
+        lignes = {l['categorie']: l for l in rapport_periode(self.periode)['budget']}
+
+        self.assertEqual(lignes['maintenance']['reel'], Decimal('50000.00'))
+        self.assertEqual(lignes['maintenance']['ecart'], Decimal('10000.00'))
+        self.assertEqual(lignes['maintenance']['taux'], Decimal('125.0'))
+        self.assertEqual(lignes['assurance']['reel'], Decimal('0.00'))
+        self.assertEqual(lignes['marketing']['prevu'], Decimal('0.00'))
+        self.assertIsNone(lignes['marketing']['taux'])
+
+    def test_cache_periode_cloturee(self):
+        """Test que la synthèse d'une période clôturée est mise en cache puis invalidée"""
+        self.periode.close_period(None)
+        rapport_periode(self.periode)
+        with self.assertNumQueries(0):
+            rapport_periode(self.periode)
+
+        depense = Expense.objects.get(titre='marketing Expat-Dakar', statut='valide')
+        depense.montant = Decimal('8000.00')
+        depense.save()
+
+        self.assertEqual(rapport_periode(self.periode)['totaux']['montant'], Decimal('58000.00'))
+
+    def test_depenses_payees_comptabilisees(self):
+        """Test que marquer des dépenses payées ne change ni les totaux ni les bases fiscales"""
+        from django.contrib import admin
+        from django.contrib.messages.storage.cookie import CookieStorage
+        from apps.accounting.admin import ExpenseAdmin
+        from apps.accounting.reports import base_fiscale
+
+        ExpenseBudget.objects.create(periode=self.periode, categorie='maintenance', montant_prevu=Decimal('40000.00'))
+        avant = rapport_periode(self.periode)
+        base_avant = base_fiscale(self.periode)
+
+        request = RequestFactory().post('/admin/accounting/expense/')
+        request._messages = CookieStorage(request)
+        ExpenseAdmin(Expense, admin.site).mark_as_paid(request, Expense.objects.all())
+
+        self.assertEqual(Expense.objects.filter(statut='paye').count(), 4)
+        self.assertEqual(Expense.objects.filter(statut='brouillon').count(), 1)
+        self.assertEqual(rapport_periode(self.periode), avant)
+        self.assertEqual(base_fiscale(self.periode), base_avant)
+        self.assertEqual(
+            totaux_periode(self.periode.date_debut, self.periode.date_fin)['total_depenses'],
+            Decimal('55000.00'),
+        )
+
+    def test_preparer_declarations(self):
+        """Test des montants TVA / IS et de la préservation des déclarations déposées"""
+        Invoice.objects.filter(type_facture='charges').update(taux_tva=Decimal('18.00'))
+
+        base, declarations = preparer_declarations(self.periode)
+
+        # 570 000 encaissés dont 20 000 TTC de charges à 18 %
+        self.assertEqual(base['revenus'], Decimal('570000.00'))
+        self.assertEqual(base['depenses_deductibles'], Decimal('55000.00'))
+        self.assertEqual(base['tva_collectee'], Decimal('3050.85'))
+        montants = {d.type_declaration: d.montant_du for d in declarations}
+        self.assertEqual(montants['impot_societe'], Decimal('154500.00'))
+
+        TaxDeclaration.objects.filter(type_declaration='tva').update(statut='declare')
+        self.depenser('taxes', '1000.00', date(2025, 3, 25), 'DGID')
+        _, declarations = preparer_declarations(self.periode)
+        montants = {d.type_declaration: d.montant_du for d in declarations}
+        self.assertEqual(montants['tva'], Decimal('3050.85'))
+        self.assertEqual(montants['impot_societe'], Decimal('154200.00'))
+
+    def test_export_csv(self):
+        """Test de l'export CSV en flux (accès selon le type d'utilisateur, pas is_staff)"""
+        compta = make_user('compta', user_type='accountant', is_staff=False)
+
+        def exporter(**params):
+            request = RequestFactory().get('/accounting/depenses/analyse/export/', params)
+            request.user = compta
+            response = expense_analytics_export_view(request)
+            self.assertEqual(response.status_code, 200)
+            return b''.join(response.streaming_content).decode('utf-8')
+
+        # Un taux de 0 % (budget sans dépense) reste exporté
+        ExpenseBudget.objects.create(periode=self.periode, categorie='fournitures', montant_prevu=Decimal('10000.00'))
+        budget = exporter(vue='budget', periode=self.periode.pk)
+        ligne = next(l for l in budget.splitlines() if l.startswith('Fournitures'))
+        self.assertTrue(ligne.endswith(';0.0'), ligne)
+
+        contenu = exporter(vue='categorie', periode=self.periode.pk)
+        self.assertIn('Maintenance;50000.00;2', contenu)
+        self.assertNotIn('99000', contenu)
+
+        lignes = exporter(periode=self.periode.pk).strip().splitlines()
+        self.assertEqual(len(lignes), 4)
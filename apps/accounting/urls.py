@@ -1,6 +1,8 @@
 from django.urls import path
 from django.http import HttpResponse
 
+from . import views
+
 app_name = 'accounting'
 
 def temp_view(request):
@@ -9,4 +11,14 @@ def temp_view(request):
 urlpatterns = [
     path('', temp_view, name='dashboard'),
     path('expenses/', temp_view, name='expenses'),
-]
\ No newline at end of file
+
+    # Analyse des dépenses et déclarations fiscales
+    path('depenses/analyse/', views.expense_analytics_view, name='expense_analytics'),
+    path('depenses/analyse/export/', views.expense_analytics_export_view, name='expense_analytics_export'),
+    path('periodes/<int:pk>/declarations/', views.tax_declarations_prepare_view, name='tax_declarations_prepare'),
+
+    # Relevés propriétaires (lots mensuels)
+    path('releves/lots/', views.statement_runs_view, name='statement_runs'),
+    path('releves/lots/lancer/', views.statement_run_start_view, name='statement_run_start'),
+    path('releves/lots/<int:pk>/', views.statement_run_detail_view, name='statement_run_detail'),
+]
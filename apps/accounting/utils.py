@@ -1 +1,170 @@
- 
+# apps/accounting/utils.py
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from io import BytesIO
+from django.utils import timezone
+
+
+def format_montant(montant):
+    """Formate un montant en FCFA avec séparateur de milliers"""
+    return f"{montant:,.0f} FCFA".replace(',', ' ')
+
+
+def generate_landlord_statement_pdf(releve):
+    """
+    Génère le relevé de compte d'un propriétaire en PDF
+
+    Le logo n'est pas téléchargé (contrairement aux états de loyer): ce PDF
+    est produit en lot pour tous les propriétaires.
+
+    Args:
+        releve: Instance du modèle LandlordStatement (totaux calculés)
+
+    Returns:
+        BytesIO contenant le PDF généré
+    """
+    buffer = BytesIO()
+
+    def add_header_footer(canvas_obj, doc):
+        canvas_obj.saveState()
+
+        canvas_obj.setFont('Helvetica-Bold', 12)
+        canvas_obj.setFillColor(colors.HexColor('#23456B'))
+        canvas_obj.drawString(20*mm, A4[1] - 15*mm, "IMANY")
+
+        canvas_obj.setFont('Helvetica', 7)
+        canvas_obj.setFillColor(colors.HexColor('#666666'))
+        footer_y = 15*mm
+        canvas_obj.drawCentredString(A4[0]/2, footer_y + 3*mm, "IMANY SN. NINEA /011195816/ RCCM/ SN DKR 2024 B 18099")
+        canvas_obj.drawCentredString(A4[0]/2, footer_y, "Allées Khalifa Ababacar Sy, Liberté 4, Dakar, Sénégal : 33 858 17 59")
+
+        canvas_obj.restoreState()
+
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=20*mm,
+        leftMargin=20*mm,
+        topMargin=30*mm,
+        bottomMargin=25*mm,
+    )
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=22,
+        textColor=colors.HexColor('#23456b'),
+        spaceAfter=12,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    )
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Heading2'],
+        fontSize=12,
+        textColor=colors.HexColor('#a25946'),
+        spaceAfter=12,
+        alignment=TA_CENTER,
+    )
+    section_style = ParagraphStyle(
+        'SectionTitle',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.HexColor('#23456b'),
+    )
+
+    proprietaire = releve.proprietaire
+    story = [
+        Paragraph("RELEVÉ DE COMPTE PROPRIÉTAIRE", title_style),
+        Paragraph(
+            f"N° {releve.numero_releve} — du {releve.periode_debut.strftime('%d/%m/%Y')} "
+            f"au {releve.periode_fin.strftime('%d/%m/%Y')}",
+            subtitle_style
+        ),
+        Spacer(1, 10),
+    ]
+
+    info_table = Table([
+        ["PROPRIÉTAIRE", "BIENS CONCERNÉS"],
+        [
+            f"{proprietaire.nom_complet}\nTéléphone: {proprietaire.telephone or 'Non renseigné'}\n"
+            f"Email: {proprietaire.email or 'Non renseigné'}",
+            str(releve.nb_biens_concernes),
+        ],
+    ], colWidths=[120*mm, 50*mm])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f1f5f9')),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#cbd5e1')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('PADDING', (0, 0), (-1, -1), 8),
+    ]))
+    story += [info_table, Spacer(1, 16), Paragraph("<b>DÉTAIL PAR BIEN</b>", section_style), Spacer(1, 8)]
+
+    details = releve.details.select_related(
+        'bien__residence', 'contrat__locataire'
+    ).order_by('bien__residence__nom', 'bien__nom')
+
+    detail_data = [["Bien", "Locataire", "Loyers", "Charges", "Commission", "Net"]]
+    for detail in details:
+        detail_data.append([
+            f"{detail.bien.residence.nom} - {detail.bien.nom}",
+            detail.contrat.locataire.nom_complet,
+            format_montant(detail.montant_loyer),
+            format_montant(detail.montant_charges),
+            f"{format_montant(detail.commission_montant)} ({detail.commission_pourcentage:.1f}%)",
+            format_montant(detail.net_bailleur),
+        ])
+    if len(detail_data) == 1:
+        detail_data.append(["Aucun encaissement sur la période", "", "", "", "", ""])
+
+    detail_table = Table(
+        detail_data,
+        colWidths=[42*mm, 32*mm, 24*mm, 20*mm, 28*mm, 24*mm],
+        repeatRows=1,
+    )
+    detail_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#23456b')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
+    ]))
+    story += [detail_table, Spacer(1, 16), Paragraph("<b>RÉCAPITULATIF</b>", section_style), Spacer(1, 8)]
+
+    recap_table = Table([
+        ["Total encaissé", format_montant(releve.total_encaisse)],
+        ["Commission agence", f"- {format_montant(releve.commission_agence)}"],
+        ["Dépenses", f"- {format_montant(releve.total_depenses)}"],
+        ["MONTANT À VERSER", format_montant(releve.montant_a_verser)],
+    ], colWidths=[110*mm, 60*mm])
+    recap_table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#23456b')),
+        ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('PADDING', (0, 0), (-1, -1), 8),
+    ]))
+    story += [
+        recap_table,
+        Spacer(1, 20),
+        Paragraph(
+            f"Document généré le {timezone.localtime().strftime('%d/%m/%Y à %H:%M')}",
+            styles['Italic']
+        ),
+    ]
+
+    doc.build(story, onFirstPage=add_header_footer, onLaterPages=add_header_footer)
+    buffer.seek(0)
+    return buffer
@@ -1,3 +1,235 @@
-from django.shortcuts import render
+# apps/accounting/views.py
+import calendar
+import logging
+import threading
+from datetime import date
 
-# Create your views here.
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from .filters import ExpenseFilter
+from .models import AccountingPeriod, Expense
+from .models.statement_run import StatementRun
+from .reports import (
+    ENTETES_DEPENSES, ExpenseReport, flux_csv, lignes_depenses, preparer_declarations,
+    rapport_periode,
+)
+from .services import StatementBatchRunner
+
+logger = logging.getLogger(__name__)
+
+
+def _executer_lot_en_arriere_plan(run_id, max_workers):
+    """Exécute un lot de relevés hors de la requête HTTP"""
+    try:
+        run = StatementRun.objects.get(pk=run_id)
+        StatementBatchRunner(run, max_workers=max_workers).executer()
+    except Exception as e:
+        logger.exception(f"Lot de relevés {run_id}: {e}")
+    finally:
+        connection.close()
+
+
+@login_required
+def statement_runs_view(request):
+    """
+    Liste des lots de relevés propriétaires et lancement d'un nouveau lot
+    """
+    if not request.user.is_staff:
+        messages.error(request, "Accès non autorisé pour ce type d'utilisateur.")
+        return redirect('dashboard:index')
+
+    runs = list(StatementRun.objects.select_related('lance_par')[:24])
+    progressions = StatementRun.progressions(runs)
+    for run in runs:
+        run.stats = progressions[run.pk]
+
+    today = timezone.now().date()
+    context = {
+        'runs': runs,
+        'mois_choices': range(1, 13),
+        'mois_defaut': today.month - 1 or 12,
+        'annee_defaut': today.year if today.month > 1 else today.year - 1,
+    }
+    return render(request, 'accounting/statement_runs.html', context)
+
+
+@login_required
+@require_POST
+def statement_run_start_view(request):
+    """
+    Lance (ou reprend) le lot de relevés d'un mois en arrière-plan
+
+    Pour une exécution planifiée, préférer la commande
+    generate_landlord_statements (même traitement, même reprise).
+    """
+    if not request.user.is_staff:
+        messages.error(request, "Accès non autorisé pour ce type d'utilisateur.")
+        return redirect('dashboard:index')
+
+    try:
+        month = int(request.POST.get('month'))
+        year = int(request.POST.get('year'))
+        periode_debut = date(year, month, 1)
+    except (TypeError, ValueError):
+        messages.error(request, "Période invalide.")
+        return redirect('accounting:statement_runs')
+
+    periode_fin = date(year, month, calendar.monthrange(year, month)[1])
+    run = StatementBatchRunner.pour_periode(periode_debut, periode_fin, lance_par=request.user)
+
+    if run.est_actif():
+        messages.warning(request, "Ce lot est déjà en cours de traitement.")
+        return redirect('accounting:statement_run_detail', pk=run.pk)
+
+    # Marquer le lot en cours avant de rendre la main (évite un double lancement)
+    run.statut = 'en_cours'
+    run.lance_par = request.user
+    run.save(update_fields=['statut', 'lance_par', 'updated_at'])
+
+    threading.Thread(
+        target=_executer_lot_en_arriere_plan,
+        args=(run.pk, 4),
+        daemon=True,
+    ).start()
+
+    messages.success(request, f"Génération des relevés du {periode_debut:%m/%Y} lancée.")
+    return redirect('accounting:statement_run_detail', pk=run.pk)
+
+
+@login_required
+def statement_run_detail_view(request, pk):
+    """
+    Suivi d'un lot: statut, durées et erreur par propriétaire
+    """
+    if not request.user.is_staff:
+        messages.error(request, "Accès non autorisé pour ce type d'utilisateur.")
+        return redirect('dashboard:index')
+
+    run = get_object_or_404(StatementRun.objects.select_related('lance_par'), pk=pk)
+    items = run.items.select_related('proprietaire', 'releve').order_by('statut', 'proprietaire__nom')
+
+    statut = request.GET.get('statut')
+    if statut:
+        items = items.filter(statut=statut)
+
+    context = {
+        'run': run,
+        'stats': run.progression(),
+        'items': items,
+        'statut': statut,
+        'statut_choices': run.items.model.STATUT_CHOICES,
+    }
+    return render(request, 'accounting/statement_run_detail.html', context)
+
+
+def _rapport_depenses(request):
+    """
+    Filtre de l'écran d'analyse et rapport correspondant
+
+    Returns:
+        tuple: (ExpenseFilter, période choisie ou None, ExpenseReport, filtre limité à la période)
+    """
+    filtre = ExpenseFilter(request.GET or None, queryset=Expense.objects.all())
+    if filtre.is_bound and filtre.is_valid():
+        donnees = {k: v for k, v in filtre.form.cleaned_data.items() if v not in (None, '')}
+        periode = donnees.get('periode')
+        date_debut, date_fin = filtre.plage()
+        rapport = ExpenseReport(filtre.qs, date_debut, date_fin)
+        return filtre, periode, rapport, bool(periode) and set(donnees) == {'periode'}
+
+    # Par défaut: année en cours
+    today = timezone.now().date()
+    return filtre, None, ExpenseReport(date_debut=date(today.year, 1, 1), date_fin=today), False
+
+
+@login_required
+def expense_analytics_view(request):
+    """
+    Analyse des dépenses: répartitions par catégorie, résidence, fournisseur
+    et mois, budget prévu / réalisé et déclarations fiscales de la période
+    """
+    if request.user.user_type not in ['manager', 'accountant']:
+        messages.error(request, "Accès non autorisé pour ce type d'utilisateur.")
+        return redirect('dashboard:index')
+
+    filtre, periode, rapport, periode_seule = _rapport_depenses(request)
+    if periode_seule:
+        # Mis en cache pour les périodes clôturées
+        synthese = rapport_periode(periode)
+    else:
+        synthese = rapport.synthese()
+        if periode:
+            synthese['budget'] = rapport.budget_vs_reel(periode)
+
+    context = {
+        'filtre': filtre,
+        'periode': periode,
+        'synthese': synthese,
+        'declarations': periode.declarations_fiscales.all() if periode else [],
+        'querystring': request.GET.urlencode(),
+    }
+    return render(request, 'accounting/expense_analytics.html', context)
+
+
+@login_required
+def expense_analytics_export_view(request):
+    """
+    Export CSV en flux de l'analyse des dépenses
+
+    ?vue=detail (défaut), categorie, residence, fournisseur, mois ou budget,
+    avec les mêmes filtres que l'écran d'analyse.
+    """
+    if request.user.user_type not in ['manager', 'accountant']:
+        messages.error(request, "Accès non autorisé pour ce type d'utilisateur.")
+        return redirect('dashboard:index')
+
+    _, periode, rapport, _ = _rapport_depenses(request)
+    vue = request.GET.get('vue', 'detail')
+    intitules = {'categorie': 'Catégorie', 'residence': 'Résidence', 'fournisseur': 'Fournisseur'}
+
+    if vue == 'detail':
+        entetes, lignes = ENTETES_DEPENSES, lignes_depenses(rapport.depenses)
+    elif vue in intitules:
+        entetes = [intitules[vue], 'Montant', 'Nombre de dépenses']
+        lignes = ([l['libelle'], l['montant'], l['nb_depenses']] for l in getattr(rapport, f'par_{vue}')())
+    elif vue == 'mois':
+        entetes = ['Mois', 'Montant', 'Nombre de dépenses']
+        lignes = ([f"{l['mois']:%m/%Y}", l['montant'], l['nb_depenses']] for l in rapport.par_mois())
+    elif vue == 'budget' and periode:
+        entetes = ['Catégorie', 'Résidence', 'Prévu', 'Réalisé', 'Écart', 'Taux (%)']
+        lignes = (
+            [l['libelle'], l['residence'] or 'Toutes', l['prevu'], l['reel'], l['ecart'], '' if l['taux'] is None else l['taux']]
+            for l in rapport.budget_vs_reel(periode)
+        )
+    else:
+        messages.error(request, "Export indisponible pour ces critères.")
+        return redirect('accounting:expense_analytics')
+
+    response = StreamingHttpResponse(flux_csv(entetes, lignes), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="depenses_{vue}_{timezone.now().date()}.csv"'
+    return response
+
+
+@login_required
+@require_POST
+def tax_declarations_prepare_view(request, pk):
+    """Calcule (ou recalcule) les déclarations TVA et IS d'une période"""
+    if request.user.user_type not in ['manager', 'accountant']:
+        messages.error(request, "Accès non autorisé pour ce type d'utilisateur.")
+        return redirect('dashboard:index')
+
+    periode = get_object_or_404(AccountingPeriod, pk=pk)
+    base, declarations = preparer_declarations(periode)
+    messages.success(
+        request,
+        f"{len(declarations)} déclaration(s) préparée(s) pour {periode.nom} "
+        f"(résultat fiscal: {base['resultat_fiscal']} FCFA)."
+    )
+    return redirect(f"{reverse('accounting:expense_analytics')}?periode={periode.pk}")
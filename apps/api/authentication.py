@@ -1 +1,125 @@
- 
+# apps/api/authentication.py
+"""
+Classes d'authentification DRF pour l'API
+
+- APITokenAuthentication : en-tête "Authorization: Bearer <token>"
+- APIKeyAuthentication   : en-tête "X-API-Key: <clé>"
+
+Les recherches passent par un cache à courte durée de vie indexé par le hash
+du token, et les compteurs d'utilisation sont écrits en base par lots
+(voir apps.api.utils.buffer_usage) : un client d'intégration qui fait des
+milliers d'appels par heure ne coûte plus un SELECT + un UPDATE par appel.
+
+Configuration (settings.py):
+    REST_FRAMEWORK = {
+        'DEFAULT_AUTHENTICATION_CLASSES': [
+            'apps.api.authentication.APITokenAuthentication',
+            'apps.api.authentication.APIKeyAuthentication',
+            'rest_framework.authentication.SessionAuthentication',
+        ],
+    }
+"""
+
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from apps.api.models.models import APIKey, APIToken
+from apps.api.utils import (
+    API_AUTH_CACHE_TTL,
+    api_key_cache_key,
+    buffer_usage,
+    get_client_ip,
+    hash_token,
+    ip_in_whitelist,
+    token_cache_key,
+)
+
+
+# Valeur mise en cache pour un token/une clé inconnu(e), afin que les
+# requêtes répétées avec un identifiant invalide ne touchent pas la base
+_INVALID = 'invalid'
+
+
+def _cached_lookup(cache_key, loader):
+    """Retourne l'instance en cache, ou la charge et la met en cache"""
+    instance = cache.get(cache_key)
+    if instance is None:
+        instance = loader() or _INVALID
+        cache.set(cache_key, instance, API_AUTH_CACHE_TTL)
+    return None if instance == _INVALID else instance
+
+
+class APITokenAuthentication(BaseAuthentication):
+    """Authentification par token (seul le hash SHA-256 est stocké)"""
+
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("En-tête d'autorisation invalide.")
+
+        try:
+            raw_token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Token invalide.")
+
+        return self.authenticate_credentials(raw_token)
+
+    def authenticate_credentials(self, raw_token):
+        token_hash = hash_token(raw_token)
+
+        token = _cached_lookup(
+            token_cache_key(token_hash),
+            lambda: APIToken.objects.select_related('user').filter(
+                token_hash=token_hash
+            ).first()
+        )
+
+        if token is None or not token.is_valid:
+            raise exceptions.AuthenticationFailed("Token invalide ou expiré.")
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("Utilisateur inactif.")
+
+        buffer_usage(APIToken, token.pk)
+
+        return (token.user, token)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class APIKeyAuthentication(BaseAuthentication):
+    """Authentification par clé API avec liste blanche IP"""
+
+    header = 'HTTP_X_API_KEY'
+
+    def authenticate(self, request):
+        key = request.META.get(self.header)
+        if not key:
+            return None
+
+        api_key = _cached_lookup(
+            api_key_cache_key(key),
+            lambda: APIKey.objects.select_related('user').filter(key=key).first()
+        )
+
+        if api_key is None or not api_key.is_active or api_key.is_expired:
+            raise exceptions.AuthenticationFailed("Clé API invalide ou expirée.")
+
+        if not api_key.user.is_active:
+            raise exceptions.AuthenticationFailed("Utilisateur inactif.")
+
+        if not ip_in_whitelist(get_client_ip(request), api_key.ip_whitelist):
+            raise exceptions.AuthenticationFailed("Adresse IP non autorisée pour cette clé.")
+
+        buffer_usage(APIKey, api_key.pk, counter_field='nombre_utilisations')
+
+        return (api_key.user, api_key)
+
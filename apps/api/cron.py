@@ -0,0 +1,13 @@
+# apps/api/cron.py
+from django_cron import CronJobBase, Schedule
+
+
+class FlushAPIUsageCronJob(CronJobBase):
+    RUN_EVERY_MINS = 5  # API_USAGE_FLUSH_INTERVAL
+
+    schedule = Schedule(run_every_mins=RUN_EVERY_MINS)
+    code = 'api.flush_api_usage'
+
+    def do(self):
+        from apps.api.utils import flush_pending_usage
+        flush_pending_usage()
@@ -99,6 +99,15 @@ class APIKey(BaseModel):
         if not self.key:
             self.key = self.generate_api_key()
         super().save(*args, **kwargs)
+
+        # Les authentifications en cache doivent voir la nouvelle version
+        from apps.api.utils import invalidate_api_key_cache
+        invalidate_api_key_cache(self.key)
+    
+    def delete(self, *args, **kwargs):
+        from apps.api.utils import invalidate_api_key_cache
+        invalidate_api_key_cache(self.key)
+        return super().delete(*args, **kwargs)
     
     def __str__(self):
         return f"{self.nom} ({self.user.username})"
@@ -119,21 +128,18 @@ class APIKey(BaseModel):
         return timezone.now() > self.date_expiration
     
     def can_access_ip(self, ip_address):
-        """Vérifie si l'IP peut utiliser cette clé"""
-        if not self.ip_whitelist:
-            return True
-        return ip_address in self.ip_whitelist
+        """Vérifie si l'IP peut utiliser cette clé (adresses et réseaux CIDR)"""
+        from apps.api.utils import ip_in_whitelist
+        return ip_in_whitelist(ip_address, self.ip_whitelist)
     
     def has_permission(self, permission):
         """Vérifie si la clé a une permission spécifique"""
         return permission in self.permissions or 'all' in self.permissions
     
     def record_usage(self):
-        """Enregistre une utilisation de la clé"""
-        from django.utils import timezone
-        self.nombre_utilisations += 1
-        self.derniere_utilisation = timezone.now()
-        self.save(update_fields=['nombre_utilisations', 'derniere_utilisation'])
+        """Enregistre une utilisation de la clé (écrite en base par lots)"""
+        from apps.api.utils import buffer_usage
+        buffer_usage(APIKey, self.pk, counter_field='nombre_utilisations')
 
 
 class APIRequest(BaseModel):
@@ -574,9 +580,44 @@ class APIToken(BaseModel):
             models.Index(fields=['is_active', 'is_revoked']),
         ]
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        # Les authentifications en cache doivent voir la nouvelle version
+        from apps.api.utils import invalidate_token_cache
+        invalidate_token_cache(self.token_hash)
+    
+    def delete(self, *args, **kwargs):
+        from apps.api.utils import invalidate_token_cache
+        invalidate_token_cache(self.token_hash)
+        return super().delete(*args, **kwargs)
+    
     def __str__(self):
         return f"Token {self.nom or 'sans nom'} - {self.user.username}"
     
+    @classmethod
+    def create_token(cls, user, nom='', scopes=None, validite=None, **kwargs):
+        """
+        Crée un token et retourne (token, token_brut)
+        
+        Seul le hash est stocké: le token brut doit être transmis au client
+        immédiatement, il ne pourra plus être retrouvé.
+        """
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.api.utils import generate_raw_token, hash_token
+        
+        raw_token = generate_raw_token()
+        token = cls.objects.create(
+            user=user,
+            token_hash=hash_token(raw_token),
+            nom=nom,
+            scopes=scopes or [],
+            date_expiration=timezone.now() + (validite or timedelta(days=30)),
+            **kwargs
+        )
+        return token, raw_token
+    
     @property
     def is_expired(self):
         """Vérifie si le token a expiré"""
@@ -600,10 +641,9 @@ class APIToken(BaseModel):
         return scope in self.scopes or 'all' in self.scopes
     
     def record_usage(self):
-        """Enregistre une utilisation du token"""
-        from django.utils import timezone
-        self.derniere_utilisation = timezone.now()
-        self.save(update_fields=['derniere_utilisation'])
+        """Enregistre une utilisation du token (écrite en base par lots)"""
+        from apps.api.utils import buffer_usage
+        buffer_usage(APIToken, self.pk)
 
 
 class APIError(BaseModel):
@@ -1,3 +1,191 @@
-from django.test import TestCase
+"""
+Tests pour l'authentification API
+"""
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework import exceptions
+
+from apps.api.authentication import APIKeyAuthentication, APITokenAuthentication
+from apps.api.models.models import APIKey, APIToken
+from apps.api.utils import flush_pending_usage, get_client_ip, hash_token, ip_in_whitelist
+
+from tests.factories import make_user
+
+
+class IPWhitelistTest(SimpleTestCase):
+    """Tests pour les listes blanches IP précompilées"""
+
+    def test_liste_vide_autorise_tout(self):
+        """Une liste blanche vide autorise toutes les IPs"""
+        self.assertTrue(ip_in_whitelist('196.1.95.10', []))
+
+    def test_adresse_exacte(self):
+        """Test d'une adresse présente dans la liste"""
+        self.assertTrue(ip_in_whitelist('196.1.95.10', ['196.1.95.10']))
+        self.assertFalse(ip_in_whitelist('196.1.95.11', ['196.1.95.10']))
+
+    def test_reseau_cidr(self):
+        """Test d'une adresse appartenant à un réseau CIDR"""
+        whitelist = ['10.0.0.0/24', '196.1.95.10']
+        self.assertTrue(ip_in_whitelist('10.0.0.42', whitelist))
+        self.assertFalse(ip_in_whitelist('10.0.1.42', whitelist))
+
+    def test_entrees_invalides(self):
+        """Les entrées et adresses invalides ne lèvent pas d'exception"""
+        self.assertFalse(ip_in_whitelist('pas-une-ip', ['10.0.0.1']))
+        self.assertTrue(ip_in_whitelist('10.0.0.1', ['n/importe', '10.0.0.1']))
+
+
+class HashTokenTest(SimpleTestCase):
+    """Tests pour le hachage des tokens"""
+
+    def test_hash_stable(self):
+        """Le hash est déterministe et tient dans token_hash (64 caractères)"""
+        self.assertEqual(hash_token('abc'), hash_token('abc'))
+        self.assertEqual(len(hash_token('abc')), 64)
+        self.assertNotEqual(hash_token('abc'), hash_token('abd'))
+
+
+class ClientIPTest(SimpleTestCase):
+    """Tests de l'adresse IP retenue pour la liste blanche"""
+
+    def make_request(self, remote_addr, forwarded_for=None):
+        extra = {'REMOTE_ADDR': remote_addr}
+        if forwarded_for:
+            extra['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        return RequestFactory().get('/api/', **extra)
+
+    def test_en_tete_ignore_sans_proxy_de_confiance(self):
+        """Sans proxy configuré, X-Forwarded-For (fourni par le client) est ignoré"""
+        request = self.make_request('203.0.113.7', '196.1.95.10')
+        self.assertEqual(get_client_ip(request), '203.0.113.7')
+
+    @override_settings(API_TRUSTED_PROXY_COUNT=1)
+    def test_entree_ajoutee_par_le_proxy(self):
+        """Derrière un proxy, l'entrée la plus à droite est celle qu'il a ajoutée"""
+        request = self.make_request('10.0.0.2', '196.1.95.10, 203.0.113.7')
+        self.assertEqual(get_client_ip(request), '203.0.113.7')
+        self.assertEqual(get_client_ip(self.make_request('10.0.0.2')), '10.0.0.2')
+
+
+class APIKeyAuthenticationTest(TestCase):
+    """Tests de l'authentification par clé API"""
+
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(
+            nom='Intégration', user=make_user('integration'), ip_whitelist=['196.1.95.0/24'],
+        )
+
+    def authenticate(self, remote_addr, forwarded_for=None, key=None):
+        extra = {'REMOTE_ADDR': remote_addr, 'HTTP_X_API_KEY': key or self.api_key.key}
+        if forwarded_for:
+            extra['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        return APIKeyAuthentication().authenticate(RequestFactory().get('/api/', **extra))
+
+    def test_liste_blanche_sur_adresse_reelle(self):
+        """Une adresse hors liste ne passe pas en usurpant X-Forwarded-For"""
+        user, api_key = self.authenticate('196.1.95.10')
+        self.assertEqual(api_key, self.api_key)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate('203.0.113.7', forwarded_for='196.1.95.10')
+
+    def test_recherche_en_cache(self):
+        """Les appels suivants ne lisent plus la clé en base, ni une clé inconnue"""
+        self.authenticate('196.1.95.10')
+        with self.assertNumQueries(0):
+            user, api_key = self.authenticate('196.1.95.11')
+        self.assertEqual(user.username, 'integration')
+
+        with self.assertNumQueries(1):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate('196.1.95.10', key='inconnue')
+        with self.assertNumQueries(0):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate('196.1.95.10', key='inconnue')
+
+        # Une clé désactivée est retirée du cache
+        self.api_key.is_active = False
+        self.api_key.save()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate('196.1.95.10')
+
+
+class APITokenAuthenticationTest(TestCase):
+    """Tests de l'authentification par token"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('client')
+        self.token, self.raw_token = APIToken.create_token(self.user, nom='Mobile')
+
+    def authenticate(self, raw_token=None):
+        request = RequestFactory().get('/api/', HTTP_AUTHORIZATION=f'Bearer {raw_token or self.raw_token}')
+        return APITokenAuthentication().authenticate(request)
+
+    def test_recherche_en_cache(self):
+        """Le premier appel lit le token en base, les suivants le cache"""
+        with self.assertNumQueries(2):  # lecture du token, première utilisation écrite
+            user, token = self.authenticate()
+        self.assertEqual((user, token), (self.user, self.token))
+
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual(user.username, 'client')
+
+        with self.assertNumQueries(1):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate('inconnu')
+        with self.assertNumQueries(0):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate('inconnu')
+
+    def test_token_revoque_ou_expire(self):
+        """Un token révoqué ou expiré est refusé, même déjà en cache"""
+        self.authenticate()
+        self.token.revoke()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate()
+
+        expire, raw_token = APIToken.create_token(self.user, validite=timedelta(days=-1))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(raw_token)
+
+    def test_utilisateur_inactif(self):
+        """Un token valide d'un utilisateur désactivé est refusé"""
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate()
+
+    def test_sans_en_tete(self):
+        """Sans en-tête Bearer, l'authentification passe la main"""
+        self.assertIsNone(APITokenAuthentication().authenticate(RequestFactory().get('/api/')))
+
+
+class APIUsageFlushTest(TestCase):
+    """Tests des compteurs d'utilisation écrits par lots"""
+
+    def setUp(self):
+        cache.clear()
+        self.api_key = APIKey.objects.create(nom='Intégration', user=make_user('integration'))
+        self.token, self.raw_token = APIToken.create_token(make_user('client'))
+
+    def test_utilisations_en_attente_ecrites_periodiquement(self):
+        """Les appels de la clé restent en cache puis sont écrits par la tâche périodique"""
+        request = RequestFactory().get('/api/', HTTP_X_API_KEY=self.api_key.key)
+        for _ in range(3):
+            APIKeyAuthentication().authenticate(request)
+        token_request = RequestFactory().get('/api/', HTTP_AUTHORIZATION=f'Bearer {self.raw_token}')
+        for _ in range(2):
+            APITokenAuthentication().authenticate(token_request)
+
+        self.api_key.refresh_from_db()
+        self.assertEqual(self.api_key.nombre_utilisations, 1)  # première utilisation seulement
+
+        self.assertEqual(flush_pending_usage(), 3)
+        self.api_key.refresh_from_db()
+        self.assertEqual(self.api_key.nombre_utilisations, 3)
+        self.assertEqual(flush_pending_usage(), 0)
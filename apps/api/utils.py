@@ -1 +1,236 @@
- 
+# apps/api/utils.py
+"""
+Utilitaires pour l'authentification API
+
+- Hachage des tokens (seul le hash est stocké en base)
+- Listes blanches IP précompilées en ensembles de réseaux
+- Compteurs d'utilisation mutualisés en cache puis écrits par lots
+"""
+
+import hashlib
+import ipaddress
+import secrets
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+
+# Durée de vie du cache des tokens/clés (secondes)
+API_AUTH_CACHE_TTL = getattr(settings, 'API_AUTH_CACHE_TTL', 60)
+
+# Écriture des compteurs en base toutes les N utilisations...
+API_USAGE_FLUSH_EVERY = getattr(settings, 'API_USAGE_FLUSH_EVERY', 100)
+
+# ... ou au plus tard après ce délai (secondes)
+API_USAGE_FLUSH_INTERVAL = getattr(settings, 'API_USAGE_FLUSH_INTERVAL', 300)
+
+
+def generate_raw_token(length=40):
+    """Génère un token brut (à transmettre une seule fois au client)"""
+    return secrets.token_urlsafe(length)
+
+
+def hash_token(raw_token):
+    """
+    Retourne le hash SHA-256 d'un token brut
+
+    Le hash (64 caractères hexadécimaux) est la seule forme stockée en base
+    et sert aussi de clé de cache : le token brut n'apparaît jamais ailleurs.
+    """
+    return hashlib.sha256(raw_token.encode('utf-8')).hexdigest()
+
+
+def token_cache_key(token_hash):
+    return f'api_token_{token_hash}'
+
+
+def api_key_cache_key(key):
+    return f'api_key_{hash_token(key)}'
+
+
+def invalidate_token_cache(token_hash):
+    """Retire un token du cache (révocation, modification)"""
+    cache.delete(token_cache_key(token_hash))
+
+
+def invalidate_api_key_cache(key):
+    """Retire une clé API du cache (désactivation, modification)"""
+    cache.delete(api_key_cache_key(key))
+
+
+# ============================================================================
+# LISTES BLANCHES IP
+# ============================================================================
+
+@lru_cache(maxsize=1024)
+def compile_ip_whitelist(entries):
+    """
+    Compile une liste blanche IP en structures de recherche rapides
+
+    Args:
+        entries (tuple): Adresses ('10.0.0.5') ou réseaux CIDR ('10.0.0.0/24')
+
+    Returns:
+        tuple: (frozenset d'adresses exactes, tuple de réseaux)
+    """
+    addresses = set()
+    networks = []
+
+    for entry in entries:
+        entry = str(entry).strip()
+        if not entry:
+            continue
+        try:
+            if '/' in entry:
+                networks.append(ipaddress.ip_network(entry, strict=False))
+            else:
+                addresses.add(ipaddress.ip_address(entry))
+        except ValueError:
+            # Entrée invalide: ignorée plutôt que de bloquer toute la clé
+            continue
+
+    return frozenset(addresses), tuple(networks)
+
+
+def ip_in_whitelist(ip_address, whitelist):
+    """
+    Vérifie si une IP appartient à une liste blanche
+
+    Une liste vide autorise toutes les IPs.
+    """
+    if not whitelist:
+        return True
+    if not ip_address:
+        return False
+
+    try:
+        ip = ipaddress.ip_address(ip_address)
+    except ValueError:
+        return False
+
+    addresses, networks = compile_ip_whitelist(tuple(whitelist))
+    if ip in addresses:
+        return True
+    return any(ip in network for network in networks)
+
+
+def get_client_ip(request):
+    """
+    Retourne l'adresse IP du client
+
+    X-Forwarded-For est fourni par le client: seules les entrées ajoutées
+    par nos propres proxys sont fiables. Derrière API_TRUSTED_PROXY_COUNT
+    proxys (0 par défaut: REMOTE_ADDR), l'adresse du client est la N-ième
+    entrée en partant de la droite. Une chaîne plus courte que le nombre de
+    proxys n'est pas passée par eux: REMOTE_ADDR fait foi.
+    """
+    nb_proxys = getattr(settings, 'API_TRUSTED_PROXY_COUNT', 0)
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if nb_proxys and x_forwarded_for:
+        chaine = [adresse.strip() for adresse in x_forwarded_for.split(',') if adresse.strip()]
+        if len(chaine) >= nb_proxys:
+            return chaine[-nb_proxys]
+    return request.META.get('REMOTE_ADDR')
+
+
+# ============================================================================
+# COMPTEURS D'UTILISATION MUTUALISÉS
+# ============================================================================
+
+def _usage_keys(model, pk):
+    prefix = f'api_usage_{model._meta.label_lower}_{pk}'
+    return f'{prefix}_count', f'{prefix}_flushed_at'
+
+
+def buffer_usage(model, pk, counter_field=None):
+    """
+    Enregistre une utilisation en cache et l'écrit en base par lots
+
+    Au lieu d'un UPDATE par requête, le compteur est incrémenté en cache et
+    n'est reporté en base qu'après API_USAGE_FLUSH_EVERY utilisations ou
+    API_USAGE_FLUSH_INTERVAL secondes.
+
+    Args:
+        model: Classe du modèle (APIKey, APIToken)
+        pk: Clé primaire de l'instance
+        counter_field (str): Champ compteur à incrémenter (optionnel)
+
+    Returns:
+        bool: True si les compteurs ont été écrits en base
+    """
+    count_key, flushed_key = _usage_keys(model, pk)
+
+    try:
+        pending = cache.incr(count_key)
+    except ValueError:
+        cache.set(count_key, 1, None)
+        pending = 1
+
+    now = timezone.now()
+    flushed_at = cache.get(flushed_key)
+    if flushed_at is None:
+        # Première utilisation depuis le démarrage: écrire immédiatement
+        # pour que derniere_utilisation ne reste pas vide
+        should_flush = True
+    else:
+        should_flush = (
+            pending >= API_USAGE_FLUSH_EVERY
+            or (now - flushed_at).total_seconds() >= API_USAGE_FLUSH_INTERVAL
+        )
+
+    if should_flush:
+        flush_usage(model, pk, counter_field=counter_field, now=now)
+    return should_flush
+
+
+def flush_usage(model, pk, counter_field=None, now=None):
+    """Écrit en base les utilisations en attente pour une instance (1 UPDATE)"""
+    count_key, flushed_key = _usage_keys(model, pk)
+    now = now or timezone.now()
+
+    pending = cache.get(count_key) or 0
+    if pending:
+        # Décrémenter plutôt que supprimer pour ne pas perdre les
+        # incréments concurrents arrivés entre la lecture et l'écriture
+        try:
+            cache.decr(count_key, pending)
+        except ValueError:
+            pass
+
+    cache.set(flushed_key, now, None)
+
+    updates = {'derniere_utilisation': now}
+    if counter_field and pending:
+        updates[counter_field] = F(counter_field) + pending
+
+    model.objects.filter(pk=pk).update(**updates)
+    return pending
+
+
+def flush_pending_usage(batch_size=500):
+    """
+    Écrit en base les utilisations en attente de toutes les clés et tokens
+
+    buffer_usage n'écrit qu'à l'utilisation suivante: sans cette tâche
+    périodique, les appels d'un client qui s'arrête resteraient en cache.
+    Seules les instances déjà utilisées (derniere_utilisation renseignée,
+    la première utilisation étant écrite immédiatement) sont lues, et leurs
+    compteurs en cache par lots de batch_size.
+
+    Returns:
+        int: nombre d'utilisations écrites en base
+    """
+    from apps.api.models.models import APIKey, APIToken
+
+    total = 0
+    for model, counter_field in ((APIKey, 'nombre_utilisations'), (APIToken, None)):
+        pks = list(model.objects.filter(derniere_utilisation__isnull=False).values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            keys = {_usage_keys(model, pk)[0]: pk for pk in pks[start:start + batch_size]}
+            for count_key, pending in cache.get_many(list(keys)).items():
+                if pending:
+                    total += flush_usage(model, keys[count_key], counter_field=counter_field)
+    return total
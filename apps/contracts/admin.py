@@ -4,7 +4,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import RentalContract, ContractWorkflow, DocumentContrat, HistoriqueWorkflow
+from .models import RentalContract, ContractWorkflow, DocumentContrat, HistoriqueWorkflow, WorkflowEtapeDuree
 
 
 @admin.register(RentalContract)
@@ -645,4 +645,27 @@ class HistoriqueWorkflowAdmin(admin.ModelAdmin):
             obj.etape_precedente,
             obj.etape_suivante
         )
-    transition_display.short_description = 'Transition'
\ No newline at end of file
+    transition_display.short_description = 'Transition'
+
+
+@admin.register(WorkflowEtapeDuree)
+class WorkflowEtapeDureeAdmin(admin.ModelAdmin):
+    """Durées d'étapes PMO (lecture seule: alimentées par les transitions)"""
+
+    list_display = ['workflow', 'etape', 'entree_le', 'sortie_le', 'duree_display']
+    list_filter = ['etape']
+    search_fields = ['workflow__contrat__numero_contrat']
+    list_select_related = ['workflow__contrat']
+    date_hierarchy = 'entree_le'
+
+    def duree_display(self, obj):
+        return obj.duree
+    duree_display.short_description = 'Durée'
+    duree_display.admin_order_field = 'duree_secondes'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
@@ -0,0 +1,32 @@
+# apps/contracts/management/commands/rebuild_workflow_timings.py
+"""
+Commande Django pour recalculer les durées d'étapes du workflow PMO
+Usage: python manage.py rebuild_workflow_timings
+
+Reprise depuis HistoriqueWorkflow: à lancer une fois après la mise en place
+du suivi, ou après une correction manuelle de l'historique.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.contracts.services import WorkflowStageStats, reconstruire_durees
+
+
+class Command(BaseCommand):
+    help = "Recalcule les durées d'étapes PMO depuis l'historique des transitions"
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("\n🔄 Recalcul des durées d'étapes PMO\n"))
+
+        nb_lignes = reconstruire_durees()
+        self.stdout.write(f'  ✓ {nb_lignes} durée(s) d\'étape enregistrée(s)')
+
+        self.stdout.write('\n' + '=' * 60)
+        for delai in WorkflowStageStats().par_etape():
+            alerte = ' ⚠️  goulot' if delai['goulot'] else ''
+            self.stdout.write(
+                f"{delai['libelle']}: médiane {delai['mediane_jours'] if delai['mediane_jours'] is not None else '-'} j, "
+                f"p90 {delai['p90_jours'] if delai['p90_jours'] is not None else '-'} j "
+                f"(cible {delai['sla_jours']} j){alerte}"
+            )
+        self.stdout.write('')
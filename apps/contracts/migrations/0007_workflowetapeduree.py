@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0006_rentalcontract_montant_tva_rentalcontract_taux_tva_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowEtapeDuree',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('etape', models.CharField(max_length=30, verbose_name='Étape')),
+                ('entree_le', models.DateTimeField(verbose_name="Entrée dans l'étape")),
+                ('sortie_le', models.DateTimeField(blank=True, null=True, verbose_name="Sortie de l'étape")),
+                ('duree_secondes', models.PositiveIntegerField(blank=True, null=True, verbose_name='Durée (secondes)')),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='durees_etapes', to='contracts.contractworkflow', verbose_name='Workflow')),
+            ],
+            options={
+                'verbose_name': "Durée d'étape PMO",
+                'verbose_name_plural': "Durées d'étapes PMO",
+                'ordering': ['workflow', 'entree_le'],
+                'indexes': [models.Index(fields=['etape', 'sortie_le'], name='contracts_w_etape_0bf41b_idx')],
+                'unique_together': {('workflow', 'etape')},
+            },
+        ),
+    ]
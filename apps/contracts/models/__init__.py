@@ -11,10 +11,12 @@ from .contract import RentalContract
 from .workflow import ContractWorkflow
 from .document import DocumentContrat
 from .history import HistoriqueWorkflow
+from .stage_timing import WorkflowEtapeDuree
 
 __all__ = [
     'RentalContract',
     'ContractWorkflow',
     'DocumentContrat',
     'HistoriqueWorkflow',
+    'WorkflowEtapeDuree',
 ]
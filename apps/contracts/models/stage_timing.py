@@ -0,0 +1,106 @@
+# apps/contracts/models/stage_timing.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from apps.core.models import TimestampedModel
+
+# Délai cible (jours) par étape du workflow PMO, surchargeable via settings.PMO_SLA_JOURS
+SLA_JOURS_DEFAUT = {
+    'verification_dossier': 3,
+    'attente_facture': 5,
+    'facture_validee': 2,
+    'redaction_contrat': 5,
+    'visite_entree': 7,
+    'remise_cles': 2,
+}
+
+
+def sla_etapes():
+    """Délais cibles par étape, en timedelta"""
+    jours = {**SLA_JOURS_DEFAUT, **getattr(settings, 'PMO_SLA_JOURS', {})}
+    return {etape: timedelta(days=nb) for etape, nb in jours.items()}
+
+
+class WorkflowEtapeDuree(TimestampedModel):
+    """
+    Temps passé par un workflow PMO dans chaque étape
+
+    Alimenté à chaque transition (HistoriqueWorkflow): la transition ferme
+    l'étape précédente et ouvre la suivante. L'étape finale « termine »
+    n'est pas chronométrée.
+    """
+
+    workflow = models.ForeignKey(
+        'contracts.ContractWorkflow',
+        on_delete=models.CASCADE,
+        related_name='durees_etapes',
+        verbose_name="Workflow"
+    )
+
+    etape = models.CharField(
+        max_length=30,
+        verbose_name="Étape"
+    )
+
+    entree_le = models.DateTimeField(
+        verbose_name="Entrée dans l'étape"
+    )
+
+    sortie_le = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Sortie de l'étape"
+    )
+
+    duree_secondes = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Durée (secondes)"
+    )
+
+    class Meta:
+        verbose_name = "Durée d'étape PMO"
+        verbose_name_plural = "Durées d'étapes PMO"
+        ordering = ['workflow', 'entree_le']
+        unique_together = [['workflow', 'etape']]
+        indexes = [
+            models.Index(fields=['etape', 'sortie_le']),
+        ]
+
+    def __str__(self):
+        return f"{self.workflow_id} - {self.etape} ({self.duree or 'en cours'})"
+
+    @property
+    def duree(self):
+        """Durée de l'étape (jusqu'à maintenant si elle est en cours)"""
+        if self.duree_secondes is not None:
+            return timedelta(seconds=self.duree_secondes)
+        return timezone.now() - self.entree_le
+
+    @property
+    def hors_delai(self):
+        sla = sla_etapes().get(self.etape)
+        return sla is not None and self.duree > sla
+
+    @classmethod
+    def enregistrer_transition(cls, workflow, etape_precedente, etape_suivante, date_transition):
+        """Ferme l'étape quittée et ouvre la suivante"""
+        etape = cls.objects.filter(workflow=workflow, etape=etape_precedente).first()
+        if etape is None:
+            # Étape ouverte avant la mise en place du suivi: entrée reprise de l'historique
+            entree = workflow.historique.filter(
+                etape_suivante=etape_precedente, date_transition__lt=date_transition
+            ).order_by('-date_transition').values_list('date_transition', flat=True).first()
+            etape = cls(workflow=workflow, etape=etape_precedente, entree_le=entree or workflow.created_at)
+        etape.sortie_le = date_transition
+        etape.duree_secondes = max(0, int((date_transition - etape.entree_le).total_seconds()))
+        etape.save()
+
+        if etape_suivante != 'termine':
+            cls.objects.update_or_create(
+                workflow=workflow, etape=etape_suivante,
+                defaults={'entree_le': date_transition, 'sortie_le': None, 'duree_secondes': None},
+            )
@@ -0,0 +1,179 @@
+# apps/contracts/services.py
+"""
+Statistiques du workflow PMO: répartition par étape et délais par étape
+
+- statistiques_workflows(): répartition par étape et statut de dossier en
+  une requête (agrégats conditionnels)
+- WorkflowStageStats: médiane, 90e centile et dépassements de délai cible
+  par étape, depuis la table WorkflowEtapeDuree
+"""
+
+import operator
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.contracts.models import ContractWorkflow, HistoriqueWorkflow, WorkflowEtapeDuree
+from apps.contracts.models.stage_timing import sla_etapes
+
+ETAPES = [code for code, _ in ContractWorkflow.ETAPE_CHOICES]
+ETAPES_CHRONOMETREES = [etape for etape in ETAPES if etape != 'termine']
+STATUTS_DOSSIER = [code for code, _ in ContractWorkflow.STATUT_DOSSIER_CHOICES]
+
+
+def statistiques_workflows(workflows=None):
+    """
+    Nombre de workflows par étape et par statut de dossier
+
+    Returns:
+        dict: total, une clé par étape, dossier_<statut> par statut de dossier
+    """
+    workflows = ContractWorkflow.objects.all() if workflows is None else workflows
+    agregats = {'total': Count('id')}
+    agregats.update({
+        etape: Count('id', filter=Q(etape_actuelle=etape)) for etape in ETAPES
+    })
+    agregats.update({
+        f'dossier_{statut}': Count('id', filter=Q(statut_dossier=statut)) for statut in STATUTS_DOSSIER
+    })
+    return workflows.order_by().aggregate(**agregats)
+
+
+def _centile(valeurs, pourcentage):
+    """Centile par interpolation linéaire sur une liste triée"""
+    if not valeurs:
+        return None
+    rang = (len(valeurs) - 1) * pourcentage / 100
+    bas = int(rang)
+    haut = min(bas + 1, len(valeurs) - 1)
+    return valeurs[bas] + (valeurs[haut] - valeurs[bas]) * (rang - bas)
+
+
+def _filtre_hors_delai(sla):
+    """Étapes en cours depuis plus longtemps que leur délai cible"""
+    maintenant = timezone.now()
+    filtre = reduce(operator.or_, (
+        Q(etape=etape, entree_le__lt=maintenant - delai) for etape, delai in sla.items()
+    ))
+    return Q(sortie_le__isnull=True) & filtre
+
+
+class WorkflowStageStats:
+    """
+    Délais par étape du workflow PMO
+
+    Args:
+        depuis: ne retenir que les étapes terminées après cette date
+                (défaut: 90 derniers jours)
+    """
+
+    def __init__(self, depuis=None):
+        self.depuis = depuis or timezone.now() - timedelta(days=90)
+        self.sla = sla_etapes()
+
+    def par_etape(self):
+        """
+        Médiane, 90e centile et dépassements par étape (deux requêtes)
+
+        Returns:
+            list: une entrée par étape chronométrée, dans l'ordre du workflow
+        """
+        durees = defaultdict(list)
+        for etape, secondes in WorkflowEtapeDuree.objects.filter(
+            sortie_le__gte=self.depuis, duree_secondes__isnull=False
+        ).order_by('etape', 'duree_secondes').values_list('etape', 'duree_secondes'):
+            durees[etape].append(secondes)
+
+        hors_delai = _filtre_hors_delai(self.sla)
+        en_cours = {
+            ligne['etape']: ligne
+            for ligne in WorkflowEtapeDuree.objects.filter(sortie_le__isnull=True)
+            .order_by().values('etape').annotate(
+                nb=Count('id'), nb_hors_delai=Count('id', filter=hors_delai)
+            )
+        }
+
+        resultats = []
+        for etape, libelle in ContractWorkflow.ETAPE_CHOICES:
+            if etape not in ETAPES_CHRONOMETREES:
+                continue
+            valeurs = durees.get(etape, [])
+            sla = self.sla.get(etape)
+            mediane = _centile(valeurs, 50)
+            p90 = _centile(valeurs, 90)
+            resultats.append({
+                'etape': etape,
+                'libelle': libelle,
+                'sla': sla,
+                'nb_terminees': len(valeurs),
+                'mediane': timedelta(seconds=mediane) if mediane is not None else None,
+                'p90': timedelta(seconds=p90) if p90 is not None else None,
+                'nb_terminees_hors_delai': (
+                    sum(1 for v in valeurs if v > sla.total_seconds()) if sla else 0
+                ),
+                'nb_en_cours': en_cours.get(etape, {}).get('nb', 0),
+                'nb_en_cours_hors_delai': en_cours.get(etape, {}).get('nb_hors_delai', 0),
+                'goulot': bool(sla and p90 is not None and p90 > sla.total_seconds()),
+                # En jours, pour l'affichage
+                'sla_jours': round(sla.total_seconds() / 86400, 1) if sla else None,
+                'mediane_jours': round(mediane / 86400, 1) if mediane is not None else None,
+                'p90_jours': round(p90 / 86400, 1) if p90 is not None else None,
+            })
+        return resultats
+
+    def etapes_hors_delai(self, limite=10):
+        """Étapes en cours au-delà du délai cible, les plus anciennes d'abord"""
+        return WorkflowEtapeDuree.objects.filter(
+            _filtre_hors_delai(self.sla)
+        ).select_related(
+            'workflow__contrat__locataire',
+            'workflow__contrat__appartement__residence',
+        ).order_by('entree_le')[:limite]
+
+
+def reconstruire_durees(workflows=None):
+    """
+    Recalcule les durées d'étapes depuis l'historique des transitions
+
+    Une requête pour l'historique, puis un remplacement en masse.
+
+    Returns:
+        int: nombre de lignes créées
+    """
+    workflows = ContractWorkflow.objects.all() if workflows is None else workflows
+    creations = dict(workflows.values_list('pk', 'created_at'))
+
+    transitions = defaultdict(list)
+    for workflow_id, precedente, suivante, date_transition in HistoriqueWorkflow.objects.filter(
+        workflow__in=workflows
+    ).order_by('workflow_id', 'date_transition', 'pk').values_list(
+        'workflow_id', 'etape_precedente', 'etape_suivante', 'date_transition'
+    ):
+        transitions[workflow_id].append((precedente, suivante, date_transition))
+
+    lignes = []
+    for workflow_id, created_at in creations.items():
+        ouvertes = {'verification_dossier': created_at}
+        fermees = {}
+        for precedente, suivante, date_transition in transitions.get(workflow_id, []):
+            entree = ouvertes.pop(precedente, None) or created_at
+            fermees[precedente] = (entree, date_transition)
+            if suivante != 'termine':
+                ouvertes[suivante] = date_transition
+                fermees.pop(suivante, None)
+        for etape, (entree, sortie) in fermees.items():
+            lignes.append(WorkflowEtapeDuree(
+                workflow_id=workflow_id, etape=etape, entree_le=entree, sortie_le=sortie,
+                duree_secondes=max(0, int((sortie - entree).total_seconds())),
+            ))
+        for etape, entree in ouvertes.items():
+            lignes.append(WorkflowEtapeDuree(workflow_id=workflow_id, etape=etape, entree_le=entree))
+
+    with transaction.atomic():
+        WorkflowEtapeDuree.objects.filter(workflow__in=workflows).delete()
+        WorkflowEtapeDuree.objects.bulk_create(lignes, batch_size=1000)
+    return len(lignes)
@@ -10,7 +10,7 @@ from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
 
-from .models import RentalContract, ContractWorkflow, DocumentContrat
+from .models import RentalContract, ContractWorkflow, DocumentContrat, HistoriqueWorkflow, WorkflowEtapeDuree
 import logging
 
 logger = logging.getLogger(__name__)
@@ -238,6 +238,33 @@ def check_workflow_completion(sender, instance, created, **kwargs):
                 logger.info(f"Workflow {instance.pk}: Dossier marqu� comme complet")
 
 
+@receiver(post_save, sender=ContractWorkflow)
+def start_workflow_stage_timing(sender, instance, created, **kwargs):
+    """
+    Ouvre le chronométrage de la première étape d'un nouveau workflow
+    """
+    if created and instance.etape_actuelle != 'termine':
+        WorkflowEtapeDuree.objects.get_or_create(
+            workflow=instance,
+            etape=instance.etape_actuelle,
+            defaults={'entree_le': instance.created_at}
+        )
+
+
+@receiver(post_save, sender=HistoriqueWorkflow)
+def track_workflow_stage_timing(sender, instance, created, **kwargs):
+    """
+    Ferme l'étape quittée et ouvre la suivante à chaque transition
+    """
+    if created:
+        WorkflowEtapeDuree.enregistrer_transition(
+            instance.workflow,
+            instance.etape_precedente,
+            instance.etape_suivante,
+            instance.date_transition
+        )
+
+
 # ============================================================================
 # SIGNALS DOCUMENT CONTRACT
 # ============================================================================
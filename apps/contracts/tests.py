@@ -1,3 +1,109 @@
+"""
+Tests pour le module des contrats
+"""
+from datetime import date, timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.contracts.models import HistoriqueWorkflow, WorkflowEtapeDuree
+from apps.contracts.services import (
+    WorkflowStageStats, reconstruire_durees, statistiques_workflows,
+)
+
+from tests.factories import make_appartement, make_contract, make_residence, make_tiers
+
+
+class PMOWorkflowStatsTest(TestCase):
+    """Tests des statistiques et délais du workflow PMO"""
+
+    def setUp(self):
+        residence = make_residence()
+        locataire = make_tiers('Fall')
+        self.workflows = [
+            make_contract(
+                make_appartement(residence, f'A{i}'), locataire,
+                statut='brouillon', date_debut=date(2025, 1, 1),
+            ).workflow
+            for i in range(5)
+        ]
+
+    def transition(self, workflow, precedente, suivante):
+        workflow.etape_actuelle = suivante
+        workflow.save(update_fields=['etape_actuelle'])
+        return HistoriqueWorkflow.objects.create(
+            workflow=workflow, etape_precedente=precedente, etape_suivante=suivante
+        )
+
+    def test_statistiques_en_une_requete(self):
+        """Test de la répartition par étape et statut de dossier"""
+        self.transition(self.workflows[0], 'verification_dossier', 'attente_facture')
+
+        with self.assertNumQueries(1):
+            stats = statistiques_workflows()
+
+        self.assertEqual(stats['total'], 5)
+        self.assertEqual(stats['verification_dossier'], 4)
+        self.assertEqual(stats['attente_facture'], 1)
+        self.assertEqual(stats['termine'], 0)
+        self.assertEqual(stats['dossier_en_cours'], 5)
+
+    def test_transition_chronometree(self):
+        """Test qu'une transition ferme l'étape quittée et ouvre la suivante"""
+        workflow = self.workflows[0]
+        WorkflowEtapeDuree.objects.filter(workflow=workflow).update(
+            entree_le=timezone.now() - timedelta(days=2)
+        )
+
+        self.transition(workflow, 'verification_dossier', 'attente_facture')
+
+        verification = WorkflowEtapeDuree.objects.get(workflow=workflow, etape='verification_dossier')
+        self.assertIsNotNone(verification.sortie_le)
+        self.assertAlmostEqual(verification.duree_secondes, 2 * 86400, delta=60)
+        attente = WorkflowEtapeDuree.objects.get(workflow=workflow, etape='attente_facture')
+        self.assertIsNone(attente.sortie_le)
+
+    def test_mediane_centile_et_hors_delai(self):
+        """Test de la médiane, du 90e centile et des dépassements par étape"""
+        maintenant = timezone.now()
+        for workflow, jours in zip(self.workflows, [1, 2, 3, 4, 10]):
+            WorkflowEtapeDuree.objects.filter(workflow=workflow).update(
+                entree_le=maintenant - timedelta(days=jours),
+                sortie_le=maintenant,
+                duree_secondes=jours * 86400,
+            )
+        # Une étape en cours depuis 8 jours (délai cible: 5 jours)
+        WorkflowEtapeDuree.objects.create(
+            workflow=self.workflows[0], etape='attente_facture',
+            entree_le=maintenant - timedelta(days=8),
+        )
+
+        with self.assertNumQueries(2):
+            delais = {d['etape']: d for d in WorkflowStageStats().par_etape()}
+
+        verification = delais['verification_dossier']
+        self.assertEqual(verification['nb_terminees'], 5)
+        self.assertEqual(verification['mediane'], timedelta(days=3))
+        self.assertEqual(verification['p90_jours'], 7.6)
+        self.assertEqual(verification['nb_terminees_hors_delai'], 2)
+        self.assertTrue(verification['goulot'])
+        self.assertEqual(delais['attente_facture']['nb_en_cours_hors_delai'], 1)
+        self.assertEqual(list(WorkflowStageStats().etapes_hors_delai()), [
+            WorkflowEtapeDuree.objects.get(workflow=self.workflows[0], etape='attente_facture')
+        ])
+
+    def test_reconstruction_depuis_historique(self):
+        """Test du recalcul des durées depuis l'historique des transitions"""
+        workflow = self.workflows[0]
+        self.transition(workflow, 'verification_dossier', 'attente_facture')
+        self.transition(workflow, 'attente_facture', 'facture_validee')
+        WorkflowEtapeDuree.objects.all().delete()
+
+        reconstruire_durees()
 
-# Create your tests here.
+        etapes = dict(
+            WorkflowEtapeDuree.objects.filter(workflow=workflow).values_list('etape', 'sortie_le')
+        )
+        self.assertEqual(set(etapes), {'verification_dossier', 'attente_facture', 'facture_validee'})
+        self.assertIsNone(etapes['facture_validee'])
+        self.assertEqual(WorkflowEtapeDuree.objects.filter(sortie_le__isnull=True).count(), 5)
@@ -4,7 +4,6 @@ Vues pour le module PMO (Project Management Office)
 Gestion du workflow de traitement des contrats
 """
 
-from datetime import timedelta
 from dateutil.relativedelta import relativedelta
 
 from django.shortcuts import render, redirect, get_object_or_404
@@ -16,6 +15,7 @@ from django.db.models import Q
 from django.utils import timezone
 
 from ..models import ContractWorkflow, DocumentContrat, RentalContract
+from ..services import WorkflowStageStats, statistiques_workflows
 from ..forms import (
     DocumentUploadForm, VisitePlanificationForm, EtatLieuxUploadForm,
     RemiseClesForm, WorkflowFilterForm, WorkflowNotesForm, WorkflowCreateForm
@@ -339,37 +339,18 @@ class PMODashboardView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Statistiques globales
-        total_workflows = ContractWorkflow.objects.count()
-
-        context['stats'] = {
-            'total': total_workflows,
-            'verification_dossier': ContractWorkflow.objects.filter(etape_actuelle='verification_dossier').count(),
-            'attente_facture': ContractWorkflow.objects.filter(etape_actuelle='attente_facture').count(),
-            'facture_validee': ContractWorkflow.objects.filter(etape_actuelle='facture_validee').count(),
-            'redaction_contrat': ContractWorkflow.objects.filter(etape_actuelle='redaction_contrat').count(),
-            'visite_entree': ContractWorkflow.objects.filter(etape_actuelle='visite_entree').count(),
-            'remise_cles': ContractWorkflow.objects.filter(etape_actuelle='remise_cles').count(),
-            'termine': ContractWorkflow.objects.filter(etape_actuelle='termine').count(),
-
-            # Statuts dossiers
-            'dossier_complet': ContractWorkflow.objects.filter(statut_dossier='complet').count(),
-            'dossier_incomplet': ContractWorkflow.objects.filter(statut_dossier='incomplet').count(),
-            'dossier_en_cours': ContractWorkflow.objects.filter(statut_dossier='en_cours').count(),
-        }
+        # Statistiques globales: étapes et statuts de dossier en une requête
+        context['stats'] = statistiques_workflows()
+
+        # Délais par étape (médiane, 90e centile, dépassements du délai cible)
+        stage_stats = WorkflowStageStats()
+        context['delais_etapes'] = stage_stats.par_etape()
 
         # Formulaire de filtres
         context['filter_form'] = WorkflowFilterForm(self.request.GET)
 
-        # Workflows urgents (en attente depuis plus de 7 jours)
-        sept_jours_avant = timezone.now() - timedelta(days=7)
-        context['workflows_urgents'] = ContractWorkflow.objects.filter(
-            created_at__lte=sept_jours_avant,
-            etape_actuelle__in=['verification_dossier', 'attente_facture']
-        ).select_related(
-            'contrat__appartement__residence__proprietaire',
-            'contrat__locataire'
-        )[:5]
+        # Workflows urgents: étape en cours au-delà de son délai cible
+        context['etapes_hors_delai'] = stage_stats.etapes_hors_delai(limite=5)
 
         return context
 
@@ -0,0 +1,320 @@
+# apps/core/data_generator.py
+"""
+Générateur de données synthétiques à l'échelle de la production
+
+Toutes les insertions passent par bulk_create (aucun save() par ligne, donc
+ni signaux ni generate_unique_reference). Les références sont dérivées d'un
+préfixe de lot pour pouvoir générer plusieurs lots dans la même base.
+
+Utilisé par:
+    - python manage.py generate_demo_data (données de charge / capacité)
+    - tests.factories.seed_portfolio (tests de budget de requêtes)
+"""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+User = get_user_model()
+
+DEFAULT_PASSWORD = 'demo12345'
+
+QUARTIERS = ['Plateau', 'Almadies', 'Mermoz', 'Ouakam', 'Point E', 'Sacré-Cœur', 'Liberté 6']
+TYPES_BIEN = ['studio', 'f2', 'f3', 'f4', 'duplex']
+TYPES_TRAVAIL = ['plomberie', 'electricite', 'peinture', 'climatisation', 'serrurerie']
+PRIORITES = ['basse', 'normale', 'normale', 'haute', 'urgente']
+MOYENS_PAIEMENT = ['especes', 'virement', 'orange_money', 'wave', 'cheque']
+
+
+def month_start(day, months_back=0):
+    """Premier jour du mois situé months_back mois avant day"""
+    year, month = day.year, day.month - months_back
+    while month <= 0:
+        month += 12
+        year -= 1
+    return date(year, month, 1)
+
+
+def month_end(day):
+    """Dernier jour du mois de day"""
+    return month_start(day.replace(day=28) + timedelta(days=4)) - timedelta(days=1)
+
+
+def generate_portfolio(nb_residences=50, appartements_par_residence=10, mois_historique=12,
+                       nb_proprietaires=None, nb_techniciens=10, nb_comptables=2,
+                       travaux_par_residence=5, taux_occupation=0.8, taux_paiement=0.85,
+                       notifications=True, prefix='DEMO', password=DEFAULT_PASSWORD,
+                       batch_size=1000, seed=42, log=None):
+    """
+    Génère un portefeuille complet et cohérent
+
+    Pour chaque appartement occupé: un contrat actif couvrant la période
+    d'historique et un contrat expiré antérieur, une facture de loyer par mois,
+    un paiement pour ~taux_paiement des factures. Travaux répartis sur les
+    techniciens, demandes d'achat sur un tiers des travaux, notifications
+    de paiement et d'assignation.
+
+    Comptes créés (mot de passe commun `password`):
+        {prefix}_manager, {prefix}_compta_N, tech_{prefix}_N
+
+    Returns:
+        dict: utilisateurs clés et nombre d'objets créés par modèle
+    """
+    from apps.accounting.ledger import reconstruire_cumuls
+    from apps.contracts.models import RentalContract
+    from apps.maintenance.models.travail import Travail
+    from apps.payments.models.invoice import Invoice
+    from apps.payments.models.payment import Payment
+    from apps.properties.models.appartement import Appartement
+    from apps.properties.models.residence import Residence
+    from apps.properties.occupancy import reconstruire_historique, refresh_residence_occupancy
+    from apps.tiers.models import Tiers, TiersBien
+
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    today = timezone.now().date()
+    now = timezone.now()
+    tag = prefix.upper()
+    nb_proprietaires = nb_proprietaires or max(1, nb_residences // 4)
+
+    def bulk(model, objs):
+        created = model.objects.bulk_create(objs, batch_size=batch_size)
+        log(f"{model._meta.verbose_name_plural}: {len(created)}")
+        return created
+
+    with transaction.atomic():
+        # ---------------------------------------------------------------
+        # Utilisateurs (un seul hachage de mot de passe pour tous)
+        # ---------------------------------------------------------------
+        hashed = make_password(password)
+        user_specs = [(f'{tag.lower()}_manager', 'manager', True)]
+        user_specs += [(f'{tag.lower()}_compta_{i}', 'accountant', True) for i in range(nb_comptables)]
+        # Préfixe 'tech_' : reconnu par les vues mobiles employé
+        user_specs += [(f'tech_{tag.lower()}_{i}', 'employe', False) for i in range(nb_techniciens)]
+        users = bulk(User, [
+            User(
+                username=username, password=hashed, user_type=user_type, is_staff=is_staff,
+                email=f'{username}@example.com', first_name=username.split('_')[0].title(),
+                last_name=username.split('_')[-1],
+            )
+            for username, user_type, is_staff in user_specs
+        ])
+        manager = users[0]
+        comptables = users[1:1 + nb_comptables]
+        techniciens = users[1 + nb_comptables:]
+
+        # ---------------------------------------------------------------
+        # Propriétaires, résidences, mandats de gestion
+        # ---------------------------------------------------------------
+        proprietaires = bulk(Tiers, [
+            Tiers(
+                reference=f'{tag}-P{i:06d}', nom=f'Proprietaire{i}', prenom='Demo',
+                type_tiers='proprietaire', telephone='+221770000000',
+                email=f'proprio{i}.{tag.lower()}@example.com', adresse='Dakar',
+            )
+            for i in range(nb_proprietaires)
+        ])
+
+        residences = bulk(Residence, [
+            Residence(
+                reference=f'{tag}-R{i:06d}', nom=f'Résidence {tag} {i:04d}',
+                adresse=f'{i} Rue {tag}', quartier=rng.choice(QUARTIERS),
+                nb_appartements_total=appartements_par_residence,
+                proprietaire=proprietaires[i % nb_proprietaires],
+            )
+            for i in range(nb_residences)
+        ])
+
+        # Ce que ferait le signal post_save de Residence
+        bulk(TiersBien, [
+            TiersBien(
+                tiers=residence.proprietaire, residence=residence, type_contrat='gestion',
+                date_debut=month_start(today, mois_historique + 12), statut='en_cours',
+            )
+            for residence in residences
+        ])
+
+        # ---------------------------------------------------------------
+        # Appartements et locataires
+        # ---------------------------------------------------------------
+        appartements = []
+        for r, residence in enumerate(residences):
+            for j in range(appartements_par_residence):
+                loyer = Decimal(rng.randrange(100, 800) * 1000)
+                appartements.append(Appartement(
+                    reference=f'{tag}-A{r:05d}{j:03d}', nom=f'Appt {j + 1}',
+                    residence=residence, etage=j // 4, type_bien=rng.choice(TYPES_BIEN),
+                    statut_occupation='occupe' if rng.random() < taux_occupation else 'libre',
+                    loyer_base=loyer, base_rent=loyer,
+                    depot_garantie=loyer * 2, security_deposit=loyer * 2,
+                ))
+        appartements = bulk(Appartement, appartements)
+        # bulk_create contourne Appartement.save(): compteurs recalculés en une fois
+        refresh_residence_occupancy([residence.pk for residence in residences])
+        occupes = [a for a in appartements if a.statut_occupation == 'occupe']
+
+        locataires = bulk(Tiers, [
+            Tiers(
+                reference=f'{tag}-L{i:06d}', nom=f'Locataire{i}', prenom='Demo',
+                type_tiers='locataire', telephone='+221780000000',
+                email=f'locataire{i}.{tag.lower()}@example.com', adresse='Dakar',
+            )
+            for i in range(len(occupes))
+        ])
+
+        # ---------------------------------------------------------------
+        # Contrats (actif + historique)
+        # ---------------------------------------------------------------
+        debut_actif = month_start(today, mois_historique)
+        contrats = []
+        for i, (appartement, locataire) in enumerate(zip(occupes, locataires)):
+            contrats.append(RentalContract(
+                numero_contrat=f'{tag}-CA{i:06d}', appartement=appartement, locataire=locataire,
+                date_debut=debut_actif, date_fin=debut_actif + timedelta(days=730),
+                duree_mois=24, loyer_mensuel=appartement.loyer_base,
+                depot_garantie=appartement.depot_garantie, statut='actif',
+                date_signature=debut_actif, signe_par_locataire=True, signe_par_bailleur=True,
+            ))
+            contrats.append(RentalContract(
+                numero_contrat=f'{tag}-CH{i:06d}', appartement=appartement, locataire=locataire,
+                date_debut=debut_actif - timedelta(days=365),
+                date_fin=debut_actif - timedelta(days=1),
+                duree_mois=12, loyer_mensuel=appartement.loyer_base,
+                depot_garantie=appartement.depot_garantie, statut='expire',
+            ))
+        contrats = bulk(RentalContract, contrats)
+        contrats_actifs = [c for c in contrats if c.statut == 'actif']
+        nb_periodes = reconstruire_historique(
+            Appartement.objects.filter(reference__startswith=f'{tag}-A'), aujourd_hui=today
+        )
+
+        # ---------------------------------------------------------------
+        # Factures mensuelles et paiements
+        # ---------------------------------------------------------------
+        factures = []
+        for i, contrat in enumerate(contrats_actifs):
+            for m in range(mois_historique):
+                debut = month_start(today, mois_historique - 1 - m)
+                echeance = debut + timedelta(days=4)
+                factures.append(Invoice(
+                    numero_facture=f'{tag}-FL{i:06d}{m:03d}', contrat=contrat,
+                    type_facture='loyer', periode_debut=debut, periode_fin=month_end(debut),
+                    date_emission=debut, date_echeance=echeance,
+                    montant_ht=contrat.loyer_mensuel, montant_ttc=contrat.loyer_mensuel,
+                    statut='emise' if echeance >= today else 'en_retard',
+                    description=f'Loyer {debut.strftime("%m/%Y")}',
+                ))
+
+        paiements = []
+        for i, facture in enumerate(factures):
+            if rng.random() < taux_paiement:
+                facture.statut = 'payee'
+                paiements.append(Payment(
+                    numero_paiement=f'{tag}-PAY{i:08d}', facture=facture,
+                    montant=facture.montant_ttc,
+                    date_paiement=facture.date_echeance + timedelta(days=rng.randrange(-4, 15)),
+                    moyen_paiement=rng.choice(MOYENS_PAIEMENT), statut='valide',
+                    valide_par=rng.choice(comptables) if comptables else manager,
+                    date_validation=now,
+                ))
+        factures = bulk(Invoice, factures)
+        paiements = bulk(Payment, paiements)
+        # bulk_create contourne les signaux du grand livre: cumuls recalculés sur la plage
+        if paiements:
+            reconstruire_cumuls(
+                min(p.date_paiement for p in paiements), max(p.date_paiement for p in paiements)
+            )
+
+        # ---------------------------------------------------------------
+        # Travaux et demandes d'achat
+        # ---------------------------------------------------------------
+        apparts_par_residence = {}
+        for appartement in appartements:
+            apparts_par_residence.setdefault(appartement.residence_id, []).append(appartement)
+
+        travaux = []
+        for r, residence in enumerate(residences):
+            for k in range(travaux_par_residence):
+                statut = rng.choice(['signale', 'assigne', 'en_cours', 'complete', 'complete'])
+                technicien = None if statut == 'signale' or not techniciens else rng.choice(techniciens)
+                signale_le = now - timedelta(days=rng.randrange(0, 30 * max(1, mois_historique)))
+                debut = signale_le + timedelta(hours=rng.randrange(6, 72)) if statut in ['en_cours', 'complete'] else None
+                travaux.append(Travail(
+                    numero_travail=f'{tag}-T{r:05d}{k:03d}', titre=f'Intervention {k + 1}',
+                    nature='reactif', type_travail=rng.choice(TYPES_TRAVAIL),
+                    priorite=rng.choice(PRIORITES), statut=statut,
+                    residence=residence,
+                    appartement=rng.choice(apparts_par_residence[residence.pk]),
+                    assigne_a=technicien, cree_par=manager,
+                    date_signalement=signale_le,
+                    date_prevue=signale_le + timedelta(days=rng.randrange(1, 10)),
+                    date_assignation=signale_le + timedelta(hours=rng.randrange(1, 24)) if technicien else None,
+                    date_debut=debut,
+                    date_fin=debut + timedelta(hours=rng.randrange(1, 8)) if statut == 'complete' else None,
+                    duree_estimee=timedelta(hours=rng.choice([1, 2, 4])),
+                ))
+        travaux = bulk(Travail, travaux)
+
+        demandes = bulk(Invoice, [
+            Invoice(
+                numero_facture=f'{tag}-FA{i:07d}', type_facture='demande_achat', is_manual=True,
+                montant_ht=Decimal(rng.randrange(5, 200) * 1000),
+                montant_ttc=Decimal(rng.randrange(5, 200) * 1000),
+                date_emission=travail.date_signalement.date(),
+                date_echeance=travail.date_signalement.date() + timedelta(days=30),
+                etape_workflow=rng.choice(['en_attente', 'valide_responsable', 'approuve', 'recue', 'paye']),
+                demandeur=travail.assigne_a or manager,
+                date_demande=travail.date_signalement.date(),
+                travail_lie=travail,
+            )
+            for i, travail in enumerate(travaux[::3])
+        ])
+
+        # ---------------------------------------------------------------
+        # Notifications
+        # ---------------------------------------------------------------
+        nb_notifications = 0
+        if notifications:
+            from apps.notifications.models import Notification
+
+            notifs = [
+                Notification(
+                    destinataire=travail.assigne_a, type_notification='intervention_assigned',
+                    canal='app', message=f'Travail {travail.numero_travail} assigné',
+                    statut='envoye', date_envoi=travail.date_assignation,
+                )
+                for travail in travaux if travail.assigne_a_id
+            ]
+            notifs += [
+                Notification(
+                    destinataire=manager, type_notification='payment_received', canal='app',
+                    message=f'Paiement {paiement.numero_paiement} reçu', statut='envoye',
+                    date_envoi=now,
+                )
+                for paiement in paiements[:: max(1, len(paiements) // 500 or 1)]
+            ]
+            nb_notifications = len(bulk(Notification, notifs))
+
+    return {
+        'manager': manager,
+        'comptables': comptables,
+        'techniciens': techniciens,
+        'counts': {
+            'utilisateurs': len(users),
+            'proprietaires': len(proprietaires),
+            'residences': len(residences),
+            'appartements': len(appartements),
+            'locataires': len(locataires),
+            'contrats': len(contrats),
+            'periodes_occupation': nb_periodes,
+            'factures': len(factures) + len(demandes),
+            'paiements': len(paiements),
+            'travaux': len(travaux),
+            'notifications': nb_notifications,
+        },
+    }
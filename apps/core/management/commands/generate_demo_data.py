@@ -0,0 +1,104 @@
+# apps/core/management/commands/generate_demo_data.py
+"""
+Commande Django pour générer un jeu de données synthétique à grande échelle
+Usage: python manage.py generate_demo_data --residences 500 --appartements 12 --mois 12
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.data_generator import DEFAULT_PASSWORD, generate_portfolio
+
+
+class Command(BaseCommand):
+    help = 'Génère un portefeuille synthétique réaliste (bulk_create) pour les tests de charge'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--residences', type=int, default=50,
+                            help='Nombre de résidences (défaut: 50)')
+        parser.add_argument('--appartements', type=int, default=10,
+                            help='Appartements par résidence (défaut: 10)')
+        parser.add_argument('--mois', type=int, default=12,
+                            help="Mois d'historique de facturation (défaut: 12)")
+        parser.add_argument('--proprietaires', type=int, default=None,
+                            help='Nombre de propriétaires (défaut: résidences / 4)')
+        parser.add_argument('--techniciens', type=int, default=10,
+                            help='Nombre de techniciens (défaut: 10)')
+        parser.add_argument('--comptables', type=int, default=2,
+                            help='Nombre de comptables (défaut: 2)')
+        parser.add_argument('--travaux', type=int, default=5,
+                            help='Travaux par résidence (défaut: 5)')
+        parser.add_argument('--occupation', type=float, default=0.8,
+                            help="Taux d'occupation entre 0 et 1 (défaut: 0.8)")
+        parser.add_argument('--sans-notifications', action='store_true',
+                            help='Ne pas générer de notifications')
+        parser.add_argument('--prefix', default='DEMO',
+                            help='Préfixe des références et identifiants (un par lot)')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD,
+                            help='Mot de passe commun des comptes générés')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Taille des lots bulk_create (défaut: 1000)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Graine aléatoire (jeu reproductible)')
+        parser.add_argument('--force', action='store_true',
+                            help='Autoriser la génération avec DEBUG=False')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'DEBUG=False: utilisez --force pour générer des données de démonstration'
+            )
+        if not 0 <= options['occupation'] <= 1:
+            raise CommandError("--occupation doit être compris entre 0 et 1")
+
+        prefix = options['prefix']
+        self.stdout.write(self.style.SUCCESS(
+            f"\n🏗️  Génération du lot {prefix}: {options['residences']} résidences × "
+            f"{options['appartements']} appartements, {options['mois']} mois d'historique\n"
+        ))
+
+        start = time.perf_counter()
+        try:
+            result = generate_portfolio(
+                nb_residences=options['residences'],
+                appartements_par_residence=options['appartements'],
+                mois_historique=options['mois'],
+                nb_proprietaires=options['proprietaires'],
+                nb_techniciens=options['techniciens'],
+                nb_comptables=options['comptables'],
+                travaux_par_residence=options['travaux'],
+                taux_occupation=options['occupation'],
+                notifications=not options['sans_notifications'],
+                prefix=prefix,
+                password=options['password'],
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+                log=lambda message: self.stdout.write(f'  ✓ {message}'),
+            )
+        except Exception as e:
+            raise CommandError(
+                f'Génération interrompue (préfixe {prefix} déjà utilisé ?): {e}'
+            )
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(self.style.SUCCESS('📊 RÉSUMÉ'))
+        self.stdout.write('=' * 60)
+        for label, count in result['counts'].items():
+            self.stdout.write(f'  {label:<15} {count:>10}')
+        self.stdout.write(f'\n⏱️  Durée: {elapsed:.1f}s')
+
+        self.stdout.write('\n🔑 Comptes (mot de passe commun):')
+        self.stdout.write(f"  Manager:     {result['manager'].username}")
+        for user in result['comptables']:
+            self.stdout.write(f'  Comptable:   {user.username}')
+        if result['techniciens']:
+            self.stdout.write(
+                f"  Techniciens: {result['techniciens'][0].username} … "
+                f"{result['techniciens'][-1].username}"
+            )
+        self.stdout.write(
+            f'\n💡 Test de charge: python load_test.py --prefix {prefix} --password <mot de passe>\n'
+        )
@@ -16,6 +16,7 @@ import json
 # Imports des modèles
 from apps.properties.models.residence import Residence
 from apps.properties.models.appartement import Appartement
+from apps.properties.occupancy import portfolio_occupancy
 from apps.contracts.models import RentalContract
 from apps.payments.models.invoice import Invoice
 from apps.payments.models.payment import Payment
@@ -58,21 +59,15 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         
         # === STATISTIQUES PRINCIPALES ===
         
-        # Résidences et appartements
-        total_residences = Residence.objects.count()
-        total_appartements = Appartement.objects.count()
-        appartements_libres = Appartement.objects.filter(
-            statut_occupation__in=['libre', 'available']
-        ).count()
-        appartements_occupes = Appartement.objects.filter(
-            statut_occupation__in=['occupe', 'occupied']
-        ).count()
+        # Résidences et appartements (compteurs d'occupation, une requête)
+        occupation = portfolio_occupancy()
+        total_residences = occupation['total_residences']
+        total_appartements = occupation['total_appartements']
+        appartements_libres = occupation['total_libres']
+        appartements_occupes = occupation['total_occupes']
         
         # Taux d'occupation
-        taux_occupation = round(
-            (appartements_occupes / total_appartements * 100) if total_appartements > 0 else 0,
-            1
-        )
+        taux_occupation = occupation['taux_occupation']
         
         # Contrats
         total_contrats = RentalContract.objects.count()
@@ -235,38 +230,30 @@ class PropertiesOverviewView(LoginRequiredMixin, TemplateView):
         appartements = Appartement.objects.select_related('residence').all()
 
         # Statistiques globales
-        total_appartements = appartements.count()
-        appartements_libres = appartements.filter(statut_occupation__in=['libre', 'available']).count()
-        appartements_occupes = appartements.filter(statut_occupation__in=['occupe', 'occupied']).count()
-        taux_occupation = round((appartements_occupes / total_appartements * 100) if total_appartements > 0 else 0, 1)
+        occupation = portfolio_occupancy()
 
         # Préparer les données des résidences avec leurs statistiques
         residences_data = []
         for residence in residences:
-            res_appartements = residence.appartements.all()
-            total_appts = res_appartements.count()
-            occupes = res_appartements.filter(statut_occupation__in=['occupe', 'occupied']).count()
-            taux = round((occupes / total_appts * 100) if total_appts > 0 else 0, 1)
-
             residences_data.append({
                 'id': residence.id,
                 'nom': residence.nom,
                 'adresse': residence.adresse,
                 'ville': residence.ville,
                 'quartier': residence.quartier,
-                'total_appartements': total_appts,
-                'taux_occupation': taux,
-                'appartements': res_appartements,
+                'total_appartements': residence.nb_appartements,
+                'taux_occupation': round(float(residence.taux_occupation), 1),
+                'appartements': residence.appartements.all(),
             })
 
         context.update({
             'residences_data': residences_data,
             'all_appartements': appartements,  # Tous les appartements pour section séparée
-            'total_residences': residences.count(),
-            'total_appartements': total_appartements,
-            'appartements_libres': appartements_libres,
-            'appartements_occupes': appartements_occupes,
-            'taux_occupation': taux_occupation,
+            'total_residences': occupation['total_residences'],
+            'total_appartements': occupation['total_appartements'],
+            'appartements_libres': occupation['total_libres'],
+            'appartements_occupes': occupation['total_occupes'],
+            'taux_occupation': occupation['taux_occupation'],
         })
 
         return context
@@ -673,16 +660,11 @@ def residence_stats_api(request, residence_id):
     """API pour les stats d'une résidence"""
     try:
         residence = get_object_or_404(Residence, id=residence_id)
-        appartements = residence.appartements.all()
         
         stats = {
-            'total_appartements': appartements.count(),
-            'appartements_libres': appartements.filter(
-                statut_occupation__in=['libre', 'available']
-            ).count(),
-            'appartements_occupes': appartements.filter(
-                statut_occupation__in=['occupe', 'occupied']
-            ).count(),
+            'total_appartements': residence.nb_appartements,
+            'appartements_libres': residence.nb_appartements_libres,
+            'appartements_occupes': residence.nb_appartements_occupes,
         }
         
         return JsonResponse({'success': True, 'stats': stats})
@@ -714,19 +696,13 @@ def update_appartement_status(request, appartement_id):
 def residences_dashboard_stats(request):
     """API pour les stats du dashboard des résidences"""
     try:
+        occupation = portfolio_occupancy()
         stats = {
-            'total_residences': Residence.objects.count(),
-            'total_appartements': Appartement.objects.count(),
-            'taux_occupation': 0
+            'total_residences': occupation['total_residences'],
+            'total_appartements': occupation['total_appartements'],
+            'taux_occupation': occupation['taux_occupation'],
         }
         
-        total = stats['total_appartements']
-        if total > 0:
-            occupes = Appartement.objects.filter(
-                statut_occupation__in=['occupe', 'occupied']
-            ).count()
-            stats['taux_occupation'] = round((occupes / total) * 100, 1)
-        
         return JsonResponse({'success': True, 'stats': stats})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
@@ -1467,8 +1443,68 @@ def export_appartements(request):
 
 @login_required
 def rapport_occupation(request):
-    """Rapport d'occupation"""
-    return render(request, 'dashboard/reports/occupation.html')
+    """
+    Rapport d'occupation sur une année: jours de vacance, taux d'occupation
+    mensuel et manque à gagner, par résidence et par propriétaire
+
+    Calculé sur l'historique d'occupation (une requête par regroupement).
+    """
+    if request.user.user_type not in ['manager', 'accountant']:
+        messages.error(request, "Accès non autorisé pour ce type d'utilisateur.")
+        return redirect('dashboard:index')
+
+    from apps.properties.services import OccupancyAnalytics
+
+    today = timezone.now().date()
+    try:
+        annee = int(request.GET.get('annee', today.year))
+    except ValueError:
+        annee = today.year
+    annee = min(max(annee, 2000), today.year)
+    proprietaire_id = request.GET.get('proprietaire', '')
+    proprietaire_id = int(proprietaire_id) if proprietaire_id.isdigit() else None
+
+    analytics = OccupancyAnalytics(datetime(annee, 1, 1).date(), datetime(annee, 12, 31).date())
+    filtres = Q(residence__proprietaire_id=proprietaire_id) if proprietaire_id else None
+
+    stats_residences = analytics.resume('residence', filtres)
+    residences = Residence.objects.select_related('proprietaire').filter(
+        pk__in=stats_residences
+    ).order_by('nom')
+    residences_data = [
+        {'residence': residence, **stats_residences[residence.pk]} for residence in residences
+    ]
+
+    stats_proprietaires = analytics.resume('proprietaire', filtres)
+    proprietaires_data = sorted(
+        (
+            {'proprietaire': proprietaire, **stats_proprietaires[proprietaire.pk]}
+            for proprietaire in Tiers.objects.filter(pk__in=stats_proprietaires)
+        ),
+        key=lambda ligne: ligne['loyer_perdu'],
+        reverse=True,
+    )
+
+    totaux = {
+        cle: sum(ligne[cle] for ligne in residences_data)
+        for cle in ['jours_occupes', 'jours_vacants', 'jours_maintenance', 'jours_exploitables', 'loyer_perdu']
+    }
+    totaux['taux_occupation'] = (
+        round(totaux['jours_occupes'] * 100 / totaux['jours_exploitables'], 1)
+        if totaux['jours_exploitables'] else 0
+    )
+
+    context = {
+        'annee': annee,
+        'annees': range(today.year - 4, today.year + 1),
+        'proprietaire_id': proprietaire_id,
+        'proprietaires': Tiers.objects.filter(type_tiers='proprietaire').order_by('nom'),
+        'residences_data': residences_data,
+        'proprietaires_data': proprietaires_data,
+        'evolution': analytics.evolution_mensuelle(filtres),
+        'totaux': totaux,
+    }
+    return render(request, 'dashboard/reports/occupation.html', context)
 
 
 # ============================================================================
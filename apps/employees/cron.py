@@ -0,0 +1,13 @@
+# apps/employees/cron.py
+from django_cron import CronJobBase, Schedule
+
+
+class MaterialiserTachesRecurrentesCronJob(CronJobBase):
+    RUN_AT_TIMES = ['02:15']
+
+    schedule = Schedule(run_at_times=RUN_AT_TIMES)
+    code = 'employees.materialiser_taches_recurrentes'
+
+    def do(self):
+        from django.core.management import call_command
+        call_command('materialiser_taches_recurrentes')
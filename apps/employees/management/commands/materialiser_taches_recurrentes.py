@@ -0,0 +1,43 @@
+# apps/employees/management/commands/materialiser_taches_recurrentes.py
+"""
+Commande Django pour planifier les occurrences des tâches récurrentes
+Usage: python manage.py materialiser_taches_recurrentes [--jours 90] [--dry-run]
+
+À exécuter chaque nuit: les occurrences de l'horizon glissant sont créées
+d'avance, sans attendre la clôture de l'occurrence précédente. Idempotente.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.employees.recurrence import materialiser_taches
+from apps.maintenance.recurrence import horizon_par_defaut
+
+
+class Command(BaseCommand):
+    help = 'Crée les occurrences à venir des tâches récurrentes sur un horizon glissant'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jours',
+            type=int,
+            default=None,
+            help='Horizon de planification en jours (défaut: MAINTENANCE_HORIZON_RECURRENCE_JOURS, 90)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compter les occurrences à créer sans rien enregistrer'
+        )
+
+    def handle(self, *args, **options):
+        jours = options['jours'] or horizon_par_defaut()
+        count = materialiser_taches(horizon_jours=jours, simulation=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'🔍 {count} occurrence(s) à créer sur {jours} jours'))
+        elif count:
+            self.stdout.write(self.style.SUCCESS(f'✅ {count} occurrence(s) planifiée(s) sur {jours} jours'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Tâches récurrentes déjà planifiées sur {jours} jours'))
+
+        return f'{count} occurrences'
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_merge_20251025_1430'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='date_occurrence',
+            field=models.DateField(blank=True, help_text="Identifie l'occurrence dans sa série", null=True, verbose_name="Date d'occurrence"),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='serie',
+            field=models.ForeignKey(blank=True, help_text="Tâche récurrente d'origine de cette occurrence", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='employees.task', verbose_name='Série récurrente'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('serie__isnull', False)), fields=('serie', 'date_occurrence'), name='tache_occurrence_unique'),
+        ),
+    ]
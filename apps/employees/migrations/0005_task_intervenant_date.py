@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_task_recurrence_series'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigne_a', 'date_prevue'], name='employees_t_assigne_ac5858_idx'),
+        ),
+    ]
@@ -35,6 +35,7 @@ urlpatterns = [
 
     # === PLANNING MOBILE ===
     path('schedule/', views.my_schedule_mobile, name='schedule'),
+    path('api/stats/', views.my_stats_api, name='stats_api'),
 
     # === PROFIL ET SÉCURITÉ ===
     path('profil/', views.employee_profile_mobile, name='profil'),
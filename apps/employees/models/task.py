@@ -140,6 +140,23 @@ class Task(BaseModel):
         verbose_name="Fin de récurrence"
     )
     
+    serie = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='occurrences',
+        verbose_name="Série récurrente",
+        help_text="Tâche récurrente d'origine de cette occurrence"
+    )
+    
+    date_occurrence = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Date d'occurrence",
+        help_text="Identifie l'occurrence dans sa série"
+    )
+    
     # Résultats
     commentaire = models.TextField(
         verbose_name="Commentaire de l'employé",
@@ -161,6 +178,14 @@ class Task(BaseModel):
             models.Index(fields=['date_prevue']),
             models.Index(fields=['priorite']),
             models.Index(fields=['type_tache']),
+            models.Index(fields=['assigne_a', 'date_prevue']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['serie', 'date_occurrence'],
+                condition=models.Q(serie__isnull=False),
+                name='tache_occurrence_unique',
+            ),
         ]
     
     def __str__(self):
@@ -202,48 +227,40 @@ class Task(BaseModel):
         if temps_passe:
             self.temps_passe = temps_passe
         self.save()
+    
+    def regle_rrule(self):
+        """Règle de récurrence de la série (None si la tâche n'est pas récurrente)"""
+        from apps.maintenance.recurrence import regle
         
-        # Générer la prochaine occurrence si récurrente
-        if self.is_recurrente:
-            self.generate_next_occurrence()
+        if not self.is_recurrente or not self.recurrence_type:
+            return None
+        return regle(self.recurrence_type, self.date_prevue, self.recurrence_fin)
     
     def generate_next_occurrence(self):
-        """Génère la prochaine occurrence pour les tâches récurrentes"""
-        from datetime import timedelta
-        from django.utils import timezone
+        """
+        Crée (si besoin) l'occurrence suivant cette tâche dans sa série
         
-        if not self.is_recurrente or not self.recurrence_type:
-            return
+        Les occurrences à venir sont normalement créées par la commande
+        materialiser_taches_recurrentes; cette méthode est idempotente.
+        """
+        from django.utils import timezone
+        from apps.employees.recurrence import occurrence_tache
         
-        # Calculer la prochaine date
-        if self.recurrence_type == 'quotidien':
-            next_date = self.date_prevue + timedelta(days=1)
-        elif self.recurrence_type == 'hebdomadaire':
-            next_date = self.date_prevue + timedelta(weeks=1)
-        elif self.recurrence_type == 'mensuel':
-            next_date = self.date_prevue + timedelta(days=30)
-        else:
-            return
+        racine = self.serie or self
+        regle_serie = racine.regle_rrule()
+        if regle_serie is None:
+            return None
         
-        # Vérifier si on n'a pas dépassé la date de fin
-        if self.recurrence_fin and next_date.date() > self.recurrence_fin:
-            return
+        next_date = regle_serie.after(timezone.localtime(self.date_prevue))
+        if next_date is None:
+            return None
         
-        # Créer la nouvelle tâche
-        Task.objects.create(
-            titre=self.titre,
-            description=self.description,
-            type_tache=self.type_tache,
-            bien=self.bien,
-            assigne_a=self.assigne_a,
-            cree_par=self.cree_par,
-            date_prevue=next_date,
-            duree_estimee=self.duree_estimee,
-            priorite=self.priorite,
-            is_recurrente=self.is_recurrente,
-            recurrence_type=self.recurrence_type,
-            recurrence_fin=self.recurrence_fin,
-        )
+        existante = racine.occurrences.filter(date_occurrence=next_date.date()).first()
+        if existante:
+            return existante
+        nouvelle = occurrence_tache(racine, next_date)
+        nouvelle.save()
+        return nouvelle
 
 
 class TaskMedia(BaseModel):
@@ -0,0 +1,70 @@
+# apps/employees/recurrence.py
+"""
+Récurrence des tâches (même moteur que les travaux: apps.maintenance.recurrence)
+
+Une tâche récurrente sans série est la racine; materialiser_taches() crée
+en bulk_create les occurrences de l'horizon glissant, identifiées par
+(serie, date_occurrence) pour rester idempotent.
+"""
+
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.employees.models.task import Task
+from apps.maintenance.recurrence import dates_a_venir, fenetre
+
+
+def series_taches():
+    """Racines des séries de tâches récurrentes encore actives"""
+    return Task.objects.filter(
+        is_recurrente=True, serie__isnull=True, recurrence_type__isnull=False,
+    ).exclude(recurrence_type='').filter(
+        Q(recurrence_fin__isnull=True) | Q(recurrence_fin__gte=timezone.localdate()),
+    ).exclude(statut='annule')
+
+
+def occurrence_tache(racine, date_prevue):
+    """Occurrence (non enregistrée) d'une série de tâches à une date"""
+    return Task(
+        serie=racine,
+        date_occurrence=date_prevue.date(),
+        date_prevue=date_prevue,
+        titre=racine.titre,
+        description=racine.description,
+        type_tache=racine.type_tache,
+        bien_id=racine.bien_id,
+        assigne_a_id=racine.assigne_a_id,
+        cree_par_id=racine.cree_par_id,
+        duree_estimee=racine.duree_estimee,
+        priorite=racine.priorite,
+        is_recurrente=True,
+        recurrence_type=racine.recurrence_type,
+        recurrence_fin=racine.recurrence_fin,
+    )
+
+
+def materialiser_taches(horizon_jours=None, maintenant=None, series=None, simulation=False):
+    """
+    Crée les occurrences manquantes des séries de tâches sur l'horizon
+
+    Returns:
+        int: nombre d'occurrences créées (ou à créer en simulation)
+    """
+    debut, fin = fenetre(horizon_jours, maintenant)
+    series = list(series_taches() if series is None else series)
+    existantes = set(
+        Task.objects.filter(
+            serie__in=[racine.pk for racine in series],
+            date_occurrence__range=[debut.date(), fin.date()],
+        ).values_list('serie_id', 'date_occurrence')
+    )
+
+    nouvelles = []
+    for racine in series:
+        for date_prevue in dates_a_venir(racine.regle_rrule(), timezone.localtime(racine.date_prevue), debut, fin):
+            if (racine.pk, date_prevue.date()) not in existantes:
+                nouvelles.append(occurrence_tache(racine, date_prevue))
+
+    if nouvelles and not simulation:
+        Task.objects.bulk_create(nouvelles, batch_size=500, ignore_conflicts=True)
+    return len(nouvelles)
@@ -1,3 +1,97 @@
-from django.test import TestCase
+"""
+Tests pour le module employés
+"""
+import json
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from apps.employees.models import Task
+from apps.employees.recurrence import materialiser_taches
+from apps.employees.views import my_stats_api
+from apps.maintenance.operations import changer_statut_travaux
+from apps.maintenance.resume import resume_intervenant
+
+from tests.factories import make_travail, make_user
+
+
+class RecurrenceTachesTest(TestCase):
+    """Tests de la récurrence calendaire des tâches"""
+
+    def test_materialisation_calendaire_et_idempotente(self):
+        """Test: mensuel du 30 → 28 février puis 30 mars, sans doublon à la relance"""
+        debut = timezone.make_aware(timezone.datetime(2025, 1, 30, 10, 0))
+        tache = Task.objects.create(
+            titre='Ménage hall', type_tache='menage', assigne_a=make_user('awa', user_type='employe'),
+            date_prevue=debut, is_recurrente=True, recurrence_type='mensuel',
+        )
+
+        self.assertEqual(materialiser_taches(horizon_jours=60, maintenant=debut), 2)
+        self.assertEqual(materialiser_taches(horizon_jours=60, maintenant=debut), 0)
+
+        dates = list(tache.occurrences.order_by('date_occurrence').values_list('date_occurrence', flat=True))
+        self.assertEqual(dates, [date(2025, 2, 28), date(2025, 3, 30)])
+        self.assertEqual(tache.generate_next_occurrence().date_occurrence, date(2025, 2, 28))
+
+
+class ResumeIntervenantTest(TestCase):
+    """Tests du résumé mobile d'un intervenant"""
+
+    def setUp(self):
+        cache.clear()
+        self.technicien = make_user('tech_modou', user_type='technicien')
+        maintenant = timezone.now()
+        self.en_retard = make_travail(
+            'Fuite cuisine', assigne_a=self.technicien, statut='assigne', date_prevue=maintenant - timedelta(days=2),
+        )
+        self.en_cours = make_travail(
+            'Prise HS', assigne_a=self.technicien, statut='en_cours', date_prevue=maintenant + timedelta(days=3),
+        )
+        self.a_venir = make_travail(
+            'Peinture hall', assigne_a=self.technicien, statut='planifie', date_prevue=maintenant + timedelta(days=2),
+        )
+        make_travail('Sans date', assigne_a=self.technicien, statut='signale')
+        make_travail('Terminé', assigne_a=self.technicien, statut='complete', date_fin=maintenant)
+        make_travail('Autre technicien', assigne_a=make_user('tech_awa', user_type='technicien'), statut='assigne')
+
+    def test_compteurs_et_prochains_en_deux_requetes(self):
+        """Test: un agrégat et une tranche, puis le cache jusqu'à la modification d'un travail"""
+        with self.assertNumQueries(2):
+            resume = resume_intervenant(self.technicien)
+        with self.assertNumQueries(0):
+            resume_intervenant(self.technicien)
+
+        self.assertEqual(resume['en_retard'], 1)
+        self.assertEqual(resume['en_attente'], 3)
+        self.assertEqual(resume['en_cours'], 1)
+        self.assertEqual(resume['a_venir'], 2)
+        self.assertEqual(resume['termines_semaine'], 1)
+        self.assertEqual(resume['termines_aujourd_hui'], 1)
+        self.assertEqual(
+            [travail.titre for travail in resume['prochains']],
+            ['Prise HS', 'Fuite cuisine', 'Peinture hall', 'Sans date'],
+        )
+
+        # Modification unitaire (signal) puis action groupée
+        self.a_venir.statut = 'en_cours'
+        self.a_venir.save()
+        self.assertEqual(resume_intervenant(self.technicien)['en_cours'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            changer_statut_travaux([self.en_cours], 'complete')
+        self.assertEqual(resume_intervenant(self.technicien)['termines_aujourd_hui'], 2)
+
+    def test_api_statistiques_servie_par_le_cache(self):
+        """Test de l'API mobile: résumé partagé avec le tableau de bord"""
+        request = RequestFactory().get('/employees/mobile/api/stats/')
+        request.user = self.technicien
+        resume_intervenant(self.technicien)
+
+        with self.assertNumQueries(0):
+            response = my_stats_api(request)
+
+        donnees = json.loads(response.content)
+        self.assertEqual(donnees['stats']['en_retard'], 1)
+        self.assertEqual(len(donnees['next_jobs']), 4)
+        self.assertEqual(donnees['next_jobs'][0]['statut'], 'en_cours')
@@ -11,6 +11,7 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 from datetime import timedelta, datetime, date
 import base64
+import json
 
 from apps.employees.models.employee import Employee
 from apps.notifications.utils import notify_task_assigned_with_email
@@ -18,6 +19,12 @@ from apps.notifications.utils import notify_task_assigned_with_email
 # ✅ IMPORTS CORRECTS SELON LES MODÈLES EXISTANTS
 from .models.task import Task, TaskMedia
 from apps.maintenance.models.intervention import Intervention, InterventionMedia
+from apps.maintenance.calendrier import (
+    evenement_tache, fenetre_calendrier, fenetre_semaine, par_jour, taches_planifiees, travaux_planifies,
+)
+from apps.maintenance.dispatch import PlanDeCharge
+from apps.maintenance.journal import avec_acteur
+from apps.maintenance.resume import COMPTEURS, resume_intervenant
 from django.views.decorators.csrf import csrf_exempt
 
 # ✅ FORMS CORRECTS
@@ -199,39 +206,15 @@ def task_complete(request, task_id):
 
 
 def create_recurrent_task_manual(task):
-    """Créer la prochaine occurrence d'une tâche récurrente - FONCTION MANUELLE"""
+    """
+    Créer la prochaine occurrence d'une tâche récurrente
+
+    Dates calendaires (moteur RRULE) et idempotent: si la commande
+    materialiser_taches_recurrentes l'a déjà créée, elle est simplement renvoyée.
+    """
     if not task.is_recurrente or not task.recurrence_type:
-        return
-    
-    # Calculer la prochaine date
-    if task.recurrence_type == 'quotidien':
-        next_date = task.date_prevue + timedelta(days=1)
-    elif task.recurrence_type == 'hebdomadaire':
-        next_date = task.date_prevue + timedelta(weeks=1)
-    elif task.recurrence_type == 'mensuel':
-        next_date = task.date_prevue + timedelta(days=30)
-    else:
-        return
-    
-    # Vérifier si on n'a pas dépassé la date de fin
-    if task.recurrence_fin and next_date.date() > task.recurrence_fin:
-        return
-    
-    # Créer la nouvelle tâche
-    Task.objects.create(
-        titre=task.titre,
-        description=task.description,
-        type_tache=task.type_tache,
-        bien=task.bien,
-        assigne_a=task.assigne_a,
-        cree_par=task.cree_par,
-        date_prevue=next_date,
-        duree_estimee=task.duree_estimee,
-        priorite=task.priorite,
-        is_recurrente=task.is_recurrente,
-        recurrence_type=task.recurrence_type,
-        recurrence_fin=task.recurrence_fin,
-    )
+        return None
+    return task.generate_next_occurrence()
 
 
 @login_required
@@ -247,20 +230,13 @@ def planning_view(request):
         messages.error(request, "Vous n'avez pas l'autorisation d'accéder à cette page.")
         return redirect('dashboard:index')
     
-    # Récupérer les tâches de la semaine
+    # Tâches de la semaine (une requête, regroupées par jour en Python)
     today = timezone.now().date()
-    start_week = today - timedelta(days=today.weekday())
+    debut, fin = fenetre_semaine(today)
+    start_week = debut.date()
     end_week = start_week + timedelta(days=6)
     
-    tasks = Task.objects.filter(
-        date_prevue__date__range=[start_week, end_week]
-    ).select_related('assigne_a', 'bien').order_by('date_prevue')
-    
-    # Organiser par jour
-    planning_data = {}
-    for i in range(7):
-        day = start_week + timedelta(days=i)
-        planning_data[day] = tasks.filter(date_prevue__date=day)
+    planning_data = par_jour(taches_planifiees(debut, fin), debut, fin)
     
     context = {
         'planning_data': planning_data,
@@ -282,45 +258,17 @@ def tasks_calendar_api(request):
             request.user.username.startswith('tech_')):
         return JsonResponse({'error': 'Permission refusée'}, status=403)
     
-    start_date = request.GET.get('start')
-    end_date = request.GET.get('end')
-    
-    tasks_query = Task.objects.select_related('assigne_a', 'bien')
+    try:
+        debut, fin = fenetre_calendrier(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     # Si employé, ne voir que ses tâches
+    intervenant = None
     if request.user.user_type in employee_types or request.user.username.startswith('tech_'):
-        tasks_query = tasks_query.filter(assigne_a=request.user)
-    
-    if start_date and end_date:
-        tasks_query = tasks_query.filter(
-            date_prevue__date__range=[start_date, end_date]
-        )
-    
-    events = []
-    for task in tasks_query:
-        # Couleurs selon le statut
-        color_map = {
-            'planifie': '#3B82F6',    # Bleu
-            'en_cours': '#F59E0B',    # Orange
-            'complete': '#10B981',    # Vert
-            'annule': '#EF4444',      # Rouge
-        }
-        
-        events.append({
-            'id': task.id,
-            'title': task.titre,
-            'start': task.date_prevue.isoformat(),
-            'end': (task.date_prevue + timedelta(minutes=task.duree_estimee or 60)).isoformat(),
-            'color': color_map.get(task.statut, '#6B7280'),
-            'extendedProps': {
-                'status': task.statut,
-                'priority': task.priorite,
-                'employee': task.assigne_a.get_full_name(),
-                'property': task.bien.name if task.bien else None,
-                'type': task.type_tache,
-            }
-        })
+        intervenant = request.user
     
+    events = [evenement_tache(task) for task in taches_planifiees(debut, fin, intervenant)]
     return JsonResponse(events, safe=False)
 
 
@@ -485,37 +433,15 @@ def task_delete_view(request, task_id):
 
 @login_required
 def employee_dashboard_mobile(request):
-    """Dashboard mobile pour employés - Utilise le modèle Travail unifié"""
-    from django.utils import timezone
-    from django.urls import reverse
-    from datetime import date, timedelta
-    from apps.maintenance.models.travail import Travail
-
-    today = date.today()
+    """Dashboard mobile pour employés - Résumé en cache (deux requêtes au plus)"""
     now = timezone.now()
+    today = timezone.localdate(now)
+    resume = resume_intervenant(request.user)
 
-    # Récupérer TOUS les travaux assignés à l'utilisateur
-    user_travaux = Travail.objects.filter(
-        assigne_a=request.user
-    ).select_related(
-        'appartement',
-        'appartement__residence',
-        'residence'
-    ).order_by('-date_prevue', '-priorite')
-
-    # UNIFICATION: Créer une liste de travaux pour affichage
+    # Prochains travaux: en cours ou prévus jusqu'à aujourd'hui, puis à venir
     today_work = []
     upcoming_work = []
-
-    # Traiter tous les travaux
-    for travail in user_travaux:
-        # Déterminer le nom du bien
-        bien_nom = ''
-        if travail.appartement:
-            bien_nom = f"{travail.appartement.residence.nom} - {travail.appartement.nom}"
-        elif travail.residence:
-            bien_nom = travail.residence.nom
-
+    for travail in resume['prochains']:
         work_item = {
             'id': travail.id,
             'type': 'travail',
@@ -528,78 +454,41 @@ def employee_dashboard_mobile(request):
             'priorite_display': travail.get_priorite_display(),
             'type_travail': travail.type_travail,
             'type_travail_display': travail.get_type_travail_display(),
-            'bien_nom': bien_nom,
+            'bien_nom': travail.lieu_travail if travail.appartement_id or travail.residence_id else '',
             'appartement': travail.appartement,
             'residence': travail.residence,
             'date_prevue': travail.date_prevue,
             'cout_estime': travail.cout_estime,
             'detail_url': reverse('employees_mobile:travail_detail', args=[travail.id]),
-            'heure_affichage': travail.date_prevue.strftime('%H:%M') if travail.date_prevue else '',
-            'date_affichage': travail.date_prevue.strftime('%d/%m à %H:%M') if travail.date_prevue else 'Non planifié',
+            'heure_affichage': timezone.localtime(travail.date_prevue).strftime('%H:%M') if travail.date_prevue else '',
+            'date_affichage': timezone.localtime(travail.date_prevue).strftime('%d/%m à %H:%M') if travail.date_prevue else 'Non planifié',
         }
-
-        # Classer selon la date et le statut
-        if travail.statut in ['assigne', 'en_cours']:
-            # Travaux en cours ou assignés = aujourd'hui
+        if travail.statut == 'en_cours' or (travail.date_prevue and timezone.localdate(travail.date_prevue) <= today):
             today_work.append(work_item)
-        elif travail.statut == 'signale':
-            # Travaux signalés = à venir
+        else:
             upcoming_work.append(work_item)
-        elif travail.date_prevue:
-            # Sinon classer selon la date
-            if travail.date_prevue.date() == today:
-                today_work.append(work_item)
-            elif travail.date_prevue.date() > today:
-                upcoming_work.append(work_item)
-    
-    # Trier les listes
-    today_work.sort(key=lambda x: (
-        x.get('date_prevue') or timezone.now(),
-        x['priorite'] == 'urgente',
-        x['priorite'] == 'haute'
-    ))
-
-    upcoming_work.sort(key=lambda x: (
-        x.get('date_prevue') or timezone.now(),
-        x['priorite'] == 'urgente',
-        x['priorite'] == 'haute'
-    ))
-
-    # STATISTIQUES BASÉES SUR LE MODÈLE TRAVAIL
-    total_pending = user_travaux.filter(statut__in=['signale', 'assigne']).count()
-    total_in_progress = user_travaux.filter(statut='en_cours').count()
-    total_completed_today = user_travaux.filter(
-        statut='termine',
-        date_fin__date=today
-    ).count()
-
-    # Travaux en retard (date prévue dépassée et pas encore terminés)
-    total_overdue = user_travaux.filter(
-        statut__in=['signale', 'assigne', 'en_cours'],
-        date_prevue__lt=now
-    ).count()
-
-    # Nombre de travaux à venir
-    upcoming_count = len(upcoming_work)
-    
+
     context = {
         # DONNÉES UNIFIÉES
         'today_work': today_work,
-        'upcoming_work': upcoming_work[:5],  # Limiter à 5 pour l'affichage
-        
+        'upcoming_work': upcoming_work,
+        'resume': resume,
+
         # STATISTIQUES GLOBALES
-        'total_pending': total_pending,
-        'total_in_progress': total_in_progress,
-        'total_completed_today': total_completed_today,
-        'total_overdue': total_overdue,
-        'upcoming_count': upcoming_count,
-        
+        'total_today': resume['aujourd_hui'],
+        'total_pending': resume['en_attente'],
+        'total_in_progress': resume['en_cours'],
+        'total_completed_today': resume['termines_aujourd_hui'],
+        'total_completed_week': resume['termines_semaine'],
+        'total_overdue': resume['en_retard'],
+        'upcoming_count': resume['a_venir'],
+
         # INFOS UTILISATEUR
         'user': request.user,
         'current_time': now,
         'today_date': today,
     }
-    
+
     return render(request, 'employees/mobile/dashboard.html', context)
 
 
@@ -616,7 +505,7 @@ def travail_detail_mobile(request, travail_id):
             'residence',
             'assigne_a',
             'cree_par'
-        ),
+        ).avec_materiel(),
         id=travail_id
     )
 
@@ -676,6 +565,7 @@ def travail_start_mobile(request, travail_id):
     travail = get_object_or_404(Travail, id=travail_id, assigne_a=request.user)
 
     if travail.statut in ['signale', 'assigne']:
+        avec_acteur(travail, request.user)
         travail.statut = 'en_cours'
         travail.date_debut = timezone.now()
         travail.save()
@@ -705,26 +595,24 @@ def travail_complete_mobile(request, travail_id):
                 return redirect('employees_mobile:travail_complete', travail_id=travail_id)
 
             # Mettre à jour le travail
-            travail.statut = 'termine'
-            travail.date_fin = timezone.now()
-            travail.notes_completion = notes
-
-            # Temps passé (optionnel)
             if temps_passe:
                 try:
-                    travail.temps_passe = float(temps_passe)
+                    travail.temps_reel = timedelta(hours=float(temps_passe))
                 except ValueError:
                     pass  # Ignorer si valeur invalide
 
-            travail.save()
+            # Temps passé déclaré, recalculé par marquer_complete si le travail a été démarré
+            avec_acteur(travail, request.user)
+            travail.marquer_complete(notes)
 
             # Gérer les photos uploadées
             photos = request.FILES.getlist('photos')
             for photo in photos:
                 TravailMedia.objects.create(
                     travail=travail,
-                    file=photo,
-                    uploaded_by=request.user,
+                    type_media='photo_apres',
+                    fichier=photo,
+                    ajoute_par=request.user,
                     description=f"Photo de fin de travail - {travail.titre}"
                 )
 
@@ -751,6 +639,7 @@ def travail_checklist_toggle(request, travail_id, checklist_id):
         checklist_item = get_object_or_404(TravailChecklist, id=checklist_id, travail=travail)
 
         # Toggle l'état
+        avec_acteur(checklist_item, request.user)
         checklist_item.is_completed = not checklist_item.is_completed
         if checklist_item.is_completed:
             checklist_item.completed_by = request.user
@@ -980,7 +869,7 @@ def my_tasks_mobile(request):
     ).select_related(
         'appartement__residence',
         'residence'
-    ).order_by('-date_prevue', '-priorite')
+    ).avec_materiel().order_by('-date_prevue', '-priorite')
 
     # Unification des données
     work_list = []
@@ -1019,7 +908,9 @@ def my_tasks_mobile(request):
             'relative_time': _calculate_relative_time(travail.date_prevue) if travail.date_prevue else '',
             'is_overdue': travail.date_prevue < timezone.now() if travail.date_prevue and travail.statut in ['signale', 'assigne', 'en_cours'] else False,
             'detail_url': reverse('employees_mobile:travail_detail', args=[travail.id]),
-            'created_at': travail.created_at if hasattr(travail, 'created_at') else travail.date_prevue
+            'created_at': travail.created_at if hasattr(travail, 'created_at') else travail.date_prevue,
+            'necessite_materiel': travail.necessite_materiel,
+            'statut_materiel': travail.statut_materiel,
         }
         work_list.append(work_item)
 
@@ -1762,40 +1653,59 @@ def my_schedule_mobile(request):
     else:
         reference_date = timezone.now().date()
     
-    # Semaine de référence
-    start_week = reference_date - timedelta(days=reference_date.weekday())
+    # Semaine de référence: une requête par type, regroupée par jour en Python
+    debut, fin = fenetre_semaine(reference_date)
+    start_week = debut.date()
+    taches = par_jour(taches_planifiees(debut, fin, request.user), debut, fin)
+    travaux = par_jour(travaux_planifies(debut, fin, request.user), debut, fin)
     
     # Organiser par jour de la semaine
     weekly_schedule = {}
-    for i in range(7):
-        day = start_week + timedelta(days=i)
-        
-        # Tâches du jour
-        day_tasks = Task.objects.filter(
-            assigne_a=request.user,
-            date_prevue__date=day
-        ).order_by('date_prevue')
-        
-        # Interventions du jour (basées sur date d'assignation)
-        day_interventions = []
-        if request.user.user_type == 'technicien' or request.user.username.startswith('tech_'):
-            day_interventions = Intervention.objects.filter(
-                technicien=request.user,
-                date_assignation__date=day
-            ).order_by('date_assignation')
-        
+    for i, day in enumerate(taches):
         weekly_schedule[i] = {
             'date': day,
             'day_name': day.strftime('%A'),
             'day_short': day.strftime('%a'),
             'is_today': day == timezone.now().date(),
-            'tasks': day_tasks,
-            'interventions': day_interventions,
-            'total_items': len(day_tasks) + len(day_interventions)
+            'tasks': taches[day],
+            'interventions': travaux[day],
+            'total_items': len(taches[day]) + len(travaux[day]),
+            'completed_count': sum(1 for e in taches[day] + travaux[day] if e.statut == 'complete'),
         }
     
+    # Même planning sérialisé pour le détail du jour (JavaScript)
+    schedule_json = {
+        i: {
+            'date': jour['date'].isoformat(),
+            'completed_count': jour['completed_count'],
+            'tasks': [
+                {'id': t.id, 'titre': t.titre, 'statut': t.statut, 'priorite': t.priorite,
+                 'date_prevue': t.date_prevue.isoformat()}
+                for t in jour['tasks']
+            ],
+            'interventions': [
+                {'id': t.id, 'titre': t.titre, 'statut': t.statut, 'priorite': t.priorite,
+                 'date_signalement': t.date_prevue.isoformat()}
+                for t in jour['interventions']
+            ],
+        }
+        for i, jour in weekly_schedule.items()
+    }
+    total_tasks = sum(len(jour['tasks']) for jour in weekly_schedule.values())
+    total_interventions = sum(len(jour['interventions']) for jour in weekly_schedule.values())
+    total_completed = sum(jour['completed_count'] for jour in weekly_schedule.values())
+    total_items = total_tasks + total_interventions
+    
     context = {
+        'resume': resume_intervenant(request.user),
         'weekly_schedule': weekly_schedule,
+        'schedule_data': weekly_schedule,
+        'schedule_json': json.dumps(schedule_json),
+        'total_tasks': total_tasks,
+        'total_interventions': total_interventions,
+        'completion_rate': round(total_completed * 100 / total_items) if total_items else 0,
+        'today': timezone.now().date(),
+        'current_week_start': start_week,
         'reference_date': reference_date,
         'week_start': start_week,
         'week_end': start_week + timedelta(days=6),
@@ -1885,56 +1795,31 @@ def offline_data_api(request):
 
 @login_required
 def my_stats_api(request):
-    """API des statistiques personnelles de l'employé - VUE CORRIGÉE"""
+    """API des statistiques personnelles de l'employé (résumé en cache)"""
     # ✅ CORRECTION: Accepter tous les types d'employés ET tech_
     employee_types = ['field_agent', 'technician', 'technicien', 'agent_terrain']
     
     if not (request.user.user_type in employee_types or request.user.username.startswith('tech_')):
         return JsonResponse({'error': 'Unauthorized'}, status=403)
     
-    # Période (7 derniers jours par défaut)
-    period_days = int(request.GET.get('days', 7))
-    start_date = timezone.now().date() - timedelta(days=period_days)
-    
-    # Statistiques des tâches
-    my_tasks = Task.objects.filter(assigne_a=request.user)
-    period_tasks = my_tasks.filter(date_prevue__date__gte=start_date)
-    
-    task_stats = {
-        'total_tasks': my_tasks.count(),
-        'completed_tasks': my_tasks.filter(statut='complete').count(),
-        'period_tasks': period_tasks.count(),
-        'period_completed': period_tasks.filter(statut='complete').count(),
-        'overdue_tasks': my_tasks.filter(
-            statut__in=['planifie', 'en_cours'],
-            date_prevue__lt=timezone.now()
-        ).count(),
-    }
-    
-    # Statistiques des interventions (si technicien)
-    intervention_stats = {}
-    if request.user.user_type == 'technicien' or request.user.username.startswith('tech_'):
-        my_interventions = Intervention.objects.filter(technicien=request.user)
-        period_interventions = my_interventions.filter(date_signalement__date__gte=start_date)
-        
-        # Satisfaction moyenne
-        avg_satisfaction = my_interventions.filter(
-            satisfaction_locataire__isnull=False
-        ).aggregate(avg=Avg('satisfaction_locataire'))['avg']
-        
-        intervention_stats = {
-            'total_interventions': my_interventions.count(),
-            'completed_interventions': my_interventions.filter(statut='complete').count(),
-            'period_interventions': period_interventions.count(),
-            'period_completed': period_interventions.filter(statut='complete').count(),
-            'avg_satisfaction': round(avg_satisfaction, 2) if avg_satisfaction else None,
-        }
+    resume = resume_intervenant(request.user)
     
     return JsonResponse({
         'success': True,
-        'period_days': period_days,
-        'task_stats': task_stats,
-        'intervention_stats': intervention_stats,
+        'computed_at': resume['calcule_le'].isoformat(),
+        'stats': {compteur: resume[compteur] for compteur in COMPTEURS},
+        'next_jobs': [
+            {
+                'id': travail.id,
+                'numero': travail.numero_travail,
+                'titre': travail.titre,
+                'statut': travail.statut,
+                'priorite': travail.priorite,
+                'date_prevue': travail.date_prevue.isoformat() if travail.date_prevue else None,
+                'lieu': travail.lieu_travail,
+            }
+            for travail in resume['prochains']
+        ],
     })
 
 
@@ -1994,35 +1879,22 @@ def employee_workload_api(request, employee_id):
     try:
         employee = get_object_or_404(User, id=employee_id)
         
-        # Charge de travail actuelle
-        workload = {
-            'planned_tasks': Task.objects.filter(
-                assigne_a=employee, 
-                statut='planifie'
-            ).count(),
-            'in_progress_tasks': Task.objects.filter(
-                assigne_a=employee, 
-                statut='en_cours'
-            ).count(),
-            'completed_today': Task.objects.filter(
-                assigne_a=employee,
-                statut='complete',
-                date_fin__date=timezone.now().date()
-            ).count(),
-        }
-        
-        # Tâches de la semaine
+        # Charge de travail actuelle (une requête pour les tâches, une pour les travaux)
         today = timezone.now().date()
         start_week = today - timedelta(days=today.weekday())
         end_week = start_week + timedelta(days=6)
-        
-        weekly_tasks = Task.objects.filter(
-            assigne_a=employee,
-            date_prevue__date__range=[start_week, end_week]
-        ).count()
-        
-        workload['weekly_tasks'] = weekly_tasks
-        workload['availability_status'] = 'available' if workload['planned_tasks'] + workload['in_progress_tasks'] < 5 else 'busy'
+
+        workload = Task.objects.filter(assigne_a=employee).aggregate(
+            planned_tasks=Count('id', filter=Q(statut='planifie')),
+            in_progress_tasks=Count('id', filter=Q(statut='en_cours')),
+            completed_today=Count('id', filter=Q(statut='complete', date_fin__date=today)),
+            weekly_tasks=Count('id', filter=Q(date_prevue__date__range=[start_week, end_week])),
+        )
+
+        travaux = PlanDeCharge(utilisateurs=[employee]).charge(employee)
+        workload['travaux'] = travaux
+        actifs = workload['planned_tasks'] + workload['in_progress_tasks'] + travaux['nb_travaux']
+        workload['availability_status'] = 'available' if actifs < 5 and travaux['disponible'] else 'busy'
         
         return JsonResponse({
             'success': True,
@@ -2062,15 +1934,9 @@ def get_employee_availability(request, employee_id):
             statut__in=['planifie', 'en_cours']
         ).count()
         
-        # Interventions assignées aujourd'hui (si c'est un technicien)
-        interventions_today = 0
-        if employee_user.user_type in ['technicien', 'technician'] or employee_user.username.startswith('tech_'):
-            from apps.maintenance.models.intervention import Intervention
-            interventions_today = Intervention.objects.filter(
-                technicien=employee_user,
-                date_assignation__date=today,
-                statut__in=['assigne', 'en_cours']
-            ).count()
+        # Travaux prévus aujourd'hui (même calcul de charge que l'assignation)
+        charge = PlanDeCharge(utilisateurs=[employee_user], jour=today).charge(employee_user)
+        interventions_today = charge['nb_aujourdhui']
         
         total_workload = tasks_today + interventions_today
         
@@ -2092,6 +1958,7 @@ def get_employee_availability(request, employee_id):
                 'tasks_today': tasks_today,
                 'interventions_today': interventions_today,
                 'total_workload': total_workload,
+                'hours_today': charge['heures_aujourdhui'],
             }
         })
         
@@ -5,6 +5,10 @@ from apps.maintenance.models.intervention import Intervention, InterventionCheck
 from apps.maintenance.models.maintenance import MaintenanceSchedule
 from apps.maintenance.models.tache import Tache
 from apps.maintenance.models.travail import Travail
+from apps.maintenance.models.evenement import TravailEvent
+from apps.maintenance.models.statistiques import TravailDailyRollup
+from apps.maintenance.models.stock import ArticleStock, MouvementStock
+from apps.maintenance.journal import avec_acteur
 from apps.maintenance.models_unified import TravailChecklist, TravailMedia
 
 
@@ -207,6 +211,18 @@ class TravailChecklistInline(admin.TabularInline):
     readonly_fields = ('completed_by', 'date_completion')
 
 
+class TravailEventInline(admin.TabularInline):
+    """Journal d'un travail (lecture seule)"""
+    model = TravailEvent
+    extra = 0
+    fields = ('date_evenement', 'type_evenement', 'message', 'acteur')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Travail)
 class TravailAdmin(admin.ModelAdmin):
     """Administration du modèle Travail unifié"""
@@ -230,7 +246,8 @@ class TravailAdmin(admin.ModelAdmin):
 
     readonly_fields = (
         'numero_travail', 'created_at', 'updated_at',
-        'lieu_travail', 'duree_reelle', 'est_en_retard', 'necessite_materiel'
+        'lieu_travail', 'duree_reelle', 'est_en_retard', 'necessite_materiel',
+        'serie', 'date_occurrence'
     )
 
     date_hierarchy = 'date_prevue'
@@ -255,7 +272,7 @@ class TravailAdmin(admin.ModelAdmin):
             )
         }),
         ('Récurrence', {
-            'fields': ('is_recurrent', 'recurrence', 'recurrence_fin'),
+            'fields': ('is_recurrent', 'recurrence', 'regle_recurrence', 'recurrence_fin', 'serie', 'date_occurrence'),
             'classes': ('collapse',)
         }),
         ('Coûts et Matériel', {
@@ -271,7 +288,7 @@ class TravailAdmin(admin.ModelAdmin):
         }),
     )
 
-    inlines = [TravailMediaInline, TravailChecklistInline]
+    inlines = [TravailMediaInline, TravailChecklistInline, TravailEventInline]
 
     actions = ['marquer_complete', 'marquer_annule', 'assigner_employe']
 
@@ -309,7 +326,7 @@ class TravailAdmin(admin.ModelAdmin):
         count = 0
         for travail in queryset:
             if travail.statut not in ['complete', 'valide', 'annule']:
-                travail.marquer_complete()
+                avec_acteur(travail, request.user).marquer_complete()
                 count += 1
 
         self.message_user(request, f"{count} travail/travaux marqué(s) comme terminé(s).")
@@ -419,4 +436,108 @@ class TravailChecklistAdmin(admin.ModelAdmin):
         """Optimise les requêtes"""
         return super().get_queryset(request).select_related(
             'travail', 'completed_by'
-        )
\ No newline at end of file
+        )
+
+
+@admin.register(TravailEvent)
+class TravailEventAdmin(admin.ModelAdmin):
+    """Consultation du journal des travaux (ajout seul)"""
+
+    list_display = ('date_evenement', 'travail', 'type_evenement', 'message', 'acteur')
+
+    list_filter = ('type_evenement', 'date_evenement')
+
+    search_fields = ('travail__numero_travail', 'travail__titre', 'message')
+
+    readonly_fields = (
+        'travail', 'type_evenement', 'acteur', 'date_evenement',
+        'ancienne_valeur', 'nouvelle_valeur', 'message', 'created_at', 'updated_at'
+    )
+
+    date_hierarchy = 'date_evenement'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        """Optimise les requêtes"""
+        return super().get_queryset(request).select_related('travail', 'acteur')
+
+
+@admin.register(TravailDailyRollup)
+class TravailDailyRollupAdmin(admin.ModelAdmin):
+    """Cumuls journaliers (recalculés par rebuild_maintenance_rollups)"""
+
+    list_display = (
+        'date', 'priorite', 'nb_signales', 'nb_assignes', 'nb_demarres',
+        'nb_resolus', 'nb_resolus_hors_sla', 'nb_ouverts'
+    )
+
+    list_filter = ('priorite',)
+
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class MouvementStockInline(admin.TabularInline):
+    model = MouvementStock
+    extra = 0
+    can_delete = False
+    fields = ('date_mouvement', 'type_mouvement', 'quantite', 'solde_apres', 'travail', 'motif')
+    readonly_fields = fields
+    ordering = ('-date_mouvement', '-pk')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArticleStock)
+class ArticleStockAdmin(admin.ModelAdmin):
+    """Articles du magasin (le stock n'est modifié que par les mouvements)"""
+
+    list_display = ('designation', 'unite', 'categorie', 'quantite_en_stock', 'cout_unitaire_moyen', 'stock_minimum', 'is_active')
+
+    list_filter = ('categorie', 'is_active')
+
+    search_fields = ('designation', 'cle')
+
+    readonly_fields = ('cle', 'quantite_en_stock', 'cout_unitaire_moyen', 'created_at', 'updated_at')
+
+    inlines = [MouvementStockInline]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(MouvementStock)
+class MouvementStockAdmin(admin.ModelAdmin):
+    """Journal des mouvements de stock (ajout seul)"""
+
+    list_display = ('date_mouvement', 'article', 'type_mouvement', 'quantite', 'solde_apres', 'travail', 'effectue_par')
+
+    list_filter = ('type_mouvement', 'date_mouvement')
+
+    search_fields = ('article__designation', 'travail__numero_travail', 'motif')
+
+    date_hierarchy = 'date_mouvement'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        """Optimise les requêtes"""
+        return super().get_queryset(request).select_related('article', 'travail', 'effectue_par')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MaintenanceConfig(AppConfig): 
     default_auto_field = 'django.db.models.BigAutoField' 
     name = 'apps.maintenance' 
+
+    def ready(self):
+        """Importer les signals lors du démarrage de l'application"""
+        import apps.maintenance.signals
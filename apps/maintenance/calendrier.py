@@ -0,0 +1,316 @@
+# apps/maintenance/calendrier.py
+"""
+Flux calendrier des travaux et des tâches
+
+- fenetre_calendrier(): fenêtre obligatoire (start / end), bornée à
+  MAINTENANCE_CALENDRIER_MAX_JOURS (62 jours par défaut)
+- travaux_planifies() / taches_planifiees(): une requête par type, sur
+  l'index de date_prevue (comparaison directe, sans __date)
+- par_jour(): regroupement par jour en Python, sans requête par jour
+- abonnement iCalendar (.ics) par intervenant: lien signé, ETag calculé
+  par une requête agrégée pour répondre 304 aux relectures des téléphones
+"""
+
+import hashlib
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.maintenance.models.travail import Travail
+
+SEL_ABONNEMENT = 'maintenance.calendrier'
+
+COULEURS_PRIORITES = {
+    'urgente': '#ef4444',
+    'haute': '#f97316',
+    'normale': '#3b82f6',
+    'basse': '#10b981',
+}
+COULEURS_STATUTS_TACHES = {
+    'planifie': '#3B82F6',
+    'en_cours': '#F59E0B',
+    'complete': '#10B981',
+    'annule': '#EF4444',
+}
+
+
+# ============================================================================
+# FENÊTRE ET REQUÊTES
+# ============================================================================
+
+def _borne(valeur):
+    """Date ou datetime ISO (FullCalendar) → datetime aware"""
+    moment = parse_datetime(valeur) if valeur else None
+    if moment is None:
+        jour = parse_date(valeur[:10]) if valeur else None
+        if jour is None:
+            raise ValueError(f"Date invalide: {valeur!r}")
+        moment = datetime.combine(jour, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def fenetre_calendrier(debut, fin):
+    """
+    Valide la fenêtre [debut, fin[ demandée par le calendrier
+
+    Raises:
+        ValueError: borne absente ou invalide, fenêtre vide ou trop large
+    """
+    if not debut or not fin:
+        raise ValueError("Les paramètres start et end sont obligatoires")
+    debut, fin = _borne(debut), _borne(fin)
+    max_jours = getattr(settings, 'MAINTENANCE_CALENDRIER_MAX_JOURS', 62)
+    if fin <= debut:
+        raise ValueError("La fin doit être postérieure au début")
+    if fin - debut > timedelta(days=max_jours):
+        raise ValueError(f"Fenêtre limitée à {max_jours} jours")
+    return debut, fin
+
+
+def fenetre_semaine(jour):
+    """Lundi 00:00 → lundi suivant 00:00 (heure locale)"""
+    lundi = jour - timedelta(days=jour.weekday())
+    debut = timezone.make_aware(datetime.combine(lundi, time.min))
+    return debut, debut + timedelta(days=7)
+
+
+def travaux_planifies(debut, fin, intervenant=None):
+    """Travaux prévus dans la fenêtre (une requête)"""
+    travaux = Travail.objects.filter(date_prevue__gte=debut, date_prevue__lt=fin)
+    if intervenant is not None:
+        travaux = travaux.filter(assigne_a=intervenant)
+    return travaux.select_related('assigne_a', 'appartement__residence', 'residence').order_by('date_prevue', 'pk')
+
+
+def taches_planifiees(debut, fin, intervenant=None):
+    """Tâches prévues dans la fenêtre (une requête)"""
+    from apps.employees.models.task import Task
+
+    taches = Task.objects.filter(date_prevue__gte=debut, date_prevue__lt=fin)
+    if intervenant is not None:
+        taches = taches.filter(assigne_a=intervenant)
+    return taches.select_related('assigne_a', 'bien').order_by('date_prevue', 'pk')
+
+
+def par_jour(elements, debut, fin):
+    """
+    Regroupe par jour local (tous les jours de la fenêtre, même vides)
+
+    Returns:
+        dict: {date: [éléments triés par date_prevue]}
+    """
+    jour, dernier = timezone.localdate(debut), timezone.localdate(fin - timedelta(microseconds=1))
+    jours = {}
+    while jour <= dernier:
+        jours[jour] = []
+        jour += timedelta(days=1)
+    for element in elements:
+        jours.setdefault(timezone.localdate(element.date_prevue), []).append(element)
+    return jours
+
+
+# ============================================================================
+# ÉVÉNEMENTS (FullCalendar)
+# ============================================================================
+
+def fin_travail(travail):
+    return travail.date_prevue + (travail.duree_estimee or timedelta(hours=1))
+
+
+def fin_tache(tache):
+    return tache.date_prevue + timedelta(minutes=tache.duree_estimee or 60)
+
+
+def evenement_travail(travail):
+    from django.urls import reverse
+
+    return {
+        'id': f'travail-{travail.pk}',
+        'title': travail.titre,
+        'start': travail.date_prevue.isoformat(),
+        'end': fin_travail(travail).isoformat(),
+        'url': reverse('maintenance:travail_detail', kwargs={'travail_id': travail.pk}),
+        'color': COULEURS_PRIORITES.get(travail.priorite, '#6b7280'),
+        'extendedProps': {
+            'type': 'travail',
+            'priority': travail.priorite,
+            'status': travail.statut,
+            'technician': travail.assigne_a.get_full_name() if travail.assigne_a else None,
+            'property': travail.lieu_travail,
+        },
+    }
+
+
+def evenement_tache(tache):
+    return {
+        'id': f'tache-{tache.pk}',
+        'title': tache.titre,
+        'start': tache.date_prevue.isoformat(),
+        'end': fin_tache(tache).isoformat(),
+        'color': COULEURS_STATUTS_TACHES.get(tache.statut, '#6B7280'),
+        'extendedProps': {
+            'type': 'tache',
+            'status': tache.statut,
+            'priority': tache.priorite,
+            'employee': tache.assigne_a.get_full_name(),
+            'property': tache.bien.name if tache.bien else None,
+        },
+    }
+
+
+# ============================================================================
+# ABONNEMENT ICALENDAR
+# ============================================================================
+
+def jeton_abonnement(intervenant):
+    """Jeton signé du lien d'abonnement (changer SECRET_KEY révoque tous les liens)"""
+    return signing.Signer(salt=SEL_ABONNEMENT).sign(str(intervenant.pk))
+
+
+def intervenant_du_jeton(jeton):
+    """Intervenant actif du jeton, ou None si le jeton est invalide"""
+    from django.contrib.auth import get_user_model
+
+    try:
+        pk = signing.Signer(salt=SEL_ABONNEMENT).unsign(jeton)
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(pk=pk, is_active=True).first()
+
+
+def fenetre_abonnement(maintenant=None):
+    """Du passé récent (MAINTENANCE_ICS_JOURS_PASSES) à l'horizon de planification"""
+    from apps.maintenance.recurrence import horizon_par_defaut
+
+    jours_passes = getattr(settings, 'MAINTENANCE_ICS_JOURS_PASSES', 30)
+    aujourd_hui = timezone.localdate(maintenant or timezone.now())
+    debut = timezone.make_aware(datetime.combine(aujourd_hui - timedelta(days=jours_passes), time.min))
+    return debut, debut + timedelta(days=jours_passes + horizon_par_defaut() + 1)
+
+
+class AbonnementCalendrier:
+    """
+    Calendrier iCalendar d'un intervenant (travaux et tâches assignés)
+
+    Usage:
+        abonnement = AbonnementCalendrier(user)
+        if abonnement.etag() == request.headers.get('If-None-Match'): → 304
+        abonnement.ics()
+    """
+
+    def __init__(self, intervenant, avec_taches=True, maintenant=None):
+        self.intervenant = intervenant
+        self.avec_taches = avec_taches
+        self.debut, self.fin = fenetre_abonnement(maintenant)
+
+    def _sources(self):
+        sources = [travaux_planifies(self.debut, self.fin, self.intervenant)]
+        if self.avec_taches:
+            sources.append(taches_planifiees(self.debut, self.fin, self.intervenant))
+        return sources
+
+    def etag(self):
+        """Empreinte du contenu: nombre et dernière modification, une requête agrégée par source"""
+        empreinte = [str(self.intervenant.pk), self.debut.date().isoformat()]
+        for source in self._sources():
+            resume = source.order_by().aggregate(nb=Count('pk'), maj=Max('updated_at'))
+            empreinte.append(f"{resume['nb']}:{resume['maj'].isoformat() if resume['maj'] else '-'}")
+        return '"%s"' % hashlib.md5('|'.join(empreinte).encode()).hexdigest()
+
+    def evenements(self):
+        travaux, *taches = self._sources()
+        for travail in travaux:
+            yield {
+                'uid': f'travail-{travail.pk}',
+                'titre': f'[{travail.get_priorite_display()}] {travail.titre}',
+                'debut': travail.date_prevue,
+                'fin': fin_travail(travail),
+                'lieu': travail.lieu_travail,
+                'description': travail.description,
+                'modifie': travail.updated_at,
+                'annule': travail.statut == 'annule',
+            }
+        for tache in (taches[0] if taches else []):
+            yield {
+                'uid': f'tache-{tache.pk}',
+                'titre': tache.titre,
+                'debut': tache.date_prevue,
+                'fin': fin_tache(tache),
+                'lieu': tache.bien.name if tache.bien else '',
+                'description': tache.description,
+                'modifie': tache.updated_at,
+                'annule': tache.statut == 'annule',
+            }
+
+    def ics(self):
+        return generer_ics(
+            self.evenements(),
+            nom=f"Planning {self.intervenant.get_full_name() or self.intervenant.username}",
+        )
+
+
+def _texte_ics(valeur):
+    return (
+        str(valeur or '').replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _date_ics(moment):
+    return moment.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _plier(ligne):
+    """Lignes de 75 octets maximum (RFC 5545 §3.1), suites préfixées d'une espace"""
+    octets = ligne.encode('utf-8')
+    if len(octets) <= 75:
+        return ligne
+    morceaux, courant = [], ''
+    for caractere in ligne:
+        limite = 75 if not morceaux else 74
+        if len((courant + caractere).encode('utf-8')) > limite:
+            morceaux.append(courant)
+            courant = caractere
+        else:
+            courant += caractere
+    morceaux.append(courant)
+    return '\r\n '.join(morceaux)
+
+
+def generer_ics(evenements, nom='Planning'):
+    """Document iCalendar (VCALENDAR / VEVENT)"""
+    domaine = getattr(settings, 'MAINTENANCE_ICS_DOMAINE', 'seyni-properties')
+    lignes = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Seyni Properties//Planning maintenance//FR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_texte_ics(nom)}',
+    ]
+    maintenant = timezone.now()
+    for evenement in evenements:
+        lignes += [
+            'BEGIN:VEVENT',
+            f"UID:{evenement['uid']}@{domaine}",
+            f"DTSTAMP:{_date_ics(evenement['modifie'] or maintenant)}",
+            f"DTSTART:{_date_ics(evenement['debut'])}",
+            f"DTEND:{_date_ics(evenement['fin'])}",
+            f"SUMMARY:{_texte_ics(evenement['titre'])}",
+        ]
+        if evenement['lieu']:
+            lignes.append(f"LOCATION:{_texte_ics(evenement['lieu'])}")
+        if evenement['description']:
+            lignes.append(f"DESCRIPTION:{_texte_ics(evenement['description'])}")
+        lignes += [
+            f"STATUS:{'CANCELLED' if evenement['annule'] else 'CONFIRMED'}",
+            'END:VEVENT',
+        ]
+    lignes.append('END:VCALENDAR')
+    return '\r\n'.join(_plier(ligne) for ligne in lignes) + '\r\n'
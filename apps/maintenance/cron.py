@@ -0,0 +1,30 @@
+# apps/maintenance/cron.py
+from django_cron import CronJobBase, Schedule
+
+
+class MaterialiserTravauxRecurrentsCronJob(CronJobBase):
+    RUN_AT_TIMES = ['02:00']
+
+    schedule = Schedule(run_at_times=RUN_AT_TIMES)
+    code = 'maintenance.materialiser_travaux_recurrents'
+
+    def do(self):
+        from django.core.management import call_command
+        call_command('materialiser_travaux_recurrents')
+
+
+class MaintenanceRollupsCronJob(CronJobBase):
+    RUN_AT_TIMES = ['01:30']
+
+    schedule = Schedule(run_at_times=RUN_AT_TIMES)
+    code = 'maintenance.rebuild_maintenance_rollups'
+
+    def do(self):
+        from datetime import timedelta
+
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        # La veille est finalisée, le jour courant est amorcé
+        veille = timezone.localdate() - timedelta(days=1)
+        call_command('rebuild_maintenance_rollups', '--from', veille.isoformat())
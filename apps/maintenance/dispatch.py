@@ -0,0 +1,233 @@
+# apps/maintenance/dispatch.py
+"""
+Affectation des travaux selon la charge des intervenants
+
+PlanDeCharge lit en deux requêtes (intervenants, puis une requête groupée
+sur leurs travaux actifs) la charge de tous les intervenants:
+    - nombre de travaux actifs et d'urgences,
+    - travaux prévus dans la journée,
+    - heures estimées (duree_estimee, MAINTENANCE_DUREE_DEFAUT_HEURES sinon),
+    - résidences où ils interviennent déjà (proximité).
+
+Il classe ensuite les intervenants pour n'importe quel travail sans autre
+requête, et se met à jour en mémoire lors d'une répartition en lot
+(dispatcher_urgents).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, DurationField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.maintenance.models.travail import Travail
+
+STATUTS_ACTIFS = ['planifie', 'assigne', 'en_attente_materiel', 'en_cours']
+STATUTS_A_DISPATCHER = ['signale']
+
+POIDS_DEFAUT = {
+    'travaux': 1.0,      # par travail actif
+    'urgents': 1.0,      # en plus, par travail urgent
+    'aujourdhui': 1.0,   # par travail prévu dans la journée
+    'heures': 0.5,       # par heure estimée restante
+    'residence': -1.5,   # déjà présent sur la résidence du travail
+}
+
+
+def _poids():
+    return {**POIDS_DEFAUT, **getattr(settings, 'MAINTENANCE_DISPATCH_POIDS', {})}
+
+
+def _heures(duree):
+    return round(duree.total_seconds() / 3600, 1) if duree else 0.0
+
+
+def intervenants():
+    """Utilisateurs actifs pouvant recevoir des travaux (MAINTENANCE_TYPES_INTERVENANTS)"""
+    return get_user_model().objects.filter(
+        is_active=True,
+        user_type__in=getattr(settings, 'MAINTENANCE_TYPES_INTERVENANTS', ['employe']),
+    ).order_by('first_name', 'last_name', 'pk')
+
+
+def residence_du_travail(travail):
+    if travail.residence_id:
+        return travail.residence_id
+    if travail.appartement_id:
+        return travail.appartement.residence_id
+    return None
+
+
+class PlanDeCharge:
+    """
+    Charge de travail des intervenants à une date
+
+    Usage:
+        plan = PlanDeCharge()
+        plan.classement(travail)    # intervenants, le plus indiqué d'abord
+        plan.suggestion(travail)
+    """
+
+    def __init__(self, utilisateurs=None, jour=None):
+        self.jour = jour or timezone.localdate()
+        self.poids = _poids()
+        self.duree_defaut = timedelta(hours=getattr(settings, 'MAINTENANCE_DUREE_DEFAUT_HEURES', 2))
+        self.capacite_jour = getattr(settings, 'MAINTENANCE_HEURES_JOUR', 8)
+        self.intervenants = list(intervenants() if utilisateurs is None else utilisateurs)
+        self.charges = {
+            intervenant.pk: {
+                'nb_travaux': 0,
+                'nb_urgents': 0,
+                'nb_aujourdhui': 0,
+                'duree': timedelta(0),
+                'duree_aujourdhui': timedelta(0),
+                'residences': set(),
+            }
+            for intervenant in self.intervenants
+        }
+        self._charger()
+
+    def _charger(self):
+        """Une requête groupée par intervenant et résidence"""
+        duree = Coalesce('duree_estimee', Value(self.duree_defaut), output_field=DurationField())
+        aujourdhui = Q(date_prevue__date=self.jour)
+        lignes = Travail.objects.filter(
+            assigne_a__in=list(self.charges), statut__in=STATUTS_ACTIFS,
+        ).annotate(
+            residence_lieu=Coalesce('residence_id', 'appartement__residence_id'),
+        ).order_by().values('assigne_a', 'residence_lieu').annotate(
+            nb=Count('id'),
+            nb_urgents=Count('id', filter=Q(priorite='urgente')),
+            nb_aujourdhui=Count('id', filter=aujourdhui),
+            duree=Sum(duree),
+            duree_aujourdhui=Sum(duree, filter=aujourdhui),
+        )
+        for ligne in lignes:
+            charge = self.charges[ligne['assigne_a']]
+            charge['nb_travaux'] += ligne['nb']
+            charge['nb_urgents'] += ligne['nb_urgents']
+            charge['nb_aujourdhui'] += ligne['nb_aujourdhui']
+            charge['duree'] += ligne['duree'] or timedelta(0)
+            charge['duree_aujourdhui'] += ligne['duree_aujourdhui'] or timedelta(0)
+            if ligne['residence_lieu']:
+                charge['residences'].add(ligne['residence_lieu'])
+
+    def charge(self, intervenant):
+        """Charge d'un intervenant (heures en décimal, disponibilité du jour)"""
+        charge = self.charges[intervenant.pk]
+        heures_aujourdhui = _heures(charge['duree_aujourdhui'])
+        return {
+            'nb_travaux': charge['nb_travaux'],
+            'nb_urgents': charge['nb_urgents'],
+            'nb_aujourdhui': charge['nb_aujourdhui'],
+            'heures_estimees': _heures(charge['duree']),
+            'heures_aujourdhui': heures_aujourdhui,
+            'disponible': heures_aujourdhui < self.capacite_jour,
+        }
+
+    def _score(self, charge, meme_residence):
+        poids = self.poids
+        return round(
+            poids['travaux'] * charge['nb_travaux']
+            + poids['urgents'] * charge['nb_urgents']
+            + poids['aujourdhui'] * charge['nb_aujourdhui']
+            + poids['heures'] * charge['heures_estimees']
+            + (poids['residence'] if meme_residence else 0),
+            2,
+        )
+
+    def classement(self, travail):
+        """
+        Intervenants classés pour un travail: disponibles d'abord, puis par score
+
+        Returns:
+            list: dicts intervenant, nb_travaux, nb_urgents, nb_aujourdhui,
+                  heures_estimees, heures_aujourdhui, disponible, meme_residence, score
+        """
+        residence_id = residence_du_travail(travail)
+        lignes = []
+        for intervenant in self.intervenants:
+            charge = self.charge(intervenant)
+            meme_residence = residence_id is not None and residence_id in self.charges[intervenant.pk]['residences']
+            lignes.append({
+                'intervenant': intervenant,
+                **charge,
+                'meme_residence': meme_residence,
+                'score': self._score(charge, meme_residence),
+            })
+        return sorted(lignes, key=lambda l: (not l['disponible'], l['score']))
+
+    def suggestion(self, travail):
+        """Intervenant le plus indiqué, ou None s'il n'y en a aucun"""
+        classement = self.classement(travail)
+        return classement[0]['intervenant'] if classement else None
+
+    def reserver(self, intervenant, travail):
+        """Ajoute un travail à la charge en mémoire (répartition en lot)"""
+        charge = self.charges[intervenant.pk]
+        duree = travail.duree_estimee or self.duree_defaut
+        charge['nb_travaux'] += 1
+        charge['duree'] += duree
+        if travail.priorite == 'urgente':
+            charge['nb_urgents'] += 1
+        if travail.date_prevue and timezone.localdate(travail.date_prevue) == self.jour:
+            charge['nb_aujourdhui'] += 1
+            charge['duree_aujourdhui'] += duree
+        residence_id = residence_du_travail(travail)
+        if residence_id:
+            charge['residences'].add(residence_id)
+
+
+def assigner(travail, intervenant, acteur=None):
+    """Assigne un travail à un intervenant (acteur: auteur inscrit au journal)"""
+    from apps.maintenance.journal import avec_acteur
+
+    avec_acteur(travail, acteur)
+    travail.assigne_a = intervenant
+    travail.statut = 'assigne'
+    travail.date_assignation = timezone.now()
+    travail.save(update_fields=['assigne_a', 'statut', 'date_assignation', 'updated_at'])
+    return travail
+
+
+def travaux_urgents_non_assignes():
+    return Travail.objects.filter(
+        assigne_a__isnull=True, priorite='urgente', statut__in=STATUTS_A_DISPATCHER,
+    ).select_related('appartement').order_by('date_signalement', 'pk')
+
+
+def dispatcher_urgents(travaux=None, plan=None, simulation=False, acteur=None):
+    """
+    Assigne les travaux urgents non assignés, le plus ancien d'abord
+
+    La charge est lue une fois puis mise à jour en mémoire à chaque
+    affectation, pour répartir le lot entre les intervenants. Les travaux
+    candidats sont verrouillés pendant la transaction (deux répartitions
+    simultanées n'assignent pas deux fois le même travail), et chaque
+    intervenant reçoit une notification groupée après validation.
+
+    Returns:
+        list: tuples (travail, intervenant ou None)
+    """
+    from apps.maintenance.operations import _notifier
+
+    plan = plan or PlanDeCharge()
+    affectations = []
+    travaux_par_intervenant = {}
+    with transaction.atomic():
+        if travaux is None:
+            travaux = travaux_urgents_non_assignes().select_for_update(of=('self',))
+        for travail in travaux:
+            intervenant = plan.suggestion(travail)
+            if intervenant is not None:
+                plan.reserver(intervenant, travail)
+                if not simulation:
+                    assigner(travail, intervenant, acteur)
+                    if intervenant.pk != getattr(acteur, 'pk', None):
+                        travaux_par_intervenant.setdefault(intervenant.pk, []).append(travail.numero_travail)
+            affectations.append((travail, intervenant))
+        _notifier('intervention_assigned', travaux_par_intervenant, "vous ont été assignés", "vous a été assigné")
+    return affectations
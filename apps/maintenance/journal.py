@@ -0,0 +1,76 @@
+# apps/maintenance/journal.py
+"""
+Journal des travaux (TravailEvent)
+
+Les événements sont écrits par les signaux (apps/maintenance/signals.py)
+au moment où les changements sont enregistrés. L'auteur d'un changement
+est lu sur l'instance enregistrée (attribut _acteur_journal, voir
+avec_acteur), à défaut sur le modèle (cree_par, ajoute_par...).
+
+Lecture:
+    historique(travail)     une requête, index (travail, date_evenement)
+    fil_activite(...)       fil transverse des managers, index date_evenement
+"""
+
+from apps.maintenance.models.evenement import TravailEvent
+from apps.maintenance.models.travail import Travail
+
+LIBELLES_STATUTS = dict(Travail.STATUT_CHOICES)
+
+
+def avec_acteur(instance, acteur):
+    """Indique l'auteur du prochain enregistrement de l'instance"""
+    instance._acteur_journal = acteur
+    return instance
+
+
+def acteur_de(instance, defaut=None):
+    return getattr(instance, '_acteur_journal', None) or defaut
+
+
+def etat_journal(travail):
+    """Valeurs suivies d'un travail (sans requête, même sur une instance partielle)"""
+    return {
+        'statut': travail.__dict__.get('statut'),
+        'assigne_a_id': travail.__dict__.get('assigne_a_id'),
+    }
+
+
+def journaliser(travail, type_evenement, message, acteur=None, ancienne_valeur='', nouvelle_valeur='',
+                date_evenement=None):
+    """Ajoute un événement au journal d'un travail (instance ou identifiant)"""
+    evenement = TravailEvent(
+        travail_id=getattr(travail, 'pk', travail),
+        type_evenement=type_evenement,
+        message=message[:255],
+        acteur=acteur,
+        ancienne_valeur=str(ancienne_valeur or '')[:50],
+        nouvelle_valeur=str(nouvelle_valeur or '')[:50],
+    )
+    if date_evenement is not None:
+        evenement.date_evenement = date_evenement
+    evenement.save()
+    return evenement
+
+
+def message_statut(ancien, nouveau):
+    if not ancien:
+        return f"Statut: {LIBELLES_STATUTS.get(nouveau, nouveau)}"
+    return f"Statut: {LIBELLES_STATUTS.get(ancien, ancien)} → {LIBELLES_STATUTS.get(nouveau, nouveau)}"
+
+
+def historique(travail):
+    """Événements d'un travail, du plus ancien au plus récent (une requête)"""
+    return travail.evenements.select_related('acteur').order_by('date_evenement', 'pk')
+
+
+def fil_activite(types=None, acteur=None, depuis=None):
+    """Événements de tous les travaux, les plus récents d'abord"""
+    evenements = TravailEvent.objects.select_related('travail', 'acteur')
+    if types:
+        evenements = evenements.filter(type_evenement__in=types)
+    if acteur is not None:
+        evenements = evenements.filter(acteur=acteur)
+    if depuis is not None:
+        evenements = evenements.filter(date_evenement__gte=depuis)
+    return evenements.order_by('-date_evenement', '-pk')
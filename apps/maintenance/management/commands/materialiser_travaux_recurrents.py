@@ -0,0 +1,42 @@
+# apps/maintenance/management/commands/materialiser_travaux_recurrents.py
+"""
+Commande Django pour planifier les occurrences des travaux récurrents
+Usage: python manage.py materialiser_travaux_recurrents [--jours 90] [--dry-run]
+
+À exécuter chaque nuit: les occurrences de l'horizon glissant sont créées
+d'avance, sans attendre la clôture de l'occurrence précédente. Idempotente.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.maintenance.recurrence import horizon_par_defaut, materialiser_travaux
+
+
+class Command(BaseCommand):
+    help = 'Crée les occurrences à venir des travaux récurrents sur un horizon glissant'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jours',
+            type=int,
+            default=None,
+            help='Horizon de planification en jours (défaut: MAINTENANCE_HORIZON_RECURRENCE_JOURS, 90)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compter les occurrences à créer sans rien enregistrer'
+        )
+
+    def handle(self, *args, **options):
+        jours = options['jours'] or horizon_par_defaut()
+        count = materialiser_travaux(horizon_jours=jours, simulation=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'🔍 {count} occurrence(s) à créer sur {jours} jours'))
+        elif count:
+            self.stdout.write(self.style.SUCCESS(f'✅ {count} occurrence(s) planifiée(s) sur {jours} jours'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Travaux récurrents déjà planifiés sur {jours} jours'))
+
+        return f'{count} occurrences'
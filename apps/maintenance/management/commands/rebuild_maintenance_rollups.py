@@ -0,0 +1,42 @@
+# apps/maintenance/management/commands/rebuild_maintenance_rollups.py
+"""
+Commande Django pour recalculer les cumuls journaliers de maintenance (délais, SLA, backlog)
+Usage: python manage.py rebuild_maintenance_rollups [--from 2025-01-01] [--to 2025-12-31]
+
+Lancée chaque nuit sur la veille et le jour courant (MaintenanceRollupsCronJob).
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.maintenance.services import reconstruire_cumuls
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les cumuls journaliers de maintenance depuis les travaux'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='date_debut',
+            help='Première date à recalculer (AAAA-MM-JJ). Par défaut: premier signalement'
+        )
+        parser.add_argument(
+            '--to',
+            dest='date_fin',
+            help='Dernière date à recalculer (AAAA-MM-JJ). Par défaut: aujourd\'hui'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            date_debut = date.fromisoformat(options['date_debut']) if options['date_debut'] else None
+            date_fin = date.fromisoformat(options['date_fin']) if options['date_fin'] else None
+        except ValueError:
+            raise CommandError('Les dates doivent être au format AAAA-MM-JJ')
+        if date_debut and date_fin and date_fin < date_debut:
+            raise CommandError('La date de fin doit suivre la date de début')
+
+        self.stdout.write('🔄 Recalcul des cumuls de maintenance...')
+        nb_cumuls = reconstruire_cumuls(date_debut, date_fin)
+        self.stdout.write(self.style.SUCCESS(f'✅ {nb_cumuls} cumul(s) recalculé(s)'))
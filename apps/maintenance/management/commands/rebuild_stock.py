@@ -0,0 +1,46 @@
+# apps/maintenance/management/commands/rebuild_stock.py
+"""
+Commande Django pour reconstituer le magasin depuis les demandes d'achat
+Usage: python manage.py rebuild_stock [--soldes-seulement]
+
+Entre en stock les demandes d'achat reçues sans mouvement, sort le matériel
+des travaux terminés, puis recalcule les soldes depuis les mouvements.
+Rejouable: une ligne d'achat n'entre et ne sort qu'une fois.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.maintenance.managers import ETAPES_COUT_MATERIEL
+from apps.maintenance.models import Travail
+from apps.maintenance.stock import consommer_materiel, entrer_reception, recalculer_soldes
+from apps.payments.models import Invoice
+
+
+class Command(BaseCommand):
+    help = 'Reconstitue les mouvements de stock manquants et recalcule les soldes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--soldes-seulement',
+            action='store_true',
+            help='Recalculer uniquement les soldes depuis les mouvements existants'
+        )
+
+    def handle(self, *args, **options):
+        if not options['soldes_seulement']:
+            self.stdout.write('📦 Entrées des demandes d\'achat reçues...')
+            demandes = Invoice.objects.filter(
+                type_facture='demande_achat',
+                etape_workflow__in=ETAPES_COUT_MATERIEL,
+            ).exclude(
+                lignes_achat__mouvements_stock__type_mouvement='entree',
+            ).distinct()
+            nb_entrees = sum(len(entrer_reception(demande)) for demande in demandes)
+            self.stdout.write(f'   {nb_entrees} entrée(s)')
+
+            self.stdout.write('🔧 Sorties des travaux terminés...')
+            nb_sorties = len(consommer_materiel(Travail.objects.filter(statut__in=['complete', 'valide'])))
+            self.stdout.write(f'   {nb_sorties} sortie(s)')
+
+        nb_corriges = recalculer_soldes()
+        self.stdout.write(self.style.SUCCESS(f'✅ Soldes recalculés ({nb_corriges} article(s) corrigé(s))'))
@@ -1 +1,95 @@
- 
+# apps/maintenance/managers.py
+"""
+Custom QuerySet Managers pour le module maintenance
+Statut et coût du matériel des travaux calculés en base (agrégats
+conditionnels sur les demandes d'achat), pour des listes à nombre de
+requêtes constant
+"""
+
+from decimal import Decimal
+
+from django.db import models
+from django.db.models import Case, CharField, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+# Étapes du workflow des demandes d'achat (Invoice.etape_workflow)
+ETAPES_VALIDATION = ['brouillon', 'en_attente']
+ETAPES_EN_COURS = [
+    'brouillon', 'en_attente', 'valide_responsable', 'comptable',
+    'validation_dg', 'approuve', 'en_cours_achat',
+]
+ETAPES_RECUES = ['recue']
+ETAPES_COUT_MATERIEL = ['recue', 'paye']
+
+ZERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def statut_materiel(nb_demandes, nb_validation, nb_en_cours, nb_recues):
+    """
+    Statut du matériel d'un travail à partir des compteurs de ses demandes d'achat
+
+    Returns:
+        str: 'aucun_materiel', 'en_attente_validation', 'en_attente_reception',
+             'materiel_recu', 'materiel_partiel'
+    """
+    if not nb_demandes:
+        return 'aucun_materiel'
+    if nb_validation == nb_demandes:
+        return 'en_attente_validation'
+    if nb_recues == nb_demandes:
+        return 'materiel_recu'
+    if nb_en_cours:
+        return 'en_attente_reception'
+    if nb_recues:
+        return 'materiel_partiel'
+    return 'en_attente_reception'
+
+
+def _nb_demandes(etapes):
+    return Count('demandes_achat', filter=Q(demandes_achat__etape_workflow__in=etapes))
+
+
+class TravailQuerySet(models.QuerySet):
+    """QuerySet personnalisé pour les travaux"""
+
+    def avec_materiel(self):
+        """
+        Annote le matériel des travaux en une seule requête groupée
+
+        Lus par necessite_materiel, statut_materiel et cout_total_materiel:
+            nb_demandes_achat_annote, statut_materiel_annote, cout_materiel_annote
+        """
+        return self.alias(
+            nb_validation_materiel=_nb_demandes(ETAPES_VALIDATION),
+            nb_en_cours_materiel=_nb_demandes(ETAPES_EN_COURS),
+            nb_recues_materiel=_nb_demandes(ETAPES_RECUES),
+        ).annotate(
+            nb_demandes_achat_annote=Count('demandes_achat'),
+            # Même ordre de priorité que statut_materiel()
+            statut_materiel_annote=Case(
+                When(nb_demandes_achat_annote=0, then=Value('aucun_materiel')),
+                When(nb_demandes_achat_annote=F('nb_validation_materiel'), then=Value('en_attente_validation')),
+                When(nb_demandes_achat_annote=F('nb_recues_materiel'), then=Value('materiel_recu')),
+                When(nb_en_cours_materiel__gt=0, then=Value('en_attente_reception')),
+                When(nb_recues_materiel__gt=0, then=Value('materiel_partiel')),
+                default=Value('en_attente_reception'),
+                output_field=CharField(),
+            ),
+            cout_materiel_annote=Coalesce(
+                Sum(
+                    'demandes_achat__montant_ttc',
+                    filter=Q(demandes_achat__etape_workflow__in=ETAPES_COUT_MATERIEL),
+                ),
+                ZERO,
+            ),
+        )
+
+
+class TravailManager(models.Manager):
+    """Manager pour Travail"""
+
+    def get_queryset(self):
+        return TravailQuerySet(self.model, using=self._db)
+
+    def avec_materiel(self):
+        return self.get_queryset().avec_materiel()
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def rattacher_series(apps, schema_editor):
+    """
+    Rattache les chaînes créées à chaque clôture (ancienne récurrence) à une série
+
+    Les travaux récurrents de même titre, lieu et récurrence forment une série
+    dont le plus ancien est la racine.
+    """
+    Travail = apps.get_model('maintenance', 'Travail')
+    series = {}
+    for travail in Travail.objects.filter(is_recurrent=True, date_prevue__isnull=False).order_by('date_prevue', 'pk'):
+        cle = (travail.titre, travail.appartement_id, travail.residence_id, travail.recurrence)
+        racine, dates = series.setdefault(cle, (travail, set()))
+        if racine.pk == travail.pk:
+            continue
+        jour = travail.date_prevue.date()
+        travail.serie_id = racine.pk
+        travail.date_occurrence = None if jour in dates else jour
+        dates.add(jour)
+        travail.save(update_fields=['serie', 'date_occurrence'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0005_remove_demande_achat_field'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='travail',
+            name='date_occurrence',
+            field=models.DateField(blank=True, help_text="Identifie l'occurrence dans sa série", null=True, verbose_name="Date d'occurrence"),
+        ),
+        migrations.AddField(
+            model_name='travail',
+            name='regle_recurrence',
+            field=models.CharField(blank=True, help_text='Optionnelle, prioritaire sur le type (ex: FREQ=WEEKLY;BYDAY=MO,TH)', max_length=255, verbose_name='Règle de récurrence (RRULE)'),
+        ),
+        migrations.AddField(
+            model_name='travail',
+            name='serie',
+            field=models.ForeignKey(blank=True, help_text="Travail récurrent d'origine de cette occurrence", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='maintenance.travail', verbose_name='Série récurrente'),
+        ),
+        migrations.AddConstraint(
+            model_name='travail',
+            constraint=models.UniqueConstraint(condition=models.Q(('serie__isnull', False)), fields=('serie', 'date_occurrence'), name='travail_occurrence_unique'),
+        ),
+        migrations.RunPython(rattacher_series, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0006_travail_recurrence_series'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='travail',
+            index=models.Index(fields=['assigne_a', 'date_prevue'], name='maintenance_assigne_00f609_idx'),
+        ),
+    ]
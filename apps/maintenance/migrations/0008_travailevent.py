@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def reconstituer_journal(apps, schema_editor):
+    """
+    Reconstitue le journal des travaux existants à partir de leurs dates
+    (création, assignation, début, fin) et de l'historique des demandes d'achat
+    """
+    Travail = apps.get_model('maintenance', 'Travail')
+    TravailEvent = apps.get_model('maintenance', 'TravailEvent')
+    HistoriqueValidation = apps.get_model('payments', 'HistoriqueValidation')
+
+    libelles_statuts = dict(Travail._meta.get_field('statut').choices)
+    libelles_actions = dict(HistoriqueValidation._meta.get_field('action').choices)
+    evenements = []
+    for travail in Travail.objects.select_related('assigne_a').iterator():
+        evenements.append(TravailEvent(
+            travail_id=travail.pk, type_evenement='creation', date_evenement=travail.created_at,
+            acteur_id=travail.cree_par_id or travail.signale_par_id,
+            message=f"Travail créé ({travail.numero_travail})",
+        ))
+        if travail.date_assignation and travail.assigne_a_id:
+            evenements.append(TravailEvent(
+                travail_id=travail.pk, type_evenement='assignation', date_evenement=travail.date_assignation,
+                nouvelle_valeur=str(travail.assigne_a_id),
+                message=f"Assigné à {travail.assigne_a.first_name} {travail.assigne_a.last_name}".strip(),
+            ))
+        for date_evenement, statut in [(travail.date_debut, 'en_cours'), (travail.date_fin, 'complete')]:
+            if date_evenement:
+                evenements.append(TravailEvent(
+                    travail_id=travail.pk, type_evenement='statut', date_evenement=date_evenement,
+                    nouvelle_valeur=statut, message=f"Statut: {libelles_statuts[statut]}",
+                ))
+    historiques = HistoriqueValidation.objects.filter(
+        demande__travail_lie__isnull=False,
+    ).select_related('demande')
+    for historique in historiques.iterator():
+        evenements.append(TravailEvent(
+            travail_id=historique.demande.travail_lie_id, type_evenement='demande_achat',
+            date_evenement=historique.date_action, acteur_id=historique.effectue_par_id,
+            nouvelle_valeur=historique.action,
+            message=f"{libelles_actions.get(historique.action, historique.action)} ({historique.demande.numero_facture})",
+        ))
+    TravailEvent.objects.bulk_create(evenements, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('maintenance', '0007_travail_intervenant_date'),
+        ('payments', '0006_demande_achat_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravailEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('type_evenement', models.CharField(choices=[('creation', 'Création'), ('statut', 'Changement de statut'), ('assignation', 'Assignation'), ('media', 'Média ajouté'), ('checklist', 'Checklist'), ('demande_achat', "Demande d'achat")], max_length=20, verbose_name="Type d'événement")),
+                ('date_evenement', models.DateTimeField(default=django.utils.timezone.now, verbose_name="Date de l'événement")),
+                ('ancienne_valeur', models.CharField(blank=True, max_length=50, verbose_name='Ancienne valeur')),
+                ('nouvelle_valeur', models.CharField(blank=True, max_length=50, verbose_name='Nouvelle valeur')),
+                ('message', models.CharField(max_length=255, verbose_name='Message')),
+                ('acteur', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='evenements_travaux', to=settings.AUTH_USER_MODEL, verbose_name='Effectué par')),
+                ('travail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evenements', to='maintenance.travail', verbose_name='Travail')),
+            ],
+            options={
+                'verbose_name': 'Événement de travail',
+                'verbose_name_plural': 'Événements de travaux',
+                'ordering': ['date_evenement', 'pk'],
+                'indexes': [models.Index(fields=['travail', 'date_evenement'], name='maintenance_travail_f5cabc_idx'), models.Index(fields=['-date_evenement'], name='maintenance_date_ev_988d2e_idx'), models.Index(fields=['type_evenement', 'date_evenement'], name='maintenance_type_ev_b34cf5_idx')],
+            },
+        ),
+        migrations.RunPython(reconstituer_journal, migrations.RunPython.noop),
+    ]
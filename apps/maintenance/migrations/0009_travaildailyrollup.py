@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0008_travailevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravailDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('priorite', models.CharField(max_length=20, verbose_name='Priorité')),
+                ('nb_signales', models.IntegerField(default=0, verbose_name='Travaux signalés')),
+                ('nb_assignes', models.IntegerField(default=0, verbose_name='Travaux assignés')),
+                ('nb_demarres', models.IntegerField(default=0, verbose_name='Travaux démarrés')),
+                ('nb_resolus', models.IntegerField(default=0, verbose_name='Travaux résolus')),
+                ('nb_resolus_hors_sla', models.IntegerField(default=0, verbose_name='Résolus hors délai')),
+                ('secondes_assignation', models.BigIntegerField(default=0, verbose_name="Délais d'assignation cumulés (s)")),
+                ('secondes_demarrage', models.BigIntegerField(default=0, verbose_name='Délais de démarrage cumulés (s)')),
+                ('secondes_resolution', models.BigIntegerField(default=0, verbose_name='Délais de résolution cumulés (s)')),
+                ('nb_ouverts', models.IntegerField(default=0, verbose_name='Travaux ouverts en fin de journée')),
+            ],
+            options={
+                'verbose_name': 'Cumul maintenance journalier',
+                'verbose_name_plural': 'Cumuls maintenance journaliers',
+                'ordering': ['-date', 'priorite'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='travaildailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'priorite'), name='cumul_maintenance_unique'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0009_travaildailyrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='travailevent',
+            name='type_evenement',
+            field=models.CharField(choices=[('creation', 'Création'), ('statut', 'Changement de statut'), ('assignation', 'Assignation'), ('priorite', 'Changement de priorité'), ('planification', 'Replanification'), ('media', 'Média ajouté'), ('checklist', 'Checklist'), ('demande_achat', "Demande d'achat")], max_length=20, verbose_name="Type d'événement"),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:34
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0006_demande_achat_inbox_indexes'),
+        ('maintenance', '0010_travailevent_types_groupes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('cle', models.CharField(help_text='Désignation normalisée et unité', max_length=255, unique=True, verbose_name='Clé')),
+                ('designation', models.CharField(max_length=255, verbose_name='Désignation')),
+                ('unite', models.CharField(default='unité', max_length=50, verbose_name='Unité')),
+                ('categorie', models.CharField(blank=True, max_length=50, verbose_name='Catégorie')),
+                ('quantite_en_stock', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Quantité en stock')),
+                ('cout_unitaire_moyen', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Coût unitaire moyen (FCFA)')),
+                ('stock_minimum', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Stock de sécurité')),
+                ('delai_reappro_jours', models.PositiveIntegerField(blank=True, help_text='Par défaut: MAINTENANCE_STOCK_DELAI_REAPPRO_JOURS', null=True, verbose_name='Délai de réapprovisionnement (jours)')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Actif')),
+            ],
+            options={
+                'verbose_name': 'Article en stock',
+                'verbose_name_plural': 'Articles en stock',
+                'ordering': ['designation'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MouvementStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('type_mouvement', models.CharField(choices=[('entree', 'Entrée (réception)'), ('sortie', 'Sortie (consommation)'), ('ajustement', "Ajustement d'inventaire")], max_length=20, verbose_name='Type de mouvement')),
+                ('quantite', models.DecimalField(decimal_places=2, help_text='Positive pour une entrée, négative pour une sortie', max_digits=12, verbose_name='Quantité')),
+                ('solde_apres', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Stock après mouvement')),
+                ('cout_unitaire', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Coût unitaire (FCFA)')),
+                ('date_mouvement', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date du mouvement')),
+                ('motif', models.CharField(blank=True, max_length=255, verbose_name='Motif')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='mouvements', to='maintenance.articlestock', verbose_name='Article')),
+                ('effectue_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mouvements_stock', to=settings.AUTH_USER_MODEL, verbose_name='Effectué par')),
+                ('ligne_achat', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mouvements_stock', to='payments.lignedemandeachat', verbose_name="Ligne de demande d'achat")),
+                ('travail', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mouvements_stock', to='maintenance.travail', verbose_name='Travail')),
+            ],
+            options={
+                'verbose_name': 'Mouvement de stock',
+                'verbose_name_plural': 'Mouvements de stock',
+                'ordering': ['date_mouvement', 'pk'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='articlestock',
+            index=models.Index(fields=['designation'], name='maintenance_designa_765322_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouvementstock',
+            index=models.Index(fields=['article', 'date_mouvement'], name='maintenance_article_38bdc1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouvementstock',
+            index=models.Index(fields=['type_mouvement', 'date_mouvement'], name='maintenance_type_mo_5e106f_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mouvementstock',
+            constraint=models.UniqueConstraint(condition=models.Q(('ligne_achat__isnull', False)), fields=('ligne_achat', 'type_mouvement'), name='mouvement_ligne_achat_unique'),
+        ),
+    ]
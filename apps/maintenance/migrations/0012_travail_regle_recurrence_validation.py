@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:01
+
+import apps.maintenance.recurrence
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0011_stock'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='travail',
+            name='regle_recurrence',
+            field=models.CharField(blank=True, help_text='Optionnelle, prioritaire sur le type (ex: FREQ=WEEKLY;BYDAY=MO,TH)', max_length=255, validators=[apps.maintenance.recurrence.valider_regle_recurrence], verbose_name='Règle de récurrence (RRULE)'),
+        ),
+    ]
@@ -1,4 +1,7 @@
 from .travail import Travail, TravailChecklist, TravailMedia
+from .evenement import TravailEvent
+from .statistiques import TravailDailyRollup
+from .stock import ArticleStock, MouvementStock
 from .tache import Tache
 from .intervention import Intervention, InterventionChecklistItem, InterventionMedia, InterventionTemplate, InterventionTemplateChecklistItem
 from .maintenance import MaintenanceSchedule
@@ -7,6 +10,10 @@ __all__ = [
     'Travail',
     'TravailChecklist',
     'TravailMedia',
+    'TravailEvent',
+    'TravailDailyRollup',
+    'ArticleStock',
+    'MouvementStock',
     'Tache',
     'Intervention',
     'InterventionChecklistItem',
@@ -0,0 +1,125 @@
+# apps/maintenance/models/evenement.py
+
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+
+from apps.core.models import BaseModel
+
+User = get_user_model()
+
+
+class TravailEvent(BaseModel):
+    """
+    Journal des événements d'un travail (ajout seul)
+
+    Écrit par les signaux de apps/maintenance/signals.py: création,
+    changements de statut et d'assignation, médias, checklist et étapes
+    des demandes d'achat liées; en masse par les actions groupées
+    (apps/maintenance/operations.py). Sert d'historique au détail d'un travail
+    et de fil d'activité aux managers.
+    """
+
+    TYPE_CHOICES = [
+        ('creation', 'Création'),
+        ('statut', 'Changement de statut'),
+        ('assignation', 'Assignation'),
+        ('priorite', 'Changement de priorité'),
+        ('planification', 'Replanification'),
+        ('media', 'Média ajouté'),
+        ('checklist', 'Checklist'),
+        ('demande_achat', "Demande d'achat"),
+    ]
+
+    # Icône Font Awesome et couleur d'affichage par type d'événement
+    AFFICHAGE = {
+        'creation': ('fa-plus', 'blue'),
+        'statut': ('fa-exchange-alt', 'orange'),
+        'assignation': ('fa-user-plus', 'indigo'),
+        'priorite': ('fa-flag', 'red'),
+        'planification': ('fa-calendar-alt', 'blue'),
+        'media': ('fa-camera', 'gray'),
+        'checklist': ('fa-check-square', 'teal'),
+        'demande_achat': ('fa-shopping-cart', 'purple'),
+    }
+    AFFICHAGE_STATUTS = {
+        'en_cours': ('fa-play', 'orange'),
+        'complete': ('fa-check', 'green'),
+        'valide': ('fa-check-double', 'green'),
+        'annule': ('fa-times', 'red'),
+    }
+
+    travail = models.ForeignKey(
+        'maintenance.Travail',
+        on_delete=models.CASCADE,
+        related_name='evenements',
+        verbose_name="Travail"
+    )
+
+    type_evenement = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES,
+        verbose_name="Type d'événement"
+    )
+
+    acteur = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='evenements_travaux',
+        verbose_name="Effectué par"
+    )
+
+    date_evenement = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Date de l'événement"
+    )
+
+    ancienne_valeur = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name="Ancienne valeur"
+    )
+
+    nouvelle_valeur = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name="Nouvelle valeur"
+    )
+
+    message = models.CharField(
+        max_length=255,
+        verbose_name="Message"
+    )
+
+    class Meta:
+        verbose_name = "Événement de travail"
+        verbose_name_plural = "Événements de travaux"
+        ordering = ['date_evenement', 'pk']
+        indexes = [
+            models.Index(fields=['travail', 'date_evenement']),
+            models.Index(fields=['-date_evenement']),
+            models.Index(fields=['type_evenement', 'date_evenement']),
+        ]
+
+    def __str__(self):
+        return f"{self.travail_id} - {self.message} ({self.date_evenement.strftime('%d/%m/%Y %H:%M')})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Le journal des travaux est en ajout seul")
+        super().save(*args, **kwargs)
+
+    @property
+    def icone(self):
+        return self._affichage()[0]
+
+    @property
+    def couleur(self):
+        return self._affichage()[1]
+
+    def _affichage(self):
+        if self.type_evenement == 'statut' and self.nouvelle_valeur in self.AFFICHAGE_STATUTS:
+            return self.AFFICHAGE_STATUTS[self.nouvelle_valeur]
+        return self.AFFICHAGE.get(self.type_evenement, ('fa-circle', 'gray'))
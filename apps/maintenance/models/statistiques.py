@@ -0,0 +1,84 @@
+# apps/maintenance/models/statistiques.py
+
+from django.db import models
+
+from apps.core.models import BaseModel
+
+
+class TravailDailyRollup(BaseModel):
+    """
+    Cumul journalier des délais de maintenance par priorité
+
+    Recalculé par apps.maintenance.services.reconstruire_cumuls (commande
+    rebuild_maintenance_rollups, tâche cron quotidienne). Les délais sont
+    stockés en secondes cumulées: délai moyen = secondes / nombre.
+    Les travaux annulés ne sont pas comptés.
+    """
+
+    date = models.DateField(
+        verbose_name="Date"
+    )
+
+    priorite = models.CharField(
+        max_length=20,
+        verbose_name="Priorité"
+    )
+
+    nb_signales = models.IntegerField(
+        default=0,
+        verbose_name="Travaux signalés"
+    )
+
+    nb_assignes = models.IntegerField(
+        default=0,
+        verbose_name="Travaux assignés"
+    )
+
+    nb_demarres = models.IntegerField(
+        default=0,
+        verbose_name="Travaux démarrés"
+    )
+
+    nb_resolus = models.IntegerField(
+        default=0,
+        verbose_name="Travaux résolus"
+    )
+
+    nb_resolus_hors_sla = models.IntegerField(
+        default=0,
+        verbose_name="Résolus hors délai"
+    )
+
+    secondes_assignation = models.BigIntegerField(
+        default=0,
+        verbose_name="Délais d'assignation cumulés (s)"
+    )
+
+    secondes_demarrage = models.BigIntegerField(
+        default=0,
+        verbose_name="Délais de démarrage cumulés (s)"
+    )
+
+    secondes_resolution = models.BigIntegerField(
+        default=0,
+        verbose_name="Délais de résolution cumulés (s)"
+    )
+
+    nb_ouverts = models.IntegerField(
+        default=0,
+        verbose_name="Travaux ouverts en fin de journée"
+    )
+
+    class Meta:
+        verbose_name = "Cumul maintenance journalier"
+        verbose_name_plural = "Cumuls maintenance journaliers"
+        ordering = ['-date', 'priorite']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'priorite'],
+                name='cumul_maintenance_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.priorite}: {self.nb_resolus} résolu(s), {self.nb_ouverts} ouvert(s)"
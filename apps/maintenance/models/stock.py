@@ -0,0 +1,207 @@
+# apps/maintenance/models/stock.py
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+
+from apps.core.models import BaseModel
+
+User = get_user_model()
+
+
+class ArticleStock(BaseModel):
+    """
+    Article du magasin (fournitures, pièces, consommables)
+
+    Les articles sont créés à la réception des demandes d'achat, identifiés
+    par leur désignation normalisée et leur unité (cle). quantite_en_stock
+    est le solde courant des mouvements (MouvementStock), tenu à jour à
+    chaque mouvement par apps.maintenance.stock.
+    """
+
+    cle = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name="Clé",
+        help_text="Désignation normalisée et unité"
+    )
+
+    designation = models.CharField(
+        max_length=255,
+        verbose_name="Désignation"
+    )
+
+    unite = models.CharField(
+        max_length=50,
+        default='unité',
+        verbose_name="Unité"
+    )
+
+    categorie = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name="Catégorie"
+    )
+
+    quantite_en_stock = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Quantité en stock"
+    )
+
+    cout_unitaire_moyen = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Coût unitaire moyen (FCFA)"
+    )
+
+    stock_minimum = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Stock de sécurité"
+    )
+
+    delai_reappro_jours = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Délai de réapprovisionnement (jours)",
+        help_text="Par défaut: MAINTENANCE_STOCK_DELAI_REAPPRO_JOURS"
+    )
+
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name="Actif"
+    )
+
+    class Meta:
+        verbose_name = "Article en stock"
+        verbose_name_plural = "Articles en stock"
+        ordering = ['designation']
+        indexes = [
+            models.Index(fields=['designation']),
+        ]
+
+    def __str__(self):
+        return f"{self.designation} ({self.quantite_en_stock} {self.unite})"
+
+    @property
+    def valeur_stock(self):
+        return self.quantite_en_stock * self.cout_unitaire_moyen
+
+
+class MouvementStock(BaseModel):
+    """
+    Mouvement de stock (ajout seul)
+
+    Entrées à la réception des demandes d'achat, sorties à la clôture des
+    travaux liés, ajustements d'inventaire. solde_apres est le stock de
+    l'article après le mouvement. Une ligne de demande d'achat n'entre et
+    ne sort qu'une fois (contraintes sur ligne_achat).
+    """
+
+    TYPE_CHOICES = [
+        ('entree', 'Entrée (réception)'),
+        ('sortie', 'Sortie (consommation)'),
+        ('ajustement', "Ajustement d'inventaire"),
+    ]
+
+    article = models.ForeignKey(
+        ArticleStock,
+        on_delete=models.PROTECT,
+        related_name='mouvements',
+        verbose_name="Article"
+    )
+
+    type_mouvement = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES,
+        verbose_name="Type de mouvement"
+    )
+
+    quantite = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Quantité",
+        help_text="Positive pour une entrée, négative pour une sortie"
+    )
+
+    solde_apres = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Stock après mouvement"
+    )
+
+    cout_unitaire = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Coût unitaire (FCFA)"
+    )
+
+    ligne_achat = models.ForeignKey(
+        'payments.LigneDemandeAchat',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='mouvements_stock',
+        verbose_name="Ligne de demande d'achat"
+    )
+
+    travail = models.ForeignKey(
+        'maintenance.Travail',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='mouvements_stock',
+        verbose_name="Travail"
+    )
+
+    effectue_par = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='mouvements_stock',
+        verbose_name="Effectué par"
+    )
+
+    date_mouvement = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Date du mouvement"
+    )
+
+    motif = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Motif"
+    )
+
+    class Meta:
+        verbose_name = "Mouvement de stock"
+        verbose_name_plural = "Mouvements de stock"
+        ordering = ['date_mouvement', 'pk']
+        indexes = [
+            models.Index(fields=['article', 'date_mouvement']),
+            models.Index(fields=['type_mouvement', 'date_mouvement']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ligne_achat', 'type_mouvement'],
+                condition=models.Q(ligne_achat__isnull=False),
+                name='mouvement_ligne_achat_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_type_mouvement_display()} {self.quantite} {self.article.unite} - {self.article.designation}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Les mouvements de stock sont en ajout seul")
+        super().save(*args, **kwargs)
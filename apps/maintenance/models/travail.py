@@ -1,10 +1,16 @@
 from django.db import models
+from django.db.models import Sum
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 from django.utils import timezone
 from apps.core.models import BaseModel
 from apps.core.utils import generate_unique_reference
+from apps.maintenance.managers import (
+    ETAPES_COUT_MATERIEL, ETAPES_EN_COURS, ETAPES_RECUES, ETAPES_VALIDATION,
+    TravailManager, statut_materiel,
+)
+from apps.maintenance.recurrence import valider_regle_recurrence
 
 User = get_user_model()
 
@@ -225,6 +231,31 @@ class Travail(BaseModel):
         verbose_name="Fin de récurrence"
     )
 
+    regle_recurrence = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Règle de récurrence (RRULE)",
+        help_text="Optionnelle, prioritaire sur le type (ex: FREQ=WEEKLY;BYDAY=MO,TH)",
+        validators=[valider_regle_recurrence],
+    )
+
+    serie = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='occurrences',
+        verbose_name="Série récurrente",
+        help_text="Travail récurrent d'origine de cette occurrence"
+    )
+
+    date_occurrence = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Date d'occurrence",
+        help_text="Identifie l'occurrence dans sa série"
+    )
+
     # ========== COÛTS ==========
     cout_estime = models.DecimalField(
         max_digits=10,
@@ -268,6 +299,8 @@ class Travail(BaseModel):
         verbose_name="Temps réel passé"
     )
 
+    objects = TravailManager()
+
     class Meta:
         verbose_name = "Travail"
         verbose_name_plural = "Travaux"
@@ -278,9 +311,26 @@ class Travail(BaseModel):
             models.Index(fields=['nature', 'type_travail']),
             models.Index(fields=['date_prevue']),
             models.Index(fields=['assigne_a', 'statut']),
+            models.Index(fields=['assigne_a', 'date_prevue']),
             models.Index(fields=['appartement']),
             models.Index(fields=['residence']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['serie', 'date_occurrence'],
+                condition=models.Q(serie__isnull=False),
+                name='travail_occurrence_unique',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # État au chargement, comparé à l'enregistrement pour le journal (TravailEvent)
+        from apps.maintenance.journal import etat_journal
+
+        instance = super().from_db(db, field_names, values)
+        instance._etat_journal = etat_journal(instance)
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.numero_travail:
@@ -332,6 +382,8 @@ class Travail(BaseModel):
     @property
     def necessite_materiel(self):
         """Vérifie si le travail nécessite du matériel (a des demandes d'achat)"""
+        if hasattr(self, 'nb_demandes_achat_annote'):
+            return self.nb_demandes_achat_annote > 0
         return self.demandes_achat.exists()
 
     @property
@@ -339,40 +391,31 @@ class Travail(BaseModel):
         """
         Retourne le statut du matériel pour ce travail
 
+        Utilise l'annotation de Travail.objects.avec_materiel() si présente.
+
         Returns:
             str: 'aucun_materiel', 'en_attente_validation', 'en_attente_reception',
                  'materiel_recu', 'materiel_partiel'
         """
-        demandes = self.demandes_achat.all()
-
-        if not demandes.exists():
-            return 'aucun_materiel'
-
-        # Vérifier les différents statuts
-        etapes = list(demandes.values_list('etape_workflow', flat=True))
-
-        if all(e in ['brouillon', 'en_attente'] for e in etapes):
-            return 'en_attente_validation'
-
-        if all(e == 'recue' for e in etapes):
-            return 'materiel_recu'
-
-        if any(e in ['brouillon', 'en_attente', 'valide_responsable', 'comptable',
-                     'validation_dg', 'approuve', 'en_cours_achat'] for e in etapes):
-            return 'en_attente_reception'
-
-        if any(e == 'recue' for e in etapes):
-            return 'materiel_partiel'
-
-        return 'en_attente_reception'
+        if hasattr(self, 'statut_materiel_annote'):
+            return self.statut_materiel_annote
+
+        etapes = list(self.demandes_achat.values_list('etape_workflow', flat=True))
+        return statut_materiel(
+            len(etapes),
+            sum(1 for e in etapes if e in ETAPES_VALIDATION),
+            sum(1 for e in etapes if e in ETAPES_EN_COURS),
+            sum(1 for e in etapes if e in ETAPES_RECUES),
+        )
 
     @property
     def cout_total_materiel(self):
-        """Calcule le coût total du matériel (toutes les demandes d'achat)"""
-        demandes = self.demandes_achat.filter(
-            etape_workflow__in=['recue', 'paye']
-        )
-        return sum(d.montant_ttc for d in demandes) if demandes.exists() else Decimal('0.00')
+        """Calcule le coût total du matériel reçu ou payé (demandes d'achat)"""
+        if hasattr(self, 'cout_materiel_annote'):
+            return self.cout_materiel_annote
+        return self.demandes_achat.filter(
+            etape_workflow__in=ETAPES_COUT_MATERIEL
+        ).aggregate(total=Sum('montant_ttc'))['total'] or Decimal('0.00')
 
     def creer_demande_achat(self, demandeur, service_fonction, motif_principal, articles):
         """
@@ -481,57 +524,37 @@ class Travail(BaseModel):
 
         self.save()
 
-        # Créer prochaine occurrence si récurrent
-        if self.is_recurrent and self.recurrence != 'aucune':
-            self.generer_prochaine_occurrence()
+    def regle_rrule(self):
+        """Règle de récurrence de la série (None si le travail n'est pas récurrent)"""
+        from apps.maintenance.recurrence import regle
+
+        if not self.is_recurrent or not self.date_prevue:
+            return None
+        return regle(self.recurrence, self.date_prevue, self.recurrence_fin, self.regle_recurrence)
 
     def generer_prochaine_occurrence(self):
-        """Génère la prochaine occurrence pour un travail récurrent"""
-        from datetime import timedelta
+        """
+        Crée (si besoin) l'occurrence suivant ce travail dans sa série
 
-        if not self.is_recurrent or self.recurrence == 'aucune':
-            return None
+        Les occurrences à venir sont normalement créées par la commande
+        materialiser_travaux_recurrents; cette méthode est idempotente.
+        """
+        from apps.maintenance.recurrence import occurrence_travail
 
-        # Calculer la prochaine date
-        date_base = self.date_prevue or timezone.now()
-
-        if self.recurrence == 'quotidien':
-            prochaine_date = date_base + timedelta(days=1)
-        elif self.recurrence == 'hebdomadaire':
-            prochaine_date = date_base + timedelta(weeks=1)
-        elif self.recurrence == 'mensuelle':
-            prochaine_date = date_base + timedelta(days=30)
-        elif self.recurrence == 'trimestrielle':
-            prochaine_date = date_base + timedelta(days=90)
-        elif self.recurrence == 'annuelle':
-            prochaine_date = date_base + timedelta(days=365)
-        else:
+        racine = self.serie or self
+        if not racine.is_recurrent or not self.date_prevue:
             return None
 
-        # Vérifier la date de fin
-        if self.recurrence_fin and prochaine_date.date() > self.recurrence_fin:
+        regle_serie = racine.regle_rrule()
+        prochaine_date = regle_serie.after(timezone.localtime(self.date_prevue)) if regle_serie else None
+        if prochaine_date is None:
             return None
 
-        # Créer le nouveau travail
-        nouveau = Travail.objects.create(
-            titre=self.titre,
-            description=self.description,
-            nature=self.nature,
-            type_travail=self.type_travail,
-            priorite=self.priorite,
-            appartement=self.appartement,
-            residence=self.residence,
-            assigne_a=self.assigne_a,
-            cree_par=self.cree_par,
-            date_prevue=prochaine_date,
-            duree_estimee=self.duree_estimee,
-            cout_estime=self.cout_estime,
-            is_recurrent=True,
-            recurrence=self.recurrence,
-            recurrence_fin=self.recurrence_fin,
-            statut='planifie',
-        )
-
+        existante = racine.occurrences.filter(date_occurrence=prochaine_date.date()).first()
+        if existante:
+            return existante
+        nouveau = occurrence_travail(racine, prochaine_date)
+        nouveau.save()
         return nouveau
 
 
@@ -647,6 +670,12 @@ class TravailChecklist(BaseModel):
         status = "✓" if self.is_completed else "○"
         return f"{status} {self.description}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._etait_complete = instance.__dict__.get('is_completed')
+        return instance
+
     def mark_completed(self, user=None):
         """Marque l'élément comme terminé"""
         self.is_completed = True
@@ -0,0 +1,322 @@
+# apps/maintenance/operations.py
+"""
+Actions groupées sur les travaux (triage après une intempérie, une coupure...)
+
+    assigner_travaux       intervenant (statut assigné si pas encore démarré)
+    changer_statut_travaux transitions vérifiées par TRANSITIONS
+    reprioriser_travaux    priorité
+    replanifier_travaux    date prévue (un travail reporté redevient planifié)
+    annuler_travaux        statut annulé
+
+Les travaux sélectionnés sont lus (et verrouillés) en une requête, chaque
+changement est vérifié en mémoire, puis dans une seule transaction:
+    - un UPDATE (bulk_update si les valeurs diffèrent d'un travail à l'autre),
+    - un bulk_create du journal (TravailEvent),
+    - après validation, un bulk_create des notifications des intervenants
+      et l'invalidation de leur résumé mobile (apps.maintenance.resume).
+Travail.save() et ses signaux ne sont pas appelés; le matériel des travaux
+terminés sort du stock dans la même transaction (consommer_materiel).
+"""
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from apps.maintenance.journal import LIBELLES_STATUTS, etat_journal, message_statut
+from apps.maintenance.models.evenement import TravailEvent
+from apps.maintenance.models.travail import Travail
+from apps.maintenance.resume import invalider_resume
+from apps.maintenance.stock import consommer_materiel
+
+# Statuts atteignables depuis chaque statut
+TRANSITIONS = {
+    'signale': ['planifie', 'assigne', 'en_cours', 'reporte', 'annule'],
+    'planifie': ['signale', 'assigne', 'en_cours', 'reporte', 'annule'],
+    'assigne': ['planifie', 'en_attente_materiel', 'en_cours', 'reporte', 'annule'],
+    'en_attente_materiel': ['assigne', 'en_cours', 'reporte', 'annule'],
+    'en_cours': ['en_attente_materiel', 'complete', 'reporte', 'annule'],
+    'reporte': ['signale', 'planifie', 'assigne', 'annule'],
+    'complete': ['en_cours', 'valide'],
+    'valide': [],
+    'annule': ['signale'],
+}
+
+STATUTS_CLOS = ['complete', 'valide', 'annule']
+STATUTS_AVANT_ASSIGNATION = ['signale', 'planifie', 'reporte']
+
+LIBELLES_PRIORITES = dict(Travail.PRIORITE_CHOICES)
+
+
+class ResultatGroupe:
+    """Travaux modifiés et travaux refusés (avec le motif) d'une action groupée"""
+
+    def __init__(self):
+        self.modifies = []
+        self.refuses = []
+
+    def __len__(self):
+        return len(self.modifies)
+
+    def message(self, action):
+        message = f"{len(self.modifies)} travail(aux) {action}"
+        if self.refuses:
+            message += f", {len(self.refuses)} refusé(s)"
+        return message
+
+    def erreurs(self):
+        return [
+            {'id': travail.pk, 'numero': travail.numero_travail, 'motif': motif}
+            for travail, motif in self.refuses
+        ]
+
+
+def _selection(travaux):
+    """Travaux à modifier, verrouillés jusqu'à la fin de la transaction"""
+    if isinstance(travaux, QuerySet):
+        cles = travaux.order_by().values('pk')
+    else:
+        cles = [getattr(travail, 'pk', travail) for travail in travaux]
+    return list(Travail.objects.select_for_update().filter(pk__in=cles).order_by('pk'))
+
+
+def _effets_statut(travail, statut, maintenant):
+    """Champs à renseigner en même temps que le statut (ou motif de refus)"""
+    if statut not in TRANSITIONS.get(travail.statut, []):
+        return (
+            f"Passage {LIBELLES_STATUTS.get(travail.statut, travail.statut)} → "
+            f"{LIBELLES_STATUTS.get(statut, statut)} impossible"
+        )
+    valeurs = {'statut': statut}
+    if statut == 'assigne':
+        if not travail.assigne_a_id:
+            return "Aucun intervenant assigné"
+        valeurs['date_assignation'] = travail.date_assignation or maintenant
+    elif statut == 'en_cours':
+        valeurs['date_debut'] = travail.date_debut or maintenant
+    elif statut == 'complete':
+        valeurs['date_fin'] = travail.date_fin or maintenant
+        if travail.date_debut:
+            valeurs['temps_reel'] = valeurs['date_fin'] - travail.date_debut
+    return valeurs
+
+
+def _evenements(travail, valeurs, acteur, maintenant, intervenant=None, motif=''):
+    """Événements du journal correspondant aux champs modifiés"""
+    evenements = []
+
+    def evenement(type_evenement, message, ancienne_valeur, nouvelle_valeur):
+        evenements.append(TravailEvent(
+            travail_id=travail.pk,
+            type_evenement=type_evenement,
+            acteur=acteur,
+            date_evenement=maintenant,
+            message=message[:255],
+            ancienne_valeur=str(ancienne_valeur or '')[:50],
+            nouvelle_valeur=str(nouvelle_valeur or '')[:50],
+        ))
+
+    if 'assigne_a_id' in valeurs and valeurs['assigne_a_id'] != travail.assigne_a_id:
+        evenement(
+            'assignation', f"Assigné à {intervenant.get_full_name() or intervenant.username}",
+            travail.assigne_a_id, valeurs['assigne_a_id'],
+        )
+    if 'statut' in valeurs and valeurs['statut'] != travail.statut:
+        message = message_statut(travail.statut, valeurs['statut'])
+        evenement('statut', f"{message} ({motif})" if motif else message, travail.statut, valeurs['statut'])
+    if 'priorite' in valeurs and valeurs['priorite'] != travail.priorite:
+        evenement(
+            'priorite',
+            f"Priorité: {LIBELLES_PRIORITES.get(travail.priorite)} → {LIBELLES_PRIORITES.get(valeurs['priorite'])}",
+            travail.priorite, valeurs['priorite'],
+        )
+    if 'date_prevue' in valeurs and valeurs['date_prevue'] != travail.date_prevue:
+        evenement(
+            'planification',
+            f"Prévu le {timezone.localtime(valeurs['date_prevue']).strftime('%d/%m/%Y %H:%M')}",
+            travail.date_prevue and timezone.localtime(travail.date_prevue).strftime('%d/%m/%Y %H:%M'),
+            timezone.localtime(valeurs['date_prevue']).strftime('%d/%m/%Y %H:%M'),
+        )
+    return evenements
+
+
+def _notifier(type_notification, travaux_par_intervenant, libelle, libelle_un):
+    """Une notification par intervenant, créées en masse après validation"""
+    if not travaux_par_intervenant:
+        return
+
+    def envoyer():
+        from apps.notifications.utils import notify_users_bulk
+
+        notify_users_bulk({
+            destinataire_id: (
+                f"{len(numeros)} travaux {libelle}: {', '.join(numeros[:10])}{'...' if len(numeros) > 10 else ''}"
+                if len(numeros) > 1 else f"Le travail {numeros[0]} {libelle_un}"
+            )
+            for destinataire_id, numeros in travaux_par_intervenant.items()
+        }, type_notification)
+
+    transaction.on_commit(envoyer)
+
+
+def _appliquer(travaux, preparer, acteur=None, motif='', notification=None, intervenant=None):
+    """
+    Vérifie puis applique une action groupée
+
+    Args:
+        preparer: fonction (travail, maintenant) -> dict des champs à modifier,
+                  ou motif du refus (str)
+        notification: (type_notification, libellé pluriel, libellé singulier,
+                       fonction travail -> intervenant à prévenir)
+        intervenant: intervenant assigné par l'action (libellé du journal)
+
+    Returns:
+        ResultatGroupe
+    """
+    resultat = ResultatGroupe()
+    maintenant = timezone.now()
+
+    with transaction.atomic():
+        selection = _selection(travaux)
+        modifications = {}
+        for travail in selection:
+            valeurs = preparer(travail, maintenant)
+            if isinstance(valeurs, str):
+                resultat.refuses.append((travail, valeurs))
+                continue
+            valeurs = {champ: valeur for champ, valeur in valeurs.items() if getattr(travail, champ) != valeur}
+            if valeurs:
+                modifications[travail.pk] = valeurs
+            resultat.modifies.append(travail)
+
+        evenements = []
+        intervenants = set()
+        for travail in resultat.modifies:
+            valeurs = modifications.get(travail.pk)
+            if not valeurs:
+                continue
+            intervenants.add(travail.assigne_a_id)
+            evenements += _evenements(travail, valeurs, acteur, maintenant, intervenant, motif)
+            for champ, valeur in valeurs.items():
+                setattr(travail, champ, valeur)
+            travail.updated_at = maintenant
+            travail._etat_journal = etat_journal(travail)
+            intervenants.add(travail.assigne_a_id)
+
+        if modifications:
+            _enregistrer(resultat.modifies, modifications, maintenant)
+            TravailEvent.objects.bulk_create(evenements, batch_size=500)
+            transaction.on_commit(lambda: invalider_resume(*intervenants))
+
+        if notification is not None:
+            type_notification, libelle, libelle_un, destinataire = notification
+            travaux_par_intervenant = {}
+            for travail in resultat.modifies:
+                destinataire_id = destinataire(travail) if travail.pk in modifications else None
+                if destinataire_id and destinataire_id != getattr(acteur, 'pk', None):
+                    travaux_par_intervenant.setdefault(destinataire_id, []).append(travail.numero_travail)
+            _notifier(type_notification, travaux_par_intervenant, libelle, libelle_un)
+
+    return resultat
+
+
+def _enregistrer(travaux, modifications, maintenant):
+    """Un UPDATE si tous les travaux reçoivent les mêmes valeurs, un bulk_update sinon"""
+    valeurs = list(modifications.values())
+    if all(autres == valeurs[0] for autres in valeurs[1:]):
+        Travail.objects.filter(pk__in=list(modifications)).update(**valeurs[0], updated_at=maintenant)
+        return
+    champs = sorted({champ for valeurs_travail in valeurs for champ in valeurs_travail})
+    Travail.objects.bulk_update(
+        [travail for travail in travaux if travail.pk in modifications],
+        [champ.removesuffix('_id') for champ in champs] + ['updated_at'],
+        batch_size=500,
+    )
+
+
+# ============================================================================
+# ACTIONS
+# ============================================================================
+
+def assigner_travaux(travaux, intervenant, acteur=None):
+    """Assigne les travaux non clos à un intervenant"""
+    def preparer(travail, maintenant):
+        if travail.statut in STATUTS_CLOS:
+            return f"Travail {LIBELLES_STATUTS[travail.statut].lower()}"
+        valeurs = {'assigne_a_id': intervenant.pk}
+        if travail.statut in STATUTS_AVANT_ASSIGNATION:
+            valeurs['statut'] = 'assigne'
+        if travail.assigne_a_id != intervenant.pk or not travail.date_assignation:
+            valeurs['date_assignation'] = maintenant
+        return valeurs
+
+    return _appliquer(
+        travaux, preparer, acteur, intervenant=intervenant,
+        notification=(
+            'intervention_assigned', "vous ont été assignés", "vous a été assigné",
+            lambda travail: travail.assigne_a_id,
+        ),
+    )
+
+
+def changer_statut_travaux(travaux, statut, acteur=None, motif=''):
+    """Change le statut des travaux dont la transition est autorisée"""
+    if statut not in TRANSITIONS:
+        raise ValueError(f"Statut inconnu: {statut}")
+    with transaction.atomic():
+        resultat = _appliquer(
+            travaux, lambda travail, maintenant: _effets_statut(travail, statut, maintenant), acteur, motif,
+        )
+        if statut == 'complete':
+            consommer_materiel(resultat.modifies, acteur=acteur)
+    return resultat
+
+
+def reprioriser_travaux(travaux, priorite, acteur=None):
+    """Change la priorité des travaux non clos"""
+    if priorite not in LIBELLES_PRIORITES:
+        raise ValueError(f"Priorité inconnue: {priorite}")
+
+    def preparer(travail, maintenant):
+        if travail.statut in STATUTS_CLOS:
+            return f"Travail {LIBELLES_STATUTS[travail.statut].lower()}"
+        return {'priorite': priorite}
+
+    return _appliquer(
+        travaux, preparer, acteur,
+        notification=(
+            'system_alert', f"passés en priorité {LIBELLES_PRIORITES[priorite].lower()}",
+            f"est passé en priorité {LIBELLES_PRIORITES[priorite].lower()}",
+            lambda travail: travail.assigne_a_id,
+        ),
+    )
+
+
+def replanifier_travaux(travaux, date_prevue, acteur=None):
+    """Reprogramme les travaux non clos (les travaux reportés redeviennent planifiés)"""
+    def preparer(travail, maintenant):
+        if travail.statut in STATUTS_CLOS:
+            return f"Travail {LIBELLES_STATUTS[travail.statut].lower()}"
+        valeurs = {'date_prevue': date_prevue}
+        if travail.statut == 'reporte':
+            valeurs['statut'] = 'assigne' if travail.assigne_a_id else 'planifie'
+        return valeurs
+
+    return _appliquer(
+        travaux, preparer, acteur,
+        notification=(
+            'maintenance_scheduled',
+            f"reprogrammés au {timezone.localtime(date_prevue).strftime('%d/%m/%Y %H:%M')}",
+            f"est reprogrammé au {timezone.localtime(date_prevue).strftime('%d/%m/%Y %H:%M')}",
+            lambda travail: travail.assigne_a_id,
+        ),
+    )
+
+
+def annuler_travaux(travaux, acteur=None, motif=''):
+    """Annule les travaux qui peuvent l'être, en prévenant les intervenants"""
+    return _appliquer(
+        travaux, lambda travail, maintenant: _effets_statut(travail, 'annule', maintenant), acteur, motif,
+        notification=(
+            'system_alert', "annulés", "a été annulé", lambda travail: travail.assigne_a_id,
+        ),
+    )
@@ -0,0 +1,238 @@
+# apps/maintenance/recurrence.py
+"""
+Récurrence des travaux (règles RRULE, python-dateutil)
+
+Un travail récurrent sans série est la racine d'une série; ses occurrences
+pointent vers lui (serie) et sont identifiées par leur date (date_occurrence).
+Les dates suivent le calendrier: une maintenance mensuelle du 15 reste le
+15, celle du 31 tombe le dernier jour des mois plus courts.
+
+materialiser_travaux() crée en bulk_create les occurrences d'un horizon
+glissant (MAINTENANCE_HORIZON_RECURRENCE_JOURS, 90 jours par défaut). La
+clé (serie, date_occurrence) et le numéro dérivé de la racine rendent
+l'opération idempotente: relancer la commande ne crée aucun doublon.
+
+Une règle RRULE saisie est validée à l'enregistrement (valider_regle_recurrence:
+une seule règle, au plus quotidienne); une série dont la règle ne peut
+quand même pas être construite est journalisée et ignorée.
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, YEARLY, rrule, rrulestr
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FREQUENCES = {
+    'quotidien': (DAILY, 1),
+    'hebdomadaire': (WEEKLY, 1),
+    'mensuel': (MONTHLY, 1),
+    'mensuelle': (MONTHLY, 1),
+    'trimestrielle': (MONTHLY, 3),
+    'annuelle': (YEARLY, 1),
+}
+
+
+def horizon_par_defaut():
+    return getattr(settings, 'MAINTENANCE_HORIZON_RECURRENCE_JOURS', 90)
+
+
+def regle(recurrence, debut, fin=None, texte=''):
+    """
+    Règle de récurrence d'une série
+
+    Args:
+        recurrence: type de récurrence (clé de FREQUENCES)
+        debut: datetime de la première occurrence (heure locale conservée)
+        fin: dernière date possible (incluse)
+        texte: règle RRULE explicite (ex: 'FREQ=WEEKLY;BYDAY=MO,TH'), prioritaire
+
+    Returns:
+        rrule ou None si la série n'est pas récurrente
+    """
+    debut = timezone.localtime(debut) if timezone.is_aware(debut) else debut
+    until = datetime.combine(fin, time.max, tzinfo=debut.tzinfo) if fin else None
+
+    if texte:
+        regle_texte = rrulestr(texte, dtstart=debut)
+        if until is None:
+            return regle_texte
+        if regle_texte._count:
+            # COUNT et UNTIL ne se combinent pas: la série s'arrête à la
+            # première des deux bornes
+            until = min(until, list(regle_texte)[-1])
+        elif regle_texte._until:
+            # UNTIL de la règle: la fin de récurrence ne peut que l'avancer
+            until = min(until, regle_texte._until)
+        return regle_texte.replace(count=None, until=until)
+
+    if recurrence not in FREQUENCES:
+        return None
+    frequence, intervalle = FREQUENCES[recurrence]
+    options = {}
+    if frequence in (MONTHLY, YEARLY) and debut.day > 28:
+        # 29, 30 ou 31: dernier jour disponible du mois plutôt que de le sauter
+        options = {'bymonthday': tuple(range(28, debut.day + 1)), 'bysetpos': -1}
+        if frequence == YEARLY:
+            options['bymonth'] = debut.month
+    return rrule(frequence, interval=intervalle, dtstart=debut, until=until, **options)
+
+
+def valider_regle_recurrence(texte):
+    """Validateur de Travail.regle_recurrence: une règle RRULE, au plus quotidienne"""
+    if not texte:
+        return
+    try:
+        regle_texte = rrulestr(texte, dtstart=timezone.localtime())
+    except (ValueError, TypeError) as e:
+        raise ValidationError(f"Règle de récurrence invalide: {e}")
+    if not isinstance(regle_texte, rrule):
+        raise ValidationError("Une seule règle RRULE est acceptée.")
+    if regle_texte._freq > DAILY:
+        raise ValidationError("La récurrence ne peut pas être plus fréquente que quotidienne.")
+
+
+def dates_a_venir(regle_serie, premiere, debut, fin):
+    """Dates de la série postérieures à la première occurrence, dans [debut, fin]"""
+    if regle_serie is None:
+        return []
+    return [d for d in regle_serie.between(debut, fin, inc=True) if d > premiere]
+
+
+def fenetre(horizon_jours=None, maintenant=None):
+    """Début (aujourd'hui, minuit local) et fin de l'horizon de planification"""
+    maintenant = timezone.localtime(maintenant or timezone.now())
+    debut = maintenant.replace(hour=0, minute=0, second=0, microsecond=0)
+    return debut, debut + timedelta(days=horizon_jours or horizon_par_defaut())
+
+
+# ============================================================================
+# TRAVAUX
+# ============================================================================
+
+def series_travaux():
+    """Racines des séries de travaux récurrents encore actives"""
+    from apps.maintenance.models import Travail
+
+    return Travail.objects.filter(
+        is_recurrent=True, serie__isnull=True, date_prevue__isnull=False,
+    ).filter(
+        ~Q(recurrence='aucune') | ~Q(regle_recurrence=''),
+    ).filter(
+        Q(recurrence_fin__isnull=True) | Q(recurrence_fin__gte=timezone.localdate()),
+    ).exclude(statut='annule')
+
+
+def occurrence_travail(racine, date_prevue):
+    """Occurrence (non enregistrée) d'une série de travaux à une date"""
+    from apps.maintenance.models import Travail
+
+    return Travail(
+        numero_travail=f'{racine.numero_travail}-{date_prevue:%Y%m%d}',
+        serie=racine,
+        date_occurrence=date_prevue.date(),
+        date_prevue=date_prevue,
+        titre=racine.titre,
+        description=racine.description,
+        nature=racine.nature,
+        type_travail=racine.type_travail,
+        priorite=racine.priorite,
+        appartement_id=racine.appartement_id,
+        residence_id=racine.residence_id,
+        assigne_a_id=racine.assigne_a_id,
+        cree_par_id=racine.cree_par_id,
+        duree_estimee=racine.duree_estimee,
+        cout_estime=racine.cout_estime,
+        is_recurrent=True,
+        recurrence=racine.recurrence,
+        recurrence_fin=racine.recurrence_fin,
+        statut='assigne' if racine.assigne_a_id else 'planifie',
+        date_assignation=timezone.now() if racine.assigne_a_id else None,
+    )
+
+
+def materialiser_travaux(horizon_jours=None, maintenant=None, series=None, simulation=False):
+    """
+    Crée les occurrences manquantes des séries sur l'horizon
+
+    Deux requêtes de lecture (séries, occurrences existantes) puis un
+    bulk_create par paquets. bulk_create ne déclenche pas les signaux de
+    Travail: le journal (création, assignation) est écrit en masse et les
+    résumés des intervenants assignés sont invalidés après validation.
+
+    Returns:
+        int: nombre d'occurrences créées (ou à créer en simulation)
+    """
+    from apps.maintenance.models import Travail
+
+    debut, fin = fenetre(horizon_jours, maintenant)
+    series = list(series_travaux() if series is None else series)
+    existantes = set(
+        Travail.objects.filter(
+            serie__in=[racine.pk for racine in series],
+            date_occurrence__range=[debut.date(), fin.date()],
+        ).values_list('serie_id', 'date_occurrence')
+    )
+
+    nouvelles = []
+    for racine in series:
+        try:
+            regle_serie = racine.regle_rrule()
+        except (ValueError, TypeError) as e:
+            # Ex: COUNT dans la règle et fin de récurrence renseignée
+            logger.warning(f"Série {racine.numero_travail} ignorée, règle de récurrence invalide: {e}")
+            continue
+        for date_prevue in dates_a_venir(regle_serie, timezone.localtime(racine.date_prevue), debut, fin):
+            if (racine.pk, date_prevue.date()) not in existantes:
+                nouvelles.append(occurrence_travail(racine, date_prevue))
+
+    if nouvelles and not simulation:
+        with transaction.atomic():
+            Travail.objects.bulk_create(nouvelles, batch_size=500, ignore_conflicts=True)
+            journaliser_occurrences([occurrence.numero_travail for occurrence in nouvelles])
+    return len(nouvelles)
+
+
+def journaliser_occurrences(numeros):
+    """
+    Journal des occurrences insérées en masse (création et assignation)
+
+    Les occurrences sont relues par numéro (ignore_conflicts ne renvoie pas
+    les clés); celles déjà journalisées, insérées par une exécution
+    concurrente, sont ignorées.
+    """
+    from apps.maintenance.models import Travail, TravailEvent
+    from apps.maintenance.resume import invalider_resume
+
+    occurrences = Travail.objects.filter(numero_travail__in=numeros).exclude(
+        evenements__type_evenement='creation'
+    ).select_related('assigne_a').order_by().only(
+        'pk', 'numero_travail', 'statut', 'cree_par_id', 'assigne_a_id',
+        'assigne_a__first_name', 'assigne_a__last_name', 'assigne_a__username',
+    )
+    maintenant = timezone.now()
+    evenements = []
+    intervenants = set()
+    for occurrence in occurrences:
+        evenements.append(TravailEvent(
+            travail_id=occurrence.pk, type_evenement='creation', acteur_id=occurrence.cree_par_id,
+            date_evenement=maintenant, message=f"Travail créé ({occurrence.numero_travail})"[:255],
+            nouvelle_valeur=occurrence.statut,
+        ))
+        if occurrence.assigne_a_id:
+            intervenants.add(occurrence.assigne_a_id)
+            evenements.append(TravailEvent(
+                travail_id=occurrence.pk, type_evenement='assignation', acteur_id=occurrence.cree_par_id,
+                date_evenement=maintenant,
+                message=f"Assigné à {occurrence.assigne_a.get_full_name() or occurrence.assigne_a.username}"[:255],
+                nouvelle_valeur=str(occurrence.assigne_a_id),
+            ))
+    TravailEvent.objects.bulk_create(evenements, batch_size=500)
+    if intervenants:
+        transaction.on_commit(lambda: invalider_resume(*intervenants))
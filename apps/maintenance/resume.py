@@ -0,0 +1,89 @@
+# apps/maintenance/resume.py
+"""
+Résumé d'un intervenant pour le portail mobile
+
+resume_intervenant(user) calcule les compteurs de l'intervenant (travaux
+du jour, en retard, en attente, en cours, terminés aujourd'hui et dans la
+semaine, à venir) en un agrégat conditionnel, puis ses prochains travaux
+en une tranche ordonnée: deux requêtes, mises en cache par intervenant
+(MAINTENANCE_RESUME_CACHE_TTL, 60 s par défaut).
+
+Le cache est invalidé quand un travail de l'intervenant est modifié
+(signal Travail, actions groupées de apps.maintenance.operations).
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from apps.maintenance.calendrier import fenetre_semaine
+from apps.maintenance.models.travail import Travail
+
+STATUTS_OUVERTS = ['signale', 'planifie', 'assigne', 'en_attente_materiel', 'en_cours', 'reporte']
+STATUTS_EN_ATTENTE = ['signale', 'planifie', 'assigne', 'en_attente_materiel', 'reporte']
+STATUTS_TERMINES = ['complete', 'valide']
+
+COMPTEURS = [
+    'aujourd_hui', 'en_retard', 'en_attente', 'en_cours',
+    'a_venir', 'termines_aujourd_hui', 'termines_semaine',
+]
+
+NB_PROCHAINS = 5
+
+CACHE_RESUME = 'maintenance:resume_intervenant:{intervenant_id}'
+
+
+def resume_intervenant(intervenant):
+    """
+    Compteurs et prochains travaux d'un intervenant (deux requêtes, en cache)
+
+    Returns:
+        dict: un entier par clé de COMPTEURS, 'prochains' (travaux en cours
+              puis par date prévue, non planifiés en dernier) et 'calcule_le'
+    """
+    def calculer():
+        maintenant = timezone.now()
+        aujourd_hui = timezone.localdate(maintenant)
+        debut_jour = timezone.make_aware(datetime.combine(aujourd_hui, time.min))
+        fin_jour = debut_jour + timedelta(days=1)
+        debut_semaine, _ = fenetre_semaine(aujourd_hui)
+
+        travaux = Travail.objects.filter(assigne_a=intervenant)
+        ouverts = Q(statut__in=STATUTS_OUVERTS)
+        termines = Q(statut__in=STATUTS_TERMINES)
+        resume = travaux.aggregate(
+            aujourd_hui=Count('id', filter=ouverts & Q(date_prevue__gte=debut_jour, date_prevue__lt=fin_jour)),
+            en_retard=Count('id', filter=ouverts & Q(date_prevue__lt=maintenant)),
+            en_attente=Count('id', filter=Q(statut__in=STATUTS_EN_ATTENTE)),
+            en_cours=Count('id', filter=Q(statut='en_cours')),
+            a_venir=Count('id', filter=ouverts & Q(date_prevue__gte=fin_jour)),
+            termines_aujourd_hui=Count('id', filter=termines & Q(date_fin__gte=debut_jour)),
+            termines_semaine=Count('id', filter=termines & Q(date_fin__gte=debut_semaine)),
+        )
+        resume['prochains'] = list(
+            travaux.filter(ouverts).select_related(
+                'appartement__residence', 'residence',
+            ).order_by(
+                Case(When(statut='en_cours', then=Value(0)), default=Value(1)),
+                F('date_prevue').asc(nulls_last=True),
+                'pk',
+            )[:NB_PROCHAINS]
+        )
+        resume['calcule_le'] = maintenant
+        return resume
+
+    return cache.get_or_set(
+        CACHE_RESUME.format(intervenant_id=intervenant.pk),
+        calculer,
+        getattr(settings, 'MAINTENANCE_RESUME_CACHE_TTL', 60),
+    )
+
+
+def invalider_resume(*intervenant_ids):
+    cache.delete_many([
+        CACHE_RESUME.format(intervenant_id=intervenant_id)
+        for intervenant_id in set(intervenant_ids) if intervenant_id
+    ])
@@ -0,0 +1,354 @@
+# apps/maintenance/services.py
+"""
+Délais de maintenance et respect des engagements (SLA)
+
+Les délais sont mesurés depuis le signalement (date_signalement, à défaut
+la création du travail):
+    - assignation: date_assignation
+    - démarrage:   date_debut
+    - résolution:  date_fin (MTTR)
+
+Les délais cibles par priorité viennent de MAINTENANCE_SLA_HEURES (heures,
+fusionné avec SLA_HEURES_DEFAUT). Chaque analyse est une requête groupée;
+les tendances lisent les cumuls journaliers TravailDailyRollup.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from apps.maintenance.models.statistiques import TravailDailyRollup
+from apps.maintenance.models.travail import Travail
+
+SLA_HEURES_DEFAUT = {
+    'urgente': {'assignation': 1, 'demarrage': 4, 'resolution': 24},
+    'haute': {'assignation': 4, 'demarrage': 24, 'resolution': 72},
+    'normale': {'assignation': 24, 'demarrage': 72, 'resolution': 168},
+    'basse': {'assignation': 72, 'demarrage': 168, 'resolution': 336},
+}
+
+ETAPES = {
+    'assignation': 'date_assignation',
+    'demarrage': 'date_debut',
+    'resolution': 'date_fin',
+}
+
+STATUTS_CLOS = ['complete', 'valide', 'annule']
+
+REGROUPEMENTS = {
+    'priorite': 'priorite',
+    'type_travail': 'type_travail',
+    'residence': 'residence_lieu',
+    'technicien': 'assigne_a',
+}
+
+# Tranches d'ancienneté du backlog, en jours [min, max[
+TRANCHES_ANCIENNETE = [
+    ('moins_1j', 0, 1),
+    ('de_1_a_3j', 1, 3),
+    ('de_3_a_7j', 3, 7),
+    ('de_7_a_30j', 7, 30),
+    ('plus_30j', 30, None),
+]
+
+
+def sla_priorites():
+    """Délais cibles par priorité et par étape, en timedelta"""
+    surcharges = getattr(settings, 'MAINTENANCE_SLA_HEURES', {})
+    return {
+        priorite: {
+            etape: timedelta(hours=heures)
+            for etape, heures in {**defaut, **surcharges.get(priorite, {})}.items()
+        }
+        for priorite, defaut in SLA_HEURES_DEFAUT.items()
+    }
+
+
+def _heures(duree):
+    return round(duree.total_seconds() / 3600, 1) if duree is not None else None
+
+
+def _taux(nb, total):
+    return round(nb * 100 / total, 1) if total else None
+
+
+def _signale_le():
+    return Coalesce('date_signalement', 'created_at')
+
+
+def _delai(etape):
+    return ExpressionWrapper(F(ETAPES[etape]) - _signale_le(), output_field=DurationField())
+
+
+def _hors_sla(etape, sla):
+    """Travaux dont l'étape a été franchie après le délai cible de leur priorité"""
+    condition = Q()
+    for priorite, delais in sla.items():
+        condition |= Q(priorite=priorite, **{f'delai_{etape}__gt': Value(delais[etape], output_field=DurationField())})
+    return condition
+
+
+def travaux_mesures():
+    """Travaux non annulés, avec l'instant de signalement et les délais par étape (alias)"""
+    return Travail.objects.exclude(statut='annule').alias(
+        signale_le=_signale_le(),
+        **{f'delai_{etape}': _delai(etape) for etape in ETAPES},
+    )
+
+
+class MaintenanceAnalytics:
+    """
+    Délais moyens, dépassements de SLA et backlog
+
+    Args:
+        depuis, jusqu_a: travaux signalés dans [depuis, jusqu_a[
+                         (défaut: MAINTENANCE_ANALYTICS_JOURS derniers jours, 90)
+    """
+
+    def __init__(self, depuis=None, jusqu_a=None, maintenant=None):
+        self.maintenant = maintenant or timezone.now()
+        self.jusqu_a = jusqu_a or self.maintenant
+        self.depuis = depuis or self.jusqu_a - timedelta(days=getattr(settings, 'MAINTENANCE_ANALYTICS_JOURS', 90))
+        self.sla = sla_priorites()
+
+    def travaux(self):
+        return travaux_mesures().filter(signale_le__gte=self.depuis, signale_le__lt=self.jusqu_a)
+
+    def _ouverts_hors_sla(self):
+        """Travaux non résolus au-delà du délai de résolution de leur priorité"""
+        condition = Q()
+        for priorite, delais in self.sla.items():
+            condition |= Q(priorite=priorite, signale_le__lt=self.maintenant - delais['resolution'])
+        return Q(date_fin__isnull=True) & ~Q(statut__in=STATUTS_CLOS) & condition
+
+    def _agregats(self):
+        agregats = {
+            'nb': Count('id'),
+            'nb_ouverts': Count('id', filter=Q(date_fin__isnull=True) & ~Q(statut__in=STATUTS_CLOS)),
+            'nb_ouverts_hors_sla': Count('id', filter=self._ouverts_hors_sla()),
+        }
+        for etape, champ in ETAPES.items():
+            agregats[f'nb_{etape}'] = Count('id', filter=Q(**{f'{champ}__isnull': False}))
+            agregats[f'delai_{etape}_moyen'] = Avg(_delai(etape))
+            agregats[f'nb_{etape}_hors_sla'] = Count('id', filter=_hors_sla(etape, self.sla))
+        return agregats
+
+    @staticmethod
+    def _indicateurs(ligne):
+        indicateurs = {
+            'nb': ligne['nb'],
+            'nb_ouverts': ligne['nb_ouverts'],
+            'nb_ouverts_hors_sla': ligne['nb_ouverts_hors_sla'],
+        }
+        for etape in ETAPES:
+            nb = ligne[f'nb_{etape}']
+            indicateurs[f'nb_{etape}'] = nb
+            indicateurs[f'heures_{etape}'] = _heures(ligne[f'delai_{etape}_moyen'])
+            indicateurs[f'nb_{etape}_hors_sla'] = ligne[f'nb_{etape}_hors_sla']
+            indicateurs[f'taux_{etape}_hors_sla'] = _taux(ligne[f'nb_{etape}_hors_sla'], nb)
+        return indicateurs
+
+    def resume(self):
+        """Indicateurs globaux de la période (une requête)"""
+        return self._indicateurs(self.travaux().aggregate(**self._agregats()))
+
+    def par(self, regroupement):
+        """
+        Indicateurs par priorité, type de travail, résidence ou technicien
+
+        Une requête groupée, plus une pour les libellés des résidences et
+        des techniciens.
+
+        Returns:
+            list: dicts cle, libelle et indicateurs, les plus volumineux d'abord
+        """
+        champ = REGROUPEMENTS[regroupement]
+        travaux = self.travaux()
+        if regroupement == 'residence':
+            travaux = travaux.annotate(residence_lieu=Coalesce('residence_id', 'appartement__residence_id'))
+        lignes = list(travaux.order_by().values(champ).annotate(**self._agregats()).order_by('-nb', champ))
+
+        libelles = self._libelles(regroupement, [ligne[champ] for ligne in lignes])
+        return [
+            {
+                'cle': ligne[champ],
+                'libelle': libelles.get(ligne[champ]) or 'Non renseigné',
+                **self._indicateurs(ligne),
+            }
+            for ligne in lignes
+        ]
+
+    @staticmethod
+    def _libelles(regroupement, cles):
+        if regroupement == 'priorite':
+            return dict(Travail.PRIORITE_CHOICES)
+        if regroupement == 'type_travail':
+            return dict(Travail.TYPE_TRAVAIL_CHOICES)
+        cles = [cle for cle in cles if cle is not None]
+        if regroupement == 'residence':
+            from apps.properties.models.residence import Residence
+            return dict(Residence.objects.filter(pk__in=cles).values_list('pk', 'nom'))
+        return {
+            utilisateur.pk: utilisateur.get_full_name() or utilisateur.username
+            for utilisateur in get_user_model().objects.filter(pk__in=cles)
+        }
+
+    def anciennete_backlog(self):
+        """
+        Travaux ouverts (toutes dates) par priorité et tranche d'ancienneté
+
+        Returns:
+            dict: {priorité: {tranche: nombre, 'total': nombre}}
+        """
+        tranches = {}
+        for nom, minimum, maximum in TRANCHES_ANCIENNETE:
+            condition = Q(signale_le__lte=self.maintenant - timedelta(days=minimum))
+            if maximum is not None:
+                condition &= Q(signale_le__gt=self.maintenant - timedelta(days=maximum))
+            tranches[nom] = Count('id', filter=condition)
+
+        backlog = {
+            priorite: {nom: 0 for nom, _, _ in TRANCHES_ANCIENNETE} | {'total': 0}
+            for priorite, _ in Travail.PRIORITE_CHOICES
+        }
+        lignes = travaux_mesures().filter(date_fin__isnull=True).exclude(statut__in=STATUTS_CLOS).order_by() \
+            .values('priorite').annotate(total=Count('id'), **tranches)
+        for ligne in lignes:
+            backlog[ligne.pop('priorite')] = ligne
+        return backlog
+
+    def ouverts_hors_sla(self, limite=10):
+        """Travaux ouverts au-delà du délai de résolution, les plus anciens d'abord"""
+        return travaux_mesures().filter(self._ouverts_hors_sla()).select_related(
+            'assigne_a', 'appartement__residence', 'residence',
+        ).order_by('signale_le')[:limite]
+
+
+# ============================================================================
+# CUMULS JOURNALIERS
+# ============================================================================
+
+def _debut_jour(jour):
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+def reconstruire_cumuls(date_debut=None, date_fin=None):
+    """
+    Recalcule les cumuls journaliers par priorité sur [date_debut, date_fin]
+
+    Cinq requêtes groupées quelle que soit la longueur de la période
+    (signalements, une par étape, backlog initial), puis un remplacement
+    en masse des cumuls de la période.
+
+    Returns:
+        int: nombre de cumuls écrits
+    """
+    travaux = travaux_mesures()
+    if date_debut is None:
+        premier = travaux.order_by('signale_le').values_list('signale_le', flat=True).first()
+        date_debut = timezone.localdate(premier) if premier else timezone.localdate()
+    date_fin = date_fin or timezone.localdate()
+    debut, fin = _debut_jour(date_debut), _debut_jour(date_fin + timedelta(days=1))
+    sla = sla_priorites()
+
+    cumuls = {}
+
+    def cumul(jour, priorite):
+        if (jour, priorite) not in cumuls:
+            cumuls[(jour, priorite)] = TravailDailyRollup(date=jour, priorite=priorite)
+        return cumuls[(jour, priorite)]
+
+    for ligne in travaux.filter(signale_le__gte=debut, signale_le__lt=fin).annotate(
+        jour=TruncDate('signale_le'),
+    ).order_by().values('jour', 'priorite').annotate(nb=Count('id')):
+        cumul(ligne['jour'], ligne['priorite']).nb_signales = ligne['nb']
+
+    for etape, champ in ETAPES.items():
+        lignes = travaux.filter(**{f'{champ}__gte': debut, f'{champ}__lt': fin}).annotate(
+            jour=TruncDate(champ),
+        ).order_by().values('jour', 'priorite').annotate(
+            nb=Count('id'),
+            duree=Sum(f'delai_{etape}'),
+            nb_hors_sla=Count('id', filter=_hors_sla(etape, sla)),
+        )
+        for ligne in lignes:
+            rollup = cumul(ligne['jour'], ligne['priorite'])
+            secondes = int(ligne['duree'].total_seconds()) if ligne['duree'] else 0
+            if etape == 'assignation':
+                rollup.nb_assignes, rollup.secondes_assignation = ligne['nb'], secondes
+            elif etape == 'demarrage':
+                rollup.nb_demarres, rollup.secondes_demarrage = ligne['nb'], secondes
+            else:
+                rollup.nb_resolus, rollup.secondes_resolution = ligne['nb'], secondes
+                rollup.nb_resolus_hors_sla = ligne['nb_hors_sla']
+
+    # Backlog: ouverts à l'ouverture de la période, puis signalés - résolus jour après jour
+    ouverts = {
+        ligne['priorite']: ligne['nb_signales'] - ligne['nb_resolus']
+        for ligne in travaux.filter(signale_le__lt=debut).order_by().values('priorite').annotate(
+            nb_signales=Count('id'),
+            nb_resolus=Count('id', filter=Q(date_fin__lt=debut)),
+        )
+    }
+    jour = date_debut
+    while jour <= date_fin:
+        for priorite, _ in Travail.PRIORITE_CHOICES:
+            existant = cumuls.get((jour, priorite))
+            ouverts[priorite] = ouverts.get(priorite, 0) + (
+                existant.nb_signales - existant.nb_resolus if existant else 0
+            )
+            if existant or ouverts[priorite]:
+                cumul(jour, priorite).nb_ouverts = ouverts[priorite]
+        jour += timedelta(days=1)
+
+    with transaction.atomic():
+        TravailDailyRollup.objects.filter(date__gte=date_debut, date__lte=date_fin).delete()
+        TravailDailyRollup.objects.bulk_create(cumuls.values(), batch_size=500)
+    return len(cumuls)
+
+
+def tendance(jours=30, priorite=None, jusqu_a=None):
+    """
+    Série journalière (toutes priorités ou une seule) lue dans les cumuls
+
+    Returns:
+        list: une entrée par jour: signalés, résolus, délai moyen de
+              résolution (heures), taux hors SLA, backlog
+    """
+    jusqu_a = jusqu_a or timezone.localdate()
+    depuis = jusqu_a - timedelta(days=jours - 1)
+    cumuls = TravailDailyRollup.objects.filter(date__gte=depuis, date__lte=jusqu_a)
+    if priorite:
+        cumuls = cumuls.filter(priorite=priorite)
+    par_jour = {
+        ligne['date']: ligne
+        for ligne in cumuls.order_by().values('date').annotate(
+            nb_signales=Sum('nb_signales'),
+            nb_resolus=Sum('nb_resolus'),
+            nb_resolus_hors_sla=Sum('nb_resolus_hors_sla'),
+            secondes_resolution=Sum('secondes_resolution'),
+            nb_ouverts=Sum('nb_ouverts'),
+        )
+    }
+
+    serie = []
+    for decalage in range(jours):
+        jour = depuis + timedelta(days=decalage)
+        ligne = par_jour.get(jour, {})
+        nb_resolus = ligne.get('nb_resolus') or 0
+        serie.append({
+            'date': jour,
+            'nb_signales': ligne.get('nb_signales') or 0,
+            'nb_resolus': nb_resolus,
+            'heures_resolution': (
+                round(ligne['secondes_resolution'] / nb_resolus / 3600, 1) if nb_resolus else None
+            ),
+            'taux_hors_sla': _taux(ligne.get('nb_resolus_hors_sla') or 0, nb_resolus),
+            'nb_ouverts': ligne.get('nb_ouverts') or 0,
+        })
+    return serie
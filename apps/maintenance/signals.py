@@ -1 +1,112 @@
- 
+# apps/maintenance/signals.py
+"""
+Alimentation du journal des travaux (TravailEvent) et du magasin
+(entrées à la réception des demandes d'achat, sorties à la clôture des
+travaux); invalidation du résumé mobile des intervenants
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.maintenance.journal import (
+    acteur_de, etat_journal, journaliser, message_statut,
+)
+from apps.maintenance.models import Travail, TravailChecklist, TravailMedia
+from apps.maintenance.resume import invalider_resume
+from apps.maintenance.stock import consommer_materiel, entrer_reception
+
+
+@receiver(post_save, sender=Travail)
+@receiver(post_delete, sender=Travail)
+def invalider_resume_intervenants(sender, instance, **kwargs):
+    """Résumé de l'intervenant assigné (et du précédent, avant journaliser_travail)"""
+    precedent = getattr(instance, '_etat_journal', None) or {}
+    invalider_resume(instance.assigne_a_id, precedent.get('assigne_a_id'))
+
+
+@receiver(post_save, sender=Travail)
+def journaliser_travail(sender, instance, created, raw=False, **kwargs):
+    """Création, changements de statut et d'assignation"""
+    if raw:
+        return
+    etat = etat_journal(instance)
+    precedent = getattr(instance, '_etat_journal', None)
+    instance._etat_journal = etat
+
+    if created:
+        journaliser(
+            instance, 'creation', f"Travail créé ({instance.numero_travail})",
+            acteur=acteur_de(instance, instance.cree_par or instance.signale_par),
+            nouvelle_valeur=instance.statut,
+        )
+        if instance.assigne_a_id:
+            journaliser(
+                instance, 'assignation', f"Assigné à {instance.assigne_a.get_full_name()}",
+                acteur=acteur_de(instance, instance.cree_par), nouvelle_valeur=instance.assigne_a_id,
+            )
+        return
+
+    if precedent is None:
+        return
+    acteur = acteur_de(instance)
+    if etat['statut'] == 'complete' and precedent['statut'] not in (None, 'complete'):
+        consommer_materiel([instance], acteur=acteur)
+    if precedent['assigne_a_id'] != etat['assigne_a_id'] and etat['assigne_a_id'] is not None:
+        journaliser(
+            instance, 'assignation', f"Assigné à {instance.assigne_a.get_full_name()}", acteur=acteur,
+            ancienne_valeur=precedent['assigne_a_id'], nouvelle_valeur=etat['assigne_a_id'],
+        )
+    elif precedent['assigne_a_id'] != etat['assigne_a_id']:
+        journaliser(
+            instance, 'assignation', "Assignation retirée", acteur=acteur,
+            ancienne_valeur=precedent['assigne_a_id'],
+        )
+    if precedent['statut'] is not None and precedent['statut'] != etat['statut']:
+        journaliser(
+            instance, 'statut', message_statut(precedent['statut'], etat['statut']), acteur=acteur,
+            ancienne_valeur=precedent['statut'], nouvelle_valeur=etat['statut'],
+        )
+
+
+@receiver(post_save, sender=TravailMedia)
+def journaliser_media(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        journaliser(
+            instance.travail, 'media', f"{instance.get_type_media_display()} ajouté(e)",
+            acteur=acteur_de(instance, instance.ajoute_par), nouvelle_valeur=instance.type_media,
+        )
+
+
+@receiver(post_save, sender=TravailChecklist)
+def journaliser_checklist(sender, instance, created, raw=False, **kwargs):
+    """Étape de checklist cochée ou décochée"""
+    if raw:
+        return
+    etait_complete = False if created else getattr(instance, '_etait_complete', None)
+    instance._etait_complete = instance.is_completed
+    if etait_complete is None or etait_complete == instance.is_completed:
+        return
+    journaliser(
+        instance.travail,
+        'checklist',
+        f"{'Étape terminée' if instance.is_completed else 'Étape rouverte'}: {instance.description}",
+        acteur=acteur_de(instance, instance.completed_by),
+        nouvelle_valeur='complete' if instance.is_completed else 'a_faire',
+    )
+
+
+@receiver(post_save, sender='payments.HistoriqueValidation')
+def journaliser_demande_achat(sender, instance, created, raw=False, **kwargs):
+    """Étapes des demandes d'achat liées à un travail, entrée en stock à la réception"""
+    if not created or raw:
+        return
+    demande = instance.demande
+    if instance.action == 'reception':
+        entrer_reception(demande, acteur=instance.effectue_par)
+    if not demande.travail_lie_id:
+        return
+    journaliser(
+        demande.travail_lie_id, 'demande_achat',
+        f"{instance.get_action_display()} ({demande.numero_facture})",
+        acteur=instance.effectue_par, nouvelle_valeur=instance.action,
+    )
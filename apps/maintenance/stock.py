@@ -0,0 +1,324 @@
+# apps/maintenance/stock.py
+"""
+Magasin: articles, mouvements et soldes
+
+Le stock d'un article (ArticleStock.quantite_en_stock) est le solde courant
+de ses mouvements (MouvementStock). Chaque opération verrouille les articles
+concernés, calcule les soldes en mémoire puis écrit en masse les mouvements
+et les soldes:
+    entrer_reception(demande)    réception d'une demande d'achat (signal
+                                 HistoriqueValidation 'reception')
+    consommer_materiel(travaux)  sortie du matériel reçu pour des travaux
+                                 terminés (signal Travail, actions groupées)
+    sortir_stock(article, ...)   prélèvement au magasin
+    ajuster_stock(article, ...)  inventaire physique
+
+suggestions_reappro() compare le stock au point de commande (consommation
+journalière × délai de réapprovisionnement + stock de sécurité) en une
+requête groupée. recalculer_soldes() reconstruit les soldes depuis les
+mouvements.
+"""
+
+import re
+import unicodedata
+from datetime import timedelta
+from decimal import ROUND_CEILING, ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, Q, QuerySet, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.maintenance.models.stock import ArticleStock, MouvementStock
+
+CENTIEME = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+def cle_article(designation, unite='unité'):
+    """Désignation et unité normalisées (casse, accents, espaces)"""
+    def normaliser(texte):
+        texte = unicodedata.normalize('NFKD', texte or '').encode('ascii', 'ignore').decode()
+        return re.sub(r'\s+', ' ', texte).strip().lower()
+
+    return f"{normaliser(designation)}|{normaliser(unite) or 'unite'}"[:255]
+
+
+def _articles(definitions):
+    """
+    Articles verrouillés par clé, créés au besoin
+
+    Args:
+        definitions: dict {cle: (designation, unite, categorie)}
+    """
+    articles = {
+        article.cle: article
+        for article in ArticleStock.objects.select_for_update().filter(cle__in=list(definitions))
+    }
+    manquants = [cle for cle in definitions if cle not in articles]
+    if manquants:
+        ArticleStock.objects.bulk_create([
+            ArticleStock(
+                cle=cle,
+                designation=definitions[cle][0][:255],
+                unite=definitions[cle][1] or 'unité',
+                categorie=definitions[cle][2] or '',
+            )
+            for cle in manquants
+        ], ignore_conflicts=True)
+        articles.update({
+            article.cle: article
+            for article in ArticleStock.objects.select_for_update().filter(cle__in=manquants)
+        })
+    return articles
+
+
+def _enregistrer(mouvements):
+    """
+    Applique les mouvements aux soldes des articles (déjà verrouillés)
+
+    Deux requêtes: bulk_update des articles, bulk_create des mouvements.
+    Le coût moyen est pondéré par les entrées.
+    """
+    maintenant = timezone.now()
+    articles = {}
+    for mouvement in mouvements:
+        article = mouvement.article
+        ancien = article.quantite_en_stock
+        article.quantite_en_stock = ancien + mouvement.quantite
+        if mouvement.type_mouvement == 'entree' and mouvement.cout_unitaire is not None:
+            if ancien > 0 and article.quantite_en_stock > 0:
+                article.cout_unitaire_moyen = (
+                    (ancien * article.cout_unitaire_moyen + mouvement.quantite * mouvement.cout_unitaire)
+                    / article.quantite_en_stock
+                ).quantize(CENTIEME, ROUND_HALF_UP)
+            else:
+                article.cout_unitaire_moyen = mouvement.cout_unitaire
+        mouvement.solde_apres = article.quantite_en_stock
+        article.updated_at = maintenant
+        articles[article.pk] = article
+
+    if mouvements:
+        ArticleStock.objects.bulk_update(
+            articles.values(), ['quantite_en_stock', 'cout_unitaire_moyen', 'updated_at'], batch_size=500,
+        )
+        MouvementStock.objects.bulk_create(mouvements, batch_size=500)
+    return mouvements
+
+
+# ============================================================================
+# MOUVEMENTS
+# ============================================================================
+
+def entrer_reception(demande, acteur=None):
+    """
+    Entre en stock les lignes reçues d'une demande d'achat
+
+    Quantité reçue (à défaut la quantité demandée) au coût réel (à défaut
+    estimé). Une ligne déjà entrée est ignorée: l'opération est rejouable.
+
+    Returns:
+        list: mouvements créés
+    """
+    with transaction.atomic():
+        lignes = [
+            ligne for ligne in demande.lignes_achat.exclude(mouvements_stock__type_mouvement='entree')
+            if (ligne.quantite_recue if ligne.quantite_recue is not None else ligne.quantite) > 0
+        ]
+        if not lignes:
+            return []
+
+        articles = _articles({
+            cle_article(ligne.designation, ligne.unite): (ligne.designation, ligne.unite, demande.categorie_achat)
+            for ligne in lignes
+        })
+        mouvements = []
+        for ligne in lignes:
+            quantite = ligne.quantite_recue if ligne.quantite_recue is not None else ligne.quantite
+            cout_unitaire = (
+                (ligne.prix_reel / quantite).quantize(CENTIEME, ROUND_HALF_UP) if ligne.prix_reel
+                else ligne.prix_unitaire
+            )
+            mouvements.append(MouvementStock(
+                article=articles[cle_article(ligne.designation, ligne.unite)],
+                type_mouvement='entree',
+                quantite=quantite,
+                cout_unitaire=cout_unitaire,
+                ligne_achat=ligne,
+                travail_id=demande.travail_lie_id,
+                effectue_par=acteur,
+                motif=f"Réception {demande.numero_facture}",
+            ))
+        return _enregistrer(mouvements)
+
+
+def consommer_materiel(travaux, acteur=None):
+    """
+    Sort du stock le matériel reçu pour des travaux terminés
+
+    Chaque entrée liée à une demande d'achat des travaux sort une fois
+    (contrainte sur la ligne d'achat): l'opération est rejouable.
+
+    Returns:
+        list: mouvements créés
+    """
+    if isinstance(travaux, QuerySet):
+        cles = travaux.order_by().values('pk')
+    else:
+        cles = [getattr(travail, 'pk', travail) for travail in travaux]
+    with transaction.atomic():
+        entrees = list(
+            MouvementStock.objects.filter(
+                type_mouvement='entree',
+                ligne_achat__demande__travail_lie__in=cles,
+            ).exclude(
+                ligne_achat__mouvements_stock__type_mouvement='sortie',
+            ).select_related('ligne_achat__demande').order_by('pk')
+        )
+        if not entrees:
+            return []
+
+        articles = ArticleStock.objects.select_for_update().in_bulk({entree.article_id for entree in entrees})
+        return _enregistrer([
+            MouvementStock(
+                article=articles[entree.article_id],
+                type_mouvement='sortie',
+                quantite=-entree.quantite,
+                cout_unitaire=entree.cout_unitaire,
+                ligne_achat=entree.ligne_achat,
+                travail_id=entree.ligne_achat.demande.travail_lie_id,
+                effectue_par=acteur,
+                motif=f"Consommation {entree.ligne_achat.demande.numero_facture}",
+            )
+            for entree in entrees
+        ])
+
+
+def sortir_stock(article, quantite, travail=None, acteur=None, motif=''):
+    """Prélève une quantité au magasin (pour un travail le cas échéant)"""
+    quantite = Decimal(quantite)
+    if quantite <= 0:
+        raise ValueError("La quantité doit être positive")
+    with transaction.atomic():
+        article = ArticleStock.objects.select_for_update().get(pk=article.pk)
+        if quantite > article.quantite_en_stock:
+            raise ValueError(
+                f"Stock insuffisant: {article.quantite_en_stock} {article.unite} disponible(s)"
+            )
+        return _enregistrer([MouvementStock(
+            article=article,
+            type_mouvement='sortie',
+            quantite=-quantite,
+            cout_unitaire=article.cout_unitaire_moyen,
+            travail=travail,
+            effectue_par=acteur,
+            motif=motif,
+        )])[0]
+
+
+def ajuster_stock(article, quantite_comptee, acteur=None, motif='Inventaire'):
+    """Aligne le stock sur la quantité comptée (aucun mouvement si identique)"""
+    quantite_comptee = Decimal(quantite_comptee)
+    if quantite_comptee < 0:
+        raise ValueError("La quantité comptée ne peut pas être négative")
+    with transaction.atomic():
+        article = ArticleStock.objects.select_for_update().get(pk=article.pk)
+        ecart = quantite_comptee - article.quantite_en_stock
+        if not ecart:
+            return None
+        return _enregistrer([MouvementStock(
+            article=article,
+            type_mouvement='ajustement',
+            quantite=ecart,
+            effectue_par=acteur,
+            motif=motif,
+        )])[0]
+
+
+def recalculer_soldes():
+    """
+    Reconstruit les soldes depuis les mouvements
+
+    Returns:
+        int: nombre d'articles corrigés
+    """
+    with transaction.atomic():
+        articles = list(
+            ArticleStock.objects.select_for_update().annotate(
+                solde=Coalesce(Sum('mouvements__quantite'), Value(ZERO), output_field=DecimalField()),
+            )
+        )
+        corriges = [article for article in articles if article.quantite_en_stock != article.solde]
+        for article in corriges:
+            article.quantite_en_stock = article.solde
+        ArticleStock.objects.bulk_update(corriges, ['quantite_en_stock'], batch_size=500)
+    return len(corriges)
+
+
+# ============================================================================
+# RÉAPPROVISIONNEMENT
+# ============================================================================
+
+def articles_avec_consommation(jours=None, maintenant=None):
+    """Articles actifs annotés de leur consommation sur les derniers jours (positive)"""
+    jours = jours or getattr(settings, 'MAINTENANCE_STOCK_JOURS_CONSOMMATION', 90)
+    depuis = (maintenant or timezone.now()) - timedelta(days=jours)
+    return ArticleStock.objects.filter(is_active=True).annotate(
+        consommation=Coalesce(
+            -Sum('mouvements__quantite', filter=Q(
+                mouvements__type_mouvement='sortie', mouvements__date_mouvement__gte=depuis,
+            )),
+            Value(ZERO),
+            output_field=DecimalField(),
+        ),
+    )
+
+
+def suggestions_reappro(jours=None, maintenant=None):
+    """
+    Articles à recommander (une requête)
+
+    Point de commande: consommation journalière × délai de
+    réapprovisionnement (MAINTENANCE_STOCK_DELAI_REAPPRO_JOURS, 7) + stock
+    de sécurité. Quantité suggérée: de quoi couvrir
+    MAINTENANCE_STOCK_COUVERTURE_JOURS (30) au-delà du point de commande.
+
+    Returns:
+        list: dicts article, consommation_jour, point_commande,
+              jours_restants, quantite_suggeree; les plus urgents d'abord
+    """
+    jours = jours or getattr(settings, 'MAINTENANCE_STOCK_JOURS_CONSOMMATION', 90)
+    delai_defaut = getattr(settings, 'MAINTENANCE_STOCK_DELAI_REAPPRO_JOURS', 7)
+    couverture = getattr(settings, 'MAINTENANCE_STOCK_COUVERTURE_JOURS', 30)
+
+    suggestions = []
+    for article in articles_avec_consommation(jours, maintenant):
+        par_jour = Decimal(article.consommation) / jours
+        if not par_jour and not article.stock_minimum:
+            continue
+        point_commande = par_jour * (article.delai_reappro_jours or delai_defaut) + article.stock_minimum
+        if article.quantite_en_stock > point_commande:
+            continue
+        suggestions.append({
+            'article': article,
+            'consommation_jour': par_jour.quantize(CENTIEME, ROUND_HALF_UP),
+            'point_commande': point_commande.quantize(CENTIEME, ROUND_HALF_UP),
+            'jours_restants': (
+                int(max(article.quantite_en_stock, ZERO) / par_jour) if par_jour else None
+            ),
+            'quantite_suggeree': (
+                par_jour * couverture + point_commande - article.quantite_en_stock
+            ).quantize(Decimal('1'), ROUND_CEILING),
+        })
+    return sorted(
+        suggestions,
+        key=lambda suggestion: (suggestion['jours_restants'] is None, suggestion['jours_restants'] or 0),
+    )
+
+
+def disponibilites(lignes):
+    """Articles en stock correspondant à des lignes d'achat, par ligne (une requête)"""
+    cles = {ligne.pk: cle_article(ligne.designation, ligne.unite) for ligne in lignes}
+    articles = ArticleStock.objects.filter(quantite_en_stock__gt=0).in_bulk(set(cles.values()), field_name='cle')
+    return {pk: articles[cle] for pk, cle in cles.items() if cle in articles}
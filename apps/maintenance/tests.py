@@ -1,3 +1,729 @@
+"""
+Tests pour le module maintenance
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db.models import Count
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.maintenance.calendrier import (
+    AbonnementCalendrier, fenetre_calendrier, intervenant_du_jeton, jeton_abonnement, par_jour, travaux_planifies,
+)
+from apps.maintenance.dispatch import PlanDeCharge, assigner, dispatcher_urgents
+from apps.maintenance.journal import avec_acteur, fil_activite, historique
+from apps.maintenance.models import (
+    ArticleStock, MouvementStock, Travail, TravailChecklist, TravailDailyRollup, TravailEvent,
+)
+from apps.maintenance.operations import (
+    annuler_travaux, assigner_travaux, changer_statut_travaux, replanifier_travaux, reprioriser_travaux,
+)
+from apps.maintenance.recurrence import materialiser_travaux
+from apps.maintenance.stock import (
+    ajuster_stock, cle_article, disponibilites, recalculer_soldes, sortir_stock, suggestions_reappro,
+)
+from apps.maintenance.services import MaintenanceAnalytics, reconstruire_cumuls, tendance
+from apps.notifications.models import Notification
+from apps.payments.models import HistoriqueValidation, Invoice, LigneDemandeAchat
+
+from tests.factories import make_appartement, make_residence, make_travail, make_user
+
+
+class MaterielTravauxTest(TestCase):
+    """Tests du statut matériel annoté (Travail.objects.avec_materiel)"""
+
+    def setUp(self):
+        self.employe = make_user('employe', user_type='employe')
+
+    def make_demande(self, travail, etape, montant_ht='50000.00'):
+        return Invoice.objects.create(
+            type_facture='demande_achat', montant_ht=Decimal(montant_ht),
+            date_emission=date(2025, 1, 1), date_echeance=date(2025, 1, 1),
+            etape_workflow=etape, date_demande=date(2025, 1, 1),
+            demandeur=self.employe, travail_lie=travail,
+        )
+
+    def test_annotations_identiques_aux_proprietes(self):
+        """Test de la concordance annotation / calcul à la demande pour chaque statut"""
+        attendus = {
+            make_travail('Sans matériel'): 'aucun_materiel',
+            make_travail('Validation'): 'en_attente_validation',
+            make_travail('Reçu'): 'materiel_recu',
+            make_travail('En commande'): 'en_attente_reception',
+            make_travail('Partiel'): 'materiel_partiel',
+        }
+        validation, recu, commande, partiel = list(attendus)[1:]
+        self.make_demande(validation, 'brouillon')
+        self.make_demande(validation, 'en_attente')
+        self.make_demande(recu, 'recue')
+        self.make_demande(recu, 'recue', '20000.00')
+        self.make_demande(commande, 'recue')
+        self.make_demande(commande, 'en_cours_achat')
+        self.make_demande(partiel, 'recue')
+        self.make_demande(partiel, 'paye')
+
+        for travail, statut in attendus.items():
+            self.assertEqual(travail.statut_materiel, statut)
+
+        with self.assertNumQueries(1):
+            travaux = list(Travail.objects.avec_materiel())
+            for annote in travaux:
+                self.assertEqual(annote.statut_materiel, attendus[annote])
+        for annote in travaux:
+            brut = Travail.objects.get(pk=annote.pk)
+            self.assertEqual(annote.necessite_materiel, brut.necessite_materiel)
+            self.assertEqual(annote.cout_total_materiel, brut.cout_total_materiel)
+
+        cout_recu = Travail.objects.avec_materiel().get(pk=recu.pk).cout_total_materiel
+        self.assertEqual(cout_recu, sum(d.montant_ttc for d in recu.demandes_achat.all()))
+
+    def test_liste_a_nombre_de_requetes_constant(self):
+        """Test: une seule requête quel que soit le nombre de travaux et de demandes"""
+        for i in range(5):
+            travail = make_travail(f'Travail {i}')
+            for etape in ['en_attente', 'recue'][:i % 3]:
+                self.make_demande(travail, etape)
+
+        with self.assertNumQueries(1):
+            lignes = [
+                (t.necessite_materiel, t.statut_materiel, t.cout_total_materiel)
+                for t in Travail.objects.avec_materiel()
+            ]
+        self.assertEqual(len(lignes), 5)
+
+
+class AffectationTravauxTest(TestCase):
+    """Tests du classement des intervenants selon leur charge"""
+
+    def setUp(self):
+        self.residence = make_residence()
+        self.appartement = make_appartement(self.residence)
+        self.awa = make_user('awa', user_type='employe', first_name='Awa')
+        self.binta = make_user('binta', user_type='employe', first_name='Binta')
+        self.manager = make_user('manager')
+
+    def test_charge_en_deux_requetes(self):
+        """Test de la charge (travaux, jour, heures, résidence) lue en deux requêtes"""
+        maintenant = timezone.now()
+        make_travail('Fuite', assigne_a=self.awa, statut='en_cours', priorite='urgente',
+                     appartement=self.appartement, date_prevue=maintenant,
+                     duree_estimee=timedelta(hours=3))
+        make_travail('Peinture', assigne_a=self.awa, statut='assigne')
+        make_travail('Ancien', assigne_a=self.binta, statut='complete')
+
+        with self.assertNumQueries(2):
+            plan = PlanDeCharge()
+
+        charge = plan.charge(self.awa)
+        self.assertEqual(charge['nb_travaux'], 2)
+        self.assertEqual(charge['nb_urgents'], 1)
+        self.assertEqual(charge['nb_aujourdhui'], 1)
+        self.assertEqual(charge['heures_aujourdhui'], 3.0)
+        self.assertEqual(charge['heures_estimees'], 5.0)  # 3 h + 2 h par défaut
+        self.assertEqual(plan.charge(self.binta)['nb_travaux'], 0)
+        self.assertNotIn(self.manager, plan.intervenants)
+
+        nouveau = make_travail('Serrure', appartement=self.appartement)
+        with self.assertNumQueries(0):
+            classement = plan.classement(nouveau)
+        self.assertEqual([l['intervenant'] for l in classement], [self.binta, self.awa])
+        self.assertTrue(classement[1]['meme_residence'])
+
+    def test_proximite_departage_a_charge_egale(self):
+        """Test: à charge égale, l'intervenant déjà sur la résidence est suggéré"""
+        autre = make_residence('Autre')
+        make_travail('Ici', assigne_a=self.awa, statut='assigne', residence=self.residence)
+        make_travail('Ailleurs', assigne_a=self.binta, statut='assigne', residence=autre)
+
+        travail = make_travail('Nouveau', appartement=self.appartement)
+        self.assertEqual(PlanDeCharge().suggestion(travail), self.awa)
+
+    def test_dispatch_urgences_reparti_la_charge(self):
+        """Test de la répartition en lot des urgences non assignées"""
+        urgents = [make_travail(f'Urgence {i}', priorite='urgente') for i in range(4)]
+        normal = make_travail('Normal', priorite='normale')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            affectations = dispatcher_urgents()
+
+        self.assertEqual([t for t, _ in affectations], urgents)
+        notifications = Notification.objects.filter(type_notification='intervention_assigned')
+        self.assertEqual(
+            sorted(notifications.values_list('destinataire', flat=True)), sorted([self.awa.pk, self.binta.pk])
+        )
+        self.assertTrue(all(n.message.startswith('2 travaux') for n in notifications))
+        par_intervenant = dict(
+            Travail.objects.filter(priorite='urgente').values_list('assigne_a').annotate(nb=Count('id'))
+        )
+        self.assertEqual(par_intervenant, {self.awa.pk: 2, self.binta.pk: 2})
+        self.assertTrue(all(t.statut == 'assigne' for t in Travail.objects.filter(priorite='urgente')))
+        normal.refresh_from_db()
+        self.assertIsNone(normal.assigne_a)
+        self.assertEqual(dispatcher_urgents(), [])
+
+
+class RecurrenceTravauxTest(TestCase):
+    """Tests de la récurrence calendaire et de la planification en lot"""
+
+    def make_serie(self, date_prevue, recurrence='mensuelle', **kwargs):
+        return make_travail(
+            'Entretien ascenseur', nature='preventif', is_recurrent=True,
+            recurrence=recurrence, date_prevue=date_prevue, statut='planifie', **kwargs
+        )
+
+    def dates(self, serie):
+        return list(serie.occurrences.order_by('date_occurrence').values_list('date_occurrence', flat=True))
+
+    def test_mensuel_reste_sur_le_jour_du_calendrier(self):
+        """Test: le 31 janvier donne le 28 février, le 31 mars, le 30 avril"""
+        debut = timezone.make_aware(timezone.datetime(2025, 1, 31, 9, 0))
+        serie = self.make_serie(debut)
+
+        materialiser_travaux(horizon_jours=100, maintenant=debut)
+
+        self.assertEqual(self.dates(serie), [date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)])
+        occurrence = serie.occurrences.get(date_occurrence=date(2025, 3, 31))
+        self.assertEqual(timezone.localtime(occurrence.date_prevue).hour, 9)
+        self.assertEqual(occurrence.statut, 'planifie')
+        self.assertEqual(occurrence.numero_travail, f'{serie.numero_travail}-20250331')
+
+    def test_materialisation_idempotente_et_groupee(self):
+        """Test: une relance ne crée rien, les séries sont lues en deux requêtes"""
+        debut = timezone.now()
+        hebdo = self.make_serie(debut, recurrence='hebdomadaire')
+        self.make_serie(debut, recurrence='quotidien', recurrence_fin=(debut + timedelta(days=3)).date())
+        self.make_serie(debut, recurrence='hebdomadaire', recurrence_fin=(debut + timedelta(days=20)).date())
+        make_travail('Ponctuel', date_prevue=debut)
+
+        # séries, existantes, bulk_create, relecture et journal (dans un savepoint)
+        with self.assertNumQueries(7):
+            count = materialiser_travaux(horizon_jours=90)
+
+        self.assertEqual(count, 12 + 3 + 2)
+        self.assertEqual(len(self.dates(hebdo)), 12)
+        with self.assertNumQueries(2):
+            self.assertEqual(materialiser_travaux(horizon_jours=90), 0)
+
+    def test_regle_rrule_explicite(self):
+        """Test d'une règle RRULE personnalisée (lundis et jeudis)"""
+        lundi = timezone.make_aware(timezone.datetime(2025, 3, 3, 8, 0))
+        serie = self.make_serie(lundi, recurrence='aucune', regle_recurrence='FREQ=WEEKLY;BYDAY=MO,TH')
+
+        materialiser_travaux(horizon_jours=8, maintenant=lundi)
+
+        self.assertEqual(self.dates(serie), [date(2025, 3, 6), date(2025, 3, 10)])
+
+    def test_regle_rrule_validee(self):
+        """Test: règle illisible ou plus fréquente que quotidienne refusée"""
+        for texte in ['FREQ=HOURLY', 'FREQ=MINUTELY;INTERVAL=5', 'BYDAY=XX']:
+            with self.assertRaises(ValidationError):
+                Travail._meta.get_field('regle_recurrence').run_validators(texte)
+        Travail._meta.get_field('regle_recurrence').run_validators('FREQ=WEEKLY;BYDAY=MO,TH')
+
+    def test_regle_count_et_fin(self):
+        """Test: COUNT et fin de récurrence, la première borne atteinte arrête la série"""
+        lundi = timezone.make_aware(timezone.datetime(2025, 3, 3, 8, 0))
+        courte = self.make_serie(
+            lundi, recurrence='aucune', regle_recurrence='FREQ=DAILY;COUNT=3', recurrence_fin=date(2025, 4, 1),
+        )
+        bornee = self.make_serie(
+            lundi, recurrence='aucune', regle_recurrence='FREQ=DAILY;COUNT=30', recurrence_fin=date(2025, 3, 5),
+        )
+
+        materialiser_travaux(horizon_jours=10, maintenant=lundi, series=[courte, bornee])
+
+        self.assertEqual(self.dates(courte), [date(2025, 3, 4), date(2025, 3, 5)])
+        self.assertEqual(self.dates(bornee), [date(2025, 3, 4), date(2025, 3, 5)])
+
+    def test_regle_until_conservee(self):
+        """Test: l'UNTIL de la règle n'est pas repoussé par une fin de récurrence plus tardive"""
+        lundi = timezone.make_aware(timezone.datetime(2025, 1, 6, 8, 0))
+        serie = self.make_serie(
+            lundi, recurrence='aucune', regle_recurrence='FREQ=WEEKLY;UNTIL=20250201T000000Z',
+            recurrence_fin=date(2025, 12, 31),
+        )
+
+        materialiser_travaux(horizon_jours=365, maintenant=lundi, series=[serie])
+
+        self.assertEqual(self.dates(serie), [date(2025, 1, 13), date(2025, 1, 20), date(2025, 1, 27)])
+
+    def test_occurrences_journalisees(self):
+        """Test: les occurrences insérées en masse ont leur journal et invalident le résumé"""
+        from django.core.cache import cache
+        from apps.maintenance.resume import resume_intervenant
+
+        awa = make_user('awa', user_type='employe', first_name='Awa')
+        lundi = timezone.now()
+        serie = self.make_serie(lundi, recurrence='hebdomadaire', assigne_a=awa)
+        cache.clear()
+        self.assertEqual(resume_intervenant(awa)['a_venir'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            materialiser_travaux(horizon_jours=15, series=[serie])
+
+        occurrences = list(serie.occurrences.all())
+        self.assertEqual(len(occurrences), 2)
+        evenements = TravailEvent.objects.filter(travail__in=occurrences)
+        self.assertEqual(evenements.filter(type_evenement='creation').count(), 2)
+        self.assertEqual(evenements.filter(type_evenement='assignation', nouvelle_valeur=str(awa.pk)).count(), 2)
+        self.assertEqual(resume_intervenant(awa)['a_venir'], 2)
+
+        # Relance: rien de nouveau, aucun événement en double
+        materialiser_travaux(horizon_jours=15, series=[serie])
+        self.assertEqual(TravailEvent.objects.filter(travail__in=occurrences).count(), 4)
+
+    def test_serie_illisible_ignoree(self):
+        """Test: une série dont la règle ne se construit pas n'arrête pas la planification"""
+        lundi = timezone.make_aware(timezone.datetime(2025, 3, 3, 8, 0))
+        illisible = self.make_serie(lundi, recurrence='aucune', regle_recurrence='FREQ=WEEKLY')
+        # Règle enregistrée sans passer par la validation
+        Travail.objects.filter(pk=illisible.pk).update(regle_recurrence='FREQ=SOUVENT')
+        hebdo = self.make_serie(lundi, recurrence='hebdomadaire')
+
+        with self.assertLogs('apps.maintenance.recurrence', 'WARNING'):
+            materialiser_travaux(horizon_jours=8, maintenant=lundi)
+
+        self.assertFalse(illisible.occurrences.exists())
+        self.assertEqual(self.dates(hebdo), [date(2025, 3, 10)])
+
+    def test_cloture_sans_effet_de_bord(self):
+        """Test: terminer une occurrence ne crée plus rien, la suivante est idempotente"""
+        serie = self.make_serie(timezone.now())
+        serie.marquer_complete()
+        self.assertFalse(serie.occurrences.exists())
+
+        suivante = serie.generer_prochaine_occurrence()
+        self.assertEqual(serie.generer_prochaine_occurrence(), suivante)
+        self.assertEqual(materialiser_travaux(horizon_jours=40) + 1, serie.occurrences.count())
+
+
+class CalendrierTest(TestCase):
+    """Tests du flux calendrier et de l'abonnement iCalendar"""
+
+    def setUp(self):
+        self.awa = make_user('awa', user_type='employe', first_name='Awa')
+        self.lundi = timezone.make_aware(timezone.datetime(2025, 3, 3, 0, 0))
+
+    def test_fenetre_obligatoire_et_bornee(self):
+        """Test: fenêtre absente, inversée ou trop large refusée"""
+        with self.assertRaises(ValueError):
+            fenetre_calendrier(None, '2025-03-10')
+        with self.assertRaises(ValueError):
+            fenetre_calendrier('2025-03-10', '2025-03-03')
+        with self.assertRaises(ValueError):
+            fenetre_calendrier('2025-01-01', '2025-06-01')
+        debut, fin = fenetre_calendrier('2025-03-03', '2025-03-10T00:00:00')
+        self.assertEqual(fin - debut, timedelta(days=7))
+
+    def test_semaine_en_une_requete(self):
+        """Test: travaux de la fenêtre lus en une requête puis regroupés par jour"""
+        mardi = make_travail('Mardi', assigne_a=self.awa, date_prevue=self.lundi + timedelta(days=1, hours=9))
+        make_travail('Mardi soir', assigne_a=self.awa, date_prevue=self.lundi + timedelta(days=1, hours=17))
+        make_travail('Hors fenêtre', assigne_a=self.awa, date_prevue=self.lundi + timedelta(days=8))
+        make_travail('Autre intervenant', date_prevue=self.lundi + timedelta(days=2))
+
+        fin = self.lundi + timedelta(days=7)
+        with self.assertNumQueries(1):
+            jours = par_jour(travaux_planifies(self.lundi, fin, self.awa), self.lundi, fin)
+
+        self.assertEqual(len(jours), 7)
+        self.assertEqual([t.titre for t in jours[date(2025, 3, 4)]], ['Mardi', 'Mardi soir'])
+        self.assertEqual(sum(len(travaux) for travaux in jours.values()), 2)
+        self.assertEqual(jours[date(2025, 3, 4)][0], mardi)
+
+    def test_abonnement_ics_et_etag(self):
+        """Test: ETag stable tant que rien ne change, document iCalendar valide"""
+        travail = make_travail('Fuite; salle de bain', assigne_a=self.awa,
+                               date_prevue=timezone.now() + timedelta(days=1))
+        abonnement = AbonnementCalendrier(self.awa, avec_taches=False)
+
+        etag = abonnement.etag()
+        self.assertEqual(etag, AbonnementCalendrier(self.awa, avec_taches=False).etag())
+        ics = abonnement.ics()
+        self.assertTrue(ics.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(f'UID:travail-{travail.pk}@', ics)
+        self.assertIn('Fuite\\; salle de bain', ics)
+        self.assertTrue(all(len(ligne.encode()) <= 75 for ligne in ics.split('\r\n')))
+
+        travail.updated_at = timezone.now() + timedelta(seconds=1)
+        Travail.objects.filter(pk=travail.pk).update(updated_at=travail.updated_at)
+        self.assertNotEqual(etag, AbonnementCalendrier(self.awa, avec_taches=False).etag())
+
+    def test_jeton_signe(self):
+        """Test: le jeton désigne l'intervenant, un jeton altéré est refusé"""
+        jeton = jeton_abonnement(self.awa)
+        self.assertEqual(intervenant_du_jeton(jeton), self.awa)
+        self.assertIsNone(intervenant_du_jeton(jeton + 'x'))
+        self.assertIsNone(intervenant_du_jeton('1:faux'))
+
+
+class JournalTravauxTest(TestCase):
+    """Tests du journal des travaux (TravailEvent)"""
+
+    def setUp(self):
+        self.manager = make_user('manager')
+        self.awa = make_user('awa', user_type='employe', first_name='Awa')
+
+    def types(self, travail):
+        return list(travail.evenements.values_list('type_evenement', 'nouvelle_valeur'))
+
+    def test_cycle_de_vie_journalise(self):
+        """Test: création, assignation, démarrage et clôture écrits avec leur auteur"""
+        travail = make_travail(cree_par=self.manager)
+        assigner(Travail.objects.get(pk=travail.pk), self.awa, acteur=self.manager)
+
+        travail = Travail.objects.get(pk=travail.pk)
+        avec_acteur(travail, self.awa)
+        travail.statut = 'en_cours'
+        travail.save()
+        travail.save()  # sans changement: aucun événement
+        travail.marquer_complete("Joint remplacé")
+
+        self.assertEqual(self.types(travail), [
+            ('creation', 'signale'),
+            ('assignation', str(self.awa.pk)),
+            ('statut', 'assigne'),
+            ('statut', 'en_cours'),
+            ('statut', 'complete'),
+        ])
+        with self.assertNumQueries(1):
+            evenements = list(historique(travail))
+            acteurs = [evenement.acteur for evenement in evenements]
+        self.assertEqual(acteurs, [self.manager, self.manager, self.manager, self.awa, self.awa])
+        self.assertEqual(evenements[-1].message, 'Statut: En cours → Terminé')
+
+        with self.assertRaises(ValueError):
+            evenements[0].save()
+
+    def test_checklist_et_demandes_achat(self):
+        """Test: étapes de checklist et de demande d'achat rattachées au travail"""
+        travail = make_travail()
+        TravailChecklist.objects.create(travail=travail, description='Couper l\'eau')
+        etape = TravailChecklist.objects.get(travail=travail)
+        etape.mark_completed(user=self.awa)
+        etape.save()  # déjà cochée: aucun événement
+
+        demande = Invoice.objects.create(
+            type_facture='demande_achat', montant_ht=Decimal('10000.00'),
+            date_emission=date(2025, 1, 1), date_echeance=date(2025, 1, 1),
+            etape_workflow='en_attente', date_demande=date(2025, 1, 1),
+            demandeur=self.awa, travail_lie=travail,
+        )
+        HistoriqueValidation.objects.create(demande=demande, action='soumission', effectue_par=self.awa)
+        HistoriqueValidation.objects.create(demande=make_demande_sans_travail(self.awa), action='soumission')
+
+        self.assertEqual(self.types(travail), [
+            ('creation', 'signale'), ('checklist', 'complete'), ('demande_achat', 'soumission'),
+        ])
+        self.assertEqual(TravailEvent.objects.filter(type_evenement='demande_achat').count(), 1)
+
+    def test_fil_activite(self):
+        """Test du fil transverse: plus récents d'abord, filtrable par type et auteur"""
+        premier = make_travail('Premier', cree_par=self.manager)
+        second = make_travail('Second')
+        assigner(second, self.awa, acteur=self.manager)
+
+        with self.assertNumQueries(1):
+            fil = [(e.travail.titre, e.type_evenement) for e in fil_activite()]
+        self.assertEqual(fil, [
+            ('Second', 'statut'), ('Second', 'assignation'), ('Second', 'creation'), ('Premier', 'creation'),
+        ])
+        self.assertEqual(
+            [e.travail for e in fil_activite(types=['creation'], acteur=self.manager)], [premier],
+        )
+
+
+
+class AnalyticsMaintenanceTest(TestCase):
+    """Tests des délais moyens, des dépassements de SLA et des cumuls journaliers"""
+
+    def setUp(self):
+        self.residence = make_residence()
+        self.awa = make_user('awa', user_type='employe', first_name='Awa')
+        self.maintenant = timezone.make_aware(timezone.datetime(2025, 3, 10, 12, 0))
+
+    def make_resolu(self, titre, priorite, signale_il_y_a, assignation, demarrage, resolution, **kwargs):
+        """Travail signalé il y a N heures, avec les délais (heures) de chaque étape"""
+        signale = self.maintenant - timedelta(hours=signale_il_y_a)
+        return make_travail(
+            titre, priorite=priorite, statut='complete', residence=self.residence, assigne_a=self.awa,
+            date_signalement=signale,
+            date_assignation=signale + timedelta(hours=assignation),
+            date_debut=signale + timedelta(hours=demarrage),
+            date_fin=signale + timedelta(hours=resolution),
+            **kwargs
+        )
+
+    def test_delais_et_sla_par_priorite(self):
+        """Test: délais moyens et dépassements par priorité, en une requête groupée"""
+        self.make_resolu('Fuite', 'urgente', 48, 0.5, 2, 10)
+        self.make_resolu('Panne', 'urgente', 72, 3, 6, 30)       # hors délai aux trois étapes
+        self.make_resolu('Peinture', 'normale', 100, 20, 50, 90)
+        make_travail('Ouverte', priorite='urgente', statut='assigne',
+                     date_signalement=self.maintenant - timedelta(hours=30))
+        make_travail('Annulée', priorite='urgente', statut='annule',
+                     date_signalement=self.maintenant - timedelta(hours=30))
+
+        analytics = MaintenanceAnalytics(maintenant=self.maintenant)
+        with self.assertNumQueries(1):
+            par_priorite = {ligne['cle']: ligne for ligne in analytics.par('priorite')}
+
+        urgente = par_priorite['urgente']
+        self.assertEqual(urgente['nb'], 3)
+        self.assertEqual(urgente['nb_resolution'], 2)
+        self.assertEqual(urgente['heures_resolution'], 20.0)
+        self.assertEqual(urgente['heures_assignation'], 1.8)
+        self.assertEqual(urgente['taux_resolution_hors_sla'], 50.0)
+        self.assertEqual(urgente['nb_assignation_hors_sla'], 1)
+        self.assertEqual(urgente['nb_ouverts_hors_sla'], 1)
+        self.assertEqual(par_priorite['normale']['taux_resolution_hors_sla'], 0.0)
+
+        with self.assertNumQueries(2):
+            residences = analytics.par('residence')
+        self.assertEqual(residences[0]['libelle'], self.residence.nom)
+        self.assertEqual(analytics.par('technicien')[0]['nb'], 3)
+        self.assertEqual(analytics.resume()['nb_resolution_hors_sla'], 1)
+
+    def test_anciennete_backlog(self):
+        """Test: travaux ouverts répartis par tranche d'ancienneté"""
+        for jours in [0.5, 2, 2.5, 40]:
+            make_travail(f'Ouvert {jours}', priorite='haute',
+                         date_signalement=self.maintenant - timedelta(days=jours))
+        self.make_resolu('Clos', 'haute', 200, 1, 2, 3)
+
+        backlog = MaintenanceAnalytics(maintenant=self.maintenant).anciennete_backlog()
+
+        self.assertEqual(backlog['haute']['total'], 4)
+        self.assertEqual(backlog['haute']['moins_1j'], 1)
+        self.assertEqual(backlog['haute']['de_1_a_3j'], 2)
+        self.assertEqual(backlog['haute']['plus_30j'], 1)
+        self.assertEqual(backlog['basse']['total'], 0)
+
+    def test_cumuls_journaliers(self):
+        """Test: cumuls par jour en requêtes groupées, recalcul idempotent, tendance"""
+        jour = timezone.localdate(self.maintenant)
+        self.make_resolu('Fuite', 'urgente', 30, 1, 2, 26)   # signalé J-1, résolu J
+        self.make_resolu('Panne', 'urgente', 4, 0.5, 1, 2)    # signalé et résolu J
+        make_travail('Ouvert', priorite='urgente', date_signalement=self.maintenant - timedelta(hours=28))
+
+        with self.assertNumQueries(9):  # 5 lectures groupées, delete, bulk_create, savepoint
+            reconstruire_cumuls(jour - timedelta(days=2), jour)
+        self.assertEqual(reconstruire_cumuls(jour - timedelta(days=2), jour), 2)
+
+        cumul = TravailDailyRollup.objects.get(date=jour, priorite='urgente')
+        self.assertEqual((cumul.nb_signales, cumul.nb_resolus, cumul.nb_resolus_hors_sla), (1, 2, 1))
+        self.assertEqual(cumul.secondes_resolution, (26 + 2) * 3600)
+        self.assertEqual(cumul.nb_ouverts, 1)
+        self.assertEqual(TravailDailyRollup.objects.get(date=jour - timedelta(days=1)).nb_ouverts, 2)
+
+        serie = tendance(jours=3, jusqu_a=jour)
+        self.assertEqual([j['nb_ouverts'] for j in serie], [0, 2, 1])
+        self.assertEqual(serie[-1]['heures_resolution'], 14.0)
+        self.assertEqual(serie[-1]['taux_hors_sla'], 50.0)
+
+
+def make_demande_sans_travail(demandeur):
+    return Invoice.objects.create(
+        type_facture='demande_achat', montant_ht=Decimal('10000.00'),
+        date_emission=date(2025, 1, 1), date_echeance=date(2025, 1, 1),
+        etape_workflow='en_attente', date_demande=date(2025, 1, 1), demandeur=demandeur,
+    )
+
+
+class ActionsGroupeesTest(TestCase):
+    """Tests des actions groupées (apps/maintenance/operations.py)"""
+
+    def setUp(self):
+        self.manager = make_user('manager')
+        self.awa = make_user('awa', user_type='employe', first_name='Awa')
+        self.travaux = [make_travail(f'Fuite {i}') for i in range(20)]
+
+    def test_assignation_en_lot(self):
+        """Test: une lecture, un UPDATE, un insert du journal, un insert des notifications"""
+        with self.assertNumQueries(6):  # savepoint, lecture, update, journal, release, notifications
+            with self.captureOnCommitCallbacks(execute=True):
+                resultat = assigner_travaux(self.travaux, self.awa, acteur=self.manager)
+
+        self.assertEqual(len(resultat), 20)
+        self.assertEqual(Travail.objects.filter(assigne_a=self.awa, statut='assigne').count(), 20)
+        self.assertEqual(
+            TravailEvent.objects.filter(type_evenement__in=['assignation', 'statut'], acteur=self.manager).count(), 40,
+        )
+        notifications = Notification.objects.filter(destinataire=self.awa)
+        self.assertEqual(notifications.count(), 1)
+        self.assertTrue(notifications.get().message.startswith('20 travaux vous ont été assignés'))
+
+        # Instances à jour: un save() ultérieur ne journalise pas l'assignation une seconde fois
+        travail = resultat.modifies[0]
+        travail.save()
+        self.assertEqual(travail.evenements.filter(type_evenement='assignation').count(), 1)
+
+        # Lot mixte (travail démarré conservé en cours): bulk_update
+        bintou = make_user('bintou', user_type='employe')
+        changer_statut_travaux([travail], 'en_cours')
+        assigner_travaux(self.travaux[:2] + [make_travail('Nouveau')], bintou)
+        self.assertEqual(
+            sorted(Travail.objects.filter(assigne_a=bintou).values_list('statut', flat=True)),
+            ['assigne', 'assigne', 'en_cours'],
+        )
+
+    def test_transitions_verifiees(self):
+        """Test: les transitions impossibles sont refusées, les autres appliquées"""
+        assigner_travaux(self.travaux[:5], self.awa)
+        changer_statut_travaux(self.travaux[:2], 'en_cours')
+
+        resultat = changer_statut_travaux(self.travaux[:6], 'complete')
+        self.assertEqual(len(resultat), 2)
+        self.assertEqual(len(resultat.refuses), 4)
+        self.assertEqual(resultat.erreurs()[0]['motif'], 'Passage Assigné → Terminé impossible')
+        self.assertEqual(Travail.objects.filter(statut='complete', date_fin__isnull=False).count(), 2)
+
+        # Valeurs différentes d'un travail à l'autre (date de début conservée): bulk_update
+        resultat = changer_statut_travaux(self.travaux[:6], 'en_cours')
+        self.assertEqual((len(resultat), len(resultat.refuses)), (6, 0))
+        self.assertEqual(Travail.objects.filter(statut='en_cours', date_debut__isnull=False).count(), 6)
+
+        with self.assertRaises(ValueError):
+            changer_statut_travaux(self.travaux, 'inconnu')
+
+    def test_priorite_report_et_annulation(self):
+        """Test: priorité, date prévue et annulation journalisées, clos ignorés"""
+        changer_statut_travaux(self.travaux[:1], 'annule')
+
+        resultat = reprioriser_travaux(Travail.objects.all(), 'urgente', acteur=self.manager)
+        self.assertEqual(len(resultat.refuses), 1)
+        self.assertEqual(Travail.objects.filter(priorite='urgente').count(), 19)
+        self.assertEqual(TravailEvent.objects.filter(type_evenement='priorite').count(), 19)
+
+        date_prevue = timezone.now() + timedelta(days=2)
+        changer_statut_travaux(self.travaux[1:3], 'reporte')
+        replanifier_travaux(self.travaux[1:5], date_prevue)
+        self.assertEqual(Travail.objects.filter(date_prevue=date_prevue).count(), 4)
+        self.assertEqual(Travail.objects.filter(pk__in=[t.pk for t in self.travaux[1:3]], statut='planifie').count(), 2)
+
+        assigner_travaux(self.travaux[5:8], self.awa)
+        with self.captureOnCommitCallbacks(execute=True):
+            resultat = annuler_travaux(self.travaux[5:10], acteur=self.manager, motif='Doublon')
+        self.assertEqual(len(resultat), 5)
+        self.assertEqual(
+            TravailEvent.objects.filter(type_evenement='statut', nouvelle_valeur='annule').last().message,
+            'Statut: Signalé → Annulé (Doublon)',
+        )
+        self.assertEqual(Notification.objects.get(type_notification='system_alert').message[:1], '3')
+
+
+class MagasinTest(TestCase):
+    """Tests du magasin: réceptions, consommations, soldes et réapprovisionnement"""
+
+    def setUp(self):
+        self.manager = make_user('manager')
+        self.awa = make_user('awa', user_type='employe')
+
+    def make_demande_recue(self, travail=None, lignes=(('Robinet 1/2"', '4', '3000.00', None),)):
+        demande = Invoice.objects.create(
+            type_facture='demande_achat', montant_ht=Decimal('10000.00'),
+            date_emission=date(2025, 1, 1), date_echeance=date(2025, 1, 1),
+            etape_workflow='en_cours_achat', date_demande=date(2025, 1, 1),
+            demandeur=self.awa, travail_lie=travail, categorie_achat='fournitures',
+        )
+        for designation, quantite, prix_unitaire, quantite_recue in lignes:
+            LigneDemandeAchat.objects.create(
+                demande=demande, designation=designation, quantite=Decimal(quantite),
+                prix_unitaire=Decimal(prix_unitaire), motif='Stock',
+                quantite_recue=Decimal(quantite_recue) if quantite_recue else None,
+            )
+        demande.etape_workflow = 'recue'
+        demande.save()
+        HistoriqueValidation.objects.create(demande=demande, action='reception', effectue_par=self.manager)
+        return demande
+
+    def test_reception_et_consommation(self):
+        """Test: entrée à la réception, sortie à la clôture du travail, rejouable"""
+        travail = make_travail(statut='en_cours')
+        self.make_demande_recue(travail, lignes=[
+            ('Robinet 1/2"', '4', '3000.00', '3'),
+            ('Téflon', '2', '500.00', None),
+        ])
+        self.make_demande_recue(lignes=[('  robinet 1/2" ', '2', '3600.00', None)])
+
+        robinet = ArticleStock.objects.get(cle=cle_article('Robinet 1/2"', 'unité'))
+        self.assertEqual(robinet.quantite_en_stock, Decimal('5.00'))
+        self.assertEqual(robinet.cout_unitaire_moyen, Decimal('3240.00'))  # (3 × 3000 + 2 × 3600) / 5
+        self.assertEqual(ArticleStock.objects.count(), 2)
+
+        travail.statut = 'complete'
+        travail.save()
+        travail.statut = 'en_cours'
+        travail.save()
+        travail.statut = 'complete'
+        travail.save()
+
+        robinet.refresh_from_db()
+        self.assertEqual(robinet.quantite_en_stock, Decimal('2.00'))
+        self.assertEqual(
+            list(robinet.mouvements.values_list('type_mouvement', 'quantite', 'solde_apres')),
+            [('entree', Decimal('3.00'), Decimal('3.00')), ('entree', Decimal('2.00'), Decimal('5.00')),
+             ('sortie', Decimal('-3.00'), Decimal('2.00'))],
+        )
+        self.assertEqual(MouvementStock.objects.filter(type_mouvement='sortie', travail=travail).count(), 2)
+
+        call_command('rebuild_stock', stdout=StringIO())
+        self.assertEqual(MouvementStock.objects.count(), 5)
+
+        with self.assertRaises(ValueError):
+            robinet.mouvements.first().save()
+
+    def test_cloture_groupee_sort_le_materiel(self):
+        """Test: les actions groupées (sans save()) consomment aussi le matériel"""
+        travaux = [make_travail(f'Fuite {i}', statut='en_cours') for i in range(3)]
+        for travail in travaux:
+            self.make_demande_recue(travail)
+
+        # lecture, update, journal, entrées, articles, soldes, sorties (+ 6 savepoints)
+        with self.assertNumQueries(13):
+            changer_statut_travaux(travaux, 'complete')
+        self.assertEqual(ArticleStock.objects.get().quantite_en_stock, Decimal('0.00'))
+
+    def test_sorties_ajustements_et_soldes(self):
+        """Test: prélèvement borné au stock, inventaire, recalcul des soldes"""
+        self.make_demande_recue()
+        robinet = ArticleStock.objects.get()
+
+        with self.assertRaises(ValueError):
+            sortir_stock(robinet, 5)
+        sortir_stock(robinet, 1, acteur=self.awa)
+        self.assertIsNone(ajuster_stock(robinet, 3))
+        ajuster_stock(robinet, 2, acteur=self.manager)
+
+        robinet.refresh_from_db()
+        self.assertEqual(robinet.quantite_en_stock, Decimal('2.00'))
+        ArticleStock.objects.update(quantite_en_stock=Decimal('99'))
+        self.assertEqual(recalculer_soldes(), 1)
+        robinet.refresh_from_db()
+        self.assertEqual(robinet.quantite_en_stock, Decimal('2.00'))
+
+        ligne = LigneDemandeAchat(pk=0, designation='ROBINET 1/2"', unite='Unité')
+        self.assertEqual(disponibilites([ligne]), {0: robinet})
+
+    def test_suggestions_reappro(self):
+        """Test: point de commande = consommation journalière × délai + stock de sécurité"""
+        self.make_demande_recue(lignes=[('Robinet', '100', '3000.00', None), ('Vanne', '10', '9000.00', None)])
+        robinet = ArticleStock.objects.get(designation='Robinet')
+        vanne = ArticleStock.objects.get(designation='Vanne')
+        sortir_stock(robinet, 90)   # 1 par jour sur 90 jours
+        vanne.stock_minimum = Decimal('12')
+        vanne.save()
+
+        with self.assertNumQueries(1):
+            suggestions = suggestions_reappro()
+        self.assertEqual([s['article'] for s in suggestions], [vanne])
 
-# Create your tests here.
+        sortir_stock(robinet, 5)    # 5 restants, point de commande 95/90 × 7 ≈ 7,39
+        robinet_suggestion = suggestions_reappro()[0]
+        self.assertEqual(robinet_suggestion['article'], robinet)
+        self.assertEqual(robinet_suggestion['jours_restants'], 4)
+        self.assertEqual(robinet_suggestion['quantite_suggeree'], Decimal('35'))  # 31,67 + 7,39 - 5
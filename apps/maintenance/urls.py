@@ -28,6 +28,8 @@ urlpatterns = [
 
     # === ACTIONS SUR TRAVAUX ===
     path('travaux/<int:travail_id>/assign/', views.travail_assign_view, name='travail_assign'),
+    path('travaux/auto-dispatch/', views.travaux_auto_dispatch_view, name='travaux_auto_dispatch'),
+    path('travaux/activite/', views.travaux_activite_view, name='travaux_activite'),
     path('travaux/<int:travail_id>/start/', views.travail_start_view, name='travail_start'),
     path('travaux/<int:travail_id>/complete/', views.travail_complete_view, name='travail_complete'),
 
@@ -49,12 +51,20 @@ urlpatterns = [
     path('api/stats/', views.travaux_stats_api, name='interventions_stats_api'),  # Alias
     path('api/calendar/', views.travail_calendar_api, name='travail_calendar_api'),
     path('api/calendar/', views.travail_calendar_api, name='intervention_calendar_api'),  # Alias
+    path('api/calendar/subscription/', views.calendrier_abonnement_api, name='calendrier_abonnement'),
+    path('calendrier/<str:jeton>.ics', views.calendrier_ics_view, name='calendrier_ics'),
 
     # === RECHERCHE ET EXPORT ===
     path('search/', views.travaux_search, name='travaux_search'),
     path('export/', views.travaux_export, name='travaux_export'),
     path('bulk-action/', views.travaux_bulk_action, name='travaux_bulk_action'),
 
+    # === TABLEAU DE BORD (managers) ===
+    path('dashboard/', views.maintenance_dashboard, name='dashboard'),
+
+    # === MAGASIN ===
+    path('stock/', views.stock_view, name='stock'),
+
     # === MES TRAVAUX (pour employés) ===
     path('mes-travaux/', views.mes_travaux_view, name='mes_travaux'),
 ]
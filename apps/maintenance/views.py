@@ -4,20 +4,35 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib import messages
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from datetime import timedelta
+from decimal import Decimal, InvalidOperation
 import json
 
 from apps.notifications.utils import notify_intervention_assigned_with_email
 
 # Imports des modèles
 from .models.travail import Travail, TravailMedia
+from .models.evenement import TravailEvent
+from .journal import avec_acteur, fil_activite, historique
+from .calendrier import (
+    AbonnementCalendrier, evenement_travail, fenetre_calendrier, intervenant_du_jeton,
+    jeton_abonnement, travaux_planifies,
+)
+from .dispatch import PlanDeCharge, assigner, dispatcher_urgents, intervenants, travaux_urgents_non_assignes
+from .operations import (
+    annuler_travaux, assigner_travaux, changer_statut_travaux, replanifier_travaux, reprioriser_travaux,
+)
+from .stock import articles_avec_consommation, suggestions_reappro
+from .services import TRANCHES_ANCIENNETE, MaintenanceAnalytics, sla_priorites, tendance
 from .models.intervention import Intervention, InterventionMedia
 from .forms import InterventionForm, TravailForm
 from django.views.decorators.csrf import csrf_exempt
@@ -127,8 +142,8 @@ class TravauxListView(LoginRequiredMixin, ListView):
         """Filtrer les travaux selon les paramètres"""
         queryset = Travail.objects.select_related('assigne_a').order_by('-date_signalement')
         
-        # Relations pour optimisation
-        queryset = queryset.select_related('appartement__residence')
+        # Relations et matériel (demandes d'achat) chargés dans la même requête
+        queryset = queryset.select_related('appartement__residence').avec_materiel()
 
         # Récupérer les filtres depuis kwargs (pour les URLs spécialisées)
         status_filter = self.kwargs.get('status')
@@ -211,6 +226,7 @@ class TravauxListView(LoginRequiredMixin, ListView):
                 'signale': all_travaux.filter(statut='signale').count(),
                 'assigne': all_travaux.filter(statut='assigne').count(),
                 'complete': all_travaux.filter(statut='complete').count(),
+                'urgents_non_assignes': travaux_urgents_non_assignes().count(),
             },
 
             # Données pour les filtres
@@ -572,8 +588,13 @@ class TravailUpdateView(LoginRequiredMixin, UpdateView):
 
 @login_required
 def travail_detail_view(request, travail_id):
-    """Vue détail d'un travail avec timeline"""
-    travail = get_object_or_404(Travail, id=travail_id)
+    """Vue détail d'un travail avec son historique (journal TravailEvent)"""
+    travail = get_object_or_404(
+        Travail.objects.select_related(
+            'appartement__residence', 'residence', 'assigne_a', 'signale_par',
+        ).avec_materiel(),
+        id=travail_id,
+    )
 
     # Vérification des permissions
     can_view = (
@@ -589,122 +610,35 @@ def travail_detail_view(request, travail_id):
     # Récupérer les médias associés
     medias = TravailMedia.objects.filter(travail=travail).order_by('-created_at')
 
-    # ✅ ARCHITECTURE 1-to-Many: Les demandes d'achat sont accessibles via travail.demandes_achat.all()
-    # Plus besoin de passer demande_achat au contexte, le template y accède directement
-
-    # Récupérer la liste des techniciens (pour le modal d'assignation)
-    technicians = []
-    try:
-        from django.contrib.auth import get_user_model
-        user = get_user_model()
-        technicians = user.objects.filter(
-            user_type__in=['technician', 'technicien', 'field_agent']
-        ).order_by('first_name', 'last_name')
-    except:
-        pass
-    
-    # Créer la timeline
-    timeline = []
-
-    # 1. Signalement
-    if travail.date_signalement:
-        signale_par_nom = 'Système'
-        if travail.signale_par:
-            signale_par_nom = travail.signale_par.get_full_name()
-
-        timeline.append({
-            'action': 'Travail signalé',
-            'user': signale_par_nom,
-            'date': travail.date_signalement,
-            'icon': 'fa-exclamation',
-            'color': 'red'
-        })
-
-    # 2. Assignation
-    if travail.date_assignation and travail.assigne_a:
-        timeline.append({
-            'action': f'Assigné à {travail.assigne_a.get_full_name()}',
-            'user': 'Manager',
-            'date': travail.date_assignation,
-            'icon': 'fa-user-plus',
-            'color': 'blue'
-        })
-
-    # 3. Début du travail
-    if travail.date_debut:
-        timeline.append({
-            'action': 'Travail démarré',
-            'user': travail.assigne_a.get_full_name() if travail.assigne_a else 'Employé',
-            'date': travail.date_debut,
-            'icon': 'fa-play',
-            'color': 'orange'
-        })
+    can_assign = request.user.user_type in ['manager', 'accountant'] and travail.statut in ['signale', 'assigne']
 
-    # 4. Demandes d'achat créées (si elles existent) - Architecture 1-to-Many
-    for demande in travail.demandes_achat.all():
-        if demande.date_demande:
-            timeline.append({
-                'action': f'Demande d\'achat créée ({demande.numero_facture})',
-                'user': demande.demandeur.get_full_name() if demande.demandeur else 'Système',
-                'date': demande.date_demande,
-                'icon': 'fa-shopping-cart',
-                'color': 'purple'
-            })
-
-    # 5. Fin du travail
-    if travail.date_fin:
-        timeline.append({
-            'action': 'Travail terminé',
-            'user': travail.assigne_a.get_full_name() if travail.assigne_a else 'Employé',
-            'date': travail.date_fin,
-            'icon': 'fa-check',
-            'color': 'green'
-        })
-    
-    # Trier la timeline par date (chronologique pour l'affichage)
-    # Normaliser les dates pour éviter les erreurs de comparaison
-    from datetime import datetime, date
+    # Intervenants classés selon leur charge (panneau d'assignation)
+    classement_intervenants = PlanDeCharge().classement(travail) if can_assign else []
 
-    def normalize_date(d):
-        """Convertit date en datetime aware pour permettre la comparaison"""
-        if d is None:
-            return timezone.now()
+    # Historique: journal du travail, une requête indexée
+    timeline = historique(travail)
 
-        # Convertir date en datetime
-        if isinstance(d, date) and not isinstance(d, datetime):
-            d = datetime.combine(d, datetime.min.time())
+    # Demandes d'achat liées avec leur demandeur (une requête)
+    demandes_achat = list(travail.demandes_achat.select_related('demandeur').order_by('-date_demande'))
 
-        # Rendre aware si naive
-        if isinstance(d, datetime) and timezone.is_naive(d):
-            d = timezone.make_aware(d)
-
-        return d
-
-    timeline.sort(key=lambda x: normalize_date(x['date']))
-
-    # Calculer la progression de la checklist (si elle existe)
-    checklist_total = 0
-    checklist_completed = 0
-    checklist_progress = 0
-
-    if hasattr(travail, 'checklist'):
-        try:
-            checklist_items = travail.checklist.all()
-            checklist_total = checklist_items.count()
-            checklist_completed = checklist_items.filter(est_complete=True).count()
-            if checklist_total > 0:
-                checklist_progress = int((checklist_completed / checklist_total) * 100)
-        except:
-            pass
+    # Progression de la checklist (une requête agrégée)
+    checklist = travail.checklist.aggregate(
+        total=Count('id'), completed=Count('id', filter=Q(is_completed=True)),
+    )
+    checklist_total = checklist['total']
+    checklist_completed = checklist['completed']
+    checklist_progress = int(checklist_completed * 100 / checklist_total) if checklist_total else 0
 
     context = {
         'travail': travail,
         'medias': medias,
         'timeline': timeline,
-        'technicians': technicians,
+        'demandes_achat': demandes_achat,
+        'technicians': [ligne['intervenant'] for ligne in classement_intervenants],
+        'classement_intervenants': classement_intervenants,
         # ✅ SUPPRIMÉ: 'demande_achat' - Plus besoin, accessible via travail.demandes_achat.all() dans le template
         'can_edit': request.user.user_type in ['manager', 'accountant'],
-        'can_assign': request.user.user_type in ['manager', 'accountant'] and travail.statut == 'signale',
+        'can_assign': can_assign,
         'can_start': travail.statut == 'assigne' and travail.assigne_a == request.user,
         'can_complete': travail.statut == 'en_cours' and travail.assigne_a == request.user,
         # Checklist progression
@@ -719,81 +653,209 @@ def travail_detail_view(request, travail_id):
 @login_required
 @require_http_methods(["GET", "POST"])
 def travail_assign_view(request, travail_id):
-    """Vue pour assigner une intervention à un technicien - VERSION AVEC EMAIL"""
-    travail = get_object_or_404(Travail, id=travail_id)
-    
+    """
+    Assigne un travail à un intervenant
+
+    GET (AJAX): intervenants classés selon leur charge (PlanDeCharge)
+    POST: assignation à l'intervenant choisi, ou au mieux classé si aucun
+    """
+    travail = get_object_or_404(Travail.objects.select_related('appartement'), id=travail_id)
+    detail_url = reverse('maintenance:travail_detail', kwargs={'travail_id': travail.id})
+    est_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
     # Vérifier les permissions
     if request.user.user_type not in ['manager', 'accountant']:
-        messages.error(request, "Vous n'avez pas l'autorisation d'assigner cette travail.")
-        return redirect('maintenance:travail_detail', travail_id=travail.id)
-    
+        messages.error(request, "Vous n'avez pas l'autorisation d'assigner ce travail.")
+        return redirect(detail_url)
+
     if travail.statut not in ['signale', 'assigne']:
-        messages.error(request, "Cette intervention ne peut plus être assignée dans son état actuel.")
-        return redirect('maintenance:travail_detail', travail_id=travail.id)
-    
+        messages.error(request, "Ce travail ne peut plus être assigné dans son état actuel.")
+        return redirect(detail_url)
+
+    plan = PlanDeCharge()
+
     if request.method == 'GET':
-        # ✅ FORMULAIRE SIMPLE SANS InterventionAssignForm
-        technicians = User.objects.filter(user_type='technicien', is_active=True)
-        return render(request, 'maintenance/intervention_assign.html', {
-            'travail': travail,
-            'technicians': technicians,
+        if not est_ajax:
+            return redirect(f'{detail_url}#assignation')
+        return JsonResponse({
+            'success': True,
+            'classement': [
+                {
+                    'id': ligne['intervenant'].pk,
+                    'nom': ligne['intervenant'].get_full_name(),
+                    **{cle: valeur for cle, valeur in ligne.items() if cle != 'intervenant'},
+                }
+                for ligne in plan.classement(travail)
+            ],
         })
-    
-    elif request.method == 'POST':
+
+    try:
+        technicien_id = request.POST.get('technicien_id')
+        if technicien_id:
+            technicien = next((i for i in plan.intervenants if str(i.pk) == technicien_id), None)
+            if technicien is None:
+                raise ValueError("Intervenant introuvable ou inactif")
+        else:
+            technicien = plan.suggestion(travail)
+            if technicien is None:
+                raise ValueError("Aucun intervenant disponible")
+
+        assigner(travail, technicien, acteur=request.user)
+
+        # ✅ ENVOYER NOTIFICATION + EMAIL
         try:
-            # ✅ TRAITEMENT MANUEL SANS FORM
-            technicien_id = request.POST.get('technicien_id')
-            commentaire = request.POST.get('commentaire', '').strip()
-            
-            if not technicien_id:
-                raise ValueError("Veuillez sélectionner un technicien")
-            
-            technicien = get_object_or_404(User, id=technicien_id, user_type='technicien', is_active=True)
-            
-            # Assigner l'intervention
-            travail.technicien = technicien
-            travail.statut = 'assigne'
-            travail.date_assignation = timezone.now()
-            
-            if commentaire:
-                travail.commentaire_assignation = commentaire
-            
-            travail.save()
-            
-            # ✅ ENVOYER NOTIFICATION + EMAIL
-            try:
-                notify_intervention_assigned_with_email(intervention, technicien)
-                email_status = " (notification email envoyée)"
-            except Exception as e:
-                # Si l'email échoue, on log mais on ne bloque pas
-                print(f"Erreur envoi email: {str(e)}")
-                email_status = " (notification envoyée)"
-            
-            messages.success(request, f"Travail assigné à {technicien.get_full_name()}{email_status}")
-            
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({
-                    'success': True,
-                    'message': f'Travail assigné à {technicien.get_full_name()}!',
-                    'redirect_url': reverse('maintenance:travail_detail', kwargs={'travail_id': travail.id})
-                })
-            
-            return redirect('maintenance:travail_detail', travail_id=travail.id)
-            
+            notify_intervention_assigned_with_email(travail, technicien)
+            email_status = " (notification email envoyée)"
         except Exception as e:
-            error_msg = f"Erreur lors de l'assignation: {str(e)}"
-            messages.error(request, error_msg)
-            
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return JsonResponse({'success': False, 'error': error_msg})
-            
-            technicians = User.objects.filter(user_type='technicien', is_active=True)
-            return render(request, 'maintenance/intervention_assign.html', {
-                'travail': travail,
-                'technicians': technicians,
-                'error': error_msg
+            # Si l'email échoue, on log mais on ne bloque pas
+            print(f"Erreur envoi email: {str(e)}")
+            email_status = " (notification envoyée)"
+
+        messages.success(request, f"Travail assigné à {technicien.get_full_name()}{email_status}")
+
+        if est_ajax:
+            return JsonResponse({
+                'success': True,
+                'message': f'Travail assigné à {technicien.get_full_name()}!',
+                'redirect_url': detail_url,
             })
 
+    except Exception as e:
+        error_msg = f"Erreur lors de l'assignation: {str(e)}"
+        messages.error(request, error_msg)
+
+        if est_ajax:
+            return JsonResponse({'success': False, 'error': error_msg})
+
+    return redirect(detail_url)
+
+
+@login_required
+@require_http_methods(["POST"])
+def travaux_auto_dispatch_view(request):
+    """Assigne en lot les travaux urgents non assignés aux intervenants les moins chargés"""
+    if request.user.user_type not in ['manager', 'accountant']:
+        messages.error(request, "Vous n'avez pas l'autorisation d'assigner des travaux.")
+        return redirect('maintenance:travail_list')
+
+    affectations = dispatcher_urgents(acteur=request.user)
+    assignes = [(travail, intervenant) for travail, intervenant in affectations if intervenant]
+
+    if not affectations:
+        messages.info(request, "Aucun travail urgent en attente d'assignation.")
+    elif assignes:
+        messages.success(request, f"✅ {len(assignes)} travail(aux) urgent(s) assigné(s) automatiquement.")
+    if len(assignes) < len(affectations):
+        messages.warning(request, f"⚠️ {len(affectations) - len(assignes)} travail(aux) sans intervenant disponible.")
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({
+            'success': True,
+            'affectations': [
+                {
+                    'travail': travail.numero_travail,
+                    'intervenant': intervenant.get_full_name() if intervenant else None,
+                }
+                for travail, intervenant in affectations
+            ],
+        })
+    return redirect('maintenance:travail_list')
+
+
+@login_required
+def travaux_activite_view(request):
+    """Fil d'activité de tous les travaux (journal TravailEvent), pour les managers"""
+    if request.user.user_type not in ['manager', 'accountant']:
+        messages.error(request, "Vous n'avez pas l'autorisation d'accéder à cette page.")
+        return redirect('maintenance:travail_list')
+
+    type_filter = request.GET.get('type', '')
+    acteur_id = request.GET.get('acteur', '')
+    acteur = get_object_or_404(User, pk=acteur_id) if acteur_id.isdigit() else None
+    evenements = fil_activite(types=[type_filter] if type_filter else None, acteur=acteur)
+
+    page_obj = Paginator(evenements, 50).get_page(request.GET.get('page'))
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({
+            'success': True,
+            'has_next': page_obj.has_next(),
+            'evenements': [
+                {
+                    'id': evenement.pk,
+                    'type': evenement.type_evenement,
+                    'message': evenement.message,
+                    'date': evenement.date_evenement.isoformat(),
+                    'acteur': evenement.acteur.get_full_name() if evenement.acteur else None,
+                    'travail': evenement.travail.numero_travail,
+                    'url': reverse('maintenance:travail_detail', kwargs={'travail_id': evenement.travail_id}),
+                }
+                for evenement in page_obj
+            ],
+        })
+
+    context = {
+        'page_obj': page_obj,
+        'evenements': page_obj.object_list,
+        'types': TravailEvent.TYPE_CHOICES,
+        'current_type': type_filter,
+        'current_acteur': acteur,
+    }
+    return render(request, 'maintenance/travail_activite.html', context)
+
+
+@login_required
+def stock_view(request):
+    """
+    Magasin: articles en stock et suggestions de réapprovisionnement
+
+    ?q= recherche sur la désignation, ?disponible=1 articles en stock
+    uniquement. Les suggestions sont réservées aux managers.
+    """
+    recherche = request.GET.get('q', '').strip()
+    articles = articles_avec_consommation().order_by('designation')
+    if recherche:
+        articles = articles.filter(designation__icontains=recherche)
+    if request.GET.get('disponible'):
+        articles = articles.filter(quantite_en_stock__gt=0)
+
+    page_obj = Paginator(articles, 50).get_page(request.GET.get('page'))
+    suggestions = suggestions_reappro() if request.user.user_type in ['manager', 'accountant'] else []
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({
+            'success': True,
+            'has_next': page_obj.has_next(),
+            'articles': [
+                {
+                    'id': article.pk,
+                    'designation': article.designation,
+                    'unite': article.unite,
+                    'quantite_en_stock': str(article.quantite_en_stock),
+                    'consommation': str(article.consommation),
+                }
+                for article in page_obj
+            ],
+            'suggestions': [
+                {
+                    'id': suggestion['article'].pk,
+                    'designation': suggestion['article'].designation,
+                    'quantite_suggeree': str(suggestion['quantite_suggeree']),
+                    'jours_restants': suggestion['jours_restants'],
+                }
+                for suggestion in suggestions
+            ],
+        })
+
+    context = {
+        'page_obj': page_obj,
+        'articles': page_obj.object_list,
+        'suggestions': suggestions,
+        'recherche': recherche,
+        'disponible': bool(request.GET.get('disponible')),
+    }
+    return render(request, 'maintenance/stock.html', context)
+
 
 @login_required
 @require_http_methods(["POST"])
@@ -802,7 +864,7 @@ def travail_start_view(request, travail_id):
     travail = get_object_or_404(Travail, id=travail_id)
     
     # Vérifications
-    if travail.technicien != request.user and request.user.user_type not in ['manager', 'accountant']:
+    if travail.assigne_a != request.user and request.user.user_type not in ['manager', 'accountant']:
         return JsonResponse({'success': False, 'error': 'Non autorisé'}, status=403)
     
     if travail.statut != 'assigne':
@@ -810,6 +872,7 @@ def travail_start_view(request, travail_id):
     
     try:
         # ✅ DÉMARRER L'INTERVENTION MANUELLEMENT
+        avec_acteur(travail, request.user)
         travail.statut = 'en_cours'
         travail.date_debut = timezone.now()
         travail.save()
@@ -837,7 +900,7 @@ def travail_complete_view(request, travail_id):
     travail = get_object_or_404(Travail, id=travail_id)
     
     # Vérifications
-    if travail.technicien != request.user and request.user.user_type not in ['manager', 'accountant']:
+    if travail.assigne_a != request.user and request.user.user_type not in ['manager', 'accountant']:
         messages.error(request, "Vous n'êtes pas autorisé à terminer cette travail.")
         return redirect('maintenance:interventions_list')
     
@@ -856,46 +919,26 @@ def travail_complete_view(request, travail_id):
             # ✅ TRAITEMENT MANUEL SANS FORM
             commentaire = request.POST.get('commentaire', '').strip()
             cout_reel = request.POST.get('cout_reel', '').strip()
-            duree_reelle = request.POST.get('duree_reelle', '').strip()
             satisfaction = request.POST.get('satisfaction_locataire', '').strip()
             
             if not commentaire:
                 raise ValueError("Le commentaire de finalisation est obligatoire")
             
             # Terminer l'intervention
-            travail.statut = 'complete'
-            travail.date_fin = timezone.now()
-            
-            # ✅ UTILISER LES CHAMPS CORRECTS SELON LE MODÈLE
-            if hasattr(intervention, 'commentaire_completion'):
-                travail.commentaire_completion = commentaire
-            elif hasattr(intervention, 'commentaire_fin'):
-                travail.commentaire_fin = commentaire
-            elif hasattr(intervention, 'commentaire_technicien'):
-                travail.commentaire_technicien = commentaire
-            
             if cout_reel:
                 try:
-                    if hasattr(intervention, 'cout_reel'):
-                        travail.cout_reel = float(cout_reel)
-                    elif hasattr(intervention, 'cout_final'):
-                        travail.cout_final = float(cout_reel)
-                except ValueError:
-                    pass
-            
-            if duree_reelle:
-                try:
-                    travail.duree_reelle = int(duree_reelle)
-                except ValueError:
+                    travail.cout_reel = Decimal(cout_reel)
+                except InvalidOperation:
                     pass
             
             if satisfaction:
                 try:
-                    travail.satisfaction_locataire = int(satisfaction)
+                    travail.satisfaction = int(satisfaction)
                 except ValueError:
                     pass
             
-            travail.save()
+            avec_acteur(travail, request.user)
+            travail.marquer_complete(commentaire)
             
             messages.success(request, f"Intervention '{travail.titre}' terminée avec succès!")
             
@@ -952,7 +995,7 @@ def travail_upload_media_view(request, travail_id):
     # Vérifier les permissions
     can_upload = (
         request.user.user_type in ['manager', 'accountant'] or
-        travail.technicien == request.user
+        travail.assigne_a == request.user
     )
     
     if not can_upload:
@@ -968,20 +1011,13 @@ def travail_upload_media_view(request, travail_id):
                 description = request.POST.get('description', '')
                 
                 # Créer le média
-                media_data = {
-                    'travail': travail,
-                    'type_media': type_media,
-                    'fichier': file,
-                    'description': description,
-                }
-                
-                # Ajouter le champ utilisateur selon le modèle
-                if hasattr(InterventionMedia, 'ajoute_par'):
-                    media_data['ajoute_par'] = request.user
-                elif hasattr(InterventionMedia, 'uploaded_by'):
-                    media_data['uploaded_by'] = request.user
-                
-                media = InterventionMedia.objects.create(**media_data)
+                media = TravailMedia.objects.create(
+                    travail=travail,
+                    type_media=type_media,
+                    fichier=file,
+                    description=description,
+                    ajoute_par=request.user,
+                )
                 
                 messages.success(request, "Fichier uploadé avec succès!")
                 
@@ -1012,86 +1048,113 @@ def travail_upload_media_view(request, travail_id):
 
 @login_required
 def travaux_stats_api(request):
-    """API pour les statistiques des interventions"""
+    """
+    API pour les statistiques des travaux
+
+    Comptages par statut, priorité et type, délais moyens et respect des
+    SLA (période ?jours=, 90 par défaut).
+    """
     if request.user.user_type not in ['manager', 'accountant']:
         return JsonResponse({'error': 'Non autorisé'}, status=403)
-    
-    # Statistiques générales
-    total = Travail.objects.count()
-    pending = Travail.objects.filter(statut='signale').count()
-    in_progress = Travail.objects.filter(statut='en_cours').count()
-    completed = Travail.objects.filter(statut='complete').count()
-    
-    # ✅ STATISTIQUES CONDITIONNELLES SELON LES CHAMPS DISPONIBLES
-    priority_stats = {}
-    if hasattr(Intervention, 'PRIORITE_CHOICES'):
-        for priority, label in Travail.PRIORITE_CHOICES:
-            priority_stats[priority] = Travail.objects.filter(priorite=priority).count()
-    
-    type_stats = {}
-    if hasattr(Intervention, 'TYPE_INTERVENTION_CHOICES'):
-        for type_intervention, label in Travail.TYPE_TRAVAIL_CHOICES:
-            type_stats[type_intervention] = Travail.objects.filter(type_intervention=type_intervention).count()
-    
+
+    try:
+        jours = max(1, min(int(request.GET.get('jours', 90)), 365))
+    except ValueError:
+        return JsonResponse({'error': 'Paramètre jours invalide'}, status=400)
+
+    stats = Travail.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(statut='signale')),
+        in_progress=Count('id', filter=Q(statut='en_cours')),
+        completed=Count('id', filter=Q(statut='complete')),
+    )
+    priority_stats = {priorite: 0 for priorite, _ in Travail.PRIORITE_CHOICES}
+    priority_stats.update(
+        Travail.objects.order_by().values_list('priorite').annotate(nb=Count('id'))
+    )
+    type_stats = {type_travail: 0 for type_travail, _ in Travail.TYPE_TRAVAIL_CHOICES}
+    type_stats.update(
+        Travail.objects.order_by().values_list('type_travail').annotate(nb=Count('id'))
+    )
+
+    analytics = MaintenanceAnalytics(depuis=timezone.now() - timedelta(days=jours))
     data = {
-        'total': total,
-        'pending': pending,
-        'in_progress': in_progress,
-        'completed': completed,
+        **stats,
         'priority_stats': priority_stats,
         'type_stats': type_stats,
+        'sla': {
+            'jours': jours,
+            'global': analytics.resume(),
+            'par_priorite': analytics.par('priorite'),
+        },
     }
-    
+
     return JsonResponse(data)
 
 
 @login_required
 def travail_calendar_api(request):
-    """API pour le calendrier des interventions"""
-    if request.user.user_type not in ['manager', 'accountant']:
-        return JsonResponse({'error': 'Non autorisé'}, status=403)
-    
-    # ✅ RÉCUPÉRER SELON LES CHAMPS DISPONIBLES
-    date_field = None
-    if hasattr(Intervention._meta.get_field('date_planifiee'), 'name'):
-        date_field = 'date_planifiee'
-    elif hasattr(Intervention._meta.get_field('date_assignation'), 'name'):
-        date_field = 'date_assignation'
-    
-    if not date_field:
-        return JsonResponse([])
-    
-    interventions = Travail.objects.filter(**{f'{date_field}__isnull': False}).select_related('technicien')
-    
-    if Property:
-        interventions = interventions.select_related('bien')
-    
-    events = []
-    for intervention in interventions:
-        date_value = getattr(intervention, date_field)
-        
-        events.append({
-            'id': travail.id,
-            'title': travail.titre,
-            'start': date_value.isoformat(),
-            'url': reverse('maintenance:travail_detail', kwargs={'travail_id': travail.id}),
-            'color': {
-                'urgente': '#ef4444',
-                'haute': '#f97316',
-                'normale': '#3b82f6',
-                'basse': '#10b981',
-            }.get(getattr(intervention, 'priorite', 'normale'), '#6b7280'),
-            'extendedProps': {
-                'priority': getattr(intervention, 'priorite', ''),
-                'status': travail.statut,
-                'technician': travail.technicien.get_full_name() if travail.technicien else None,
-                'property': travail.bien.name if Property and travail.bien else None,
-            }
-        })
-    
+    """
+    API pour le calendrier des travaux (FullCalendar)
+
+    Fenêtre ?start=&end= obligatoire. Les managers voient tous les travaux
+    (ou ceux de ?technicien=), les employés uniquement les leurs.
+    """
+    try:
+        debut, fin = fenetre_calendrier(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if request.user.user_type in ['manager', 'accountant']:
+        technicien_id = request.GET.get('technicien', '')
+        intervenant = get_object_or_404(User, pk=technicien_id) if technicien_id.isdigit() else None
+    else:
+        intervenant = request.user
+
+    events = [evenement_travail(travail) for travail in travaux_planifies(debut, fin, intervenant)]
     return JsonResponse(events, safe=False)
 
 
+@login_required
+def calendrier_abonnement_api(request):
+    """Lien d'abonnement iCalendar de l'utilisateur (ou de ?technicien= pour un manager)"""
+    intervenant = request.user
+    technicien_id = request.GET.get('technicien', '')
+    if technicien_id.isdigit() and request.user.user_type in ['manager', 'accountant']:
+        intervenant = get_object_or_404(User, pk=technicien_id, is_active=True)
+
+    url = request.build_absolute_uri(
+        reverse('maintenance:calendrier_ics', kwargs={'jeton': jeton_abonnement(intervenant)})
+    )
+    return JsonResponse({
+        'success': True,
+        'url': url,
+        'webcal': url.replace('https://', 'webcal://').replace('http://', 'webcal://'),
+    })
+
+
+def calendrier_ics_view(request, jeton):
+    """
+    Abonnement iCalendar d'un intervenant (sans session: lien signé)
+
+    Répond 304 si le contenu n'a pas changé depuis la dernière lecture (ETag).
+    """
+    intervenant = intervenant_du_jeton(jeton)
+    if intervenant is None:
+        raise Http404("Abonnement inconnu")
+
+    abonnement = AbonnementCalendrier(intervenant)
+    etag = abonnement.etag()
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(abonnement.ics(), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="planning.ics"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=%d' % getattr(settings, 'MAINTENANCE_ICS_MAX_AGE', 300)
+    return response
+
+
 # ============ VUES SIMPLIFIÉES POUR CRÉATION/MODIFICATION ============
 
 @login_required
@@ -1382,7 +1445,7 @@ def mes_travaux_view(request):
     # Interventions assignées à ce technicien
     interventions = Travail.objects.filter(
         technicien=request.user
-    ).order_by('-date_signalement')
+    ).avec_materiel().order_by('-date_signalement')
     
     # Filtres
     status_filter = request.GET.get('status', 'active')
@@ -1423,51 +1486,70 @@ def mes_travaux_view(request):
 @login_required
 @require_http_methods(["POST"])
 def travaux_bulk_action(request):
-    """Actions en masse sur les interventions"""
+    """
+    Actions en masse sur les travaux
+
+    assign (technicien_id), status (statut), priority (priorite),
+    reschedule (date_prevue), cancel (motif), mark_urgent, delete.
+    Les travaux dont la transition est impossible sont ignorés et listés
+    dans 'refused'.
+    """
     if request.user.user_type not in ['manager', 'accountant']:
         return JsonResponse({'success': False, 'error': 'Permission refusée'})
-    
+
     action = request.POST.get('action')
-    intervention_ids = request.POST.getlist('intervention_ids')
-    
-    if not action or not intervention_ids:
+    travail_ids = request.POST.getlist('travail_ids') or request.POST.getlist('intervention_ids')
+
+    if not action or not travail_ids:
         return JsonResponse({'success': False, 'error': 'Action ou sélection manquante'})
-    
+
     try:
-        interventions = Travail.objects.filter(id__in=intervention_ids)
-        count = interventions.count()
-        
         if action == 'assign':
             technicien_id = request.POST.get('technicien_id')
             if not technicien_id:
                 return JsonResponse({'success': False, 'error': 'Technicien requis'})
-            
-            technicien = get_object_or_404(User, id=technicien_id, user_type='technicien')
-            interventions.filter(statut='signale').update(
-                technicien=technicien,
-                statut='assigne',
-                date_assignation=timezone.now()
-            )
-            message = f"{count} intervention(s) assignée(s) à {technicien.get_full_name()}"
-            
+            technicien = get_object_or_404(intervenants(), id=technicien_id)
+            resultat = assigner_travaux(travail_ids, technicien, acteur=request.user)
+            message = resultat.message(f"assigné(s) à {technicien.get_full_name()}")
+
+        elif action == 'status':
+            statut = request.POST.get('statut')
+            resultat = changer_statut_travaux(travail_ids, statut, acteur=request.user)
+            message = resultat.message(f"passé(s) au statut {dict(Travail.STATUT_CHOICES)[statut].lower()}")
+
+        elif action in ['priority', 'mark_urgent']:
+            priorite = 'urgente' if action == 'mark_urgent' else request.POST.get('priorite')
+            resultat = reprioriser_travaux(travail_ids, priorite, acteur=request.user)
+            message = resultat.message(f"en priorité {dict(Travail.PRIORITE_CHOICES)[priorite].lower()}")
+
+        elif action == 'reschedule':
+            date_prevue = parse_datetime(request.POST.get('date_prevue', ''))
+            if date_prevue is None:
+                return JsonResponse({'success': False, 'error': 'Date prévue invalide'})
+            if timezone.is_naive(date_prevue):
+                date_prevue = timezone.make_aware(date_prevue)
+            resultat = replanifier_travaux(travail_ids, date_prevue, acteur=request.user)
+            message = resultat.message(f"reprogrammé(s) au {timezone.localtime(date_prevue).strftime('%d/%m/%Y %H:%M')}")
+
+        elif action == 'cancel':
+            resultat = annuler_travaux(travail_ids, acteur=request.user, motif=request.POST.get('motif', ''))
+            message = resultat.message("annulé(s)")
+
         elif action == 'delete':
-            interventions.delete()
-            message = f"{count} intervention(s) supprimée(s)"
-            
-        elif action == 'mark_urgent':
-            interventions.update(priorite='urgente')
-            message = f"{count} intervention(s) marquée(s) comme urgente(s)"
-            
+            count, _ = Travail.objects.filter(id__in=travail_ids).delete()
+            return JsonResponse({'success': True, 'message': f"{count} élément(s) supprimé(s)", 'count': count})
+
         else:
             return JsonResponse({'success': False, 'error': 'Action non reconnue'})
-        
+
         return JsonResponse({
             'success': True,
             'message': message,
-            'count': count
+            'count': len(resultat),
+            'refused': resultat.erreurs(),
         })
-        
-    except Exception as e:
+
+    except ValueError as e:
         return JsonResponse({'success': False, 'error': str(e)})
 
 
@@ -1537,28 +1619,33 @@ def travaux_export(request):
 
         writer.writerow(headers)
 
-        # Données
-        interventions = Travail.objects.all().order_by('-date_signalement')
+        # Données (relations chargées en une seule requête)
+        travaux = Travail.objects.select_related(
+            'assigne_a',
+            'signale_par',
+            'residence',
+            'appartement__residence',
+        ).order_by('-date_signalement')
 
-        for intervention in interventions:
+        for travail in travaux.iterator(chunk_size=2000):
             row = [
                 travail.id,
                 travail.titre,
                 travail.description,
-                travail.type_intervention,
-                getattr(intervention, 'priorite', ''),
-                travail.statut,
-                travail.date_signalement.strftime('%Y-%m-%d %H:%M'),
-                travail.technicien.get_full_name() if travail.technicien else '',
-                travail.date_assignation.strftime('%Y-%m-%d %H:%M') if getattr(intervention, 'date_assignation', None) else '',
-                travail.date_debut.strftime('%Y-%m-%d %H:%M') if getattr(intervention, 'date_debut', None) else '',
-                travail.date_fin.strftime('%Y-%m-%d %H:%M') if getattr(intervention, 'date_fin', None) else '',
-                getattr(intervention, 'cout_estime', ''),
-                getattr(intervention, 'cout_reel', '') or getattr(intervention, 'cout_final', ''),
+                travail.get_type_travail_display(),
+                travail.get_priorite_display(),
+                travail.get_statut_display(),
+                travail.date_signalement.strftime('%Y-%m-%d %H:%M') if travail.date_signalement else '',
+                travail.assigne_a.get_full_name() if travail.assigne_a else '',
+                travail.date_assignation.strftime('%Y-%m-%d %H:%M') if travail.date_assignation else '',
+                travail.date_debut.strftime('%Y-%m-%d %H:%M') if travail.date_debut else '',
+                travail.date_fin.strftime('%Y-%m-%d %H:%M') if travail.date_fin else '',
+                travail.cout_estime or '',
+                travail.cout_reel or '',
             ]
 
-            row.append(travail.bien.name if travail.bien else '')
-            row.append(str(travail.locataire) if travail.locataire else '')
+            row.append(travail.lieu_travail)
+            row.append(travail.signale_par.nom_complet if travail.signale_par else '')
             
             writer.writerow(row)
         
@@ -1572,63 +1659,51 @@ def travaux_export(request):
 
 @login_required
 def maintenance_dashboard(request):
-    """Tableau de bord maintenance pour managers"""
+    """
+    Tableau de bord maintenance pour managers
+
+    Délais moyens d'assignation, de démarrage et de résolution, respect des
+    SLA par priorité, type, résidence et technicien, ancienneté du backlog
+    et tendance lue dans les cumuls journaliers.
+    """
     if request.user.user_type not in ['manager', 'accountant']:
         return redirect('dashboard:index')
-    
-    # Statistiques générales
-    total_interventions = Travail.objects.count()
-    pending_interventions = Travail.objects.filter(statut='signale').count()
-    in_progress_interventions = Travail.objects.filter(statut='en_cours').count()
-    completed_today = Travail.objects.filter(
-        statut='complete',
-        date_fin__date=timezone.now().date()
-    ).count()
-    
-    # Interventions urgentes non assignées
-    urgent_unassigned = Travail.objects.filter(
-        priorite='urgente',
-        statut='signale'
-    )
-    
-    # Interventions en retard
-    overdue_interventions = Travail.objects.filter(
-        statut__in=['assigne', 'en_cours'],
-        date_assignation__lt=timezone.now() - timedelta(days=2)
-    ) if hasattr(Intervention._meta.get_field('date_assignation'), 'name') else []
-    
-    # Performance par technicien (dernière semaine)
-    last_week = timezone.now() - timedelta(days=7)
-    technician_performance = User.objects.filter(
-        user_type='technicien',
-        is_active=True
-    ).annotate(
-        completed_interventions=Count(
-            'interventions_technicien',
-            filter=Q(
-                interventions_technicien__statut='complete',
-                interventions_technicien__date_fin__gte=last_week
-            )
-        ),
-        pending_interventions=Count(
-            'interventions_technicien',
-            filter=Q(interventions_technicien__statut__in=['assigne', 'en_cours'])
-        )
-    )
-    
+
+    try:
+        jours = max(1, min(int(request.GET.get('jours', 90)), 365))
+    except ValueError:
+        jours = 90
+
+    analytics = MaintenanceAnalytics(depuis=timezone.now() - timedelta(days=jours))
+    urgent_unassigned = travaux_urgents_non_assignes()
+    backlog = analytics.anciennete_backlog()
+    sla = sla_priorites()
+
     context = {
-        'stats': {
-            'total_interventions': total_interventions,
-            'pending_interventions': pending_interventions,
-            'in_progress_interventions': in_progress_interventions,
-            'completed_today': completed_today,
-            'urgent_unassigned': urgent_unassigned.count(),
-            'overdue_interventions': len(overdue_interventions),
-        },
+        'jours': jours,
+        'resume': analytics.resume(),
+        'regroupements': [
+            ('Par priorité', analytics.par('priorite')),
+            ('Par type de travail', analytics.par('type_travail')),
+            ('Par résidence', analytics.par('residence')),
+            ('Par technicien', analytics.par('technicien')),
+        ],
+        'anciennete_backlog': [
+            {
+                'libelle': libelle,
+                'tranches': [backlog[priorite][nom] for nom, _, _ in TRANCHES_ANCIENNETE],
+                'total': backlog[priorite]['total'],
+                'sla_heures': {etape: delai.total_seconds() / 3600 for etape, delai in sla[priorite].items()},
+            }
+            for priorite, libelle in Travail.PRIORITE_CHOICES
+        ],
+        'tranches_anciennete': TRANCHES_ANCIENNETE,
+        'ouverts_hors_sla': analytics.ouverts_hors_sla(),
+        'tendance_json': [
+            {**jour, 'date': jour['date'].strftime('%d/%m')} for jour in tendance(jours=min(jours, 30))
+        ],
         'urgent_unassigned': urgent_unassigned[:5],
-        'overdue_interventions': overdue_interventions[:5] if overdue_interventions else [],
-        'technician_performance': technician_performance,
-        'recent_interventions': Travail.objects.order_by('-date_signalement')[:10],
+        'nb_urgent_unassigned': urgent_unassigned.count(),
     }
-    
-    return render(request, 'maintenance/dashboard.html', context)
\ No newline at end of file
+
+    return render(request, 'maintenance/dashboard.html', context)
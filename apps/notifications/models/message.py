@@ -1,7 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from apps.core.models import BaseModel
-from apps.notifications.models.notification import Notification
 
 User = get_user_model()
 
@@ -141,7 +140,7 @@ class WhatsAppMessage(BaseModel):
     """Modèle pour tracker les messages WhatsApp"""
     
     notification = models.OneToOneField(
-        Notification,
+        'notifications.Notification',
         on_delete=models.CASCADE,
         related_name='whatsapp_message',
         verbose_name="Notification"
@@ -218,7 +217,7 @@ class SMSMessage(BaseModel):
     """Modèle pour tracker les messages SMS"""
     
     notification = models.OneToOneField(
-        Notification,
+        'notifications.Notification',
         on_delete=models.CASCADE,
         related_name='sms_message',
         verbose_name="Notification"
@@ -1,6 +1,7 @@
 # apps/notifications/utils.py
 # (Ajouter ces fonctions à la fin du fichier existant)
 
+from .models import Notification
 from .email_utils import (
     send_intervention_assigned_email,
     send_task_assigned_email,
@@ -121,4 +122,23 @@ def notify_technicians_with_email(
             except:
                 pass
     
-    return notifications
\ No newline at end of file
+    return notifications
+
+
+def notify_users_bulk(messages, type_notification, canal='app'):
+    """
+    Crée en une requête les notifications de plusieurs utilisateurs
+
+    Args:
+        messages: dict {id du destinataire: message}
+    """
+    return Notification.objects.bulk_create([
+        Notification(
+            destinataire_id=destinataire_id,
+            type_notification=type_notification,
+            canal=canal,
+            message=message,
+            statut='envoye',
+        )
+        for destinataire_id, message in messages.items()
+    ], batch_size=500)
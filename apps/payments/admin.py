@@ -5,6 +5,7 @@ from apps.payments.models.ligne_demade_achat import LigneDemandeAchat
 from apps.payments.models.invoice import Invoice
 from apps.payments.models.historique_validation import HistoriqueValidation
 from apps.payments.models.payment import Payment, PaymentReminder
+from apps.payments.models.depense_mensuelle import DepenseMensuelle
 
 
 class PaymentInline(admin.TabularInline):
@@ -370,4 +371,29 @@ class HistoriqueValidationAdmin(admin.ModelAdmin):
         """Optimise les requêtes"""
         return super().get_queryset(request).select_related(
             'demande', 'effectue_par'
-        )
\ No newline at end of file
+        )
+
+
+@admin.register(DepenseMensuelle)
+class DepenseMensuelleAdmin(admin.ModelAdmin):
+    """Cumuls mensuels des dépenses (recalculés par rebuild_spend_rollups)"""
+
+    list_display = (
+        'mois', 'source', 'fournisseur', 'categorie', 'residence',
+        'montant', 'montant_estime', 'nb_documents', 'nb_lignes'
+    )
+
+    list_filter = ('source', 'categorie')
+
+    search_fields = ('fournisseur',)
+
+    date_hierarchy = 'mois'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('residence')
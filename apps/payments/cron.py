@@ -9,4 +9,30 @@ class GenerateMonthlyInvoicesCronJob(CronJobBase):
     
     def do(self):
         from django.core.management import call_command
-        call_command('generate_monthly_invoices')
\ No newline at end of file
+        call_command('generate_monthly_invoices')
+
+
+class CheckOverdueInvoicesCronJob(CronJobBase):
+    RUN_AT_TIMES = ['01:00']
+
+    schedule = Schedule(run_at_times=RUN_AT_TIMES)
+    code = 'payments.check_overdue_invoices'
+
+    def do(self):
+        from django.core.management import call_command
+        call_command('check_overdue_invoices')
+
+
+class SpendRollupsCronJob(CronJobBase):
+    RUN_AT_TIMES = ['02:00']
+
+    schedule = Schedule(run_at_times=RUN_AT_TIMES)
+    code = 'payments.rebuild_spend_rollups'
+
+    def do(self):
+        from django.core.management import call_command
+
+        # Une demande ancienne peut encore changer (prix réel saisi à la
+        # réception, annulation): tout l'historique est recalculé, en deux
+        # requêtes groupées
+        call_command('rebuild_spend_rollups')
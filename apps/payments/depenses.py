@@ -0,0 +1,359 @@
+# apps/payments/depenses.py
+"""
+Analyse des dépenses fournisseurs
+
+Sources: lignes des demandes d'achat engagées (approuvées et au-delà) et
+factures prestataires émises. Pour les négociations fournisseurs:
+    depenses_par(axe, ...)      dépenses par fournisseur, catégorie,
+                                résidence ou mois, lues dans les cumuls
+                                mensuels (DepenseMensuelle)
+    ecarts_prix(...)            écart prix réel / estimé par article et
+                                par mois (LigneDemandeAchat.ecart_prix)
+    delais_validation(...)      durée de chaque étape du workflow depuis
+                                l'historique de validation
+
+reconstruire_depenses() recalcule les cumuls mensuels en deux requêtes
+groupées (commande rebuild_spend_rollups, tâche cron quotidienne).
+rapport_depenses() assemble le rapport et le met en cache
+(PAYMENTS_DEPENSES_CACHE_TTL, 15 min par défaut).
+"""
+
+from collections import OrderedDict
+from decimal import ROUND_HALF_UP, Decimal
+from statistics import median
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Lower, NullIf, Trim, TruncMonth
+
+from apps.payments.models import DepenseMensuelle, Invoice, LigneDemandeAchat
+
+# Demandes d'achat dont la dépense est engagée
+ETAPES_ENGAGEES = ['approuve', 'en_cours_achat', 'recue', 'paye']
+
+# Factures prestataires comptées (ni brouillon ni annulée)
+STATUTS_EMIS = ['emise', 'payee', 'en_retard']
+
+# Étapes du workflow: (code, libellé, action de départ, action d'arrivée)
+ETAPES_VALIDATION = [
+    ('responsable', 'Validation responsable', 'soumission', 'validation_responsable'),
+    ('comptable', 'Traitement comptable', 'validation_responsable', 'traitement_comptable'),
+    ('dg', 'Approbation DG', 'traitement_comptable', 'approbation'),
+    ('reception', 'Achat et réception', 'approbation', 'reception'),
+    ('paiement', 'Paiement', 'reception', 'paiement'),
+    ('cycle', "Cycle d'approbation complet", 'soumission', 'approbation'),
+]
+
+AXES = {
+    'fournisseur': 'fournisseur_cle',
+    'categorie': 'categorie',
+    'residence': 'residence',
+    'mois': 'mois',
+}
+
+CACHE_RAPPORT = 'payments:depenses:{debut}:{fin}'
+
+CENTIEME = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+def _mois(jour):
+    return jour.replace(day=1) if jour else None
+
+
+def _periode(mois_debut=None, mois_fin=None):
+    periode = Q()
+    if mois_debut:
+        periode &= Q(mois__gte=_mois(mois_debut))
+    if mois_fin:
+        periode &= Q(mois__lte=_mois(mois_fin))
+    return periode
+
+
+def _pourcentage(partie, total):
+    return (Decimal(partie) * 100 / total).quantize(CENTIEME, ROUND_HALF_UP) if total else None
+
+
+def lignes_achat_engagees(mois_debut=None, mois_fin=None):
+    """
+    Lignes des demandes d'achat engagées, annotées pour le regroupement
+
+    mois: mois de la demande; nom/cle: fournisseur de la ligne, à défaut
+    celui de la demande; residence_id: résidence du travail lié.
+    """
+    nom = Coalesce(
+        NullIf(Trim('fournisseur'), Value('')),
+        Trim('demande__fournisseur_nom'),
+    )
+    return LigneDemandeAchat.objects.filter(
+        demande__type_facture='demande_achat',
+        demande__etape_workflow__in=ETAPES_ENGAGEES,
+    ).annotate(
+        mois=TruncMonth(Coalesce('demande__date_demande', 'demande__date_emission')),
+        nom=nom,
+        cle=Lower(nom),
+        residence_id=Coalesce(
+            'demande__travail_lie__residence', 'demande__travail_lie__appartement__residence',
+        ),
+    ).filter(_periode(mois_debut, mois_fin))
+
+
+def factures_prestataires(mois_debut=None, mois_fin=None):
+    """Factures prestataires émises, annotées comme lignes_achat_engagees"""
+    return Invoice.objects.filter(
+        type_facture='prestataire',
+        statut__in=STATUTS_EMIS,
+    ).annotate(
+        mois=TruncMonth('date_emission'),
+        nom=Trim('fournisseur_nom'),
+        cle=Lower(Trim('fournisseur_nom')),
+        residence_id=Coalesce('travail_lie__residence', 'travail_lie__appartement__residence'),
+    ).filter(_periode(mois_debut, mois_fin))
+
+
+# ============================================================================
+# CUMULS MENSUELS
+# ============================================================================
+
+def reconstruire_depenses(mois_debut=None, mois_fin=None):
+    """
+    Recalcule les cumuls mensuels sur [mois_debut, mois_fin] (tout par défaut)
+
+    Deux requêtes groupées (lignes d'achat, factures prestataires) puis un
+    remplacement en masse des cumuls de la période.
+
+    Returns:
+        int: nombre de cumuls écrits
+    """
+    cumuls = [
+        DepenseMensuelle(
+            mois=ligne['mois'],
+            source='demande_achat',
+            fournisseur_cle=ligne['cle'] or '',
+            fournisseur=ligne['libelle'] or '',
+            categorie=ligne['demande__categorie_achat'],
+            residence_id=ligne['residence_id'],
+            montant=ligne['montant'],
+            montant_estime=ligne['montant_estime'],
+            nb_documents=ligne['nb_documents'],
+            nb_lignes=ligne['nb_lignes'],
+        )
+        for ligne in lignes_achat_engagees(mois_debut, mois_fin).order_by().values(
+            'mois', 'cle', 'demande__categorie_achat', 'residence_id',
+        ).annotate(
+            libelle=Max('nom'),
+            montant=Sum(Coalesce('prix_reel', 'prix_total')),
+            montant_estime=Sum('prix_total'),
+            nb_documents=Count('demande', distinct=True),
+            nb_lignes=Count('id'),
+        )
+    ]
+    cumuls += [
+        DepenseMensuelle(
+            mois=ligne['mois'],
+            source='prestataire',
+            fournisseur_cle=ligne['cle'] or '',
+            fournisseur=ligne['libelle'] or '',
+            categorie=ligne['type_prestation'],
+            residence_id=ligne['residence_id'],
+            montant=ligne['montant'],
+            montant_estime=ligne['montant'],
+            nb_documents=ligne['nb_documents'],
+            nb_lignes=ligne['nb_documents'],
+        )
+        for ligne in factures_prestataires(mois_debut, mois_fin).order_by().values(
+            'mois', 'cle', 'type_prestation', 'residence_id',
+        ).annotate(
+            libelle=Max('nom'),
+            montant=Sum('montant_ttc'),
+            nb_documents=Count('id'),
+        )
+    ]
+
+    with transaction.atomic():
+        DepenseMensuelle.objects.filter(_periode(mois_debut, mois_fin)).delete()
+        DepenseMensuelle.objects.bulk_create(cumuls, batch_size=500)
+    return len(cumuls)
+
+
+def depenses_par(axe, mois_debut=None, mois_fin=None, source=None, limite=None):
+    """
+    Dépenses regroupées selon un axe (une requête sur les cumuls)
+
+    Args:
+        axe: 'fournisseur', 'categorie', 'residence' ou 'mois'
+        source: 'demande_achat' ou 'prestataire' (toutes par défaut)
+        limite: nombre de groupes retournés, les plus gros d'abord
+
+    Returns:
+        list: dicts cle, libelle, montant, montant_estime, ecart,
+              nb_documents, nb_lignes, part (% du total de la période)
+    """
+    champ = AXES[axe]
+    cumuls = DepenseMensuelle.objects.filter(_periode(mois_debut, mois_fin))
+    if source:
+        cumuls = cumuls.filter(source=source)
+
+    lignes = list(cumuls.order_by().values(champ).annotate(
+        libelle=Max({
+            'fournisseur': 'fournisseur',
+            'categorie': 'categorie',
+            'residence': 'residence__nom',
+            'mois': 'mois',
+        }[axe]),
+        montant=Sum('montant'),
+        montant_estime=Sum('montant_estime'),
+        nb_documents=Sum('nb_documents'),
+        nb_lignes=Sum('nb_lignes'),
+    ).order_by(*(['mois'] if axe == 'mois' else ['-montant', champ])))
+
+    libelles_categories = {
+        **dict(Invoice._meta.get_field('type_prestation').choices),
+        **dict(Invoice._meta.get_field('categorie_achat').choices),
+    }
+    total = sum(ligne['montant'] for ligne in lignes)
+    resultats = []
+    for ligne in lignes[:limite]:
+        libelle = ligne['libelle']
+        if axe == 'categorie':
+            libelle = libelles_categories.get(libelle, libelle)
+        resultats.append({
+            'cle': ligne[champ],
+            'libelle': libelle or 'Non renseigné',
+            'montant': ligne['montant'],
+            'montant_estime': ligne['montant_estime'],
+            'ecart': ligne['montant'] - ligne['montant_estime'],
+            'nb_documents': ligne['nb_documents'],
+            'nb_lignes': ligne['nb_lignes'],
+            'part': _pourcentage(ligne['montant'], total),
+        })
+    return resultats
+
+
+# ============================================================================
+# ÉCARTS DE PRIX ET DÉLAIS
+# ============================================================================
+
+def ecarts_prix(mois_debut=None, mois_fin=None, limite=20):
+    """
+    Écart prix réel / estimé par article et par mois (une requête groupée)
+
+    Seules les lignes dont le prix réel est saisi sont comptées. Le prix
+    unitaire estimé est rapporté à la quantité demandée, le prix unitaire
+    réel à la quantité reçue.
+
+    Returns:
+        list: dicts designation, unite, ecart, ecart_pct, evolution_pct
+              (prix unitaire réel du dernier mois / premier mois) et serie
+              (un dict par mois); les plus gros écarts d'abord
+    """
+    lignes = lignes_achat_engagees(mois_debut, mois_fin).filter(
+        prix_reel__isnull=False,
+    ).annotate(
+        article=Lower(Trim('designation')),
+    ).order_by().values('article', 'unite', 'mois').annotate(
+        libelle=Max('designation'),
+        quantite_demandee=Sum('quantite'),
+        quantite_livree=Sum(Coalesce('quantite_recue', 'quantite')),
+        montant_estime=Sum('prix_total'),
+        montant_reel=Sum('prix_reel'),
+        nb_lignes=Count('id'),
+    ).order_by('article', 'unite', 'mois')
+
+    articles = OrderedDict()
+    for ligne in lignes:
+        article = articles.setdefault((ligne['article'], ligne['unite']), {
+            'designation': ligne['libelle'],
+            'unite': ligne['unite'],
+            'montant_estime': ZERO,
+            'montant_reel': ZERO,
+            'serie': [],
+        })
+        article['montant_estime'] += ligne['montant_estime']
+        article['montant_reel'] += ligne['montant_reel']
+        article['serie'].append({
+            'mois': ligne['mois'],
+            'nb_lignes': ligne['nb_lignes'],
+            'prix_estime': (
+                (ligne['montant_estime'] / ligne['quantite_demandee']).quantize(CENTIEME, ROUND_HALF_UP)
+                if ligne['quantite_demandee'] else None
+            ),
+            'prix_reel': (
+                (ligne['montant_reel'] / ligne['quantite_livree']).quantize(CENTIEME, ROUND_HALF_UP)
+                if ligne['quantite_livree'] else None
+            ),
+            'ecart': ligne['montant_reel'] - ligne['montant_estime'],
+        })
+
+    resultats = []
+    for article in articles.values():
+        premier, dernier = article['serie'][0]['prix_reel'], article['serie'][-1]['prix_reel']
+        article['ecart'] = article['montant_reel'] - article['montant_estime']
+        article['ecart_pct'] = _pourcentage(article['ecart'], article['montant_estime'])
+        article['evolution_pct'] = (
+            _pourcentage(dernier - premier, premier)
+            if len(article['serie']) > 1 and premier and dernier is not None else None
+        )
+        resultats.append(article)
+    resultats.sort(key=lambda article: -abs(article['ecart']))
+    return resultats[:limite]
+
+
+def delais_validation(mois_debut=None, mois_fin=None):
+    """
+    Durée des étapes du workflow des demandes d'achat (une requête)
+
+    Pour chaque demande de la période, première date de chaque action de
+    l'historique; une étape est mesurée quand ses deux actions existent.
+
+    Returns:
+        list: dicts code, libelle, nb, moyenne_heures, mediane_heures,
+              max_heures (None sans mesure), dans l'ordre du workflow
+    """
+    actions = sorted({action for _, _, depart, arrivee in ETAPES_VALIDATION for action in (depart, arrivee)})
+    demandes = Invoice.objects.filter(type_facture='demande_achat').annotate(
+        mois=TruncMonth(Coalesce('date_demande', 'date_emission')),
+    ).filter(_periode(mois_debut, mois_fin)).annotate(**{
+        action: Min('historique_validations__date_action', filter=Q(historique_validations__action=action))
+        for action in actions
+    }).values(*actions)
+
+    durees = {code: [] for code, _, _, _ in ETAPES_VALIDATION}
+    for demande in demandes:
+        for code, _, depart, arrivee in ETAPES_VALIDATION:
+            if demande[depart] and demande[arrivee] and demande[arrivee] >= demande[depart]:
+                durees[code].append((demande[arrivee] - demande[depart]).total_seconds() / 3600)
+
+    return [
+        {
+            'code': code,
+            'libelle': libelle,
+            'nb': len(durees[code]),
+            'moyenne_heures': round(sum(durees[code]) / len(durees[code]), 1) if durees[code] else None,
+            'mediane_heures': round(median(durees[code]), 1) if durees[code] else None,
+            'max_heures': round(max(durees[code]), 1) if durees[code] else None,
+        }
+        for code, libelle, _, _ in ETAPES_VALIDATION
+    ]
+
+
+def rapport_depenses(mois_debut, mois_fin, nb_fournisseurs=20):
+    """Rapport complet de la période, mis en cache (PAYMENTS_DEPENSES_CACHE_TTL)"""
+    def calculer():
+        return {
+            'fournisseurs': depenses_par('fournisseur', mois_debut, mois_fin, limite=nb_fournisseurs),
+            'categories': depenses_par('categorie', mois_debut, mois_fin),
+            'residences': depenses_par('residence', mois_debut, mois_fin),
+            'mois': depenses_par('mois', mois_debut, mois_fin),
+            'ecarts': ecarts_prix(mois_debut, mois_fin),
+            'delais': delais_validation(mois_debut, mois_fin),
+            'mis_a_jour': DepenseMensuelle.objects.aggregate(date=Max('updated_at'))['date'],
+        }
+
+    return cache.get_or_set(
+        CACHE_RAPPORT.format(debut=f'{_mois(mois_debut):%Y-%m}', fin=f'{_mois(mois_fin):%Y-%m}'),
+        calculer,
+        getattr(settings, 'PAYMENTS_DEPENSES_CACHE_TTL', 900),
+    )
@@ -0,0 +1,135 @@
+# apps/payments/inboxes.py
+"""
+Boîtes de réception du workflow des demandes d'achat
+
+Chaque boîte regroupe les étapes qu'un rôle doit traiter:
+    responsable (manager)            → en_attente
+    comptable (accountant)           → comptable
+    dg (manager)                     → validation_dg
+    reception (manager, accountant)  → approuve, en_cours_achat
+
+Les boîtes s'appuient sur l'index (type_facture, etape_workflow, date_demande)
+de Invoice. Les compteurs par étape (badges) sont calculés en une requête
+groupée, mis en cache et invalidés par les signaux des demandes d'achat
+(apps.payments.signals).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q, Sum
+from django.utils import timezone
+
+from apps.payments.models.historique_validation import HistoriqueValidation
+from apps.payments.models.invoice import Invoice
+
+BOITES = {
+    'responsable': {
+        'libelle': 'À valider (responsable)',
+        'etapes': ['en_attente'],
+        'roles': ['manager'],
+    },
+    'comptable': {
+        'libelle': 'À traiter (comptabilité)',
+        'etapes': ['comptable'],
+        'roles': ['accountant'],
+    },
+    'dg': {
+        'libelle': 'À approuver (DG)',
+        'etapes': ['validation_dg'],
+        'roles': ['manager'],
+    },
+    'reception': {
+        'libelle': 'À réceptionner',
+        'etapes': ['approuve', 'en_cours_achat'],
+        'roles': ['manager', 'accountant'],
+    },
+}
+
+ETAPES_EN_TRAITEMENT = ['valide_responsable', 'comptable', 'validation_dg']
+
+CACHE_COMPTEURS = 'payments:demandes_achat:compteurs:{portee}:{mois}'
+
+
+def demandes_achat():
+    return Invoice.objects.filter(type_facture='demande_achat')
+
+
+def boites_utilisateur(user):
+    """Codes des boîtes accessibles à l'utilisateur"""
+    return [code for code, boite in BOITES.items() if user.user_type in boite['roles']]
+
+
+def _cle_compteurs(demandeur_id=None):
+    return CACHE_COMPTEURS.format(
+        portee=demandeur_id or 'tous',
+        mois=timezone.now().strftime('%Y-%m'),
+    )
+
+
+def compteurs(demandeur=None):
+    """
+    Nombre de demandes par étape et montant demandé dans le mois
+
+    Une requête groupée, mise en cache (PAYMENTS_INBOX_CACHE_TTL, 5 min par
+    défaut) et invalidée à chaque modification d'une demande.
+
+    Args:
+        demandeur: limite aux demandes d'un utilisateur (vue employé)
+
+    Returns:
+        dict: {'etapes': {etape: nombre}, 'montant_mois': Decimal}
+    """
+    def calculer():
+        demandes = demandes_achat()
+        if demandeur is not None:
+            demandes = demandes.filter(demandeur=demandeur)
+        debut_mois = timezone.now().date().replace(day=1)
+        lignes = demandes.order_by().values('etape_workflow').annotate(
+            nb=Count('id'),
+            montant_mois=Sum('montant_ttc', filter=Q(date_demande__gte=debut_mois)),
+        )
+        return {
+            'etapes': {ligne['etape_workflow']: ligne['nb'] for ligne in lignes},
+            'montant_mois': sum((ligne['montant_mois'] or 0 for ligne in lignes), 0),
+        }
+
+    return cache.get_or_set(
+        _cle_compteurs(demandeur.pk if demandeur is not None else None),
+        calculer,
+        getattr(settings, 'PAYMENTS_INBOX_CACHE_TTL', 300),
+    )
+
+
+def badges(user, compteurs_etapes=None):
+    """Nombre de demandes en attente dans chaque boîte de l'utilisateur"""
+    if compteurs_etapes is None:
+        compteurs_etapes = compteurs()['etapes']
+    return {
+        code: sum(compteurs_etapes.get(etape, 0) for etape in BOITES[code]['etapes'])
+        for code in boites_utilisateur(user)
+    }
+
+
+def invalider_compteurs(demandeur_id=None):
+    cles = [_cle_compteurs()]
+    if demandeur_id:
+        cles.append(_cle_compteurs(demandeur_id))
+    cache.delete_many(cles)
+
+
+def contenu_boites(*codes):
+    """Demandes des boîtes données, la plus ancienne d'abord"""
+    etapes = [etape for code in codes for etape in BOITES[code]['etapes']]
+    return demandes_achat().filter(etape_workflow__in=etapes).select_related(
+        'demandeur', 'travail_lie'
+    ).order_by('date_demande', 'pk')
+
+
+def avec_historique(demandes):
+    """Précharge l'historique de validation (une requête pour toute la page)"""
+    return demandes.prefetch_related(
+        Prefetch(
+            'historique_validations',
+            queryset=HistoriqueValidation.objects.select_related('effectue_par').order_by('-date_action'),
+        )
+    )
@@ -5,31 +5,20 @@ Usage: python manage.py check_overdue_invoices
 """
 
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from apps.payments.models.invoice import Invoice
+from apps.payments.services import rafraichir_statuts_factures
 
 
 class Command(BaseCommand):
     help = 'Vérifie et met à jour le statut des factures en retard'
 
     def handle(self, *args, **options):
-        today = timezone.now().date()
-        
-        # Récupérer les factures émises dont la date d'échéance est dépassée
-        overdue_invoices = Invoice.objects.filter(
-            statut='emise',
-            date_echeance__lt=today
-        )
-        
-        count = overdue_invoices.count()
+        # Un seul UPDATE: émise → en retard, et retour à émise si l'échéance a été reportée
+        count = rafraichir_statuts_factures()
         
         if count > 0:
-            # Mettre à jour le statut
-            overdue_invoices.update(statut='en_retard')
-            
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'✓ {count} facture(s) marquée(s) comme en retard'
+                    f'✓ {count} facture(s) mise(s) à jour'
                 )
             )
         else:
@@ -37,4 +26,4 @@ class Command(BaseCommand):
                 self.style.SUCCESS('✓ Aucune facture en retard')
             )
         
-        return f'{count} factures en retard'
\ No newline at end of file
+        return f'{count} factures mises à jour'
\ No newline at end of file
@@ -0,0 +1,46 @@
+# apps/payments/management/commands/rebuild_spend_rollups.py
+"""
+Commande Django pour recalculer les cumuls mensuels des dépenses fournisseurs
+Usage: python manage.py rebuild_spend_rollups [--from 2025-01] [--to 2025-12]
+
+Lancée chaque nuit sur tout l'historique (SpendRollupsCronJob).
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payments.depenses import reconstruire_depenses
+
+
+def _mois(valeur):
+    return date.fromisoformat(f'{valeur[:7]}-01') if valeur else None
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les cumuls mensuels des dépenses fournisseurs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='mois_debut',
+            help='Premier mois à recalculer (AAAA-MM). Par défaut: tout l\'historique'
+        )
+        parser.add_argument(
+            '--to',
+            dest='mois_fin',
+            help='Dernier mois à recalculer (AAAA-MM). Par défaut: sans limite'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            mois_debut = _mois(options['mois_debut'])
+            mois_fin = _mois(options['mois_fin'])
+        except ValueError:
+            raise CommandError('Les mois doivent être au format AAAA-MM')
+        if mois_debut and mois_fin and mois_fin < mois_debut:
+            raise CommandError('Le mois de fin doit suivre le mois de début')
+
+        self.stdout.write('🔄 Recalcul des dépenses fournisseurs...')
+        nb_cumuls = reconstruire_depenses(mois_debut, mois_fin)
+        self.stdout.write(self.style.SUCCESS(f'✅ {nb_cumuls} cumul(s) recalculé(s)'))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_alter_invoice_date_reception'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['type_facture', 'etape_workflow', 'date_demande'], name='payments_in_type_fa_8be586_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['type_facture', 'demandeur', 'etape_workflow'], name='payments_in_type_fa_fe51ed_idx'),
+        ),
+    ]
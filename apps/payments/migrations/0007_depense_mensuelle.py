@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:40
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_occupationperiode'),
+        ('payments', '0006_demande_achat_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepenseMensuelle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('mois', models.DateField(help_text='Premier jour du mois', verbose_name='Mois')),
+                ('source', models.CharField(choices=[('demande_achat', "Demande d'achat"), ('prestataire', 'Facture prestataire')], max_length=20, verbose_name='Source')),
+                ('fournisseur_cle', models.CharField(blank=True, help_text='Nom du fournisseur normalisé (casse, espaces)', max_length=200, verbose_name='Clé fournisseur')),
+                ('fournisseur', models.CharField(blank=True, max_length=200, verbose_name='Fournisseur')),
+                ('categorie', models.CharField(blank=True, help_text="Catégorie d'achat ou type de prestation", max_length=50, verbose_name='Catégorie')),
+                ('montant', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Montant (FCFA)')),
+                ('montant_estime', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Montant estimé (FCFA)')),
+                ('nb_documents', models.IntegerField(default=0, verbose_name='Demandes et factures')),
+                ('nb_lignes', models.IntegerField(default=0, verbose_name='Lignes')),
+                ('residence', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='depenses_mensuelles', to='properties.residence', verbose_name='Résidence')),
+            ],
+            options={
+                'verbose_name': 'Dépense mensuelle',
+                'verbose_name_plural': 'Dépenses mensuelles',
+                'ordering': ['-mois', '-montant'],
+                'indexes': [models.Index(fields=['mois', 'fournisseur_cle'], name='payments_de_mois_b4d88a_idx')],
+            },
+        ),
+    ]
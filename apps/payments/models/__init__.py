@@ -2,6 +2,7 @@ from .historique_validation import HistoriqueValidation
 from .invoice import Invoice
 from .payment import Payment, PaymentReminder
 from .ligne_demade_achat import LigneDemandeAchat
+from .depense_mensuelle import DepenseMensuelle
 
 __all__ = [
     'HistoriqueValidation',
@@ -9,4 +10,5 @@ __all__ = [
     'Payment',
     'PaymentReminder',
     'LigneDemandeAchat',
-]
\ No newline at end of file
+    'DepenseMensuelle',
+]
@@ -0,0 +1,104 @@
+# apps/payments/models/depense_mensuelle.py
+
+from decimal import Decimal
+
+from django.db import models
+
+from apps.core.models import BaseModel
+
+
+class DepenseMensuelle(BaseModel):
+    """
+    Cumul mensuel des dépenses fournisseurs
+
+    Une ligne par mois, source, fournisseur, catégorie et résidence.
+    Recalculé par apps.payments.depenses.reconstruire_depenses (commande
+    rebuild_spend_rollups, tâche cron quotidienne) depuis les lignes des
+    demandes d'achat engagées et les factures prestataires émises.
+    montant est le coût réel (à défaut estimé), montant_estime le coût
+    estimé à la demande: écart = montant - montant_estime.
+    """
+
+    SOURCE_CHOICES = [
+        ('demande_achat', "Demande d'achat"),
+        ('prestataire', 'Facture prestataire'),
+    ]
+
+    mois = models.DateField(
+        verbose_name="Mois",
+        help_text="Premier jour du mois"
+    )
+
+    source = models.CharField(
+        max_length=20,
+        choices=SOURCE_CHOICES,
+        verbose_name="Source"
+    )
+
+    fournisseur_cle = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="Clé fournisseur",
+        help_text="Nom du fournisseur normalisé (casse, espaces)"
+    )
+
+    fournisseur = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="Fournisseur"
+    )
+
+    categorie = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name="Catégorie",
+        help_text="Catégorie d'achat ou type de prestation"
+    )
+
+    residence = models.ForeignKey(
+        'properties.Residence',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='depenses_mensuelles',
+        verbose_name="Résidence"
+    )
+
+    montant = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Montant (FCFA)"
+    )
+
+    montant_estime = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Montant estimé (FCFA)"
+    )
+
+    nb_documents = models.IntegerField(
+        default=0,
+        verbose_name="Demandes et factures"
+    )
+
+    nb_lignes = models.IntegerField(
+        default=0,
+        verbose_name="Lignes"
+    )
+
+    class Meta:
+        verbose_name = "Dépense mensuelle"
+        verbose_name_plural = "Dépenses mensuelles"
+        ordering = ['-mois', '-montant']
+        indexes = [
+            models.Index(fields=['mois', 'fournisseur_cle']),
+        ]
+
+    def __str__(self):
+        return f"{self.mois:%Y-%m} - {self.fournisseur or 'Non renseigné'}: {self.montant} FCFA"
+
+    @property
+    def ecart(self):
+        return self.montant - self.montant_estime
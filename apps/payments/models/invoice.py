@@ -479,6 +479,9 @@ class Invoice(BaseModel):
             models.Index(fields=['statut']),
             models.Index(fields=['date_emission']),
             models.Index(fields=['date_echeance']),
+            # Boîtes de réception des demandes d'achat (apps.payments.inboxes)
+            models.Index(fields=['type_facture', 'etape_workflow', 'date_demande']),
+            models.Index(fields=['type_facture', 'demandeur', 'etape_workflow']),
         ]
     
     def save(self, *args, **kwargs):
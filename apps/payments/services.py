@@ -1 +1,38 @@
- 
+# apps/payments/services.py
+"""
+Maintenance des statuts de factures
+
+- rafraichir_statuts_factures(): bascule émise ↔ en retard selon la date
+  d'échéance, en un seul UPDATE ... CASE sur les lignes à modifier
+"""
+
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from apps.payments.models import Invoice
+
+
+def rafraichir_statuts_factures(aujourd_hui=None, factures=None):
+    """
+    Recalcule le statut « en retard » des factures émises
+
+    Une facture émise dont l'échéance est dépassée passe en retard; une
+    facture en retard dont l'échéance a été reportée redevient émise. Les
+    factures payées, annulées ou en brouillon ne sont pas touchées.
+
+    Returns:
+        int: nombre de factures modifiées
+    """
+    aujourd_hui = aujourd_hui or timezone.now().date()
+    factures = Invoice.objects.all() if factures is None else factures
+    en_retard = Q(date_echeance__lt=aujourd_hui)
+
+    return factures.filter(
+        (Q(statut='emise') & en_retard) | (Q(statut='en_retard') & ~en_retard)
+    ).update(
+        statut=Case(
+            When(en_retard, then=Value('en_retard')),
+            default=Value('emise'),
+        ),
+        updated_at=timezone.now(),
+    )
@@ -4,7 +4,7 @@ Signals pour le module Payments
 Gestion automatique des actions liées aux paiements et factures
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from apps.payments.models.invoice import Invoice
@@ -209,3 +209,14 @@ def verifier_factures_en_retard(sender, instance, **kwargs):
 
                 # TODO : Envoyer l'email réel
                 # send_email(locataire.email, 'Rappel de paiement', message)
+
+
+@receiver([post_save, post_delete], sender=Invoice)
+def invalider_compteurs_demandes_achat(sender, instance, **kwargs):
+    """Une demande d'achat créée, déplacée dans le workflow ou supprimée change les badges"""
+    if instance.type_facture != 'demande_achat':
+        return
+
+    from apps.payments.inboxes import invalider_compteurs
+
+    invalider_compteurs(instance.demandeur_id)
@@ -1,3 +1,202 @@
+"""
+Tests pour le module des paiements
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.payments.depenses import delais_validation, depenses_par, ecarts_prix, reconstruire_depenses
+from apps.payments.inboxes import avec_historique, badges, compteurs, contenu_boites
+from apps.payments.models import DepenseMensuelle, Invoice, LigneDemandeAchat
+from apps.payments.models.historique_validation import HistoriqueValidation
+from apps.payments.services import rafraichir_statuts_factures
+
+from tests.factories import make_residence, make_travail, make_user
+
+
+class StatutsFacturesTest(TestCase):
+    """Tests du recalcul groupé des factures en retard"""
+
+    def make_facture(self, statut, date_echeance):
+        return Invoice.objects.create(
+            type_facture='autres', montant_ht=Decimal('100000.00'),
+            date_emission=date(2025, 1, 1), date_echeance=date_echeance, statut=statut,
+        )
+
+    def test_bascule_en_retard_en_une_requete(self):
+        """Test des bascules émise → en retard et en retard → émise"""
+        echue = self.make_facture('emise', date(2025, 1, 31))
+        reportee = self.make_facture('en_retard', date(2025, 6, 30))
+        a_jour = self.make_facture('emise', date(2025, 6, 30))
+        payee = self.make_facture('payee', date(2025, 1, 31))
+
+        with self.assertNumQueries(1):
+            count = rafraichir_statuts_factures(aujourd_hui=date(2025, 3, 1))
+
+        self.assertEqual(count, 2)
+        statuts = dict(Invoice.objects.values_list('pk', 'statut'))
+        self.assertEqual(statuts[echue.pk], 'en_retard')
+        self.assertEqual(statuts[reportee.pk], 'emise')
+        self.assertEqual(statuts[a_jour.pk], 'emise')
+        self.assertEqual(statuts[payee.pk], 'payee')
+
+
+class BoitesDemandesAchatTest(TestCase):
+    """Tests des boîtes de réception des demandes d'achat"""
+
+    def setUp(self):
+        cache.clear()
+        self.manager = make_user('manager')
+        self.comptable = make_user('compta', user_type='accountant')
+        self.employe = make_user('employe', user_type='employe')
+
+    def make_demande(self, etape, date_demande, demandeur=None):
+        return Invoice.objects.create(
+            type_facture='demande_achat', montant_ht=Decimal('50000.00'),
+            date_emission=date_demande, date_echeance=date_demande,
+            etape_workflow=etape, date_demande=date_demande,
+            demandeur=demandeur or self.employe,
+        )
+
+    def test_badges_en_cache_et_invalidation(self):
+        """Test des badges par rôle, calculés en une requête puis servis par le cache"""
+        self.make_demande('en_attente', date(2025, 3, 1))
+        self.make_demande('en_attente', date(2025, 3, 2))
+        self.make_demande('comptable', date(2025, 3, 3))
+        self.make_demande('approuve', date(2025, 3, 4))
+
+        with self.assertNumQueries(1):
+            etapes = compteurs()['etapes']
+        with self.assertNumQueries(0):
+            badges_manager = badges(self.manager)
+
+        self.assertEqual(badges_manager, {'responsable': 2, 'dg': 0, 'reception': 1})
+        self.assertEqual(badges(self.comptable, etapes), {'comptable': 1, 'reception': 1})
+        self.assertEqual(badges(self.employe, etapes), {})
+
+        # Le passage d'une étape à l'autre invalide les compteurs
+        demande = Invoice.objects.filter(etape_workflow='comptable').get()
+        demande.etape_workflow = 'validation_dg'
+        demande.save()
+
+        self.assertEqual(badges(self.manager)['dg'], 1)
+        self.assertEqual(compteurs(self.employe)['etapes']['en_attente'], 2)
+
+    def test_contenu_boite_et_historique(self):
+        """Test de l'ordre d'une boîte et du préchargement de l'historique"""
+        recente = self.make_demande('en_attente', date(2025, 3, 10))
+        ancienne = self.make_demande('en_attente', date(2025, 3, 1))
+        self.make_demande('refuse', date(2025, 2, 1))
+        for demande in (recente, ancienne):
+            HistoriqueValidation.objects.create(demande=demande, action='soumission', effectue_par=self.employe)
+
+        with self.assertNumQueries(2):
+            demandes = list(avec_historique(contenu_boites('responsable')))
+            historiques = [d.historique_validations.all()[0].effectue_par.username for d in demandes]
+
+        self.assertEqual(demandes, [ancienne, recente])
+        self.assertEqual(historiques, ['employe', 'employe'])
+
+
+class DepensesFournisseursTest(TestCase):
+    """Tests de l'analyse des dépenses fournisseurs"""
+
+    def setUp(self):
+        self.residence = make_residence()
+        self.travail = make_travail(residence=self.residence)
+
+    def make_demande(self, etape, date_demande, **kwargs):
+        return Invoice.objects.create(
+            type_facture='demande_achat', montant_ht=Decimal('50000.00'),
+            date_emission=date_demande, date_echeance=date_demande,
+            etape_workflow=etape, date_demande=date_demande, **kwargs
+        )
+
+    def make_ligne(self, demande, designation, quantite, prix_unitaire, **kwargs):
+        kwargs.setdefault('motif', 'Chantier')
+        return LigneDemandeAchat.objects.create(
+            demande=demande, designation=designation,
+            quantite=Decimal(quantite), prix_unitaire=Decimal(prix_unitaire), **kwargs
+        )
+
+    def make_prestataire(self, statut, date_emission, montant):
+        return Invoice.objects.create(
+            type_facture='prestataire', statut=statut, montant_ht=Decimal(montant),
+            date_emission=date_emission, date_echeance=date_emission,
+            fournisseur_nom='Sen Plomberie', type_prestation='plomberie',
+        )
+
+    def test_cumuls_par_fournisseur_categorie_et_residence(self):
+        """Test des cumuls mensuels: fournisseur de la ligne ou de la demande, coût réel à défaut estimé"""
+        demande = self.make_demande(
+            'approuve', date(2025, 3, 5), categorie_achat='materiel',
+            fournisseur_nom='Quincaillerie Dakar', travail_lie=self.travail,
+        )
+        self.make_ligne(demande, 'Ciment', '2', '1000', prix_reel=Decimal('2400'))
+        self.make_ligne(demande, 'Sable', '1', '500', fournisseur=' QUINCAILLERIE DAKAR ')
+        brouillon = self.make_demande('brouillon', date(2025, 3, 6), fournisseur_nom='Quincaillerie Dakar')
+        self.make_ligne(brouillon, 'Ciment', '100', '1000')
+        facture = self.make_prestataire('emise', date(2025, 4, 10), '10000')
+        self.make_prestataire('annulee', date(2025, 4, 11), '99000')
+
+        with self.assertNumQueries(6):
+            nb_cumuls = reconstruire_depenses()
+        self.assertEqual(nb_cumuls, 2)
+        self.assertEqual(reconstruire_depenses(), 2)
+        self.assertEqual(DepenseMensuelle.objects.count(), 2)
+
+        with self.assertNumQueries(1):
+            fournisseurs = depenses_par('fournisseur')
+        self.assertEqual(
+            [(ligne['cle'], ligne['montant'], ligne['ecart'], ligne['nb_lignes']) for ligne in fournisseurs],
+            [('sen plomberie', facture.montant_ttc, Decimal('0.00'), 1),
+             ('quincaillerie dakar', Decimal('2900.00'), Decimal('400.00'), 2)],
+        )
+
+        residences = {ligne['libelle']: ligne['montant'] for ligne in depenses_par('residence')}
+        self.assertEqual(residences, {self.residence.nom: Decimal('2900.00'), 'Non renseigné': facture.montant_ttc})
+        categories = [ligne['libelle'] for ligne in depenses_par('categorie', mois_debut=date(2025, 3, 1), mois_fin=date(2025, 3, 31))]
+        self.assertEqual(categories, ['Matériel'])
+        self.assertEqual([ligne['cle'] for ligne in depenses_par('mois')], [date(2025, 3, 1), date(2025, 4, 1)])
+
+    def test_ecarts_prix_par_article_et_par_mois(self):
+        """Test de l'écart réel / estimé et de l'évolution du prix unitaire réel"""
+        mars = self.make_demande('recue', date(2025, 3, 5))
+        self.make_ligne(mars, 'Ciment', '10', '5000', quantite_recue=Decimal('10'), prix_reel=Decimal('55000'))
+        self.make_ligne(mars, 'Sable', '5', '1000')
+        avril = self.make_demande('paye', date(2025, 4, 5))
+        self.make_ligne(avril, ' ciment', '10', '5000', prix_reel=Decimal('60000'))
+
+        with self.assertNumQueries(1):
+            ecarts = ecarts_prix()
+
+        self.assertEqual(len(ecarts), 1)
+        ciment = ecarts[0]
+        self.assertEqual(ciment['ecart'], Decimal('15000.00'))
+        self.assertEqual(ciment['ecart_pct'], Decimal('15.00'))
+        self.assertEqual([point['prix_reel'] for point in ciment['serie']], [Decimal('5500.00'), Decimal('6000.00')])
+        self.assertEqual(ciment['evolution_pct'], Decimal('9.09'))
+
+    def test_delais_validation_depuis_historique(self):
+        """Test des délais par étape à partir de la première occurrence de chaque action"""
+        demande = self.make_demande('approuve', date(2025, 3, 5))
+        soumise = self.make_demande('en_attente', date(2025, 3, 6))
+        debut = timezone.make_aware(datetime(2025, 3, 5, 8, 0))
+        for action, heures in [('soumission', 0), ('validation_responsable', 2),
+                               ('traitement_comptable', 5), ('approbation', 29)]:
+            historique = HistoriqueValidation.objects.create(demande=demande, action=action)
+            HistoriqueValidation.objects.filter(pk=historique.pk).update(date_action=debut + timedelta(hours=heures))
+        HistoriqueValidation.objects.create(demande=soumise, action='soumission')
+
+        with self.assertNumQueries(1):
+            delais = {etape['code']: etape for etape in delais_validation(date(2025, 3, 1), date(2025, 3, 1))}
 
-# Create your tests here.
+        self.assertEqual(delais['responsable']['moyenne_heures'], 2.0)
+        self.assertEqual(delais['comptable']['moyenne_heures'], 3.0)
+        self.assertEqual(delais['dg']['mediane_heures'], 24.0)
+        self.assertEqual(delais['cycle']['max_heures'], 29.0)
+        self.assertEqual(delais['reception']['nb'], 0)
+        self.assertIsNone(delais['reception']['moyenne_heures'])
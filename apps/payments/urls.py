@@ -58,6 +58,7 @@ urlpatterns = [
     # ==================== MODULE 4 - DEMANDES D'ACHAT ====================
     # Dashboard
     path('demandes-achat/dashboard/', views_demandes_achat.dashboard_demandes_achat, name='demandes_achat_dashboard'),
+    path('demandes-achat/depenses/', views_demandes_achat.analyse_depenses, name='analyse_depenses'),
 
     # Création et liste
     path('demandes-achat/', views_demandes_achat.demande_achat_list, name='demande_achat_list'),
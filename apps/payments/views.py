@@ -14,9 +14,11 @@ from django.contrib import messages
 from django.http import HttpResponse, Http404, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-from django.db.models import Q, Sum, Count
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
+from decimal import Decimal
 import logging
 
 from .models.invoice import Invoice
@@ -335,10 +337,18 @@ def invoices_list_view(request):
     Vue liste des factures avec filtres et pagination
     """
     # Récupérer toutes les factures avec les relations
+    # Solde annoté (somme des paiements validés) au lieu d'une requête par ligne
+    paiements_valides = Payment.objects.filter(
+        facture=OuterRef('pk'), statut='valide'
+    ).order_by().values('facture').annotate(total=Sum('montant')).values('total')
     invoices = Invoice.objects.select_related(
         'contrat__appartement__residence',
         'contrat__locataire__user'
-    ).prefetch_related('paiements').order_by('-date_emission')
+    ).prefetch_related('paiements').annotate(
+        solde_du=F('montant_ttc') - Coalesce(
+            Subquery(paiements_valides), Value(Decimal('0.00')), output_field=DecimalField()
+        ),
+    ).order_by('-date_emission')
     
     # Filtres
     search = request.GET.get('search', '')
@@ -6,10 +6,24 @@ from django.contrib import messages
 from django.db import transaction
 from django.utils import timezone
 from django.http import HttpResponseForbidden
+from django.core.paginator import Paginator
+from django.db.models import Q
+from datetime import date, timedelta
 from decimal import Decimal
 from apps.payments.models.invoice import Invoice
 from apps.payments.models.ligne_demade_achat import LigneDemandeAchat
 from apps.payments.models.historique_validation import HistoriqueValidation
+from apps.payments.depenses import rapport_depenses
+from apps.payments.inboxes import (
+    BOITES,
+    ETAPES_EN_TRAITEMENT,
+    avec_historique,
+    badges,
+    boites_utilisateur,
+    compteurs,
+    contenu_boites,
+    demandes_achat,
+)
 from apps.payments.forms import (
     DemandeAchatForm,
     LigneDemandeAchatFormSet,
@@ -21,6 +35,22 @@ from apps.payments.forms import (
 )
 
 
+# Couleur de la barre de répartition par étape (tableau de bord)
+COULEURS_ETAPES = {
+    'brouillon': 'gray',
+    'en_attente': 'yellow',
+    'valide_responsable': 'blue',
+    'comptable': 'indigo',
+    'validation_dg': 'purple',
+    'approuve': 'green',
+    'en_cours_achat': 'teal',
+    'recue': 'teal',
+    'paye': 'emerald',
+    'refuse': 'red',
+    'annule': 'gray',
+}
+
+
 # ============================================================================
 # CRÉATION DE DEMANDE D'ACHAT
 # ============================================================================
@@ -108,11 +138,11 @@ def demande_achat_detail(request, pk):
     """Vue détaillée d'une demande d'achat"""
 
     demande = get_object_or_404(
-        Invoice.objects.select_related(
-            'demandeur', 'travail_lie', 'valide_par_responsable',
-            'traite_par_comptable', 'valide_par_dg', 'receptionne_par'
-        ).prefetch_related(
-            'lignes_achat', 'historique_validations__effectue_par'
+        avec_historique(
+            Invoice.objects.select_related(
+                'demandeur', 'travail_lie', 'valide_par_responsable',
+                'traite_par_comptable', 'valide_par_dg', 'receptionne_par'
+            ).prefetch_related('lignes_achat')
         ),
         pk=pk,
         type_facture='demande_achat'
@@ -128,10 +158,20 @@ def demande_achat_detail(request, pk):
     if not user_can_view:
         return HttpResponseForbidden("Vous n'avez pas accès à cette demande.")
 
+    lignes = demande.lignes_achat.all()
+    if demande.etape_workflow not in ['recue', 'paye', 'refuse', 'annule']:
+        # Articles déjà disponibles au magasin
+        from apps.maintenance.stock import disponibilites
+
+        en_stock = disponibilites(lignes)
+        for ligne in lignes:
+            ligne.en_stock = en_stock.get(ligne.pk)
+
     context = {
         'demande': demande,
-        'lignes': demande.lignes_achat.all(),
-        'historique': demande.historique_validations.all().order_by('-date_action'),
+        'lignes': lignes,
+        # Déjà trié par date décroissante dans le préchargement
+        'historique': demande.historique_validations.all(),
         'title': f'Demande {demande.numero_facture}',
     }
 
@@ -140,39 +180,78 @@ def demande_achat_detail(request, pk):
 
 @login_required
 def demande_achat_list(request):
-    """Liste des demandes d'achat avec filtres"""
+    """Liste des demandes d'achat avec filtres et boîtes de réception par rôle"""
 
-    # Base queryset
-    demandes = Invoice.objects.filter(
-        type_facture='demande_achat'
-    ).select_related(
-        'demandeur', 'travail_lie'
-    ).prefetch_related('lignes_achat')
+    user_type = request.user.user_type
+    boites = boites_utilisateur(request.user)
+    boite = request.GET.get('boite')
+
+    # Base queryset selon le rôle de l'utilisateur
+    if boite in boites:
+        demandes = contenu_boites(boite)
+    else:
+        boite = None
+        demandes = demandes_achat().select_related('demandeur', 'travail_lie')
+        if user_type == 'manager':
+            # Manager voit tout
+            pass
+        elif user_type == 'accountant':
+            # Comptable voit ce qui est validé par responsable
+            demandes = demandes.filter(
+                etape_workflow__in=['comptable', 'validation_dg', 'approuve', 'en_cours_achat', 'recue', 'paye']
+            )
+        else:
+            # Employés voient uniquement leurs demandes
+            demandes = demandes.filter(demandeur=request.user)
+        demandes = demandes.order_by('-date_demande', '-created_at')
 
     # Filtres
     etape = request.GET.get('etape')
     if etape:
         demandes = demandes.filter(etape_workflow=etape)
 
-    # Filtrer selon le rôle de l'utilisateur
-    if request.user.user_type == 'manager':
-        # Manager voit tout
-        pass
-    elif request.user.user_type == 'accountant':
-        # Comptable voit ce qui est validé par responsable
+    search = request.GET.get('search', '').strip()
+    if search:
         demandes = demandes.filter(
-            etape_workflow__in=['comptable', 'validation_dg', 'approuve', 'en_cours_achat', 'recue', 'paye']
+            Q(numero_facture__icontains=search) | Q(motif_principal__icontains=search)
         )
+
+    date_debut = request.GET.get('date_debut')
+    if date_debut:
+        demandes = demandes.filter(date_demande__gte=date_debut)
+    date_fin = request.GET.get('date_fin')
+    if date_fin:
+        demandes = demandes.filter(date_demande__lte=date_fin)
+
+    # Historique chargé en une requête pour la page affichée
+    page_obj = Paginator(avec_historique(demandes), 25).get_page(request.GET.get('page'))
+
+    # Compteurs en cache (badges)
+    if user_type in ['manager', 'accountant']:
+        etapes = compteurs()['etapes']
     else:
-        # Employés voient uniquement leurs demandes
-        demandes = demandes.filter(demandeur=request.user)
+        etapes = compteurs(request.user)['etapes']
 
-    # Ordre
-    demandes = demandes.order_by('-date_demande', '-created_at')
+    querystring = request.GET.copy()
+    querystring.pop('page', None)
 
     context = {
-        'demandes': demandes,
+        'demandes': page_obj,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
+        'querystring': querystring.urlencode(),
         'etape_filter': etape,
+        'boite': boite,
+        'boites': [
+            {'code': code, 'libelle': BOITES[code]['libelle'], 'nombre': nombre}
+            for code, nombre in badges(request.user, etapes).items()
+        ],
+        'stats': {
+            'en_attente': etapes.get('en_attente', 0),
+            'en_traitement': sum(etapes.get(e, 0) for e in ETAPES_EN_TRAITEMENT),
+            'approuve': etapes.get('approuve', 0),
+            'refuse': etapes.get('refuse', 0),
+        },
         'title': 'Demandes d\'Achat',
     }
 
@@ -525,50 +604,106 @@ def dashboard_demandes_achat(request):
     """Dashboard selon le rôle de l'utilisateur"""
 
     user_type = request.user.user_type
+    boites = boites_utilisateur(request.user)
 
-    if user_type == 'manager':
-        # Manager voit tout
-        en_attente_validation = Invoice.objects.filter(
-            type_facture='demande_achat',
-            etape_workflow='en_attente'
-        ).count()
-
-        en_attente_dg = Invoice.objects.filter(
-            type_facture='demande_achat',
-            etape_workflow='validation_dg'
-        ).count()
-
-        stats = {
-            'en_attente_validation': en_attente_validation,
-            'en_attente_dg': en_attente_dg,
-        }
-
-    elif user_type == 'accountant':
-        # Comptable voit ce qu'il doit traiter
-        a_traiter = Invoice.objects.filter(
-            type_facture='demande_achat',
-            etape_workflow='comptable'
-        ).count()
-
-        stats = {
-            'a_traiter': a_traiter,
-        }
-
+    if user_type in ['manager', 'accountant']:
+        donnees = compteurs()
+        recentes = demandes_achat()
     else:
         # Employé voit ses demandes
-        mes_demandes = Invoice.objects.filter(
-            type_facture='demande_achat',
-            demandeur=request.user
-        ).count()
-
-        stats = {
-            'mes_demandes': mes_demandes,
-        }
+        donnees = compteurs(request.user)
+        recentes = demandes_achat().filter(demandeur=request.user)
+
+    etapes = donnees['etapes']
+    total = sum(etapes.values())
+    badges_boites = badges(request.user, etapes)
+    libelles = dict(Invoice._meta.get_field('etape_workflow').choices)
+
+    stats = {
+        'total': total,
+        'en_attente': etapes.get('en_attente', 0),
+        'approuvees': etapes.get('approuve', 0),
+        'montant_total': donnees['montant_mois'],
+        'par_statut': [
+            {
+                'label': libelles.get(etape, etape),
+                'count': nombre,
+                'percentage': nombre * 100 / total,
+                'color': COULEURS_ETAPES.get(etape, 'gray'),
+            }
+            for etape, nombre in sorted(etapes.items(), key=lambda item: -item[1])
+        ],
+        'a_valider_manager': badges_boites.get('responsable', 0),
+        'a_traiter_comptable': badges_boites.get('comptable', 0),
+        # Compteurs historiques du tableau de bord
+        'en_attente_validation': badges_boites.get('responsable', 0),
+        'en_attente_dg': badges_boites.get('dg', 0),
+        'a_traiter': badges_boites.get('comptable', 0),
+        'mes_demandes': total,
+    }
 
     context = {
         'stats': stats,
         'user_type': user_type,
+        'boites': [
+            {'code': code, 'libelle': BOITES[code]['libelle'], 'nombre': badges_boites[code]}
+            for code in boites
+        ],
+        'demandes_action': list(contenu_boites(*boites)[:10]) if boites else [],
+        'demandes_recentes': list(
+            recentes.select_related('demandeur').order_by('-date_demande', '-created_at')[:10]
+        ),
         'title': 'Dashboard Demandes d\'Achat',
     }
 
     return render(request, 'payments/dashboard_demandes_achat.html', context)
+
+
+# ============================================================================
+# ANALYSE DES DÉPENSES FOURNISSEURS
+# ============================================================================
+
+def _mois_parametre(valeur, defaut):
+    """Mois AAAA-MM d'un paramètre GET (premier jour), défaut si invalide"""
+    try:
+        return date.fromisoformat(f'{valeur[:7]}-01') if valeur else defaut
+    except ValueError:
+        return defaut
+
+
+@login_required
+def analyse_depenses(request):
+    """Dépenses par fournisseur, catégorie, résidence et mois (managers, comptables)"""
+
+    if request.user.user_type not in ['manager', 'accountant']:
+        return HttpResponseForbidden("Accès réservé aux managers et à la comptabilité.")
+
+    mois_courant = timezone.localdate().replace(day=1)
+    # Douze mois glissants, mois courant inclus (11 mois = 334 à 337 jours)
+    annee_avant = (mois_courant - timedelta(days=334)).replace(day=1)
+    mois_fin = _mois_parametre(request.GET.get('fin'), mois_courant)
+    mois_debut = _mois_parametre(request.GET.get('debut'), annee_avant)
+    if mois_debut > mois_fin:
+        mois_debut, mois_fin = mois_fin, mois_debut
+
+    rapport = rapport_depenses(mois_debut, mois_fin)
+    total = sum(ligne['montant'] for ligne in rapport['mois'])
+
+    context = {
+        **rapport,
+        'mois_debut': mois_debut,
+        'mois_fin': mois_fin,
+        'total': total,
+        'ecart_total': sum(ligne['ecart'] for ligne in rapport['mois']),
+        'regroupements': [
+            ('Par catégorie', rapport['categories']),
+            ('Par résidence', rapport['residences']),
+        ],
+        'serie_json': {
+            'labels': [ligne['cle'].strftime('%Y-%m') for ligne in rapport['mois']],
+            'montants': [float(ligne['montant']) for ligne in rapport['mois']],
+        },
+        'title': 'Analyse des dépenses fournisseurs',
+    }
+
+    return render(request, 'payments/analyse_depenses.html', context)
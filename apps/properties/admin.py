@@ -10,6 +10,8 @@ from .models.appartement import Appartement, AppartementMedia
 from .models.etat_lieu import EtatDesLieux, EtatDesLieuxDetail
 from .models.remise import RemiseDesCles
 from .models.properties import Property
+from .models.occupation import OccupationPeriode
+from .occupancy import update_statut_occupation
 
 class AppartementInline(admin.TabularInline):
     """Inline pour afficher les appartements dans la résidence"""
@@ -92,7 +94,7 @@ class ResidenceAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related(
             'proprietaire'
-        ).prefetch_related('appartements')
+        )
 
     def bailleur_nom(self, obj):
         """Affiche le nom du propriétaire"""
@@ -102,17 +104,18 @@ class ResidenceAdmin(admin.ModelAdmin):
     
     def nb_appartements_display(self, obj):
         """Affiche le nombre d'appartements avec lien"""
-        count = obj.appartements.count()
+        count = obj.nb_appartements
         url = reverse('admin:properties_appartement_changelist')
         return format_html(
             '<a href="{}?residence__id__exact={}">{} appartements</a>',
             url, obj.id, count
         )
     nb_appartements_display.short_description = 'Appartements'
+    nb_appartements_display.admin_order_field = 'nb_appartements'
     
     def nb_appartements_reel(self, obj):
         """Nombre réel d'appartements"""
-        return obj.appartements.count()
+        return obj.nb_appartements
     nb_appartements_reel.short_description = 'Nombre réel d\'appartements'
     
     def taux_occupation_display(self, obj):
@@ -135,6 +138,7 @@ class ResidenceAdmin(admin.ModelAdmin):
             taux_str  # ✅ Utilise la variable formatée
         )
     taux_occupation_display.short_description = 'Taux d\'occupation'
+    taux_occupation_display.admin_order_field = 'taux_occupation'
 
 
 @admin.register(Appartement)
@@ -249,19 +253,19 @@ class AppartementAdmin(admin.ModelAdmin):
     
     def marquer_libre(self, request, queryset):
         """Marque les appartements sélectionnés comme libres"""
-        count = queryset.update(statut_occupation='libre')
+        count = update_statut_occupation(queryset, 'libre')
         self.message_user(request, f'{count} appartements marqués comme libres.')
     marquer_libre.short_description = 'Marquer comme libre'
     
     def marquer_occupe(self, request, queryset):
         """Marque les appartements sélectionnés comme occupés"""
-        count = queryset.update(statut_occupation='occupe')
+        count = update_statut_occupation(queryset, 'occupe')
         self.message_user(request, f'{count} appartements marqués comme occupés.')
     marquer_occupe.short_description = 'Marquer comme occupé'
     
     def marquer_maintenance(self, request, queryset):
         """Marque les appartements sélectionnés en maintenance"""
-        count = queryset.update(statut_occupation='maintenance')
+        count = update_statut_occupation(queryset, 'maintenance')
         self.message_user(request, f'{count} appartements marqués en maintenance.')
     marquer_maintenance.short_description = 'Marquer en maintenance'
 
@@ -495,4 +499,22 @@ class RemiseDesClesAdmin(admin.ModelAdmin):
             'fields': ('cree_par', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(OccupationPeriode)
+class OccupationPeriodeAdmin(admin.ModelAdmin):
+    """Historique d'occupation (lecture seule: alimenté par les changements de statut)"""
+    list_display = ['appartement', 'residence', 'statut', 'date_debut', 'date_fin', 'contrat', 'loyer_mensuel', 'source']
+    list_filter = ['statut', 'source', 'residence']
+    search_fields = ['appartement__nom', 'residence__nom', 'contrat__numero_contrat']
+    date_hierarchy = 'date_debut'
+    list_select_related = ['appartement__residence', 'residence', 'contrat']
+    raw_id_fields = ['appartement', 'residence', 'contrat']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
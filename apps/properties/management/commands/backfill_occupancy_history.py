@@ -0,0 +1,55 @@
+# apps/properties/management/commands/backfill_occupancy_history.py
+"""
+Commande Django pour reconstituer l'historique d'occupation depuis les contrats
+Usage: python manage.py backfill_occupancy_history [--residence ID] [--force]
+
+Par défaut, seuls les appartements sans historique sont traités: la commande
+peut être relancée sans écraser les changements de statut déjà enregistrés.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.properties.models.appartement import Appartement
+from apps.properties.occupancy import reconstruire_historique
+
+
+class Command(BaseCommand):
+    help = "Reconstitue l'historique d'occupation des appartements depuis les contrats"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--residence',
+            type=int,
+            help='Limiter à une résidence (ID)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Remplacer aussi l'historique des appartements qui en ont déjà un"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Appartements traités par transaction (défaut: 500)"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("\n🔄 Reconstitution de l'historique d'occupation\n"))
+
+        appartements = Appartement.objects.order_by('pk')
+        if options['residence']:
+            appartements = appartements.filter(residence_id=options['residence'])
+        if not options['force']:
+            appartements = appartements.filter(historique_occupation__isnull=True)
+
+        ids = list(appartements.values_list('pk', flat=True).distinct())
+        total_periodes = 0
+        for i in range(0, len(ids), options['batch_size']):
+            lot = ids[i:i + options['batch_size']]
+            total_periodes += reconstruire_historique(Appartement.objects.filter(pk__in=lot))
+            self.stdout.write(f'  ✓ {min(i + len(lot), len(ids))}/{len(ids)} appartements')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {len(ids)} appartement(s) traité(s), {total_periodes} période(s) créée(s)\n'
+        ))
@@ -0,0 +1,58 @@
+# apps/properties/management/commands/reconcile_occupancy.py
+"""
+Commande Django pour vérifier et corriger les compteurs d'occupation des résidences
+Usage: python manage.py reconcile_occupancy [--dry-run]
+
+Les compteurs sont maintenus par Appartement.save()/delete(); cette commande
+rattrape les écarts laissés par des écritures directes en base (imports SQL,
+QuerySet.update() hors des helpers de apps.properties.occupancy).
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.properties.occupancy import refresh_residence_occupancy, residences_desynchronisees
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs d'occupation des résidences désynchronisées"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Afficher les écarts sans corriger'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalculer toutes les résidences, même sans écart'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("\n🔄 Vérification des compteurs d'occupation\n"))
+
+        ecarts = list(residences_desynchronisees())
+        for residence in ecarts[:20]:
+            self.stdout.write(
+                f'  ⚠️  {residence.nom}: '
+                f'{residence.nb_appartements}/{residence.nb_appartements_libres}/'
+                f'{residence.nb_appartements_occupes}/{residence.nb_appartements_maintenance} '
+                f'→ {residence.reel_total}/{residence.reel_libres}/'
+                f'{residence.reel_occupes}/{residence.reel_maintenance} '
+                f'(total/libres/occupés/maintenance)'
+            )
+        if len(ecarts) > 20:
+            self.stdout.write(f'  ... et {len(ecarts) - 20} autre(s)')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'\n🔍 {len(ecarts)} résidence(s) désynchronisée(s) (aucune correction)\n'))
+            return
+
+        if options['all']:
+            corrigees = refresh_residence_occupancy()
+        else:
+            corrigees = refresh_residence_occupancy([residence.pk for residence in ecarts])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {len(ecarts)} écart(s) détecté(s), {corrigees} résidence(s) recalculée(s)\n'
+        ))
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:35
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def calculer_compteurs(apps, schema_editor):
+    """Initialise les compteurs d'occupation depuis les appartements existants"""
+    Residence = apps.get_model('properties', 'Residence')
+    residences = list(Residence.objects.annotate(
+        total=Count('appartements'),
+        libres=Count('appartements', filter=Q(appartements__statut_occupation__in=['libre', 'available'])),
+        occupes=Count('appartements', filter=Q(appartements__statut_occupation__in=['occupe', 'occupied'])),
+        maintenance=Count('appartements', filter=Q(appartements__statut_occupation='maintenance')),
+    ))
+    maintenant = timezone.now()
+    for residence in residences:
+        residence.nb_appartements = residence.total
+        residence.nb_appartements_libres = residence.libres
+        residence.nb_appartements_occupes = residence.occupes
+        residence.nb_appartements_maintenance = residence.maintenance
+        residence.taux_occupation = (
+            round(Decimal(residence.occupes) * 100 / residence.total, 2) if residence.total else Decimal('0.00')
+        )
+        residence.occupation_mise_a_jour = maintenant
+    Residence.objects.bulk_update(residences, [
+        'nb_appartements', 'nb_appartements_libres', 'nb_appartements_occupes',
+        'nb_appartements_maintenance', 'taux_occupation', 'occupation_mise_a_jour',
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_alter_residence_proprietaire'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='residence',
+            name='nb_appartements',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Appartements enregistrés'),
+        ),
+        migrations.AddField(
+            model_name='residence',
+            name='nb_appartements_libres',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Appartements libres'),
+        ),
+        migrations.AddField(
+            model_name='residence',
+            name='nb_appartements_maintenance',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Appartements en maintenance'),
+        ),
+        migrations.AddField(
+            model_name='residence',
+            name='nb_appartements_occupes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Appartements occupés'),
+        ),
+        migrations.AddField(
+            model_name='residence',
+            name='occupation_mise_a_jour',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Compteurs mis à jour le'),
+        ),
+        migrations.AddField(
+            model_name='residence',
+            name='taux_occupation',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=5, verbose_name="Taux d'occupation (%)"),
+        ),
+        migrations.RunPython(calculer_compteurs, migrations.RunPython.noop),
+    ]
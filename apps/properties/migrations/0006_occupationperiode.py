@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:41
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0006_rentalcontract_montant_tva_rentalcontract_taux_tva_and_more'),
+        ('properties', '0005_residence_occupation_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupationPeriode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('statut', models.CharField(choices=[('libre', 'Libre'), ('occupe', 'Occupé'), ('reserve', 'Réservé'), ('maintenance', 'En maintenance'), ('hors_service', 'Hors service')], max_length=20, verbose_name='Statut')),
+                ('date_debut', models.DateField(verbose_name='Début')),
+                ('date_fin', models.DateField(blank=True, null=True, verbose_name='Fin (exclue)')),
+                ('loyer_mensuel', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Loyer mensuel de référence')),
+                ('source', models.CharField(choices=[('statut', 'Changement de statut'), ('reprise', 'Reprise depuis les contrats')], default='statut', max_length=10, verbose_name='Source')),
+                ('appartement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historique_occupation', to='properties.appartement', verbose_name='Appartement')),
+                ('contrat', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historique_occupation', to='contracts.rentalcontract', verbose_name='Contrat')),
+                ('residence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historique_occupation', to='properties.residence', verbose_name='Résidence')),
+            ],
+            options={
+                'verbose_name': "Période d'occupation",
+                'verbose_name_plural': "Historique d'occupation",
+                'ordering': ['appartement', 'date_debut', 'created_at'],
+                'indexes': [models.Index(fields=['residence', 'date_debut', 'date_fin'], name='properties__residen_c61a52_idx'), models.Index(fields=['appartement', 'date_fin'], name='properties__apparte_61bd5e_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='occupationperiode',
+            constraint=models.UniqueConstraint(condition=models.Q(('date_fin__isnull', True)), fields=('appartement',), name='occupation_une_periode_ouverte'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from decimal import Decimal
@@ -6,6 +6,7 @@ from apps.accounting.models.expenses import User
 from apps.core.models import BaseModel, TimestampedModel
 from apps.core.utils import generate_unique_reference
 from apps.properties.models.residence import Residence
+from apps.properties.occupancy import historiser_statuts, refresh_residence_occupancy
 
 # ====== NOUVEAUX MODÈLES POUR LA STRUCTURE BAILLEUR → RÉSIDENCE → APPARTEMENT ======
 
@@ -312,6 +313,16 @@ class Appartement(TimestampedModel):
             models.Index(fields=['loyer_base']),
         ]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valeurs chargées, pour ne recalculer l'occupation que si elles changent
+        instance._occupation_initiale = (
+            instance.__dict__.get('residence_id'),
+            instance.__dict__.get('statut_occupation'),
+        )
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.reference:
             self.reference = generate_unique_reference('APP')
@@ -350,7 +361,23 @@ class Appartement(TimestampedModel):
         elif self.security_deposit and not self.depot_garantie:
             self.depot_garantie = self.security_deposit
         
-        super().save(*args, **kwargs)
+        initiale = getattr(self, '_occupation_initiale', None)
+        actuelle = (self.residence_id, self.statut_occupation)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if initiale != actuelle:
+                refresh_residence_occupancy(
+                    {actuelle[0], initiale[0] if initiale else None}
+                )
+                historiser_statuts([self])
+        self._occupation_initiale = actuelle
+
+    def delete(self, *args, **kwargs):
+        residence_id = self.residence_id
+        with transaction.atomic():
+            resultat = super().delete(*args, **kwargs)
+            refresh_residence_occupancy([residence_id])
+        return resultat
     
     def __str__(self):
         return f"{self.residence.nom} - {self.nom}"
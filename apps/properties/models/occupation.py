@@ -0,0 +1,105 @@
+from django.db import models
+from decimal import Decimal
+from apps.core.models import TimestampedModel
+
+
+class OccupationPeriode(TimestampedModel):
+    """
+    Historique d'occupation d'un appartement, par intervalles de statut
+
+    Table en ajout seul: un changement de statut ferme l'intervalle ouvert
+    (date_fin) et en ouvre un nouveau. Les intervalles sont semi-ouverts,
+    [date_debut, date_fin[; date_fin vide = intervalle en cours.
+    """
+
+    STATUT_CHOICES = [
+        ('libre', 'Libre'),
+        ('occupe', 'Occupé'),
+        ('reserve', 'Réservé'),
+        ('maintenance', 'En maintenance'),
+        ('hors_service', 'Hors service'),
+    ]
+
+    SOURCE_CHOICES = [
+        ('statut', "Changement de statut"),
+        ('reprise', "Reprise depuis les contrats"),
+    ]
+
+    appartement = models.ForeignKey(
+        'properties.Appartement',
+        on_delete=models.CASCADE,
+        related_name='historique_occupation',
+        verbose_name="Appartement"
+    )
+
+    # Dénormalisé pour agréger par résidence sans jointure
+    residence = models.ForeignKey(
+        'properties.Residence',
+        on_delete=models.CASCADE,
+        related_name='historique_occupation',
+        verbose_name="Résidence"
+    )
+
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        verbose_name="Statut"
+    )
+
+    date_debut = models.DateField(
+        verbose_name="Début"
+    )
+
+    date_fin = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Fin (exclue)"
+    )
+
+    contrat = models.ForeignKey(
+        'contracts.RentalContract',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='historique_occupation',
+        verbose_name="Contrat"
+    )
+
+    # Loyer de référence: loyer du contrat si occupé, sinon loyer de base (manque à gagner)
+    loyer_mensuel = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Loyer mensuel de référence"
+    )
+
+    source = models.CharField(
+        max_length=10,
+        choices=SOURCE_CHOICES,
+        default='statut',
+        verbose_name="Source"
+    )
+
+    class Meta:
+        verbose_name = "Période d'occupation"
+        verbose_name_plural = "Historique d'occupation"
+        ordering = ['appartement', 'date_debut', 'created_at']
+        indexes = [
+            models.Index(fields=['residence', 'date_debut', 'date_fin']),
+            models.Index(fields=['appartement', 'date_fin']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['appartement'],
+                condition=models.Q(date_fin__isnull=True),
+                name='occupation_une_periode_ouverte',
+            ),
+        ]
+
+    def __str__(self):
+        fin = self.date_fin or "en cours"
+        return f"{self.appartement_id} - {self.get_statut_display()} du {self.date_debut} au {fin}"
+
+    @property
+    def en_cours(self):
+        return self.date_fin is None
@@ -142,6 +142,46 @@ class Residence(TimestampedModel):
         help_text="Ascenseur, parking, gardien, etc."
     )
     
+    # Compteurs d'occupation (dénormalisés, maintenus par Appartement.save/delete)
+    nb_appartements = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Appartements enregistrés"
+    )
+
+    nb_appartements_libres = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Appartements libres"
+    )
+
+    nb_appartements_occupes = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Appartements occupés"
+    )
+
+    nb_appartements_maintenance = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Appartements en maintenance"
+    )
+
+    taux_occupation = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        verbose_name="Taux d'occupation (%)"
+    )
+
+    occupation_mise_a_jour = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Compteurs mis à jour le"
+    )
+
     # Coordonnées GPS (optionnel)
     latitude = models.DecimalField(
         max_digits=10,
@@ -170,8 +210,19 @@ class Residence(TimestampedModel):
         ]
     
     def save(self, *args, **kwargs):
+        from apps.properties.occupancy import COMPTEURS
+
         if not self.reference:
             self.reference = generate_unique_reference('RES')
+        # Les compteurs d'occupation ne sont écrits que par
+        # refresh_residence_occupancy (UPDATE): une instance chargée avant un
+        # changement d'appartement ne doit pas écraser les valeurs à jour
+        if not self._state.adding and not kwargs.get('force_insert'):
+            compteurs = set(COMPTEURS + ['occupation_mise_a_jour'])
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+            kwargs['update_fields'] = [champ for champ in update_fields if champ not in compteurs]
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -180,16 +231,11 @@ class Residence(TimestampedModel):
     @property
     def nb_appartements_disponibles(self):
         """Nombre d'appartements libres"""
-        return self.appartements.filter(statut_occupation='libre').count()
-    
-    @property
-    def nb_appartements_occupes(self):
-        """Nombre d'appartements occupés"""
-        return self.appartements.filter(statut_occupation='occupe').count()
-    
-    @property
-    def taux_occupation(self):
-        """Taux d'occupation en pourcentage"""
-        if self.nb_appartements_total == 0:
-            return 0
-        return round((self.nb_appartements_occupes / self.nb_appartements_total) * 100, 2)
+        return self.nb_appartements_libres
+
+    def refresh_occupation(self):
+        """Recalcule les compteurs d'occupation et recharge l'instance"""
+        from apps.properties.occupancy import COMPTEURS, refresh_residence_occupancy
+
+        refresh_residence_occupancy([self.pk])
+        self.refresh_from_db(fields=COMPTEURS + ['occupation_mise_a_jour'])
@@ -0,0 +1,349 @@
+# apps/properties/occupancy.py
+"""
+Compteurs d'occupation dénormalisés sur Residence
+
+Chaque résidence porte ses compteurs (appartements, libres, occupés, en
+maintenance, taux d'occupation), recalculés depuis les appartements par un
+seul UPDATE dans la transaction qui modifie l'appartement. Les listes de
+résidences et les indicateurs du portefeuille lisent ces colonnes au lieu de
+compter les appartements.
+
+Chaque changement de statut est aussi historisé (OccupationPeriode) pour les
+analyses de vacance dans le temps (apps.properties.services).
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+# Statuts équivalents (les valeurs anglaises sont des champs de compatibilité)
+STATUTS_LIBRES = ['libre', 'available']
+STATUTS_OCCUPES = ['occupe', 'occupied']
+STATUTS_MAINTENANCE = ['maintenance']
+
+# Valeurs de compatibilité ramenées au statut canonique dans l'historique
+STATUTS_NORMALISES = {
+    'available': 'libre',
+    'occupied': 'occupe',
+    'reserved': 'reserve',
+}
+
+COMPTEURS = [
+    'nb_appartements',
+    'nb_appartements_libres',
+    'nb_appartements_occupes',
+    'nb_appartements_maintenance',
+    'taux_occupation',
+]
+
+
+def _compte_appartements(statuts=None):
+    """Sous-requête: nombre d'appartements de la résidence (pour un UPDATE)"""
+    from apps.properties.models.appartement import Appartement
+
+    appartements = Appartement.objects.filter(residence_id=OuterRef('pk'))
+    if statuts:
+        appartements = appartements.filter(statut_occupation__in=statuts)
+    return Coalesce(
+        Subquery(
+            appartements.order_by().values('residence_id')
+            .annotate(nb=Count('pk')).values('nb'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def _taux_occupation(occupes, total):
+    """Expression: taux d'occupation en pourcentage (0 si aucun appartement)"""
+    taux = DecimalField(max_digits=5, decimal_places=2)
+    return Coalesce(
+        Cast(
+            Cast(occupes, DecimalField(max_digits=12, decimal_places=2)) * Value(Decimal('100'))
+            / NullIf(total, Value(0)),
+            taux,
+        ),
+        Value(Decimal('0.00')),
+        output_field=taux,
+    )
+
+
+def refresh_residence_occupancy(residence_ids=None):
+    """
+    Recalcule les compteurs d'occupation depuis les appartements
+
+    Un seul UPDATE, quel que soit le nombre de résidences concernées.
+
+    Args:
+        residence_ids: identifiants des résidences (défaut: toutes)
+
+    Returns:
+        int: nombre de résidences mises à jour
+    """
+    from apps.properties.models.residence import Residence
+
+    residences = Residence.objects.all()
+    if residence_ids is not None:
+        residence_ids = {pk for pk in residence_ids if pk is not None}
+        if not residence_ids:
+            return 0
+        residences = residences.filter(pk__in=residence_ids)
+
+    return residences.update(
+        nb_appartements=_compte_appartements(),
+        nb_appartements_libres=_compte_appartements(STATUTS_LIBRES),
+        nb_appartements_occupes=_compte_appartements(STATUTS_OCCUPES),
+        nb_appartements_maintenance=_compte_appartements(STATUTS_MAINTENANCE),
+        taux_occupation=_taux_occupation(
+            _compte_appartements(STATUTS_OCCUPES), _compte_appartements()
+        ),
+        occupation_mise_a_jour=timezone.now(),
+    )
+
+
+def update_statut_occupation(appartements, statut):
+    """
+    Change le statut d'occupation d'un ensemble d'appartements
+
+    Remplace queryset.update(statut_occupation=...) qui contourne save():
+    la mise à jour et le recalcul des compteurs des résidences concernées
+    se font dans la même transaction.
+
+    Returns:
+        int: nombre d'appartements mis à jour
+    """
+    from apps.properties.models.appartement import Appartement
+
+    with transaction.atomic():
+        lignes = list(appartements.values_list('pk', 'residence_id'))
+        count = appartements.update(statut_occupation=statut)
+        refresh_residence_occupancy({residence_id for _, residence_id in lignes})
+        historiser_statuts(Appartement.objects.filter(pk__in=[pk for pk, _ in lignes]))
+    return count
+
+
+def delete_appartements(appartements):
+    """
+    Supprime un ensemble d'appartements et recalcule les compteurs
+
+    Returns:
+        tuple: résultat de QuerySet.delete()
+    """
+    with transaction.atomic():
+        residence_ids = set(appartements.values_list('residence_id', flat=True))
+        resultat = appartements.delete()
+        refresh_residence_occupancy(residence_ids)
+    return resultat
+
+
+def residences_desynchronisees(residences=None):
+    """
+    Résidences dont les compteurs stockés diffèrent du décompte réel
+
+    Returns:
+        QuerySet: résidences annotées avec les valeurs réelles (reel_*)
+    """
+    from apps.properties.models.residence import Residence
+
+    residences = Residence.objects.all() if residences is None else residences
+    residences = residences.annotate(
+        reel_total=Count('appartements'),
+        reel_libres=Count('appartements', filter=Q(appartements__statut_occupation__in=STATUTS_LIBRES)),
+        reel_occupes=Count('appartements', filter=Q(appartements__statut_occupation__in=STATUTS_OCCUPES)),
+        reel_maintenance=Count('appartements', filter=Q(appartements__statut_occupation__in=STATUTS_MAINTENANCE)),
+    )
+    return residences.exclude(
+        nb_appartements=F('reel_total'),
+        nb_appartements_libres=F('reel_libres'),
+        nb_appartements_occupes=F('reel_occupes'),
+        nb_appartements_maintenance=F('reel_maintenance'),
+    )
+
+
+def portfolio_occupancy(residences=None):
+    """
+    Indicateurs d'occupation du portefeuille, en une requête
+
+    Args:
+        residences: QuerySet de résidences (défaut: toutes)
+
+    Returns:
+        dict: total_residences, total_appartements, total_libres,
+              total_occupes, total_maintenance, taux_occupation
+    """
+    from apps.properties.models.residence import Residence
+
+    residences = Residence.objects.all() if residences is None else residences
+    totaux = residences.aggregate(
+        total_residences=Count('pk'),
+        total_appartements=Coalesce(Sum('nb_appartements'), 0),
+        total_libres=Coalesce(Sum('nb_appartements_libres'), 0),
+        total_occupes=Coalesce(Sum('nb_appartements_occupes'), 0),
+        total_maintenance=Coalesce(Sum('nb_appartements_maintenance'), 0),
+    )
+    totaux['taux_occupation'] = round(
+        totaux['total_occupes'] * 100 / totaux['total_appartements'], 1
+    ) if totaux['total_appartements'] else 0
+    return totaux
+
+
+# ============================================================================
+# HISTORIQUE D'OCCUPATION
+# ============================================================================
+
+def statut_normalise(statut):
+    """Statut canonique (libre, occupe, reserve, maintenance, hors_service)"""
+    return STATUTS_NORMALISES.get(statut, statut)
+
+
+def historiser_statuts(appartements, date_effet=None):
+    """
+    Ferme l'intervalle en cours des appartements dont le statut a changé
+    et ouvre un intervalle au statut actuel
+
+    Pour un appartement qui devient occupé, l'intervalle est rattaché au
+    contrat actif et commence à sa date de début si elle est antérieure
+    (contrat saisi après l'entrée du locataire).
+
+    Args:
+        appartements: instances ou QuerySet d'Appartement (statut à jour)
+        date_effet: date du changement (défaut: aujourd'hui)
+
+    Returns:
+        list: intervalles créés
+    """
+    from apps.contracts.models import RentalContract
+    from apps.properties.models.occupation import OccupationPeriode
+
+    date_effet = date_effet or timezone.localdate()
+    appartements = {appartement.pk: appartement for appartement in appartements}
+    if not appartements:
+        return []
+
+    ouvertes = {
+        periode.appartement_id: periode
+        for periode in OccupationPeriode.objects.select_for_update().filter(
+            appartement_id__in=appartements, date_fin__isnull=True
+        )
+    }
+    a_historiser = [
+        appartement for pk, appartement in appartements.items()
+        if pk not in ouvertes
+        or ouvertes[pk].statut != statut_normalise(appartement.statut_occupation)
+        or ouvertes[pk].residence_id != appartement.residence_id
+    ]
+    if not a_historiser:
+        return []
+
+    contrats = {}
+    occupes = [a.pk for a in a_historiser if statut_normalise(a.statut_occupation) == 'occupe']
+    if occupes:
+        for contrat in RentalContract.objects.filter(
+            appartement_id__in=occupes, statut='actif'
+        ).order_by('appartement_id', '-date_debut'):
+            contrats.setdefault(contrat.appartement_id, contrat)
+
+    nouvelles, fermetures = [], {}
+    for appartement in a_historiser:
+        ouverte = ouvertes.get(appartement.pk)
+        contrat = contrats.get(appartement.pk)
+        debut = date_effet
+        if contrat and contrat.date_debut < debut:
+            debut = contrat.date_debut
+        if ouverte:
+            debut = max(debut, ouverte.date_debut)
+            fermetures.setdefault(debut, []).append(ouverte.pk)
+        nouvelles.append(OccupationPeriode(
+            appartement_id=appartement.pk,
+            residence_id=appartement.residence_id,
+            statut=statut_normalise(appartement.statut_occupation),
+            date_debut=debut,
+            contrat=contrat,
+            loyer_mensuel=contrat.loyer_mensuel if contrat else (appartement.loyer_base or Decimal('0.00')),
+        ))
+
+    for date_fin, pks in fermetures.items():
+        OccupationPeriode.objects.filter(pk__in=pks).update(date_fin=date_fin, updated_at=timezone.now())
+    return OccupationPeriode.objects.bulk_create(nouvelles)
+
+
+
+def reconstruire_historique(appartements, aujourd_hui=None):
+    """
+    Reconstitue l'historique d'occupation depuis les contrats
+
+    Périodes occupées = contrats (hors brouillons), trous = libre, puis un
+    intervalle en cours au statut actuel de l'appartement. L'historique
+    existant des appartements traités est remplacé.
+
+    Args:
+        appartements: QuerySet d'Appartement
+        aujourd_hui: date de référence (défaut: aujourd'hui)
+
+    Returns:
+        int: nombre d'intervalles créés
+    """
+    from apps.contracts.models import RentalContract
+    from apps.properties.models.occupation import OccupationPeriode
+
+    aujourd_hui = aujourd_hui or timezone.localdate()
+    appartements = list(appartements.only(
+        'pk', 'residence_id', 'statut_occupation', 'loyer_base', 'created_at'
+    ))
+    contrats = {}
+    for contrat in RentalContract.objects.filter(
+        appartement__in=appartements, date_debut__lte=aujourd_hui
+    ).exclude(statut='brouillon').only(
+        'pk', 'appartement_id', 'date_debut', 'date_fin', 'loyer_mensuel', 'statut'
+    ).order_by('date_debut', 'pk'):
+        contrats.setdefault(contrat.appartement_id, []).append(contrat)
+
+    periodes = []
+    for appartement in appartements:
+        historique = contrats.get(appartement.pk, [])
+        loyer_base = appartement.loyer_base or Decimal('0.00')
+        curseur = min(
+            [appartement.created_at.date()] + [contrat.date_debut for contrat in historique]
+        )
+        en_cours = None
+
+        def ajouter(statut, debut, fin, contrat=None):
+            periodes.append(OccupationPeriode(
+                appartement_id=appartement.pk, residence_id=appartement.residence_id,
+                statut=statut, date_debut=debut, date_fin=fin, contrat=contrat,
+                loyer_mensuel=contrat.loyer_mensuel if contrat else loyer_base,
+                source='reprise',
+            ))
+            return periodes[-1]
+
+        for contrat in historique:
+            debut = max(contrat.date_debut, curseur)
+            fin = contrat.date_fin + timedelta(days=1) if contrat.date_fin else None
+            if fin is not None and fin <= debut:
+                continue
+            if debut > curseur:
+                ajouter('libre', curseur, debut)
+                curseur = debut
+            if fin is None or fin > aujourd_hui:
+                # Contrat en cours: intervalle ouvert, sauf si l'appartement a changé de statut
+                if statut_normalise(appartement.statut_occupation) == 'occupe':
+                    en_cours = ajouter('occupe', debut, None, contrat)
+                    break
+                fin = aujourd_hui
+            if fin > debut:
+                ajouter('occupe', debut, fin, contrat)
+                curseur = fin
+
+        if en_cours is None:
+            ajouter(statut_normalise(appartement.statut_occupation), min(curseur, aujourd_hui), None)
+
+    with transaction.atomic():
+        OccupationPeriode.objects.filter(appartement__in=appartements).delete()
+        OccupationPeriode.objects.bulk_create(periodes, batch_size=1000)
+    return len(periodes)
@@ -0,0 +1,179 @@
+# apps/properties/services.py
+"""
+Analyses d'occupation dans le temps (vacance, taux, manque à gagner)
+
+Toutes les mesures viennent de l'historique OccupationPeriode: chaque
+analyse est une seule requête qui additionne, par groupe (résidence,
+propriétaire, appartement), la durée d'intersection des intervalles avec
+la période demandée.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import DateField, DurationField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from apps.properties.models.occupation import OccupationPeriode
+
+STATUTS_VACANTS = ['libre', 'reserve']
+STATUTS_INDISPONIBLES = ['maintenance']
+STATUTS_HORS_EXPLOITATION = ['hors_service']
+
+REGROUPEMENTS = {
+    'residence': 'residence_id',
+    'proprietaire': 'residence__proprietaire_id',
+    'appartement': 'appartement_id',
+}
+
+
+class OccupancyAnalytics:
+    """
+    Vacance et occupation sur une période [periode_debut, periode_fin]
+
+    Les jours futurs ne sont pas comptés: une période qui inclut
+    aujourd'hui s'arrête à aujourd'hui.
+    """
+
+    def __init__(self, periode_debut, periode_fin):
+        self.periode_debut = periode_debut
+        self.periode_fin = periode_fin
+        # Borne exclue, comme date_fin des intervalles
+        self.borne = min(periode_fin, timezone.localdate()) + timedelta(days=1)
+
+    def intervalles(self, debut=None, borne=None):
+        """Intervalles qui recoupent [debut, borne["""
+        return OccupationPeriode.objects.filter(self._recoupe(debut, borne))
+
+    def _recoupe(self, debut=None, borne=None):
+        debut = debut or self.periode_debut
+        borne = borne or self.borne
+        return Q(date_debut__lt=borne) & (Q(date_fin__isnull=True) | Q(date_fin__gt=debut))
+
+    @staticmethod
+    def _duree(debut, borne):
+        """Durée d'intersection d'un intervalle avec [debut, borne["""
+        return ExpressionWrapper(
+            Least(Coalesce('date_fin', Value(borne, output_field=DateField())), Value(borne, output_field=DateField()))
+            - Greatest(F('date_debut'), Value(debut, output_field=DateField())),
+            output_field=DurationField(),
+        )
+
+    def resume(self, par='residence', filtres=None):
+        """
+        Jours par statut, taux d'occupation et manque à gagner par groupe
+
+        Une requête groupée par (groupe, statut, loyer de référence).
+
+        Args:
+            par: 'residence', 'proprietaire' ou 'appartement'
+            filtres: Q optionnel sur OccupationPeriode
+
+        Returns:
+            dict: {identifiant du groupe: indicateurs}
+        """
+        cle = REGROUPEMENTS[par]
+        intervalles = self.intervalles()
+        if filtres is not None:
+            intervalles = intervalles.filter(filtres)
+
+        lignes = intervalles.order_by().values(cle, 'statut', 'loyer_mensuel').annotate(
+            duree=Sum(self._duree(self.periode_debut, self.borne))
+        )
+
+        resultats = defaultdict(self._indicateurs_vides)
+        for ligne in lignes:
+            jours = ligne['duree'].days if ligne['duree'] else 0
+            indicateurs = resultats[ligne[cle]]
+            if ligne['statut'] == 'occupe':
+                indicateurs['jours_occupes'] += jours
+            elif ligne['statut'] in STATUTS_VACANTS:
+                indicateurs['jours_vacants'] += jours
+            elif ligne['statut'] in STATUTS_INDISPONIBLES:
+                indicateurs['jours_maintenance'] += jours
+            else:
+                indicateurs['jours_hors_service'] += jours
+            if ligne['statut'] in STATUTS_VACANTS + STATUTS_INDISPONIBLES:
+                indicateurs['loyer_perdu'] += self._loyer_journalier(ligne['loyer_mensuel']) * jours
+
+        for indicateurs in resultats.values():
+            exploitables = (
+                indicateurs['jours_occupes'] + indicateurs['jours_vacants'] + indicateurs['jours_maintenance']
+            )
+            indicateurs['jours_exploitables'] = exploitables
+            indicateurs['taux_occupation'] = (
+                round(indicateurs['jours_occupes'] * 100 / exploitables, 1) if exploitables else 0
+            )
+            indicateurs['loyer_perdu'] = indicateurs['loyer_perdu'].quantize(Decimal('1'))
+        return dict(resultats)
+
+    def par_residence(self, residence_ids=None):
+        filtres = Q(residence_id__in=residence_ids) if residence_ids is not None else None
+        return self.resume('residence', filtres)
+
+    def par_proprietaire(self, proprietaire_ids=None):
+        filtres = Q(residence__proprietaire_id__in=proprietaire_ids) if proprietaire_ids is not None else None
+        return self.resume('proprietaire', filtres)
+
+    def par_appartement(self, residence=None):
+        filtres = Q(residence=residence) if residence is not None else None
+        return self.resume('appartement', filtres)
+
+    def evolution_mensuelle(self, filtres=None):
+        """
+        Taux d'occupation mois par mois sur la période
+
+        Une seule requête: deux sommes conditionnelles par mois.
+
+        Returns:
+            list: [{'mois', 'jours_occupes', 'jours_exploitables', 'taux_occupation'}]
+        """
+        mois = []
+        debut = self.periode_debut.replace(day=1)
+        while debut < self.borne:
+            fin = min(debut + relativedelta(months=1), self.borne)
+            mois.append((debut, fin))
+            debut += relativedelta(months=1)
+
+        intervalles = self.intervalles().exclude(statut__in=STATUTS_HORS_EXPLOITATION)
+        if filtres is not None:
+            intervalles = intervalles.filter(filtres)
+
+        agregats = {}
+        for i, (debut, fin) in enumerate(mois):
+            debut = max(debut, self.periode_debut)
+            duree = self._duree(debut, fin)
+            agregats[f'occupes_{i}'] = Sum(duree, filter=self._recoupe(debut, fin) & Q(statut='occupe'))
+            agregats[f'total_{i}'] = Sum(duree, filter=self._recoupe(debut, fin))
+        totaux = intervalles.aggregate(**agregats) if agregats else {}
+
+        evolution = []
+        for i, (debut, _) in enumerate(mois):
+            occupes = totaux[f'occupes_{i}'].days if totaux[f'occupes_{i}'] else 0
+            total = totaux[f'total_{i}'].days if totaux[f'total_{i}'] else 0
+            evolution.append({
+                'mois': debut,
+                'jours_occupes': occupes,
+                'jours_exploitables': total,
+                'taux_occupation': round(occupes * 100 / total, 1) if total else 0,
+            })
+        return evolution
+
+    @staticmethod
+    def _loyer_journalier(loyer_mensuel):
+        return (loyer_mensuel or Decimal('0')) * 12 / 365
+
+    @staticmethod
+    def _indicateurs_vides():
+        return {
+            'jours_occupes': 0,
+            'jours_vacants': 0,
+            'jours_maintenance': 0,
+            'jours_hors_service': 0,
+            'jours_exploitables': 0,
+            'taux_occupation': 0,
+            'loyer_perdu': Decimal('0'),
+        }
@@ -1,3 +1,216 @@
+"""
+Tests pour le module des propriétés
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.properties.models.appartement import Appartement
+from apps.properties.models.occupation import OccupationPeriode
+from apps.properties.models.residence import Residence
+from apps.properties.occupancy import (
+    portfolio_occupancy, reconstruire_historique, residences_desynchronisees,
+    update_statut_occupation,
+)
+from apps.properties.services import OccupancyAnalytics
+
+from tests.factories import make_appartement, make_contract, make_residence, make_tiers
+
+
+class ResidenceOccupancyTest(TestCase):
+    """Tests des compteurs d'occupation dénormalisés"""
+
+    def setUp(self):
+        self.residence = make_residence()
+        self.a1 = make_appartement(self.residence, 'A1', statut_occupation='occupe')
+        self.a2 = make_appartement(self.residence, 'A2')
+        self.a3 = make_appartement(self.residence, 'A3', statut_occupation='maintenance')
+        self.a4 = make_appartement(self.residence, 'A4')
+
+    def assertCompteurs(self, residence, total, libres, occupes, maintenance, taux):
+        residence.refresh_from_db()
+        self.assertEqual(
+            (residence.nb_appartements, residence.nb_appartements_libres,
+             residence.nb_appartements_occupes, residence.nb_appartements_maintenance),
+            (total, libres, occupes, maintenance)
+        )
+        self.assertEqual(residence.taux_occupation, Decimal(taux))
+
+    def test_creation_et_changement_de_statut(self):
+        """Test des compteurs après création et changement de statut"""
+        self.assertCompteurs(self.residence, 4, 2, 1, 1, '25.00')
+
+        appartement = Appartement.objects.get(pk=self.a2.pk)
+        appartement.statut_occupation = 'occupe'
+        appartement.save()
+
+        self.assertCompteurs(self.residence, 4, 1, 2, 1, '50.00')
+
+    def test_sauvegarde_residence_conserve_compteurs(self):
+        """Test qu'une instance de résidence périmée n'écrase pas les compteurs"""
+        residence = Residence.objects.get(pk=self.residence.pk)
+        update_statut_occupation(Appartement.objects.filter(pk=self.a2.pk), 'occupe')
+
+        residence.nom = 'Résidence renommée'
+        residence.save()
+        residence.save(update_fields=['nom', 'nb_appartements_occupes'])
+
+        self.assertCompteurs(residence, 4, 1, 2, 1, '50.00')
+        self.assertEqual(residence.nom, 'Résidence renommée')
+
+    def test_sauvegarde_sans_changement_sans_recalcul(self):
+        """Test qu'une sauvegarde sans changement de statut ne touche pas la résidence"""
+        appartement = Appartement.objects.get(pk=self.a1.pk)
+        appartement.loyer_base = Decimal('300000.00')
+        with CaptureQueriesContext(connection) as requetes:
+            appartement.save()
+
+        self.assertFalse(any('properties_residence' in q['sql'] for q in requetes.captured_queries))
+
+    def test_changement_de_residence_et_suppression(self):
+        """Test du déplacement et de la suppression d'un appartement"""
+        autre = make_residence('Autre')
+        self.a1.residence = autre
+        self.a1.save()
+
+        self.assertCompteurs(self.residence, 3, 2, 0, 1, '0.00')
+        self.assertCompteurs(autre, 1, 0, 1, 0, '100.00')
+
+        self.a1.delete()
+        self.assertCompteurs(autre, 0, 0, 0, 0, '0.00')
+
+    def test_mise_a_jour_groupee(self):
+        """Test du changement de statut groupé"""
+        count = update_statut_occupation(
+            Appartement.objects.filter(pk__in=[self.a2.pk, self.a4.pk]), 'occupe'
+        )
+
+        self.assertEqual(count, 2)
+        self.assertCompteurs(self.residence, 4, 0, 3, 1, '75.00')
+
+    def test_indicateurs_portefeuille_en_une_requete(self):
+        """Test des indicateurs du portefeuille"""
+        make_appartement(make_residence('Autre'), 'B1', statut_occupation='occupe')
+
+        with self.assertNumQueries(1):
+            totaux = portfolio_occupancy()
+
+        self.assertEqual(totaux['total_residences'], 2)
+        self.assertEqual(totaux['total_appartements'], 5)
+        self.assertEqual(totaux['total_occupes'], 2)
+        self.assertEqual(totaux['taux_occupation'], 40.0)
+
+    def test_reconciliation(self):
+        """Test de la détection et correction des écarts"""
+        # Écriture directe qui contourne les compteurs
+        Appartement.objects.filter(pk=self.a2.pk).update(statut_occupation='occupe')
+        self.assertEqual(list(residences_desynchronisees()), [self.residence])
+
+        call_command('reconcile_occupancy', '--dry-run', stdout=StringIO())
+        self.assertTrue(residences_desynchronisees().exists())
+
+        call_command('reconcile_occupancy', stdout=StringIO())
+        self.assertFalse(residences_desynchronisees().exists())
+        self.assertCompteurs(Residence.objects.get(pk=self.residence.pk), 4, 1, 2, 1, '50.00')
+
+
+class OccupationHistoryTest(TestCase):
+    """Tests de l'historique d'occupation et des analyses de vacance"""
+
+    def setUp(self):
+        self.residence = make_residence()
+        self.appartement = make_appartement(self.residence, 'A1')
+        self.locataire = make_tiers('Fall')
+
+    def test_changements_de_statut_historises(self):
+        """Test qu'un changement de statut ferme l'intervalle en cours et en ouvre un"""
+        self.appartement.statut_occupation = 'maintenance'
+        self.appartement.save()
+        update_statut_occupation(Appartement.objects.filter(pk=self.appartement.pk), 'available')
+
+        periodes = list(self.appartement.historique_occupation.order_by('created_at'))
+        self.assertEqual([p.statut for p in periodes], ['libre', 'maintenance', 'libre'])
+        self.assertEqual([p.date_fin is None for p in periodes], [False, False, True])
+        self.assertEqual(periodes[-1].loyer_mensuel, self.appartement.loyer_base)
+
+    def test_occupation_rattachee_au_contrat(self):
+        """Test qu'un contrat actif ouvre un intervalle occupé lié au contrat"""
+        contrat = make_contract(self.appartement, self.locataire)
+
+        periode = self.appartement.historique_occupation.get(date_fin__isnull=True)
+        self.assertEqual(periode.statut, 'occupe')
+        self.assertEqual(periode.contrat, contrat)
+
+    def test_reconstruction_depuis_les_contrats(self):
+        """Test de la reprise: contrats occupés, trous libres, statut actuel en cours"""
+        make_contract(
+            self.appartement, self.locataire, date_debut=date(2024, 1, 1),
+            date_fin=date(2024, 6, 30), statut='expire',
+        )
+        Appartement.objects.filter(pk=self.appartement.pk).update(statut_occupation='libre')
+
+        reconstruire_historique(
+            Appartement.objects.filter(pk=self.appartement.pk), aujourd_hui=date(2025, 1, 1)
+        )
+
+        periodes = list(
+            OccupationPeriode.objects.filter(appartement=self.appartement)
+            .values_list('statut', 'date_debut', 'date_fin')
+        )
+        self.assertEqual(periodes, [
+            ('occupe', date(2024, 1, 1), date(2024, 7, 1)),
+            ('libre', date(2024, 7, 1), None),
+        ])
+
+    def test_vacance_et_manque_a_gagner(self):
+        """Test des jours de vacance, du taux et du manque à gagner sur une année"""
+        OccupationPeriode.objects.all().delete()
+        OccupationPeriode.objects.bulk_create([
+            OccupationPeriode(
+                appartement=self.appartement, residence=self.residence, statut='occupe',
+                date_debut=date(2024, 1, 1), date_fin=date(2024, 7, 1),
+                loyer_mensuel=Decimal('250000.00'),
+            ),
+            OccupationPeriode(
+                appartement=self.appartement, residence=self.residence, statut='libre',
+                date_debut=date(2024, 7, 1), loyer_mensuel=Decimal('365000.00'),
+            ),
+        ])
+        analytics = OccupancyAnalytics(date(2024, 1, 1), date(2024, 12, 31))
+
+        with self.assertNumQueries(1):
+            stats = analytics.par_residence()[self.residence.pk]
+
+        self.assertEqual(stats['jours_occupes'], 182)
+        self.assertEqual(stats['jours_vacants'], 184)
+        self.assertEqual(stats['taux_occupation'], 49.7)
+        # 184 jours x (365 000 x 12 / 365) par jour
+        self.assertEqual(stats['loyer_perdu'], Decimal('2208000'))
+
+        with self.assertNumQueries(1):
+            evolution = analytics.evolution_mensuelle()
+
+        self.assertEqual(len(evolution), 12)
+        self.assertEqual(evolution[0]['taux_occupation'], 100.0)
+        self.assertEqual(evolution[6]['taux_occupation'], 0)
+        self.assertEqual(evolution[6]['jours_exploitables'], 31)
+
+    def test_jours_futurs_exclus(self):
+        """Test qu'une période en cours s'arrête à aujourd'hui"""
+        aujourd_hui = timezone.localdate()
+        OccupationPeriode.objects.filter(appartement=self.appartement).update(
+            date_debut=aujourd_hui - timedelta(days=9)
+        )
+
+        stats = OccupancyAnalytics(
+            aujourd_hui - timedelta(days=30), aujourd_hui + timedelta(days=30)
+        ).par_appartement()[self.appartement.pk]
+
+        self.assertEqual(stats['jours_vacants'], 10)
 
-# Create your tests here.
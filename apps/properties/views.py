@@ -7,7 +7,7 @@ from django.contrib import messages
 from django.http import JsonResponse, Http404
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-from django.db.models import Q, Count, Sum
+from django.db.models import Q, Count, F, OuterRef, Subquery, Sum
 from django.urls import reverse_lazy, reverse
 from .forms import EtatDesLieuxForm, EtatDesLieuxDetailFormSet, RemiseDesClesForm
 
@@ -16,6 +16,7 @@ from .models.appartement import Appartement
 from .models.appartement import Appartement, AppartementMedia
 from .models.etat_lieu import EtatDesLieux, EtatDesLieuxDetail
 from .models.remise import RemiseDesCles
+from .occupancy import STATUTS_OCCUPES, delete_appartements, portfolio_occupancy, update_statut_occupation
 
 
 from django.utils import timezone
@@ -147,9 +148,8 @@ class ResidenceListView(LoginRequiredMixin, ListView):
         # ✅ QUERYSET SIMPLE SANS ANNOTATIONS
         queryset = Residence.objects.all()
 
-        # ✅ RELATIONS AVEC TIERS
+        # ✅ RELATIONS AVEC TIERS (les compteurs d'occupation sont des colonnes)
         queryset = queryset.select_related('proprietaire')
-        queryset = queryset.prefetch_related('appartements')
 
         # Filtres
         search = self.request.GET.get('search', '')
@@ -163,24 +163,15 @@ class ResidenceListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # ✅ CALCUL MANUEL DES STATISTIQUES GLOBALES SEULEMENT
-        all_residences = Residence.objects.prefetch_related('appartements').all()
-        total_appartements = 0
-        total_libres = 0
-        total_occupes = 0
-        
-        for residence in all_residences:
-            appartements = residence.appartements.all()
-            total_appartements += appartements.count()
-            total_libres += appartements.filter(statut_occupation__in=['libre', 'available']).count()
-            total_occupes += appartements.filter(statut_occupation__in=['occupe', 'occupied']).count()
+        # ✅ STATISTIQUES GLOBALES: une requête sur les compteurs
+        totaux = portfolio_occupancy()
         
         context.update({
             'search': self.request.GET.get('search', ''),
-            'total_residences': all_residences.count(),
-            'total_appartements': total_appartements,
-            'total_libres': total_libres,
-            'total_occupes': total_occupes,
+            'total_residences': totaux['total_residences'],
+            'total_appartements': totaux['total_appartements'],
+            'total_libres': totaux['total_libres'],
+            'total_occupes': totaux['total_occupes'],
         })
         
         return context
@@ -200,10 +191,10 @@ class ResidenceDetailView(LoginRequiredMixin, DetailView):
         context.update({
             'appartements': appartements,
             'stats': {
-                'total': appartements.count(),
-                'libres': appartements.filter(statut_occupation__in=['libre', 'available']).count(),
-                'occupes': appartements.filter(statut_occupation__in=['occupe', 'occupied']).count(),
-                'maintenance': appartements.filter(statut_occupation='maintenance').count(),
+                'total': self.object.nb_appartements,
+                'libres': self.object.nb_appartements_libres,
+                'occupes': self.object.nb_appartements_occupes,
+                'maintenance': self.object.nb_appartements_maintenance,
             }
         })
         
@@ -758,23 +749,14 @@ def residence_stats_api(request, pk):
         except:
             pass
         
-        taux_occupation = 0
-        try:
-            taux_occupation = getattr(residence, 'taux_occupation', 0)
-            if not taux_occupation:
-                total = appartements.count()
-                occupes = appartements.filter(statut_occupation__in=['occupe', 'occupied']).count()
-                taux_occupation = (occupes / total * 100) if total > 0 else 0
-        except:
-            pass
-        
+        # Compteurs d'occupation maintenus sur la résidence
         stats = {
-            'total_appartements': appartements.count(),
-            'appartements_libres': appartements.filter(statut_occupation__in=['libre', 'available']).count(),
-            'appartements_occupes': appartements.filter(statut_occupation__in=['occupe', 'occupied']).count(),
-            'appartements_maintenance': appartements.filter(statut_occupation='maintenance').count(),
+            'total_appartements': residence.nb_appartements,
+            'appartements_libres': residence.nb_appartements_libres,
+            'appartements_occupes': residence.nb_appartements_occupes,
+            'appartements_maintenance': residence.nb_appartements_maintenance,
             'revenus_mensuels_estimes': revenus_mensuels,
-            'taux_occupation': round(taux_occupation, 1),
+            'taux_occupation': round(float(residence.taux_occupation), 1),
         }
         
         return JsonResponse({'success': True, 'stats': stats})
@@ -888,44 +870,27 @@ def rapport_occupation_view(request):
     if not request.user.user_type in ['manager', 'accountant']:
         return redirect('dashboard:index')
     
-    # Statistiques globales
-    total_appartements = Appartement.objects.count()
-    appartements_libres = Appartement.objects.filter(
-        statut_occupation__in=['libre', 'available']
-    ).count()
-    appartements_occupes = Appartement.objects.filter(
-        statut_occupation__in=['occupe', 'occupied']
-    ).count()
-    appartements_maintenance = Appartement.objects.filter(
-        statut_occupation='maintenance'
-    ).count()
+    # Statistiques globales (compteurs des résidences)
+    totaux = portfolio_occupancy()
     
-    taux_occupation_global = (appartements_occupes / total_appartements * 100) if total_appartements > 0 else 0
-    
-    # Occupation par résidence
+    # Occupation par résidence (compteurs dénormalisés, loyers en sous-requête)
+    loyers_occupes = Appartement.objects.filter(
+        residence_id=OuterRef('pk'), statut_occupation__in=STATUTS_OCCUPES
+    ).order_by().values('residence_id').annotate(total=Sum('loyer_base')).values('total')
     residences_stats = Residence.objects.annotate(
-        total_appartements=Count('appartements'),
-        appartements_libres=Count(
-            'appartements',
-            filter=Q(appartements__statut_occupation__in=['libre', 'available'])
-        ),
-        appartements_occupes=Count(
-            'appartements',
-            filter=Q(appartements__statut_occupation__in=['occupe', 'occupied'])
-        ),
-        revenus_estimes=Sum(
-            'appartements__loyer_base',
-            filter=Q(appartements__statut_occupation__in=['occupe', 'occupied'])
-        )
+        total_appartements=F('nb_appartements'),
+        appartements_libres=F('nb_appartements_libres'),
+        appartements_occupes=F('nb_appartements_occupes'),
+        revenus_estimes=Subquery(loyers_occupes),
     )
     
     context = {
         'stats_globales': {
-            'total_appartements': total_appartements,
-            'appartements_libres': appartements_libres,
-            'appartements_occupes': appartements_occupes,
-            'appartements_maintenance': appartements_maintenance,
-            'taux_occupation_global': round(taux_occupation_global, 1),
+            'total_appartements': totaux['total_appartements'],
+            'appartements_libres': totaux['total_libres'],
+            'appartements_occupes': totaux['total_occupes'],
+            'appartements_maintenance': totaux['total_maintenance'],
+            'taux_occupation_global': totaux['taux_occupation'],
         },
         'residences_stats': residences_stats,
     }
@@ -1206,11 +1171,11 @@ def appartements_bulk_action(request):
         count = appartements.count()
         
         if action == 'set_available':
-            appartements.update(statut_occupation='libre')
+            update_statut_occupation(appartements, 'libre')
             message = f"{count} appartement(s) marqué(s) comme disponible(s)"
             
         elif action == 'set_maintenance':
-            appartements.update(statut_occupation='maintenance')
+            update_statut_occupation(appartements, 'maintenance')
             message = f"{count} appartement(s) marqué(s) en maintenance"
             
         elif action == 'delete':
@@ -1222,7 +1187,7 @@ def appartements_bulk_action(request):
                         'error': f'L\'appartement "{appartement.nom}" a un contrat actif'
                     })
             
-            appartements.delete()
+            delete_appartements(appartements)
             message = f"{count} appartement(s) supprimé(s)"
             
         else:
@@ -1246,15 +1211,8 @@ def properties_dashboard(request):
     if not request.user.user_type in ['manager', 'accountant']:
         return redirect('dashboard:index')
     
-    # Statistiques générales
-    total_residences = Residence.objects.count()
-    total_appartements = Appartement.objects.count()
-    appartements_libres = Appartement.objects.filter(
-        statut_occupation__in=['libre', 'available']
-    ).count()
-    appartements_occupes = Appartement.objects.filter(
-        statut_occupation__in=['occupe', 'occupied']
-    ).count()
+    # Statistiques générales (compteurs des résidences)
+    totaux = portfolio_occupancy()
     
     # Revenus mensuels estimés
     revenus_mensuels = Appartement.objects.filter(
@@ -1262,13 +1220,7 @@ def properties_dashboard(request):
     ).aggregate(total=Sum('loyer_base'))['total'] or 0
     
     # Résidences avec plus d'infos
-    residences_recent = Residence.objects.annotate(
-        nb_appartements=Count('appartements'),
-        taux_occupation_calc=Count(
-            'appartements',
-            filter=Q(appartements__statut_occupation__in=['occupe', 'occupied'])
-        ) * 100.0 / Count('appartements')
-    ).order_by('-created_at')[:5]
+    residences_recent = Residence.objects.order_by('-created_at')[:5]
     
     # Appartements récemment libérés
     appartements_libres_recent = Appartement.objects.filter(
@@ -1277,11 +1229,11 @@ def properties_dashboard(request):
     
     context = {
         'stats': {
-            'total_residences': total_residences,
-            'total_appartements': total_appartements,
-            'appartements_libres': appartements_libres,
-            'appartements_occupes': appartements_occupes,
-            'taux_occupation_global': (appartements_occupes / total_appartements * 100) if total_appartements > 0 else 0,
+            'total_residences': totaux['total_residences'],
+            'total_appartements': totaux['total_appartements'],
+            'appartements_libres': totaux['total_libres'],
+            'appartements_occupes': totaux['total_occupes'],
+            'taux_occupation_global': totaux['taux_occupation'],
             'revenus_mensuels': float(revenus_mensuels),
         },
         'residences_recent': residences_recent,
@@ -5,3 +5,7 @@ class SyndicConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.syndic'
     verbose_name = 'Gestion Syndic'
+
+    def ready(self):
+        """Importer les signals lors du démarrage de l'application"""
+        import apps.syndic.signals
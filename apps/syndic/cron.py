@@ -0,0 +1,13 @@
+# apps/syndic/cron.py
+from django_cron import CronJobBase, Schedule
+
+
+class RefreshCotisationStatutsCronJob(CronJobBase):
+    RUN_AT_TIMES = ['01:00']
+
+    schedule = Schedule(run_at_times=RUN_AT_TIMES)
+    code = 'syndic.refresh_cotisation_statuts'
+
+    def do(self):
+        from django.core.management import call_command
+        call_command('refresh_cotisation_statuts')
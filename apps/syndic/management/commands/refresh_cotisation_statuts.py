@@ -0,0 +1,23 @@
+"""
+Commande de recalcul des statuts des cotisations syndic.
+À exécuter chaque nuit: les statuts (à venir, en cours, impayé) dépendent
+des dates et ne sont sinon recalculés qu'à la sauvegarde d'une cotisation.
+"""
+from django.core.management.base import BaseCommand
+from apps.syndic.services import rafraichir_statuts_cotisations
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les statuts des cotisations syndic selon les dates et paiements'
+
+    def handle(self, *args, **options):
+        count = rafraichir_statuts_cotisations()
+
+        if count:
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ {count} cotisation(s) mise(s) à jour')
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ Statuts des cotisations à jour'))
+
+        return f'{count} cotisations mises à jour'
@@ -0,0 +1,154 @@
+# apps/syndic/managers.py
+"""
+Custom QuerySet Managers pour le module syndic
+Impayés par copropriétaire et exécution budgétaire calculés en base
+(sous-requêtes Sum/Coalesce), pour des listes à nombre de requêtes constant
+"""
+
+from decimal import Decimal
+
+from django.db import models
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+STATUTS_IMPAYES = ['en_cours', 'impaye']
+
+ZERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+class CoproprieteQuerySet(models.QuerySet):
+    """QuerySet personnalisé pour les copropriétés"""
+
+    def actives(self):
+        return self.filter(is_active=True)
+
+    def avec_statistiques(self):
+        """Annote le nombre de copropriétaires (lu par nombre_coproprietaires)"""
+        from apps.syndic.models import Coproprietaire
+
+        return self.annotate(
+            nb_coproprietaires_annote=Coalesce(
+                Subquery(
+                    Coproprietaire.objects.filter(copropriete=OuterRef('pk'))
+                    .order_by().values('copropriete').annotate(nb=Count('pk')).values('nb')[:1]
+                ),
+                0,
+            )
+        )
+
+
+class CoproprieteManager(models.Manager):
+    """Manager pour Copropriete"""
+
+    def get_queryset(self):
+        return CoproprieteQuerySet(self.model, using=self._db)
+
+    def actives(self):
+        return self.get_queryset().actives()
+
+    def avec_statistiques(self):
+        return self.get_queryset().avec_statistiques()
+
+
+class CoproprietaireQuerySet(models.QuerySet):
+    """QuerySet personnalisé pour les copropriétaires"""
+
+    def actifs(self):
+        return self.filter(is_active=True)
+
+    def avec_impayes(self, echues_seulement=False):
+        """
+        Annote le montant restant dû et le nombre de cotisations impayées
+
+        Lus par get_total_impaye() quand ils sont présents. Avec
+        echues_seulement, seules les cotisations impayées dont l'échéance
+        est passée sont comptées (retards).
+        """
+        from django.utils import timezone
+
+        from apps.syndic.models import CotisationSyndic
+
+        impayees = CotisationSyndic.objects.filter(coproprietaire=OuterRef('pk'))
+        if echues_seulement:
+            impayees = impayees.filter(statut='impaye', date_echeance__lt=timezone.localdate())
+        else:
+            impayees = impayees.filter(statut__in=STATUTS_IMPAYES)
+        impayees = impayees.order_by().values('coproprietaire')
+
+        return self.annotate(
+            total_impaye_annote=Coalesce(
+                Subquery(
+                    impayees.annotate(
+                        total=Sum(F('montant_theorique') - F('montant_percu'))
+                    ).values('total')[:1],
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                ),
+                ZERO,
+            ),
+            nb_cotisations_impayees=Coalesce(
+                Subquery(impayees.annotate(nb=Count('pk')).values('nb')[:1]),
+                0,
+            ),
+        )
+
+    def debiteurs(self, echues_seulement=False):
+        """Copropriétaires ayant un reste dû, du plus endetté au moins endetté"""
+        return self.avec_impayes(echues_seulement).filter(total_impaye_annote__gt=0).order_by('-total_impaye_annote')
+
+
+class CoproprietaireManager(models.Manager):
+    """Manager pour Coproprietaire"""
+
+    def get_queryset(self):
+        return CoproprietaireQuerySet(self.model, using=self._db)
+
+    def actifs(self):
+        return self.get_queryset().actifs()
+
+    def avec_impayes(self, echues_seulement=False):
+        return self.get_queryset().avec_impayes(echues_seulement)
+
+    def debiteurs(self, echues_seulement=False):
+        return self.get_queryset().debiteurs(echues_seulement)
+
+
+class BudgetPrevisionnelQuerySet(models.QuerySet):
+    """QuerySet personnalisé pour les budgets prévisionnels"""
+
+    def avec_execution(self):
+        """
+        Annote les totaux prévus et réalisés des lignes du budget
+
+        Lus par montant_depense, taux_execution et montant_restant quand ils
+        sont présents.
+        """
+        from apps.syndic.models import LigneBudget
+
+        lignes = LigneBudget.objects.filter(budget=OuterRef('pk')).order_by().values('budget')
+
+        return self.annotate(
+            montant_depense_annote=Coalesce(
+                Subquery(
+                    lignes.annotate(total=Sum('montant_realise')).values('total')[:1],
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                ),
+                ZERO,
+            ),
+            montant_prevu_annote=Coalesce(
+                Subquery(
+                    lignes.annotate(total=Sum('montant_prevu')).values('total')[:1],
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                ),
+                ZERO,
+            ),
+        )
+
+
+class BudgetPrevisionnelManager(models.Manager):
+    """Manager pour BudgetPrevisionnel"""
+
+    def get_queryset(self):
+        return BudgetPrevisionnelQuerySet(self.model, using=self._db)
+
+    def avec_execution(self):
+        return self.get_queryset().avec_execution()
@@ -4,6 +4,7 @@ Modèles pour la gestion du budget prévisionnel de la copropriété.
 from django.db import models
 from django.core.validators import MinValueValidator
 from apps.core.models import TimestampedModel
+from apps.syndic.managers import BudgetPrevisionnelManager
 
 
 class BudgetPrevisionnel(TimestampedModel):
@@ -77,6 +78,8 @@ class BudgetPrevisionnel(TimestampedModel):
         help_text="PV d'AG, budget détaillé, etc."
     )
 
+    objects = BudgetPrevisionnelManager()
+
     class Meta:
         verbose_name = "Budget prévisionnel"
         verbose_name_plural = "Budgets prévisionnels"
@@ -92,11 +95,10 @@ class BudgetPrevisionnel(TimestampedModel):
 
     @property
     def montant_depense(self):
-        """Retourne le montant total dépensé."""
-        return sum(
-            ligne.montant_realise or 0
-            for ligne in self.lignes.all()
-        )
+        """Retourne le montant total dépensé (annoté par avec_execution() si présent)."""
+        if hasattr(self, 'montant_depense_annote'):
+            return self.montant_depense_annote
+        return self.lignes.aggregate(total=models.Sum('montant_realise'))['total'] or 0
 
     @property
     def taux_execution(self):
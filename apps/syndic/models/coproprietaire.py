@@ -6,6 +6,7 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from apps.core.models import TimestampedModel
+from apps.syndic.managers import CoproprietaireManager, STATUTS_IMPAYES
 
 
 class Coproprietaire(TimestampedModel):
@@ -81,6 +82,8 @@ class Coproprietaire(TimestampedModel):
         help_text="Notes internes sur ce copropriétaire"
     )
 
+    objects = CoproprietaireManager()
+
     class Meta:
         verbose_name = "Copropriétaire"
         verbose_name_plural = "Copropriétaires"
@@ -136,12 +139,12 @@ class Coproprietaire(TimestampedModel):
 
     def get_cotisations_impayees(self):
         """Retourne les cotisations impayées de ce copropriétaire."""
-        return self.cotisations.filter(statut__in=['en_cours', 'impaye'])
+        return self.cotisations.filter(statut__in=STATUTS_IMPAYES)
 
     def get_total_impaye(self):
-        """Retourne le montant total impayé."""
-        cotisations_impayees = self.get_cotisations_impayees()
-        return sum(
-            cot.montant_theorique - cot.montant_percu
-            for cot in cotisations_impayees
-        )
+        """Retourne le montant total impayé (annoté par avec_impayes() si présent)."""
+        if hasattr(self, 'total_impaye_annote'):
+            return self.total_impaye_annote
+        return self.get_cotisations_impayees().aggregate(
+            total=models.Sum(models.F('montant_theorique') - models.F('montant_percu'))
+        )['total'] or 0
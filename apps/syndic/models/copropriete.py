@@ -5,6 +5,7 @@ Une copropriété est liée à une résidence dont Imany assure le syndic.
 from django.db import models
 from django.core.validators import MinValueValidator
 from apps.core.models import TimestampedModel
+from apps.syndic.managers import CoproprieteManager
 
 
 class Copropriete(TimestampedModel):
@@ -74,6 +75,8 @@ class Copropriete(TimestampedModel):
         help_text="Notes internes sur la copropriété"
     )
 
+    objects = CoproprieteManager()
+
     class Meta:
         verbose_name = "Copropriété"
         verbose_name_plural = "Copropriétés"
@@ -87,7 +90,9 @@ class Copropriete(TimestampedModel):
 
     @property
     def nombre_coproprietaires(self):
-        """Retourne le nombre de copropriétaires."""
+        """Retourne le nombre de copropriétaires (annoté par avec_statistiques() si présent)."""
+        if hasattr(self, 'nb_coproprietaires_annote'):
+            return self.nb_coproprietaires_annote
         return self.coproprietaires.count()
 
     @property
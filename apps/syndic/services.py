@@ -0,0 +1,513 @@
+# apps/syndic/services.py
+"""
+Génération des cotisations syndic
+
+- generer_cotisations(): appels de fonds d'une période pour toutes les
+  copropriétés actives, calculés en mémoire depuis les tantièmes et écrits
+  en un upsert (bulk_create avec update_conflicts)
+- rafraichir_statuts_cotisations(): recalcul nocturne des statuts (à venir,
+  en cours, impayé, payé) en un UPDATE ... CASE, sans passer par save()
+- RecouvrementAnalytics: taux de recouvrement par copropriété et par période,
+  cohortes de débiteurs et distribution des retards de paiement
+"""
+
+import datetime
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    Case, Count, DurationField, ExpressionWrapper, F, Max, Min, Q, Sum, Value, When,
+)
+from django.utils import timezone
+
+from apps.syndic.managers import STATUTS_IMPAYES
+from apps.syndic.models import Copropriete, Coproprietaire, CotisationSyndic, PaiementCotisation
+
+PERIODES_PAR_AN = {
+    'mensuel': 12,
+    'trimestriel': 4,
+    'semestriel': 2,
+    'annuel': 1,
+}
+
+CHAMPS_MIS_A_JOUR = [
+    'montant_theorique', 'date_emission', 'date_echeance',
+    'statut', 'date_paiement_complet', 'updated_at',
+]
+
+
+def periode_courante(aujourd_hui=None):
+    """Année et trimestre courants (ex: 2025, 'Q3')"""
+    aujourd_hui = aujourd_hui or timezone.now().date()
+    return aujourd_hui.year, f'Q{(aujourd_hui.month - 1) // 3 + 1}'
+
+
+def periode_applicable(periode_cotisation, periode):
+    """Vérifie qu'une période (Q1, S2, M03, A1...) correspond à la périodicité de la copropriété"""
+    if periode_cotisation == 'mensuel':
+        return True
+    if periode_cotisation == 'trimestriel':
+        return periode.startswith('Q')
+    if periode_cotisation == 'semestriel':
+        return periode in ['S1', 'S2']
+    if periode_cotisation == 'annuel':
+        return periode == 'A1'
+    return True
+
+
+def date_echeance(annee, periode):
+    """Dernier jour de la période (Q1..Q4, S1/S2, A1, M01..M12)"""
+    fins_de_periode = {
+        'Q1': (3, 31), 'Q2': (6, 30), 'Q3': (9, 30), 'Q4': (12, 31),
+        'S1': (6, 30), 'S2': (12, 31), 'A1': (12, 31),
+    }
+    if periode in fins_de_periode:
+        return datetime.date(annee, *fins_de_periode[periode])
+    if periode.startswith('M'):
+        mois = int(periode[1:])
+        if mois == 12:
+            return datetime.date(annee, 12, 31)
+        return datetime.date(annee, mois + 1, 1) - datetime.timedelta(days=1)
+    # Par défaut, fin du trimestre courant
+    return timezone.now().date() + datetime.timedelta(days=90)
+
+
+def montant_cotisation(copropriete, nombre_tantiemes):
+    """Montant d'une cotisation pour une période, arrondi au centime"""
+    if not copropriete.nombre_tantiemes_total:
+        return Decimal('0.00')
+    par_periode = copropriete.budget_annuel / PERIODES_PAR_AN.get(copropriete.periode_cotisation, 4)
+    montant = par_periode * nombre_tantiemes / copropriete.nombre_tantiemes_total
+    return montant.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def generer_cotisations(annee, periode, force=False, dry_run=False, coproprietes=None):
+    """
+    Génère les cotisations d'une période pour les copropriétaires actifs
+
+    Trois lectures (copropriétés, copropriétaires, cotisations existantes) puis
+    un seul upsert. Les cotisations existantes ne sont recalculées qu'avec
+    force=True; leur référence et le montant déjà perçu sont conservés.
+
+    Args:
+        annee: année de la cotisation
+        periode: Q1..Q4, S1/S2, A1 ou M01..M12
+        force: recalcule les cotisations déjà émises
+        dry_run: calcule sans rien écrire
+        coproprietes: queryset de copropriétés (défaut: toutes les actives)
+
+    Returns:
+        dict: coproprietes (une entrée par copropriété active), creees,
+              mises_a_jour, ignorees, montant_total
+    """
+    coproprietes = Copropriete.objects.filter(is_active=True) if coproprietes is None else coproprietes
+    coproprietes = list(coproprietes.select_related('residence'))
+    eligibles = {
+        c.pk: c for c in coproprietes if periode_applicable(c.periode_cotisation, periode)
+    }
+
+    coproprietaires = list(
+        Coproprietaire.objects.filter(copropriete_id__in=eligibles, is_active=True)
+        .order_by('copropriete_id', 'pk')
+        .only('pk', 'copropriete_id', 'nombre_tantiemes')
+    )
+    existantes = {
+        ligne['coproprietaire_id']: ligne
+        for ligne in CotisationSyndic.objects.filter(
+            coproprietaire__in=[c.pk for c in coproprietaires], periode=periode, annee=annee
+        ).order_by().values('coproprietaire_id', 'reference', 'montant_percu', 'statut', 'date_paiement_complet')
+    }
+
+    date_emission = timezone.now().date()
+    echeance = date_echeance(annee, periode)
+    cotisations = []
+    par_copropriete = defaultdict(lambda: {'nb': 0, 'montant': Decimal('0.00'), 'ignorees': 0})
+    resultat = {'creees': 0, 'mises_a_jour': 0, 'ignorees': 0, 'montant_total': Decimal('0.00')}
+
+    for coproprietaire in coproprietaires:
+        stats = par_copropriete[coproprietaire.copropriete_id]
+        existante = existantes.get(coproprietaire.pk)
+        if existante and not force:
+            stats['ignorees'] += 1
+            resultat['ignorees'] += 1
+            continue
+
+        montant = montant_cotisation(
+            eligibles[coproprietaire.copropriete_id], coproprietaire.nombre_tantiemes
+        )
+        cotisation = CotisationSyndic(
+            coproprietaire_id=coproprietaire.pk,
+            periode=periode,
+            annee=annee,
+            montant_theorique=montant,
+            date_emission=date_emission,
+            date_echeance=echeance,
+            # Référence déterministe: unique par (copropriétaire, période, année)
+            reference=f'COT-{annee}-{periode}-{coproprietaire.pk:06d}',
+            statut='en_cours',
+        )
+        if existante:
+            cotisation.reference = existante['reference']
+            cotisation.montant_percu = existante['montant_percu']
+            cotisation.statut = existante['statut']
+            cotisation.date_paiement_complet = existante['date_paiement_complet']
+            resultat['mises_a_jour'] += 1
+        else:
+            resultat['creees'] += 1
+        cotisation.update_statut()
+        cotisations.append(cotisation)
+
+        stats['nb'] += 1
+        stats['montant'] += montant
+        resultat['montant_total'] += montant
+
+    if cotisations and not dry_run:
+        # bulk_create regroupe déjà les lots dans une transaction
+        CotisationSyndic.objects.bulk_create(
+            cotisations,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['coproprietaire', 'periode', 'annee'],
+            update_fields=CHAMPS_MIS_A_JOUR,
+        )
+        # bulk_create ne déclenche pas les signaux d'invalidation
+        invalider_recouvrement(annee, periode)
+
+    resultat['coproprietes'] = [
+        {
+            'copropriete': copropriete,
+            'eligible': copropriete.pk in eligibles,
+            'nb_cotisations': par_copropriete[copropriete.pk]['nb'],
+            'nb_ignorees': par_copropriete[copropriete.pk]['ignorees'],
+            'montant': par_copropriete[copropriete.pk]['montant'],
+        }
+        for copropriete in coproprietes
+    ]
+    return resultat
+
+
+def rafraichir_statuts_cotisations(aujourd_hui=None, cotisations=None):
+    """
+    Recalcule les statuts des cotisations selon les dates et le montant perçu
+
+    Mêmes règles que CotisationSyndic.update_statut(), appliquées en base
+    en un seul UPDATE restreint aux lignes dont le statut change. Les
+    cotisations annulées ne sont pas touchées.
+
+    Returns:
+        int: nombre de cotisations modifiées
+    """
+    aujourd_hui = aujourd_hui or timezone.now().date()
+    cotisations = CotisationSyndic.objects.all() if cotisations is None else cotisations
+
+    paye = Q(montant_percu__gte=F('montant_theorique'))
+    a_venir = ~paye & Q(date_emission__gt=aujourd_hui)
+    en_cours = ~paye & Q(date_emission__lte=aujourd_hui, date_echeance__gt=aujourd_hui)
+    impaye = ~paye & Q(date_emission__lte=aujourd_hui, date_echeance__lte=aujourd_hui)
+
+    a_modifier = (
+        (paye & ~Q(statut='paye'))
+        | (a_venir & ~Q(statut='a_venir'))
+        | (en_cours & ~Q(statut='en_cours'))
+        | (impaye & ~Q(statut='impaye'))
+    )
+
+    return cotisations.exclude(statut='annule').filter(a_modifier).update(
+        statut=Case(
+            When(paye, then=Value('paye')),
+            When(date_emission__gt=aujourd_hui, then=Value('a_venir')),
+            When(date_echeance__gt=aujourd_hui, then=Value('en_cours')),
+            default=Value('impaye'),
+        ),
+        date_paiement_complet=Case(
+            When(paye & Q(date_paiement_complet__isnull=True), then=Value(aujourd_hui)),
+            default=F('date_paiement_complet'),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+# ============================================================================
+# ANALYSE DU RECOUVREMENT
+# ============================================================================
+
+# Tranches de retard de paiement (jours après l'échéance, borne incluse)
+TRANCHES_RETARD = [
+    ('a_temps', "À l'échéance", 0),
+    ('1_30', '1 à 30 jours', 30),
+    ('31_90', '31 à 90 jours', 90),
+    ('plus_90', 'Plus de 90 jours', None),
+]
+
+# Ancienneté de la plus vieille cotisation échue et impayée d'un débiteur
+COHORTES_DEBITEURS = [
+    ('0_30', 'Moins de 30 jours', 30),
+    ('31_90', '31 à 90 jours', 90),
+    ('91_180', '91 à 180 jours', 180),
+    ('181_365', '6 mois à 1 an', 365),
+    ('plus_365', "Plus d'un an", None),
+]
+
+CLE_CACHE_PERIODE = 'syndic:recouvrement:{annee}-{periode}'
+CLE_CACHE_INDEX = 'syndic:recouvrement:periodes'
+
+
+def _cle_periode(annee, periode):
+    return CLE_CACHE_PERIODE.format(annee=annee, periode=periode)
+
+
+def invalider_recouvrement(annee, periode):
+    """Retire une période du cache (paiement tardif, cotisation modifiée)"""
+    cache.delete(_cle_periode(annee, periode))
+
+
+def _filtre_tranches(champ, tranches):
+    """Q par tranche: champ (durée) compris entre la borne précédente et la borne"""
+    filtres = {}
+    precedente = None
+    for code, _, jours in tranches:
+        filtre = Q()
+        if precedente is not None:
+            filtre &= Q(**{f'{champ}__gt': datetime.timedelta(days=precedente)})
+        if jours is not None:
+            filtre &= Q(**{f'{champ}__lte': datetime.timedelta(days=jours)})
+        filtres[code] = filtre
+        precedente = jours
+    return filtres
+
+
+class RecouvrementAnalytics:
+    """
+    Recouvrement des cotisations syndic sur toutes les périodes
+
+    Les totaux par (copropriété, période) viennent d'une requête groupée sur
+    CotisationSyndic et d'une autre sur PaiementCotisation (retards). Une
+    période close (échéance dépassée de SYNDIC_DELAI_CLOTURE_JOURS) est mise
+    en cache et n'est plus recalculée; les signaux l'invalident si une
+    cotisation ou un paiement de cette période change.
+
+    Args:
+        coproprietes: ids de copropriétés à retenir (défaut: toutes)
+        aujourd_hui: date de référence (défaut: aujourd'hui)
+    """
+
+    def __init__(self, coproprietes=None, aujourd_hui=None):
+        self.coproprietes = set(coproprietes) if coproprietes is not None else None
+        self.aujourd_hui = aujourd_hui or timezone.now().date()
+        self.delai_cloture = datetime.timedelta(
+            days=getattr(settings, 'SYNDIC_DELAI_CLOTURE_JOURS', 0)
+        )
+        self.cache_ttl = getattr(settings, 'SYNDIC_RECOUVREMENT_CACHE_TTL', 60 * 60 * 24 * 30)
+        self._donnees = None
+
+    def periode_close(self, annee, periode):
+        return date_echeance(annee, periode) + self.delai_cloture < self.aujourd_hui
+
+    # ------------------------------------------------------------------
+    # Données par période (cache + requêtes groupées)
+    # ------------------------------------------------------------------
+
+    def _calculer(self, exclues):
+        """
+        Totaux par période et copropriété, hors périodes déjà en cache
+
+        Returns:
+            dict: (annee, periode) -> {copropriete_id: totaux}
+        """
+        exclusion = Q()
+        for annee, periode in exclues:
+            exclusion |= Q(annee=annee, periode=periode)
+
+        cotisations = CotisationSyndic.objects.exclude(statut='annule')
+        if exclues:
+            cotisations = cotisations.exclude(exclusion)
+
+        donnees = defaultdict(dict)
+        for ligne in cotisations.order_by().values(
+            'coproprietaire__copropriete_id', 'annee', 'periode'
+        ).annotate(
+            theorique=Sum('montant_theorique'),
+            percu=Sum('montant_percu'),
+            nb_cotisations=Count('id'),
+            nb_payees=Count('id', filter=Q(montant_percu__gte=F('montant_theorique'))),
+            echeance=Max('date_echeance'),
+        ):
+            donnees[(ligne['annee'], ligne['periode'])][ligne['coproprietaire__copropriete_id']] = {
+                'theorique': ligne['theorique'],
+                'percu': ligne['percu'],
+                'nb_cotisations': ligne['nb_cotisations'],
+                'nb_payees': ligne['nb_payees'],
+                'echeance': ligne['echeance'],
+                'retards': {code: {'nb': 0, 'montant': Decimal('0.00')} for code, _, _ in TRANCHES_RETARD},
+            }
+
+        paiements = PaiementCotisation.objects.exclude(cotisation__statut='annule')
+        if exclues:
+            paiements = paiements.exclude(
+                cotisation__in=CotisationSyndic.objects.filter(exclusion).values('pk')
+            )
+        tranches = _filtre_tranches('retard', TRANCHES_RETARD)
+        agregats = {}
+        for code, filtre in tranches.items():
+            agregats[f'nb_{code}'] = Count('id', filter=filtre)
+            agregats[f'montant_{code}'] = Sum('montant', filter=filtre)
+
+        for ligne in paiements.annotate(
+            retard=ExpressionWrapper(
+                F('date_paiement') - F('cotisation__date_echeance'), output_field=DurationField()
+            )
+        ).order_by().values(
+            'cotisation__coproprietaire__copropriete_id', 'cotisation__annee', 'cotisation__periode'
+        ).annotate(**agregats):
+            cle = (ligne['cotisation__annee'], ligne['cotisation__periode'])
+            totaux = donnees[cle].get(ligne['cotisation__coproprietaire__copropriete_id'])
+            if totaux is None:
+                continue
+            for code in tranches:
+                totaux['retards'][code] = {
+                    'nb': ligne[f'nb_{code}'],
+                    'montant': ligne[f'montant_{code}'] or Decimal('0.00'),
+                }
+        return donnees
+
+    def donnees(self):
+        """Totaux par période: (annee, periode) -> {copropriete_id: totaux}"""
+        if self._donnees is not None:
+            return self._donnees
+
+        index = cache.get(CLE_CACHE_INDEX) or []
+        en_cache = cache.get_many([_cle_periode(a, p) for a, p in index])
+        donnees = {
+            (a, p): en_cache[_cle_periode(a, p)] for a, p in index if _cle_periode(a, p) in en_cache
+        }
+
+        calculees = self._calculer(list(donnees))
+        a_mettre_en_cache = {
+            _cle_periode(a, p): valeur
+            for (a, p), valeur in calculees.items() if self.periode_close(a, p)
+        }
+        if a_mettre_en_cache:
+            cache.set_many(a_mettre_en_cache, self.cache_ttl)
+            cache.set(
+                CLE_CACHE_INDEX,
+                sorted(set(donnees) | {(a, p) for a, p in calculees if self.periode_close(a, p)}),
+                None,
+            )
+
+        donnees.update(calculees)
+        self._donnees = donnees
+        return donnees
+
+    def _periodes_triees(self):
+        return sorted(
+            self.donnees().items(),
+            key=lambda item: (item[0][0], date_echeance(*item[0]), item[0][1]),
+        )
+
+    def _retenue(self, copropriete_id):
+        return self.coproprietes is None or copropriete_id in self.coproprietes
+
+    @staticmethod
+    def _taux(percu, theorique):
+        return round(float(percu / theorique * 100), 1) if theorique else 0
+
+    # ------------------------------------------------------------------
+    # Restitutions
+    # ------------------------------------------------------------------
+
+    def series(self):
+        """
+        Taux de recouvrement par période, pour chaque copropriété
+
+        Returns:
+            dict: copropriete_id -> liste chronologique de périodes
+        """
+        series = defaultdict(list)
+        for (annee, periode), par_copropriete in self._periodes_triees():
+            for copropriete_id, totaux in par_copropriete.items():
+                if not self._retenue(copropriete_id):
+                    continue
+                series[copropriete_id].append({
+                    'annee': annee,
+                    'periode': periode,
+                    'libelle': f'{annee}-{periode}',
+                    'close': self.periode_close(annee, periode),
+                    'theorique': totaux['theorique'],
+                    'percu': totaux['percu'],
+                    'reste': totaux['theorique'] - totaux['percu'],
+                    'nb_cotisations': totaux['nb_cotisations'],
+                    'nb_payees': totaux['nb_payees'],
+                    'taux_recouvrement': self._taux(totaux['percu'], totaux['theorique']),
+                })
+        return dict(series)
+
+    def consolidee(self):
+        """Taux de recouvrement par période, toutes copropriétés retenues confondues"""
+        resultats = []
+        for (annee, periode), par_copropriete in self._periodes_triees():
+            lignes = [t for c, t in par_copropriete.items() if self._retenue(c)]
+            if not lignes:
+                continue
+            theorique = sum((t['theorique'] for t in lignes), Decimal('0.00'))
+            percu = sum((t['percu'] for t in lignes), Decimal('0.00'))
+            resultats.append({
+                'annee': annee,
+                'periode': periode,
+                'libelle': f'{annee}-{periode}',
+                'close': self.periode_close(annee, periode),
+                'theorique': theorique,
+                'percu': percu,
+                'reste': theorique - percu,
+                'taux_recouvrement': self._taux(percu, theorique),
+            })
+        return resultats
+
+    def distribution_retards(self):
+        """Nombre et montant des paiements par tranche de retard, toutes périodes"""
+        distribution = {
+            code: {'code': code, 'libelle': libelle, 'nb': 0, 'montant': Decimal('0.00')}
+            for code, libelle, _ in TRANCHES_RETARD
+        }
+        for par_copropriete in self.donnees().values():
+            for copropriete_id, totaux in par_copropriete.items():
+                if not self._retenue(copropriete_id):
+                    continue
+                for code, valeurs in totaux['retards'].items():
+                    distribution[code]['nb'] += valeurs['nb']
+                    distribution[code]['montant'] += valeurs['montant']
+        total = sum(d['nb'] for d in distribution.values())
+        for tranche in distribution.values():
+            tranche['pourcentage'] = round(tranche['nb'] / total * 100, 1) if total else 0
+        return list(distribution.values())
+
+    def cohortes_debiteurs(self):
+        """
+        Débiteurs groupés par ancienneté de leur plus vieille cotisation échue
+
+        Calculé en direct (une requête groupée par copropriétaire).
+        """
+        cohortes = {
+            code: {'code': code, 'libelle': libelle, 'nb_debiteurs': 0, 'montant': Decimal('0.00')}
+            for code, libelle, _ in COHORTES_DEBITEURS
+        }
+        echues = CotisationSyndic.objects.filter(
+            statut__in=STATUTS_IMPAYES, date_echeance__lt=self.aujourd_hui
+        )
+        if self.coproprietes is not None:
+            echues = echues.filter(coproprietaire__copropriete_id__in=self.coproprietes)
+
+        for ligne in echues.order_by().values('coproprietaire').annotate(
+            plus_ancienne=Min('date_echeance'),
+            du=Sum(F('montant_theorique') - F('montant_percu')),
+        ):
+            if not ligne['du'] or ligne['du'] <= 0:
+                continue
+            anciennete = (self.aujourd_hui - ligne['plus_ancienne']).days
+            for code, _, jours in COHORTES_DEBITEURS:
+                if jours is None or anciennete <= jours:
+                    cohortes[code]['nb_debiteurs'] += 1
+                    cohortes[code]['montant'] += ligne['du']
+                    break
+        return list(cohortes.values())
@@ -0,0 +1,23 @@
+# apps/syndic/signals.py
+"""
+Signals pour le module syndic
+Invalidation du cache d'analyse du recouvrement quand une période close change
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.syndic.models import CotisationSyndic, PaiementCotisation
+from apps.syndic.services import invalider_recouvrement
+
+
+@receiver([post_save, post_delete], sender=CotisationSyndic)
+def invalider_recouvrement_cotisation(sender, instance, **kwargs):
+    """Une cotisation créée, modifiée ou supprimée change les totaux de sa période"""
+    invalider_recouvrement(instance.annee, instance.periode)
+
+
+@receiver([post_save, post_delete], sender=PaiementCotisation)
+def invalider_recouvrement_paiement(sender, instance, **kwargs):
+    """Un paiement (souvent tardif) change le recouvrement de la période de sa cotisation"""
+    invalider_recouvrement(instance.cotisation.annee, instance.cotisation.periode)
@@ -0,0 +1,297 @@
+"""
+Tests pour le module syndic
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.syndic.models import (
+    BudgetPrevisionnel, Copropriete, Coproprietaire, CotisationSyndic, LigneBudget,
+    PaiementCotisation,
+)
+from apps.syndic.services import (
+    RecouvrementAnalytics, generer_cotisations, rafraichir_statuts_cotisations,
+)
+
+from tests.factories import make_residence, make_tiers
+
+
+class GenerationCotisationsTest(TestCase):
+    """Tests de la génération groupée des cotisations"""
+
+    def setUp(self):
+        self.copropriete = Copropriete.objects.create(
+            residence=make_residence(),
+            nombre_tantiemes_total=1000,
+            periode_cotisation='trimestriel',
+            budget_annuel=Decimal('1200000.00'),
+            date_debut_gestion=date(2024, 1, 1),
+        )
+        self.coproprietaires = [
+            Coproprietaire.objects.create(
+                tiers=make_tiers(nom, type_tiers='coproprietaire'),
+                copropriete=self.copropriete,
+                nombre_tantiemes=tantiemes,
+                date_entree=date(2024, 1, 1),
+            )
+            for nom, tantiemes in [('Diop', 600), ('Fall', 300), ('Ndiaye', 100)]
+        ]
+
+    def test_montants_depuis_les_tantiemes(self):
+        """Test du calcul des montants et de l'écriture en un upsert"""
+        with self.assertNumQueries(4):
+            resultat = generer_cotisations(2025, 'Q1')
+
+        self.assertEqual(resultat['creees'], 3)
+        self.assertEqual(resultat['montant_total'], Decimal('300000.00'))
+        montants = dict(
+            CotisationSyndic.objects.values_list('coproprietaire__tiers__nom', 'montant_theorique')
+        )
+        self.assertEqual(montants, {
+            'Diop': Decimal('180000.00'), 'Fall': Decimal('90000.00'), 'Ndiaye': Decimal('30000.00'),
+        })
+        cotisation = CotisationSyndic.objects.get(coproprietaire=self.coproprietaires[0])
+        self.assertEqual(cotisation.date_echeance, date(2025, 3, 31))
+        self.assertEqual(cotisation.statut, 'impaye')
+
+    def test_existantes_conservees_sans_force(self):
+        """Test que les cotisations existantes ne sont recalculées qu'avec --force"""
+        generer_cotisations(2025, 'Q1')
+        cotisation = CotisationSyndic.objects.get(coproprietaire=self.coproprietaires[0])
+        CotisationSyndic.objects.filter(pk=cotisation.pk).update(montant_percu=Decimal('180000.00'))
+        Copropriete.objects.filter(pk=self.copropriete.pk).update(budget_annuel=Decimal('2400000.00'))
+
+        resultat = generer_cotisations(2025, 'Q1')
+        self.assertEqual((resultat['creees'], resultat['ignorees']), (0, 3))
+
+        resultat = generer_cotisations(2025, 'Q1', force=True)
+        self.assertEqual(resultat['mises_a_jour'], 3)
+        self.assertEqual(CotisationSyndic.objects.count(), 3)
+
+        mise_a_jour = CotisationSyndic.objects.get(pk=cotisation.pk)
+        self.assertEqual(mise_a_jour.reference, cotisation.reference)
+        self.assertEqual(mise_a_jour.montant_theorique, Decimal('360000.00'))
+        self.assertEqual(mise_a_jour.montant_percu, Decimal('180000.00'))
+        self.assertEqual(mise_a_jour.statut, 'impaye')
+
+    def test_commande_et_periodicite(self):
+        """Test de la commande: simulation, puis période hors périodicité ignorée"""
+        call_command('generate_syndic_cotisations', '--annee', '2025', '--periode', 'Q2',
+                     '--dry-run', stdout=StringIO())
+        self.assertFalse(CotisationSyndic.objects.exists())
+
+        call_command('generate_syndic_cotisations', '--annee', '2025', '--periode', 'Q2',
+                     stdout=StringIO())
+        self.assertEqual(CotisationSyndic.objects.filter(periode='Q2').count(), 3)
+
+        call_command('generate_syndic_cotisations', '--annee', '2025', '--periode', 'M01',
+                     stdout=StringIO())
+        self.assertFalse(CotisationSyndic.objects.filter(periode='M01').exists())
+
+
+class StatutsCotisationsTest(TestCase):
+    """Tests du recalcul groupé des statuts de cotisation"""
+
+    def setUp(self):
+        copropriete = Copropriete.objects.create(
+            residence=make_residence(),
+            nombre_tantiemes_total=1000,
+            budget_annuel=Decimal('1200000.00'),
+            date_debut_gestion=date(2024, 1, 1),
+        )
+        self.coproprietaire = Coproprietaire.objects.create(
+            tiers=make_tiers('Diop', type_tiers='coproprietaire'),
+            copropriete=copropriete,
+            nombre_tantiemes=500,
+            date_entree=date(2024, 1, 1),
+        )
+
+    def make_cotisation(self, periode, statut, montant_percu='0.00'):
+        echeances = {'Q1': date(2025, 3, 31), 'Q2': date(2025, 6, 30), 'Q3': date(2025, 9, 30)}
+        cotisation = CotisationSyndic.objects.create(
+            coproprietaire=self.coproprietaire, periode=periode, annee=2025,
+            montant_theorique=Decimal('150000.00'),
+            date_emission=echeances[periode].replace(day=1), date_echeance=echeances[periode],
+        )
+        # Statut figé, comme une ligne devenue obsolète
+        CotisationSyndic.objects.filter(pk=cotisation.pk).update(
+            statut=statut, montant_percu=Decimal(montant_percu)
+        )
+        return cotisation
+
+    def test_statuts_recalcules_en_une_requete(self):
+        """Test des règles de update_statut() appliquées en base"""
+        echue = self.make_cotisation('Q1', 'en_cours')
+        soldee = self.make_cotisation('Q2', 'en_cours', montant_percu='150000.00')
+        future = self.make_cotisation('Q3', 'impaye')
+
+        with self.assertNumQueries(1):
+            count = rafraichir_statuts_cotisations(aujourd_hui=date(2025, 6, 15))
+
+        self.assertEqual(count, 3)
+        statuts = dict(CotisationSyndic.objects.values_list('pk', 'statut'))
+        self.assertEqual(statuts[echue.pk], 'impaye')
+        self.assertEqual(statuts[soldee.pk], 'paye')
+        self.assertEqual(statuts[future.pk], 'a_venir')
+        self.assertEqual(
+            CotisationSyndic.objects.get(pk=soldee.pk).date_paiement_complet, date(2025, 6, 15)
+        )
+        self.assertEqual(rafraichir_statuts_cotisations(aujourd_hui=date(2025, 6, 15)), 0)
+
+
+class AnnotationsSyndicTest(TestCase):
+    """Tests des impayés et de l'exécution budgétaire annotés"""
+
+    def setUp(self):
+        self.copropriete = Copropriete.objects.create(
+            residence=make_residence(),
+            nombre_tantiemes_total=1000,
+            budget_annuel=Decimal('1200000.00'),
+            date_debut_gestion=date(2024, 1, 1),
+        )
+        for i, nom in enumerate(['Diop', 'Fall', 'Ndiaye']):
+            Coproprietaire.objects.create(
+                tiers=make_tiers(nom, type_tiers='coproprietaire'),
+                copropriete=self.copropriete,
+                nombre_tantiemes=100 * (i + 1),
+                date_entree=date(2024, 1, 1),
+            )
+        generer_cotisations(2025, 'Q1')
+        generer_cotisations(2025, 'Q2')
+        CotisationSyndic.objects.filter(
+            coproprietaire__tiers__nom='Fall', periode='Q1'
+        ).update(montant_percu=Decimal('20000.00'))
+        CotisationSyndic.objects.filter(coproprietaire__tiers__nom='Ndiaye').update(statut='paye')
+
+        for annee in [2024, 2025]:
+            budget = BudgetPrevisionnel.objects.create(
+                copropriete=self.copropriete, annee=annee, montant_total=Decimal('1000000.00')
+            )
+            LigneBudget.objects.bulk_create([
+                LigneBudget(budget=budget, categorie='nettoyage', description='Nettoyage',
+                            montant_prevu=Decimal('600000.00'), montant_realise=Decimal('300000.00')),
+                LigneBudget(budget=budget, categorie='eau', description='Eau',
+                            montant_prevu=Decimal('400000.00'), montant_realise=Decimal('100000.00')),
+            ])
+
+    def test_impayes_annotes(self):
+        """Test du reste dû annoté, identique au calcul par copropriétaire"""
+        with self.assertNumQueries(1):
+            impayes = {
+                c.tiers.nom: (c.get_total_impaye(), c.nb_cotisations_impayees)
+                for c in Coproprietaire.objects.avec_impayes().select_related('tiers')
+            }
+
+        # Q1 + Q2: 30 000 par période pour 100 tantièmes
+        self.assertEqual(impayes['Diop'], (Decimal('60000.00'), 2))
+        self.assertEqual(impayes['Fall'], (Decimal('100000.00'), 2))
+        self.assertEqual(impayes['Ndiaye'], (Decimal('0.00'), 0))
+        fall = Coproprietaire.objects.get(tiers__nom='Fall')
+        self.assertEqual(fall.get_total_impaye(), Decimal('100000.00'))
+        self.assertEqual(
+            [c.tiers.nom for c in Coproprietaire.objects.debiteurs().select_related('tiers')],
+            ['Fall', 'Diop'],
+        )
+
+    def test_debiteurs_echeances_passees(self):
+        """Test: seules les cotisations impayées échues comptent dans les retards"""
+        CotisationSyndic.objects.filter(coproprietaire__tiers__nom='Diop', periode='Q2').update(
+            date_echeance=timezone.localdate() + timedelta(days=10)
+        )
+        CotisationSyndic.objects.filter(coproprietaire__tiers__nom='Fall').update(statut='impaye')
+
+        retards = {
+            c.tiers.nom: (c.total_impaye_annote, c.nb_cotisations_impayees)
+            for c in Coproprietaire.objects.debiteurs(echues_seulement=True).select_related('tiers')
+        }
+
+        self.assertEqual(retards['Diop'], (Decimal('30000.00'), 1))
+        self.assertEqual(retards['Fall'], (Decimal('100000.00'), 2))
+        self.assertNotIn('Ndiaye', retards)
+
+    def test_execution_budgetaire_annotee(self):
+        """Test de l'exécution budgétaire en une requête pour toute la liste"""
+        with self.assertNumQueries(1):
+            execution = [
+                (b.montant_depense, b.taux_execution, b.montant_restant)
+                for b in BudgetPrevisionnel.objects.avec_execution()
+            ]
+
+        self.assertEqual(execution, [(Decimal('400000.00'), Decimal('40'), Decimal('600000.00'))] * 2)
+        self.assertEqual(BudgetPrevisionnel.objects.first().montant_depense, Decimal('400000.00'))
+
+    def test_nombre_coproprietaires_annote(self):
+        """Test du nombre de copropriétaires annoté"""
+        with self.assertNumQueries(1):
+            nombres = [c.nombre_coproprietaires for c in Copropriete.objects.avec_statistiques()]
+        self.assertEqual(nombres, [3])
+
+
+class RecouvrementAnalyticsTest(TestCase):
+    """Tests de l'analyse du recouvrement sur plusieurs périodes"""
+
+    def setUp(self):
+        cache.clear()
+        self.copropriete = Copropriete.objects.create(
+            residence=make_residence(),
+            nombre_tantiemes_total=1000,
+            budget_annuel=Decimal('1200000.00'),
+            date_debut_gestion=date(2024, 1, 1),
+        )
+        for nom in ['Diop', 'Fall']:
+            Coproprietaire.objects.create(
+                tiers=make_tiers(nom, type_tiers='coproprietaire'),
+                copropriete=self.copropriete,
+                nombre_tantiemes=500,
+                date_entree=date(2024, 1, 1),
+            )
+        generer_cotisations(2025, 'Q1')
+        generer_cotisations(2025, 'Q2')
+        # Diop paie Q1 dix jours après l'échéance, Fall paie la moitié de Q1 à temps
+        self.payer('Diop', 'Q1', '150000.00', date(2025, 4, 10))
+        self.payer('Fall', 'Q1', '75000.00', date(2025, 3, 15))
+        self.aujourd_hui = date(2025, 5, 15)
+
+    def payer(self, nom, periode, montant, le):
+        cotisation = CotisationSyndic.objects.get(coproprietaire__tiers__nom=nom, periode=periode)
+        return PaiementCotisation.objects.create(
+            cotisation=cotisation, montant=Decimal(montant), mode_paiement='virement', date_paiement=le,
+        )
+
+    def test_series_cohortes_et_retards(self):
+        """Test du taux par période, des cohortes de débiteurs et des retards"""
+        analytics = RecouvrementAnalytics(aujourd_hui=self.aujourd_hui)
+        serie = analytics.series()[self.copropriete.pk]
+
+        self.assertEqual([p['libelle'] for p in serie], ['2025-Q1', '2025-Q2'])
+        self.assertEqual(serie[0]['taux_recouvrement'], 75.0)
+        self.assertEqual(serie[0]['nb_payees'], 1)
+        self.assertTrue(serie[0]['close'])
+        self.assertFalse(serie[1]['close'])
+
+        retards = {t['code']: t['nb'] for t in analytics.distribution_retards()}
+        self.assertEqual(retards, {'a_temps': 1, '1_30': 1, '31_90': 0, 'plus_90': 0})
+
+        # Fall doit 75 000 sur Q1, échu depuis 45 jours
+        cohortes = {c['code']: (c['nb_debiteurs'], c['montant']) for c in analytics.cohortes_debiteurs()}
+        self.assertEqual(cohortes['31_90'], (1, Decimal('75000.00')))
+        self.assertEqual(cohortes['0_30'], (0, Decimal('0.00')))
+
+    def test_periodes_closes_en_cache(self):
+        """Test qu'une période close est servie par le cache et invalidée par un paiement"""
+        RecouvrementAnalytics(aujourd_hui=self.aujourd_hui).series()
+
+        # Écriture directe: le cache de Q1 n'est pas invalidé
+        CotisationSyndic.objects.filter(periode='Q1').update(montant_percu=0)
+        serie = RecouvrementAnalytics(aujourd_hui=self.aujourd_hui).series()[self.copropriete.pk]
+        self.assertEqual(serie[0]['taux_recouvrement'], 75.0)
+
+        # Un paiement tardif invalide la période de sa cotisation
+        self.payer('Fall', 'Q1', '75000.00', date(2025, 5, 10))
+        serie = RecouvrementAnalytics(aujourd_hui=self.aujourd_hui).series()[self.copropriete.pk]
+        self.assertEqual(serie[0]['percu'], Decimal('75000.00'))
@@ -9,6 +9,7 @@ app_name = 'syndic'
 urlpatterns = [
     # Dashboard
     path('', views.syndic_dashboard, name='dashboard'),
+    path('recouvrement/', views.recouvrement_analytics, name='recouvrement'),
 
     # Copropriétés
     path('coproprietes/', views.copropriete_list, name='copropriete_list'),
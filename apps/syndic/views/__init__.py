@@ -1,4 +1,5 @@
 from .dashboard_views import *
+from .analytics_views import *
 from .copropriete_views import *
 from .cotisation_views import *
 from .coproprietaire_views import *
@@ -7,6 +8,7 @@ from .budget_views import *
 __all__ = [
     # Dashboard
     'syndic_dashboard',
+    'recouvrement_analytics',
 
     # Coproprietes
     'copropriete_list',
@@ -0,0 +1,40 @@
+"""
+Vues d'analyse du recouvrement syndic.
+"""
+from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from apps.syndic.models import Copropriete
+from apps.syndic.services import RecouvrementAnalytics
+
+
+@login_required
+def recouvrement_analytics(request):
+    """
+    Analyse pluriannuelle du recouvrement des cotisations.
+    Taux par période et par copropriété, cohortes de débiteurs, retards de paiement.
+    """
+    coproprietes = Copropriete.objects.select_related('residence').order_by('residence__nom')
+
+    copropriete_id = request.GET.get('copropriete')
+    selection = None
+    if copropriete_id and copropriete_id.isdigit():
+        selection = [int(copropriete_id)]
+
+    analytics = RecouvrementAnalytics(coproprietes=selection)
+    series = analytics.series()
+    noms = {c.pk: c for c in coproprietes}
+
+    context = {
+        'coproprietes': coproprietes,
+        'copropriete_filter': copropriete_id,
+        'consolidee': analytics.consolidee(),
+        'series': [
+            {'copropriete': noms[pk], 'periodes': periodes}
+            for pk, periodes in sorted(series.items(), key=lambda item: noms[item[0]].residence.nom)
+            if pk in noms
+        ],
+        'cohortes': analytics.cohortes_debiteurs(),
+        'retards': analytics.distribution_retards(),
+    }
+
+    return render(request, 'syndic/recouvrement.html', context)
@@ -4,7 +4,6 @@ Vues pour la gestion des budgets prévisionnels.
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Sum
 from apps.syndic.models import BudgetPrevisionnel, LigneBudget
 from apps.syndic.forms import BudgetPrevisionnelForm
 
@@ -12,9 +11,10 @@ from apps.syndic.forms import BudgetPrevisionnelForm
 @login_required
 def budget_list(request):
     """Liste de tous les budgets prévisionnels."""
-    budgets = BudgetPrevisionnel.objects.select_related(
+    # Exécution budgétaire annotée: une seule requête quel que soit le nombre de budgets
+    budgets = BudgetPrevisionnel.objects.avec_execution().select_related(
         'copropriete__residence'
-    ).all()
+    )
 
     # Filtres
     copropriete_id = request.GET.get('copropriete')
@@ -45,16 +45,16 @@ def budget_list(request):
 def budget_detail(request, pk):
     """Détails d'un budget prévisionnel."""
     budget = get_object_or_404(
-        BudgetPrevisionnel.objects.select_related('copropriete__residence'),
+        BudgetPrevisionnel.objects.avec_execution().select_related('copropriete__residence'),
         pk=pk
     )
 
     # Lignes de budget par catégorie
     lignes = budget.lignes.all().order_by('categorie', 'description')
 
-    # Calculs
-    total_prevu = lignes.aggregate(total=Sum('montant_prevu'))['total'] or 0
-    total_realise = lignes.aggregate(total=Sum('montant_realise'))['total'] or 0
+    # Calculs (annotés avec le budget)
+    total_prevu = budget.montant_prevu_annote
+    total_realise = budget.montant_depense
     ecart = total_prevu - total_realise
 
     context = {
@@ -11,10 +11,11 @@ from apps.syndic.forms import CoproprietaireForm
 @login_required
 def coproprietaire_list(request):
     """Liste de tous les copropriétaires."""
-    coproprietaires = Coproprietaire.objects.select_related(
+    # Impayés annotés par sous-requête (pas de requête par ligne)
+    coproprietaires = Coproprietaire.objects.avec_impayes().select_related(
         'tiers',
         'copropriete__residence'
-    ).prefetch_related('lots').all()
+    ).prefetch_related('lots')
 
     # Filtres
     copropriete_id = request.GET.get('copropriete')
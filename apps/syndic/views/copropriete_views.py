@@ -13,7 +13,7 @@ from apps.syndic.forms import CoproprieteForm
 @login_required
 def copropriete_list(request):
     """Liste de toutes les copropriétés."""
-    coproprietes = Copropriete.objects.select_related('residence').all()
+    coproprietes = Copropriete.objects.avec_statistiques().select_related('residence')
 
     context = {
         'coproprietes': coproprietes,
@@ -31,13 +31,13 @@ def copropriete_detail(request, pk):
     )
 
     # Copropriétaires
-    coproprietaires = copropriete.coproprietaires.select_related(
+    coproprietaires = copropriete.coproprietaires.avec_impayes().select_related(
         'tiers'
     ).filter(is_active=True).order_by('-quote_part')
 
     # Budget actuel
     annee_courante = timezone.now().year
-    budget_actuel = copropriete.budgets.filter(
+    budget_actuel = copropriete.budgets.avec_execution().filter(
         annee=annee_courante
     ).first()
 
@@ -5,7 +5,7 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
-from apps.syndic.models import Copropriete, CotisationSyndic
+from apps.syndic.models import Copropriete, Coproprietaire, CotisationSyndic
 from decimal import Decimal
 
 
@@ -37,14 +37,13 @@ def syndic_dashboard(request):
         periode=periode
     )
 
-    # Montants théoriques vs perçus
-    total_theorique = cotisations_periode.aggregate(
-        total=Sum('montant_theorique')
-    )['total'] or Decimal('0.00')
-
-    total_percu = cotisations_periode.aggregate(
-        total=Sum('montant_percu')
-    )['total'] or Decimal('0.00')
+    # Montants théoriques vs perçus (un seul agrégat)
+    totaux = cotisations_periode.aggregate(
+        theorique=Sum('montant_theorique'),
+        percu=Sum('montant_percu'),
+    )
+    total_theorique = totaux['theorique'] or Decimal('0.00')
+    total_percu = totaux['percu'] or Decimal('0.00')
 
     total_restant = total_theorique - total_percu
 
@@ -64,14 +63,10 @@ def syndic_dashboard(request):
         total=Sum('montant_theorique')
     )['total'] or Decimal('0.00')
 
-    # Copropriétaires avec impayés
-    coproprietaires_debiteurs = cotisations_retard.values(
-        'coproprietaire__tiers__nom',
-        'coproprietaire__tiers__prenom',
-        'coproprietaire__copropriete__residence__nom'
-    ).annotate(
-        total_impaye=Sum('montant_theorique') - Sum('montant_percu')
-    ).order_by('-total_impaye')[:10]
+    # Copropriétaires en retard (cotisations échues impayées, toutes périodes)
+    coproprietaires_debiteurs = Coproprietaire.objects.debiteurs(echues_seulement=True).filter(
+        copropriete__is_active=True
+    ).select_related('tiers', 'copropriete__residence')[:10]
 
     # Prochaines cotisations à émettre
     prochaines_cotisations = CotisationSyndic.objects.filter(
@@ -97,7 +92,7 @@ def syndic_dashboard(request):
         'coproprietaires_debiteurs': coproprietaires_debiteurs,
         'prochaines_cotisations': prochaines_cotisations,
         'budgets_annuels': budgets_annuels,
-        'coproprietes_actives': coproprietes_actives[:5],  # Top 5 pour affichage
+        'coproprietes_actives': coproprietes_actives.avec_statistiques().select_related('residence')[:5],  # Top 5 pour affichage
     }
 
     return render(request, 'syndic/dashboard.html', context)
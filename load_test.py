@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+Test de charge HTTP concurrent (pur Python: requests + threads)
+
+Rejoue des sessions typiques manager, comptable et technicien contre un
+serveur local peuplé par `python manage.py generate_demo_data`, puis affiche
+latences (p50/p90/p99), débit et erreurs par page. Sert au dimensionnement du
+nombre de workers gunicorn: lancer avec plusieurs --workers côté serveur et
+comparer le débit obtenu à concurrence égale.
+
+Usage:
+    python manage.py generate_demo_data --prefix DEMO
+    gunicorn seyni_properties.wsgi --workers 4 &
+    python load_test.py --base-url http://127.0.0.1:8000 --prefix DEMO \\
+        --users 20 --duration 60
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+# Parcours par profil: (libellé, chemin, poids)
+SESSIONS = {
+    'manager': [
+        ('dashboard', '/dashboard/', 5),
+        ('residences', '/properties/residences/', 3),
+        ('appartements', '/properties/list/', 2),
+        ('contrats', '/contracts/', 3),
+        ('tiers', '/tiers/', 2),
+        ('travaux', '/maintenance/travaux/', 4),
+        ('travaux_export', '/maintenance/export/', 1),
+    ],
+    'comptable': [
+        ('dashboard', '/dashboard/', 3),
+        ('factures', '/payments/factures/', 5),
+        ('factures_retard', '/payments/factures/?statut=en_retard', 2),
+        ('paiements', '/payments/', 5),
+        ('contrats', '/contracts/', 1),
+    ],
+    'technicien': [
+        ('mobile_dashboard', '/employees/mobile/', 4),
+        ('mobile_travaux', '/employees/mobile/travaux/', 5),
+        ('mobile_planning', '/employees/mobile/schedule/', 2),
+    ],
+}
+
+
+class Stats:
+    """Collecte thread-safe des temps de réponse par page"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, label, elapsed, ok):
+        with self.lock:
+            self.latencies[label].append(elapsed)
+            if not ok:
+                self.errors[label] += 1
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def login(base_url, username, password, timeout):
+    """Ouvre une session authentifiée (formulaire de connexion + CSRF)"""
+    session = requests.Session()
+    login_url = f'{base_url}/accounts/login/'
+    session.get(login_url, timeout=timeout)
+    response = session.post(
+        login_url,
+        data={
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': session.cookies.get('csrftoken', ''),
+        },
+        headers={'Referer': login_url},
+        timeout=timeout,
+    )
+    if 'sessionid' not in session.cookies:
+        raise RuntimeError(f'Connexion refusée pour {username} (HTTP {response.status_code})')
+    return session
+
+
+def run_user(base_url, profile, username, password, deadline, think_time, timeout, stats, seed):
+    """Boucle d'un utilisateur virtuel jusqu'à l'échéance"""
+    rng = random.Random(seed)
+    try:
+        session = login(base_url, username, password, timeout)
+    except Exception as e:
+        print(f'❌ {e}', file=sys.stderr)
+        stats.record('login', 0.0, False)
+        return
+
+    pages = SESSIONS[profile]
+    weights = [weight for _, _, weight in pages]
+
+    while time.monotonic() < deadline:
+        label, path, _ = rng.choices(pages, weights=weights)[0]
+        label = f'{profile}:{label}'
+        start = time.perf_counter()
+        try:
+            response = session.get(f'{base_url}{path}', timeout=timeout)
+            # Une redirection vers la connexion compte comme une erreur
+            ok = response.status_code == 200 and '/accounts/login' not in response.url
+        except requests.RequestException:
+            ok = False
+        stats.record(label, time.perf_counter() - start, ok)
+
+        if think_time:
+            time.sleep(rng.uniform(0, think_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test de charge HTTP concurrent')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--prefix', default='DEMO',
+                        help='Préfixe utilisé par generate_demo_data')
+    parser.add_argument('--password', default='demo12345')
+    parser.add_argument('--users', type=int, default=10,
+                        help='Utilisateurs virtuels simultanés')
+    parser.add_argument('--mix', default='2:1:4',
+                        help='Répartition manager:comptable:technicien (défaut 2:1:4)')
+    parser.add_argument('--comptables', type=int, default=2,
+                        help='Comptes comptables disponibles (--comptables de generate_demo_data)')
+    parser.add_argument('--techniciens', type=int, default=10,
+                        help='Comptes techniciens disponibles (--techniciens de generate_demo_data)')
+    parser.add_argument('--duration', type=int, default=30, help='Durée (secondes)')
+    parser.add_argument('--think-time', type=float, default=0.5,
+                        help='Pause aléatoire max entre deux pages (secondes)')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    prefix = args.prefix.lower()
+    mix = [int(part) for part in args.mix.split(':')]
+    profiles = [
+        profile
+        for profile, weight in zip(['manager', 'comptable', 'technicien'], mix)
+        for _ in range(weight)
+    ]
+
+    def account(profile, index):
+        if profile == 'manager':
+            return f'{prefix}_manager'
+        if profile == 'comptable':
+            return f'{prefix}_compta_{index % max(1, args.comptables)}'
+        return f'tech_{prefix}_{index % max(1, args.techniciens)}'
+
+    stats = Stats()
+    deadline = time.monotonic() + args.duration
+    base_url = args.base_url.rstrip('/')
+
+    print(f'🚀 {args.users} utilisateurs virtuels pendant {args.duration}s sur {base_url}')
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        for i in range(args.users):
+            profile = profiles[i % len(profiles)]
+            executor.submit(
+                run_user, base_url, profile, account(profile, i), args.password,
+                deadline, args.think_time, args.timeout, stats, args.seed + i,
+            )
+    wall = time.perf_counter() - started
+
+    total = sum(len(values) for values in stats.latencies.values())
+    total_errors = sum(stats.errors.values())
+
+    print('\n' + '=' * 86)
+    print(f"{'Page':<32}{'Req':>7}{'Err':>6}{'Moy':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'Max':>9}")
+    print('=' * 86)
+    for label in sorted(stats.latencies):
+        values = stats.latencies[label]
+        print(
+            f'{label:<32}{len(values):>7}{stats.errors[label]:>6}'
+            f'{statistics.mean(values) * 1000:>8.0f}ms'
+            f'{percentile(values, 50) * 1000:>7.0f}ms'
+            f'{percentile(values, 90) * 1000:>7.0f}ms'
+            f'{percentile(values, 99) * 1000:>7.0f}ms'
+            f'{max(values) * 1000:>7.0f}ms'
+        )
+    all_values = [v for values in stats.latencies.values() for v in values]
+    print('=' * 86)
+    print(f'📊 {total} requêtes en {wall:.1f}s → {total / wall if wall else 0:.1f} req/s')
+    print(f'   p50 {percentile(all_values, 50) * 1000:.0f}ms · '
+          f'p90 {percentile(all_values, 90) * 1000:.0f}ms · '
+          f'p99 {percentile(all_values, 99) * 1000:.0f}ms · '
+          f'erreurs {total_errors}')
+
+    return 1 if total_errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
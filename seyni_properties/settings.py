@@ -67,6 +67,14 @@ MIDDLEWARE = [
 
 CRON_CLASSES = [
     'apps.payments.cron.GenerateMonthlyInvoicesCronJob',
+    'apps.accounting.cron.GenerateLandlordStatementsCronJob',
+    'apps.payments.cron.CheckOverdueInvoicesCronJob',
+    'apps.payments.cron.SpendRollupsCronJob',
+    'apps.syndic.cron.RefreshCotisationStatutsCronJob',
+    'apps.maintenance.cron.MaterialiserTravauxRecurrentsCronJob',
+    'apps.maintenance.cron.MaintenanceRollupsCronJob',
+    'apps.employees.cron.MaterialiserTachesRecurrentesCronJob',
+    'apps.api.cron.FlushAPIUsageCronJob',
 ]
 
 ROOT_URLCONF = 'seyni_properties.urls'
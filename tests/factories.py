@@ -1 +1,108 @@
- 
+"""
+Fabriques de données pour les tests
+
+- make_* : création unitaire (passe par save(), donc par les références auto)
+- seed_portfolio : jeu de données volumineux et déterministe en bulk_create
+  (centaines de résidences, milliers de contrats, factures, paiements, travaux)
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from apps.contracts.models import RentalContract
+from apps.core.data_generator import generate_portfolio
+from apps.maintenance.models.travail import Travail
+from apps.properties.models.appartement import Appartement
+from apps.properties.models.residence import Residence
+from apps.tiers.models import Tiers
+
+User = get_user_model()
+
+DEFAULT_PASSWORD = 'testpass123'
+
+
+# ============================================================================
+# CRÉATION UNITAIRE
+# ============================================================================
+
+def make_user(username, user_type='manager', **kwargs):
+    """Crée un utilisateur (staff par défaut pour manager/comptable)"""
+    kwargs.setdefault('email', f'{username}@example.com')
+    kwargs.setdefault('is_staff', user_type in ['manager', 'accountant'])
+    return User.objects.create_user(
+        username=username,
+        password=DEFAULT_PASSWORD,
+        user_type=user_type,
+        **kwargs
+    )
+
+
+def make_tiers(nom='Diop', type_tiers='locataire', **kwargs):
+    kwargs.setdefault('prenom', 'Moussa')
+    kwargs.setdefault('telephone', '+221771234567')
+    kwargs.setdefault('email', f'{nom.lower()}@example.com')
+    kwargs.setdefault('adresse', 'Dakar')
+    return Tiers.objects.create(nom=nom, type_tiers=type_tiers, **kwargs)
+
+
+def make_residence(nom='Résidence Test', proprietaire=None, **kwargs):
+    kwargs.setdefault('adresse', '1 Rue Test')
+    kwargs.setdefault('quartier', 'Plateau')
+    return Residence.objects.create(nom=nom, proprietaire=proprietaire, **kwargs)
+
+
+def make_appartement(residence, nom='A1', **kwargs):
+    kwargs.setdefault('type_bien', 'f3')
+    kwargs.setdefault('loyer_base', Decimal('250000.00'))
+    kwargs.setdefault('depot_garantie', Decimal('500000.00'))
+    return Appartement.objects.create(residence=residence, nom=nom, **kwargs)
+
+
+def make_contract(appartement, locataire, **kwargs):
+    debut = kwargs.pop('date_debut', date.today().replace(day=1))
+    kwargs.setdefault('date_fin', debut + timedelta(days=365))
+    kwargs.setdefault('duree_mois', 12)
+    kwargs.setdefault('loyer_mensuel', appartement.loyer_base)
+    kwargs.setdefault('depot_garantie', appartement.depot_garantie)
+    kwargs.setdefault('statut', 'actif')
+    return RentalContract.objects.create(
+        appartement=appartement, locataire=locataire, date_debut=debut, **kwargs
+    )
+
+
+def make_travail(titre='Fuite salle de bain', **kwargs):
+    kwargs.setdefault('nature', 'reactif')
+    kwargs.setdefault('type_travail', 'plomberie')
+    return Travail.objects.create(titre=titre, **kwargs)
+
+
+# ============================================================================
+# JEU DE DONNÉES VOLUMINEUX
+# ============================================================================
+
+def seed_portfolio(nb_residences=200, appartements_par_residence=10, mois_historique=3,
+                   nb_proprietaires=50, nb_techniciens=10, travaux_par_residence=5,
+                   taux_occupation=0.8, seed=42):
+    """
+    Crée un portefeuille complet en bulk_create (aucun save() par ligne)
+
+    Délègue à apps.core.data_generator.generate_portfolio (même générateur
+    que la commande generate_demo_data), sans notifications.
+
+    Returns:
+        dict: utilisateurs clés et nombre d'objets créés par modèle
+    """
+    return generate_portfolio(
+        nb_residences=nb_residences,
+        appartements_par_residence=appartements_par_residence,
+        mois_historique=mois_historique,
+        nb_proprietaires=nb_proprietaires,
+        nb_techniciens=nb_techniciens,
+        travaux_par_residence=travaux_par_residence,
+        taux_occupation=taux_occupation,
+        notifications=False,
+        prefix='PERF',
+        password=DEFAULT_PASSWORD,
+        seed=seed,
+    )
@@ -0,0 +1,163 @@
+"""
+Budgets de requêtes SQL et de temps pour les vues les plus sollicitées
+
+Chaque vue est appelée sur un portefeuille volumineux (voir
+tests.factories.seed_portfolio). Le budget est un plafond absolu: une
+régression N+1 sur une page de 20 lignes le dépasse immédiatement, quelle
+que soit la taille de la base.
+
+Lancer: python manage.py test tests.test_views.test_query_budgets
+"""
+import time
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounting.models import StatementRun, StatementRunItem
+from apps.contracts.models import RentalContract
+from apps.payments.models.invoice import Invoice
+from apps.payments.models.payment import Payment
+from apps.tiers.models import Tiers
+
+from tests.factories import seed_portfolio
+
+
+class QueryBudgetTestCase(TestCase):
+    """Classe de base: portefeuille partagé + assertion de budget"""
+
+    # Plafond de temps par défaut (secondes), volontairement large pour la CI
+    max_seconds = 2.0
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portfolio()
+        cls.manager = cls.data['manager']
+        cls.technicien = cls.data['techniciens'][0]
+
+    def assertQueryBudget(self, url, max_queries, user=None, max_seconds=None,
+                          expected_status=200):
+        """
+        Vérifie qu'une requête GET reste dans son budget SQL et de temps
+
+        Le message d'échec liste les requêtes exécutées pour repérer
+        directement la requête répétée.
+        """
+        self.client.force_login(user or self.manager)
+
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = self.client.get(url)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, expected_status, url)
+
+        nb_queries = len(ctx.captured_queries)
+        if nb_queries > max_queries:
+            details = '\n'.join(
+                f"{i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, start=1)
+            )
+            self.fail(
+                f"{url}: {nb_queries} requêtes (budget {max_queries})\n{details}"
+            )
+
+        limit = max_seconds or self.max_seconds
+        self.assertLess(
+            elapsed, limit,
+            f"{url}: {elapsed:.2f}s (plafond {limit:.2f}s)"
+        )
+        return response
+
+
+class DashboardBudgetTest(QueryBudgetTestCase):
+    """Tableaux de bord"""
+
+    def test_dashboard_index(self):
+        self.assertQueryBudget(reverse('dashboard:index'), 30)
+
+
+class PaymentsBudgetTest(QueryBudgetTestCase):
+    """Paiements et factures"""
+
+    def test_payments_list(self):
+        self.assertQueryBudget(reverse('payments:list'), 15)
+
+    def test_invoices_list(self):
+        self.assertQueryBudget(reverse('payments:invoices_list'), 15)
+
+    def test_invoices_list_filtered(self):
+        url = reverse('payments:invoices_list') + '?statut=emise&type_facture=loyer'
+        self.assertQueryBudget(url, 15)
+
+
+class ContractsBudgetTest(QueryBudgetTestCase):
+    """Contrats"""
+
+    def test_contract_list(self):
+        self.assertQueryBudget(reverse('contracts:list'), 15)
+
+
+class TiersBudgetTest(QueryBudgetTestCase):
+    """Tiers"""
+
+    def test_tiers_liste(self):
+        self.assertQueryBudget(reverse('tiers:tiers_liste'), 15)
+
+
+class TravauxBudgetTest(QueryBudgetTestCase):
+    """Travaux (manager et mobile)"""
+
+    def test_travaux_list(self):
+        self.assertQueryBudget(reverse('maintenance:travail_list'), 20)
+
+    def test_travaux_export(self):
+        """L'export CSV doit rester à nombre de requêtes constant"""
+        response = self.assertQueryBudget(reverse('maintenance:travaux_export'), 6)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+    def test_mobile_work_list(self):
+        self.assertQueryBudget(
+            reverse('employees_mobile:travaux_list'), 10, user=self.technicien
+        )
+
+
+class AccountingBudgetTest(QueryBudgetTestCase):
+    """Comptabilité"""
+
+    def test_statement_runs(self):
+        """La progression des lots est lue en une requête groupée"""
+        proprietaires = list(Tiers.objects.filter(type_tiers='proprietaire')[:5])
+        for mois in range(1, 13):
+            run = StatementRun.objects.create(
+                periode_debut=date(2025, mois, 1), periode_fin=date(2025, mois, 28)
+            )
+            StatementRunItem.objects.bulk_create([
+                StatementRunItem(run=run, proprietaire=p, statut='succes') for p in proprietaires
+            ])
+        self.assertQueryBudget(reverse('accounting:statement_runs'), 8)
+
+
+class PDFBudgetTest(QueryBudgetTestCase):
+    """Génération de PDF: requêtes indépendantes du volume de la base"""
+
+    max_seconds = 5.0
+
+    def test_invoice_pdf(self):
+        invoice = Invoice.objects.filter(type_facture='loyer').first()
+        self.assertQueryBudget(
+            reverse('payments:invoice_download_pdf', args=[invoice.pk]), 12
+        )
+
+    def test_payment_receipt_pdf(self):
+        payment = Payment.objects.filter(statut='valide').first()
+        self.assertQueryBudget(
+            reverse('payments:receipt_download', args=[payment.pk]), 12
+        )
+
+    def test_contract_pdf(self):
+        contract = RentalContract.objects.filter(statut='actif').first()
+        self.assertQueryBudget(
+            reverse('contracts:download_pdf', args=[contract.pk]), 12
+        )